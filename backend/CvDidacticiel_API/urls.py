@@ -6,6 +6,9 @@ from django.conf import settings
 from django.conf.urls.static import static 
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from apps.users.avatars import serve_media
+from apps.users.views import TokenStoreLogoutView
+
 # Importations pour DRF Spectacular
 from drf_spectacular.views import (
     SpectacularAPIView,
@@ -35,6 +38,8 @@ urlpatterns = [
     # 1. Endpoints standards (Login, Logout, Password Change/Reset)
     # Logique : Utilisé pour les fonctionnalités dj-rest-auth qui ne sont pas gérées par apps.users
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    # Logique : Révocation via le stockage de jetons (Redis), avant la vue dj-rest-auth homonyme.
+    path('api/v1/auth/logout/', TokenStoreLogoutView.as_view(), name='rest_logout'),
     path('api/v1/auth/', include('dj_rest_auth.urls')),
     
     # 2. Endpoints d'Inscription/Enregistrement
@@ -48,6 +53,7 @@ urlpatterns = [
     # Logique : Toutes vos vues d'authentification personnalisées (register, me, logout, google_login) sont ici
     path('api/v1/users/', include('apps.users.urls', namespace='users')),
     path('api/v1/cvs/', include('apps.cv_app.urls', namespace='cv_app')), 
+    path('api/v1/', include('apps.common.urls', namespace='common')),
     
 ]
 
@@ -59,5 +65,5 @@ if settings.DEBUG:
         path('__debug__/', include(debug_toolbar.urls)),
     ] + urlpatterns
     
-    # 2. Fichiers Médias
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # 2. Fichiers Médias (déclinaisons d'avatar servies avec leur Cache-Control « immutable »)
+    urlpatterns += static(settings.MEDIA_URL, view=serve_media, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CommonConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.common'
+
+    def ready(self):
+        # Logique : Enregistre le collecteur des métriques du pool de connexions.
+        from . import dbpool  # noqa: F401
@@ -0,0 +1,64 @@
+# apps/common/asyncdb.py
+
+"""
+Lectures SQL parallèles pour les vues asynchrones (ASGI).
+
+L'ORM asynchrone de Django (`aget`, `acount`, `async for`) exécute toutes les
+requêtes d'une même requête HTTP dans un seul thread, donc l'une après
+l'autre. `gather_reads()` exécute des lectures indépendantes chacune dans un
+thread du pool d'exécuteurs, sur sa propre connexion (empruntée au pool
+psycopg puis rendue), et les attend ensemble :
+
+    cvs, count = await gather_reads(
+        lambda: list(page_queryset),
+        page_queryset.count,
+    )
+
+Le routage (shard, réplica) et l'échéance de la requête suivent dans chaque
+thread (contexte copié par `sync_to_async`).
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+from .deadlines import database_deadline, reset_statement_timeouts
+
+
+def _release_connections():
+    """
+    Rend au pool les connexions du thread de la requête, sauf transaction en
+    cours ; retourne True si une transaction est ouverte.
+    """
+    if any(connection.in_atomic_block for connection in connections.all(initialized_only=True)):
+        return True
+    # Logique : Sinon chaque requête en attente garderait une connexion pendant que
+    # ses lectures parallèles en réclament d'autres : pool épuisé dès que la
+    # concurrence dépasse sa taille.
+    reset_statement_timeouts()
+    connections.close_all()
+    return False
+
+
+def _run_isolated(func):
+    def wrapper():
+        try:
+            with database_deadline():
+                return func()
+        finally:
+            # Logique : Le thread de l'exécuteur est réutilisé : on rend sa connexion au pool.
+            connections.close_all()
+    return wrapper
+
+
+async def gather_reads(*funcs):
+    """
+    Exécute les callables `funcs` (lectures SQL, sans argument) en parallèle ;
+    retourne leurs résultats dans l'ordre.
+    """
+    # Logique : Dans une transaction ouverte (ex: tests), seule la connexion de la
+    # requête voit les données non validées : on reste séquentiel sur celle-ci.
+    if await sync_to_async(_release_connections)():
+        return [await sync_to_async(func)() for func in funcs]
+    return await asyncio.gather(*(sync_to_async(_run_isolated(func), thread_sensitive=False)() for func in funcs))
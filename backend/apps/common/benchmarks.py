@@ -0,0 +1,43 @@
+# apps/common/benchmarks.py
+
+"""Jeux de données synthétiques partagés par les commandes de benchmark."""
+
+import uuid
+from datetime import date
+
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+
+def create_benchmark_user(cvs=5, sections=20):
+    """Crée un compte jetable avec `cvs` CVs de `sections` expériences et compétences."""
+    from apps.cv_app import outbox
+    from apps.cv_app.models import CV, Experience, Skill
+    from apps.cv_app.sharding import get_shard_for_owner, use_shard
+
+    suffix = uuid.uuid4().hex[:10]
+    user = User.objects.create_user(
+        email=f'bench-{suffix}@example.com', username=f'bench-{suffix}', password=uuid.uuid4().hex,
+    )
+    with outbox.muted(), use_shard(get_shard_for_owner(user.pk)):
+        for index in range(cvs):
+            cv = CV.objects.create(owner=user, title=f'CV {index}')
+            Experience.objects.bulk_create(
+                Experience(cv=cv, title=f'Poste {i}', company='ACME', start_date=date(2015, 1, 1))
+                for i in range(sections)
+            )
+            Skill.objects.bulk_create(Skill(cv=cv, name=f'Compétence {i}', level=5) for i in range(sections))
+    return user
+
+
+def delete_benchmark_user(user):
+    from apps.users.purge import delete_users
+
+    delete_users([user.pk])
+
+
+def percentiles(durations, *points):
+    """Percentiles (ms) d'une liste de durées en secondes, ex: percentiles(d, 50, 99)."""
+    ordered = sorted(durations)
+    return [ordered[min(len(ordered) - 1, int(len(ordered) * point / 100))] * 1000 for point in points]
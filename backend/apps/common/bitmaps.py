@@ -0,0 +1,363 @@
+# apps/common/bitmaps.py
+
+"""
+Bitmap compressé d'entiers positifs (IDs), sur le principe des « roaring bitmaps ».
+
+L'espace des IDs est découpé en blocs de 65 536 valeurs (16 bits de poids
+fort). Chaque bloc non vide est stocké selon sa densité :
+
+    - peu dense (<= ARRAY_MAX valeurs) : tableau trié d'entiers 16 bits (2 octets par ID) ;
+    - dense : champ de 65 536 bits dans un `int` Python (8 Ko au plus), dont
+      les opérations &, |, ^ et `bit_count()` sont exécutées en C.
+
+Les opérations ensemblistes (&, |, -) et le comptage de l'intersection
+(`intersection_count`) travaillent bloc par bloc, sans jamais énumérer les IDs.
+Les résultats d'opérations sur des champs de bits restent des champs de bits
+(seuls `Bitmap(...)`, `add` et `discard` choisissent la forme la plus compacte).
+
+Un bloc n'est jamais modifié en place (`add` et `discard` le remplacent) :
+un résultat peut partager les blocs des bitmaps dont il est issu et rester
+valide pendant que ceux-ci sont mis à jour.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left
+
+CHUNK_BITS = 16
+CHUNK_SIZE = 1 << CHUNK_BITS
+LOW_MASK = CHUNK_SIZE - 1
+# Logique : Les roaring bitmaps passent au champ de bits à 4096 valeurs (point
+# d'égalité en mémoire). En Python, tout traitement d'un tableau est une boucle
+# par valeur alors que les champs de bits sont traités en C : on bascule plus
+# tôt, au prix de 4x plus de mémoire au pire pour les blocs de 1024 à 4096 valeurs.
+ARRAY_MAX = 1024
+
+
+# ====================================================================
+# 1. BLOCS (tableau trié ou champ de bits)
+# ====================================================================
+
+def _to_bits(lows):
+    buffer = bytearray(CHUNK_SIZE // 8)
+    for low in lows:
+        buffer[low >> 3] |= 1 << (low & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+def _words(bits):
+    """Le champ en 1024 mots de 64 bits (mot i : bits 64*i à 64*i + 63)."""
+    words = array('Q', bits.to_bytes(CHUNK_SIZE // 8, 'little'))
+    if sys.byteorder == 'big':
+        words.byteswap()
+    return words
+
+
+def _iter_bits(bits):
+    # Logique : Mot par mot (les mots nuls sont sautés), puis bit par bit sur un petit entier.
+    for index, word in enumerate(_words(bits)):
+        base = index << 6
+        while word:
+            lowest = word & -word
+            yield base | (lowest.bit_length() - 1)
+            word ^= lowest
+
+
+def _iter_bits_reversed(bits):
+    words = _words(bits)
+    for index in range(len(words) - 1, -1, -1):
+        word, base = words[index], index << 6
+        while word:
+            position = word.bit_length() - 1
+            yield base | position
+            word ^= 1 << position
+
+
+def _pack(lows):
+    """Bloc le plus compact pour les valeurs basses triées `lows` (None si vide)."""
+    if not lows:
+        return None
+    if len(lows) <= ARRAY_MAX:
+        return array('H', lows)
+    return _to_bits(lows)
+
+
+def _from_bits(bits):
+    if not bits:
+        return None
+    if bits.bit_count() <= ARRAY_MAX:
+        return array('H', _iter_bits(bits))
+    return bits
+
+
+def _cardinality(container):
+    if isinstance(container, int):
+        return container.bit_count()
+    return len(container)
+
+
+def _filter_by_bits(lows, bits):
+    """Valeurs de `lows` présentes dans le champ de bits `bits`."""
+    data = bits.to_bytes(CHUNK_SIZE // 8, 'little')
+    return [low for low in lows if data[low >> 3] >> (low & 7) & 1]
+
+
+def _search_all(lows, sorted_lows):
+    """Valeurs de `lows` présentes dans le tableau trié `sorted_lows` (recherche dichotomique)."""
+    found = []
+    for low in lows:
+        index = bisect_left(sorted_lows, low)
+        if index < len(sorted_lows) and sorted_lows[index] == low:
+            found.append(low)
+    return found
+
+
+def _and(left, right):
+    if isinstance(left, int) and isinstance(right, int):
+        return left & right or None
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        return _pack(_filter_by_bits(left, right))
+    if len(left) > len(right):
+        left, right = right, left
+    if len(left) * 32 < len(right):
+        return _pack(_search_all(left, right))
+    return _pack(sorted(set(left).intersection(right)))
+
+
+def _and_count(left, right):
+    if isinstance(left, int) and isinstance(right, int):
+        return (left & right).bit_count()
+    if isinstance(left, int):
+        left, right = right, left
+    if isinstance(right, int):
+        return len(_filter_by_bits(left, right))
+    if len(left) > len(right):
+        left, right = right, left
+    if len(left) * 32 < len(right):
+        return len(_search_all(left, right))
+    return len(set(left).intersection(right))
+
+
+def _or(containers):
+    arrays = [container for container in containers if not isinstance(container, int)]
+    bits = 0
+    for container in containers:
+        if isinstance(container, int):
+            bits |= container
+    if not bits and sum(len(lows) for lows in arrays) <= ARRAY_MAX:
+        merged = set()
+        for lows in arrays:
+            merged.update(lows)
+        return _pack(sorted(merged))
+    for lows in arrays:
+        bits |= _to_bits(lows)
+    return bits
+
+
+def _andnot(left, right):
+    if isinstance(left, int):
+        return left & ~(right if isinstance(right, int) else _to_bits(right)) or None
+    if isinstance(right, int):
+        data = right.to_bytes(CHUNK_SIZE // 8, 'little')
+        return _pack([low for low in left if not data[low >> 3] >> (low & 7) & 1])
+    excluded = set(right)
+    return _pack([low for low in left if low not in excluded])
+
+
+# ====================================================================
+# 2. BITMAP
+# ====================================================================
+
+class Bitmap:
+    """Ensemble compressé d'entiers de 0 à 2**63 (IDs de base de données)."""
+
+    __slots__ = ('_chunks', '_size')
+
+    def __init__(self, values=()):
+        # Logique : {bits de poids fort: bloc} ; jamais de bloc vide.
+        self._chunks = {}
+        # Logique : Cardinal mis en cache (compter les facettes interroge la taille de milliers de bitmaps).
+        self._size = None
+        grouped = {}
+        for value in values:
+            grouped.setdefault(value >> CHUNK_BITS, set()).add(value & LOW_MASK)
+        for high, lows in grouped.items():
+            self._chunks[high] = _pack(sorted(lows))
+
+    @classmethod
+    def _from_chunks(cls, chunks):
+        bitmap = cls()
+        bitmap._chunks = {high: container for high, container in chunks.items() if container is not None}
+        return bitmap
+
+    # --- Ensemble ---
+
+    def add(self, value):
+        self._size = None
+        high, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            self._chunks[high] = array('H', [low])
+        elif isinstance(container, int):
+            self._chunks[high] = container | (1 << low)
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                return
+            if len(container) < ARRAY_MAX:
+                self._chunks[high] = container[:index] + array('H', [low]) + container[index:]
+            else:
+                self._chunks[high] = _to_bits(container) | (1 << low)
+
+    def discard(self, value):
+        self._size = None
+        high, low = value >> CHUNK_BITS, value & LOW_MASK
+        container = self._chunks.get(high)
+        if container is None:
+            return
+        if isinstance(container, int):
+            container = _from_bits(container & ~(1 << low))
+        else:
+            index = bisect_left(container, low)
+            if index < len(container) and container[index] == low:
+                container = container[:index] + container[index + 1:]
+        if container:
+            self._chunks[high] = container
+        else:
+            del self._chunks[high]
+
+    def __contains__(self, value):
+        container = self._chunks.get(value >> CHUNK_BITS)
+        if container is None:
+            return False
+        low = value & LOW_MASK
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        index = bisect_left(container, low)
+        return index < len(container) and container[index] == low
+
+    def __len__(self):
+        if self._size is None:
+            self._size = sum(_cardinality(container) for container in self._chunks.values())
+        return self._size
+
+    def __bool__(self):
+        return bool(self._chunks)
+
+    def __eq__(self, other):
+        return isinstance(other, Bitmap) and list(self) == list(other)
+
+    def __repr__(self):
+        return f'<Bitmap {len(self)} valeurs, {len(self._chunks)} blocs>'
+
+    def __iter__(self):
+        for high in sorted(self._chunks):
+            container, base = self._chunks[high], high << CHUNK_BITS
+            lows = _iter_bits(container) if isinstance(container, int) else container
+            for low in lows:
+                yield base | low
+
+    def iter_reversed(self):
+        """IDs par ordre décroissant."""
+        for high in sorted(self._chunks, reverse=True):
+            container, base = self._chunks[high], high << CHUNK_BITS
+            lows = _iter_bits_reversed(container) if isinstance(container, int) else reversed(container)
+            for low in lows:
+                yield base | low
+
+    def page(self, offset, limit, reverse=False):
+        """`limit` IDs à partir du rang `offset`, en sautant les blocs entiers qui précèdent."""
+        ids = []
+        for high in sorted(self._chunks, reverse=reverse):
+            if len(ids) >= limit:
+                break
+            container = self._chunks[high]
+            size = _cardinality(container)
+            if offset >= size:
+                offset -= size
+                continue
+            single = Bitmap._from_chunks({high: container})
+            values = single.iter_reversed() if reverse else iter(single)
+            for index, value in enumerate(values):
+                if index < offset:
+                    continue
+                ids.append(value)
+                if len(ids) >= limit:
+                    break
+            offset = 0
+        return ids
+
+    # --- Opérations ---
+
+    def __and__(self, other):
+        common = self._chunks.keys() & other._chunks.keys()
+        return Bitmap._from_chunks({high: _and(self._chunks[high], other._chunks[high]) for high in common})
+
+    def __or__(self, other):
+        return Bitmap.union(self, other)
+
+    def __sub__(self, other):
+        chunks = {}
+        for high, container in self._chunks.items():
+            excluded = other._chunks.get(high)
+            chunks[high] = container if excluded is None else _andnot(container, excluded)
+        return Bitmap._from_chunks(chunks)
+
+    def isdisjoint(self, other):
+        if len(self._chunks) > len(other._chunks):
+            self, other = other, self
+        return not any(
+            _and_count(container, other._chunks[high])
+            for high, container in self._chunks.items()
+            if high in other._chunks
+        )
+
+    def intersection_count(self, other):
+        """len(self & other), sans construire l'intersection."""
+        if len(self._chunks) > len(other._chunks):
+            self, other = other, self
+        return sum(
+            _and_count(container, other._chunks[high])
+            for high, container in self._chunks.items()
+            if high in other._chunks
+        )
+
+    @classmethod
+    def union(cls, *bitmaps):
+        grouped = {}
+        for bitmap in bitmaps:
+            for high, container in bitmap._chunks.items():
+                grouped.setdefault(high, []).append(container)
+        return cls._from_chunks({
+            high: containers[0] if len(containers) == 1 else _or(containers)
+            for high, containers in grouped.items()
+        })
+
+    @classmethod
+    def intersection(cls, first, *others):
+        result = first
+        # Logique : Du plus petit au plus grand, l'intersection rétrécit au plus vite.
+        for bitmap in sorted(others, key=len):
+            if not result:
+                break
+            result = result & bitmap
+        return result if others else cls._from_chunks(dict(first._chunks))
+
+    # --- Mesure et sérialisation ---
+
+    def size_in_bytes(self):
+        """Taille approximative des blocs (hors surcoût des objets Python)."""
+        return sum(
+            (container.bit_length() + 7) // 8 if isinstance(container, int) else 2 * len(container)
+            for container in self._chunks.values()
+        )
+
+    def __getstate__(self):
+        # Logique : Jamais vide (un état vide court-circuiterait __setstate__).
+        return (self._chunks,)
+
+    def __setstate__(self, state):
+        self._chunks, self._size = state[0], None
+
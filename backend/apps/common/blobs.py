@@ -0,0 +1,390 @@
+# apps/common/blobs.py
+
+"""
+Stockage des fichiers médias adressé par contenu.
+
+`ContentAddressedStorage` enregistre chaque fichier sous l'empreinte
+SHA-256 de son contenu (`blobs/ab/cd/<sha256>.png`) : un fichier déjà
+présent n'est ni réécrit ni dupliqué, seul son nom est renvoyé. Chaque
+blob a une ligne `Blob` (taille, nombre de références).
+
+Les champs `ContentAddressedFileField` / `ContentAddressedImageField`
+(`User.avatar`, futurs artefacts) tiennent ce compteur à jour dans la
+transaction de l'enregistrement : +1 pour le nouveau fichier, -1 pour
+celui qu'il remplace ou pour l'objet supprimé. Les suppressions sans
+signaux (`fast_delete`) appellent `release_references` avant de supprimer.
+`FieldFile.delete()` ne supprime jamais un blob partagé : c'est
+`collect_garbage` (commande `gc_media_blobs`) qui supprime, par lots, les
+blobs sans référence depuis plus de `GC_GRACE_SECONDS`, après avoir
+revérifié en base qu'aucun champ ne les désigne encore.
+
+Un `QuerySet.update()` ne passe pas par les compteurs : `reconcile_references`
+(au début de chaque `gc_media_blobs`) recompte en base les blobs encore
+référencés et corrige leur compteur, dans les deux sens.
+
+Le stockage sous-jacent (`BACKEND`) est n'importe quel stockage Django :
+`FileSystemStorage` par défaut, ou un stockage S3 (django-storages, MinIO,
+etc.) en production. Les fichiers enregistrés avant ce stockage restent
+lisibles sous leur ancien nom ; `import_media_blobs` les convertit.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from datetime import timedelta
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.db.models.fields.files import FileDescriptor, ImageFileDescriptor
+from django.db.models.signals import post_delete, post_save
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MEDIA_BLOBS_SETTINGS = {
+    'BACKEND': 'django.core.files.storage.FileSystemStorage',  # stockage sous-jacent
+    'OPTIONS': {},                 # arguments du stockage sous-jacent (bucket, endpoint...)
+    'PREFIX': 'blobs',
+    'GC_GRACE_SECONDS': 24 * 3600, # délai avant suppression d'un blob sans référence
+    'GC_BATCH_SIZE': 500,          # blobs supprimés par transaction
+}
+
+
+def get_blobs_setting(name):
+    return getattr(settings, 'MEDIA_BLOBS', {}).get(name, DEFAULT_MEDIA_BLOBS_SETTINGS[name])
+
+
+def _blob_model():
+    from apps.common.models import Blob
+    return Blob
+
+
+# ====================================================================
+# 1. STOCKAGE
+# ====================================================================
+
+class ContentAddressedStorage(Storage):
+    """Écrit chaque contenu une seule fois, sous son empreinte ; délègue le reste au stockage sous-jacent."""
+
+    def __init__(self, backend=None, options=None, prefix=None):
+        self.backend = backend
+        self.options = options
+        self.prefix = prefix
+        self._inner = None
+
+    @property
+    def inner(self):
+        if self._inner is None:
+            backend = self.backend or get_blobs_setting('BACKEND')
+            self._inner = import_string(backend)(**(self.options or get_blobs_setting('OPTIONS')))
+        return self._inner
+
+    def blob_name(self, digest, extension):
+        prefix = self.prefix or get_blobs_setting('PREFIX')
+        return f'{prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}'
+
+    def get_available_name(self, name, max_length=None):
+        # Logique : Le nom définitif dépend du contenu (voir `_save`), jamais d'un suffixe aléatoire.
+        return name
+
+    def _save(self, name, content):
+        Blob = _blob_model()
+        using = router.db_for_write(Blob)
+
+        sha256, size = hashlib.sha256(), 0
+        content.seek(0)
+        for chunk in content.chunks():
+            sha256.update(chunk)
+            size += len(chunk)
+        digest = sha256.hexdigest()
+
+        # Logique : « Toucher » la ligne repousse la suppression d'un blob sans référence ; si
+        # `collect_garbage` vient de la supprimer (0 ligne), le fichier est réécrit.
+        now = timezone.now()
+        touched = Blob.objects.using(using).filter(digest=digest).update(
+            unreferenced_at=Case(When(refcount=0, then=Value(now)), default=None),
+        )
+        if touched:
+            metrics.increment('media_blobs_deduplicated_total')
+            metrics.increment('media_blobs_bytes_saved_total', size)
+            return Blob.objects.using(using).values_list('name', flat=True).get(digest=digest)
+
+        blob_name = self.blob_name(digest, os.path.splitext(name)[1])
+        if not self.inner.exists(blob_name):
+            content.seek(0)
+            self.inner.save(blob_name, content)
+        Blob.objects.using(using).bulk_create(
+            [Blob(digest=digest, name=blob_name, size=size, unreferenced_at=now)], ignore_conflicts=True,
+        )
+        metrics.increment('media_blobs_written_total')
+        return Blob.objects.using(using).values_list('name', flat=True).get(digest=digest)
+
+    def _open(self, name, mode='rb'):
+        return self.inner.open(name, mode)
+
+    def delete(self, name):
+        # Logique : Un blob peut être partagé : il n'est supprimé que par `collect_garbage`.
+        pass
+
+    def exists(self, name):
+        return self.inner.exists(name)
+
+    def size(self, name):
+        return self.inner.size(name)
+
+    def url(self, name):
+        return self.inner.url(name)
+
+    def path(self, name):
+        return self.inner.path(name)
+
+    def listdir(self, path):
+        return self.inner.listdir(path)
+
+    def get_modified_time(self, name):
+        return self.inner.get_modified_time(name)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_blob_storage():
+    """Instance partagée, utilisée comme `storage=` des champs (appelable : sérialisé tel quel dans les migrations)."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            _storage = ContentAddressedStorage()
+        return _storage
+
+
+# ====================================================================
+# 2. COMPTEURS DE RÉFÉRENCES
+# ====================================================================
+
+# Logique : (modèle, attname) de chaque champ par contenu, relus par `collect_garbage`.
+REFERENCING_FIELDS = []
+
+
+def adjust_references(added=(), removed=(), using=None):
+    """+1 pour chaque nom de `added`, -1 pour chaque nom de `removed` (noms hors `Blob` ignorés)."""
+    Blob = _blob_model()
+    blobs = Blob.objects.using(using or router.db_for_write(Blob))
+    for name in added:
+        blobs.filter(name=name).update(refcount=F('refcount') + 1, unreferenced_at=None)
+    now = timezone.now()
+    for name in removed:
+        blobs.filter(name=name, refcount__gt=0).update(
+            refcount=F('refcount') - 1,
+            unreferenced_at=Case(When(refcount=1, then=Value(now)), default=F('unreferenced_at')),
+        )
+
+
+def release_references(model, pks, using=None):
+    """-1 pour chaque fichier des lignes `pks` de `model`, avant une suppression sans signaux."""
+    using = using or router.db_for_write(model)
+    names = []
+    for field_model, attname in REFERENCING_FIELDS:
+        if issubclass(model, field_model):
+            names += [
+                name for name in
+                model._base_manager.using(using).filter(pk__in=pks).values_list(attname, flat=True)
+                if name
+            ]
+    adjust_references(removed=names)
+
+
+def _stored_name(value):
+    name = getattr(value, 'name', value)
+    return name or None
+
+
+class BlobReferenceDescriptorMixin:
+    """Retient le nom chargé de la base (première affectation) pour calculer l'écart à l'enregistrement."""
+
+    def __set__(self, instance, value):
+        instance.__dict__.setdefault(self.field.initial_key, _stored_name(value))
+        super().__set__(instance, value)
+
+
+class BlobFileDescriptor(BlobReferenceDescriptorMixin, FileDescriptor):
+    pass
+
+
+class BlobImageFileDescriptor(BlobReferenceDescriptorMixin, ImageFileDescriptor):
+    pass
+
+
+class ContentAddressedFieldMixin:
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('storage', get_blob_storage)
+        super().__init__(*args, **kwargs)
+
+    @property
+    def initial_key(self):
+        return f'_{self.attname}_blob'
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        # Logique : Ni les modèles abstraits ni les modèles historiques des migrations.
+        if cls._meta.abstract or cls._meta.apps is not global_apps:
+            return
+        REFERENCING_FIELDS.append((cls, self.attname))
+        post_save.connect(self._on_save, sender=cls, weak=False, dispatch_uid=f'blob_refs_save_{cls._meta.label}_{name}')
+        post_delete.connect(self._on_delete, sender=cls, weak=False, dispatch_uid=f'blob_refs_delete_{cls._meta.label}_{name}')
+
+    def _on_save(self, sender, instance, created, update_fields=None, using=None, **kwargs):
+        if self.attname not in instance.__dict__ or (update_fields is not None and self.attname not in update_fields):
+            return
+        current = _stored_name(instance.__dict__[self.attname])
+        previous = None if created else instance.__dict__.get(self.initial_key)
+        if current != previous:
+            adjust_references(added=[current] if current else [], removed=[previous] if previous else [])
+        instance.__dict__[self.initial_key] = current
+
+    def _on_delete(self, sender, instance, using=None, **kwargs):
+        name = _stored_name(instance.__dict__.get(self.attname))
+        if name:
+            adjust_references(removed=[name])
+
+
+class ContentAddressedFileField(ContentAddressedFieldMixin, models.FileField):
+    descriptor_class = BlobFileDescriptor
+
+
+class ContentAddressedImageField(ContentAddressedFieldMixin, models.ImageField):
+    descriptor_class = BlobImageFileDescriptor
+
+
+# ====================================================================
+# 3. NETTOYAGE (GC) ET REPRISE DE L'EXISTANT
+# ====================================================================
+
+def count_references(names):
+    """{nom: nombre de champs qui le désignent réellement en base}."""
+    counts = dict.fromkeys(names, 0)
+    for model, attname in REFERENCING_FIELDS:
+        rows = (
+            model._base_manager.using(router.db_for_read(model))
+            .filter(**{f'{attname}__in': names})
+            .values_list(attname).annotate(total=Count('pk')).order_by()
+        )
+        for name, total in rows:
+            counts[name] += total
+    return counts
+
+
+def collect_garbage(batch_size=None, grace_seconds=None):
+    """
+    Supprime par lots les blobs sans référence depuis `grace_seconds`.
+    Génère `(supprimés, octets libérés)` par lot.
+    """
+    Blob = _blob_model()
+    using = router.db_for_write(Blob)
+    batch_size = batch_size or get_blobs_setting('GC_BATCH_SIZE')
+    grace_seconds = get_blobs_setting('GC_GRACE_SECONDS') if grace_seconds is None else grace_seconds
+    inner = get_blob_storage().inner
+
+    while True:
+        cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+        with transaction.atomic(using=using):
+            # Logique : Lignes verrouillées (un envoi du même contenu attend la fin du lot, voir `_save`).
+            batch = list(
+                Blob.objects.using(using).select_for_update(skip_locked=True)
+                .filter(refcount=0, unreferenced_at__lt=cutoff)
+                .order_by('unreferenced_at').values_list('digest', 'name', 'size')[:batch_size]
+            )
+            if not batch:
+                return
+            counts = count_references([name for _, name, _ in batch])
+            for name, total in counts.items():
+                if total:
+                    # Logique : Référence posée hors des compteurs (QuerySet.update...) : on rectifie.
+                    Blob.objects.using(using).filter(name=name).update(refcount=total, unreferenced_at=None)
+                    metrics.increment('media_blobs_refcount_repaired_total')
+            garbage = [(digest, name, size) for digest, name, size in batch if not counts[name]]
+            for _, name, _ in garbage:
+                inner.delete(name)
+            Blob.objects.using(using).filter(digest__in=[digest for digest, _, _ in garbage]).delete()
+
+        freed = sum(size for _, _, size in garbage)
+        metrics.increment('media_blobs_collected_total', len(garbage))
+        metrics.increment('media_blobs_bytes_freed_total', freed)
+        yield len(garbage), freed
+
+
+def reconcile_references(batch_size=None):
+    """
+    Recompte en base les références des blobs au compteur positif et corrige
+    les écarts (références retirées hors des compteurs). Génère le nombre de
+    compteurs corrigés par lot.
+    """
+    Blob = _blob_model()
+    using = router.db_for_write(Blob)
+    batch_size = batch_size or get_blobs_setting('GC_BATCH_SIZE')
+    last_digest = ''
+
+    while True:
+        with transaction.atomic(using=using):
+            # Logique : Lignes verrouillées : un +1/-1 concurrent s'applique après la correction.
+            batch = list(
+                Blob.objects.using(using).select_for_update(skip_locked=True)
+                .filter(refcount__gt=0, digest__gt=last_digest)
+                .order_by('digest').values_list('digest', 'name', 'refcount')[:batch_size]
+            )
+            if not batch:
+                return
+            counts = count_references([name for _, name, _ in batch])
+            now = timezone.now()
+            repaired = 0
+            for digest, name, refcount in batch:
+                if counts[name] != refcount:
+                    Blob.objects.using(using).filter(digest=digest).update(
+                        refcount=counts[name], unreferenced_at=None if counts[name] else now,
+                    )
+                    repaired += 1
+        last_digest = batch[-1][0]
+        metrics.increment('media_blobs_refcount_repaired_total', repaired)
+        yield repaired
+
+
+def import_existing_files(model, attname, batch_size=500, delete=False):
+    """
+    Convertit en blobs les fichiers de `model.attname` enregistrés sous leur
+    nom d'envoi. Génère le nombre de fichiers convertis par lot.
+    """
+    storage = get_blob_storage()
+    prefix = (storage.prefix or get_blobs_setting('PREFIX')) + '/'
+    last_pk = None
+    while True:
+        rows = model._base_manager.exclude(**{attname: ''}).exclude(**{f'{attname}__isnull': True})
+        rows = rows.exclude(**{f'{attname}__startswith': prefix}).order_by('pk')
+        if last_pk is not None:
+            rows = rows.filter(pk__gt=last_pk)
+        rows = list(rows.values_list('pk', attname)[:batch_size])
+        if not rows:
+            return
+        converted = 0
+        for pk, old_name in rows:
+            if not storage.inner.exists(old_name):
+                logger.warning("Fichier introuvable, non converti : %s", old_name)
+                continue
+            with storage.inner.open(old_name, 'rb') as content:
+                new_name = storage.save(old_name, content)
+            with transaction.atomic(using=router.db_for_write(model)):
+                updated = model._base_manager.filter(pk=pk, **{attname: old_name}).update(**{attname: new_name})
+                if updated:
+                    adjust_references(added=[new_name])
+            converted += updated
+            if updated and delete:
+                storage.inner.delete(old_name)
+        last_pk = rows[-1][0]
+        yield converted
@@ -0,0 +1,293 @@
+# apps/common/cache.py
+
+"""
+Backends de cache Redis (django_redis).
+
+`DeadlineRedisCache` respecte l'échéance de la requête courante (voir
+apps/common/deadlines.py) : une opération lancée après l'échéance lève
+`DeadlineExceeded` au lieu d'attendre Redis. Le temps d'attente de chaque
+opération reste borné par `SOCKET_TIMEOUT` (settings).
+
+`ResilientRedisCache` y ajoute, pour qu'une panne ou un ralentissement de
+Redis ne transforme pas chaque lecture de cache en échec lent :
+  - des timeouts par type d'opération (`OPERATION_TIMEOUTS` : lectures,
+    écritures, scripts), sur des connexions dédiées ;
+  - un disjoncteur (`CircuitBreaker`) : après `FAILURE_THRESHOLD` erreurs de
+    connexion consécutives, Redis n'est plus appelé pendant `RESET_TIMEOUT`
+    secondes ; une seule requête sonde ensuite Redis (semi-ouvert) et
+    referme le disjoncteur si elle réussit ;
+  - un cache de repli en mémoire du processus, borné (`FALLBACK_MAX_ENTRIES`,
+    `FALLBACK_TIMEOUT`), qui sert les opérations standard pendant la panne.
+    Il est vidé au retour de Redis : ses valeurs ne sont pas recopiées.
+
+Les opérations propres à Redis (`delete_pattern`, `lock`...) lèvent
+`CircuitOpen` (une `redis.exceptions.ConnectionError`) tant que le
+disjoncteur est ouvert.
+
+Le repli ne convient pas aux appelants dont le cache est la source de
+vérité (liste noire des jetons, verrous d'idempotence) : une valeur propre
+au processus y serait fausse. Dans un bloc `without_fallback()`, toute
+opération lève `CircuitOpen` au lieu d'être servie par le repli, et
+l'appelant échoue de façon sûre.
+"""
+
+import functools
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+from django_redis.exceptions import ConnectionInterrupted
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from . import metrics
+from .deadlines import DeadlineExceeded, check_deadline
+
+logger = logging.getLogger(__name__)
+
+# Opérations de django_redis soumises à l'échéance.
+DEADLINE_OPERATIONS = (
+    'get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many',
+    'delete_pattern', 'incr', 'decr', 'has_key', 'keys', 'ttl', 'expire',
+    'persist', 'touch', 'lock',
+)
+
+
+def _with_deadline(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        check_deadline('cache')
+        return method(self, *args, **kwargs)
+    return wrapper
+
+
+class DeadlineRedisCache(RedisCache):
+    pass
+
+
+for _name in DEADLINE_OPERATIONS:
+    setattr(DeadlineRedisCache, _name, _with_deadline(getattr(RedisCache, _name)))
+
+
+# ====================================================================
+# 1. DISJONCTEUR
+# ====================================================================
+
+DEFAULT_CACHE_RESILIENCE_SETTINGS = {
+    'FAILURE_THRESHOLD': 3,        # erreurs consécutives avant ouverture
+    'RESET_TIMEOUT': 5,            # secondes d'ouverture avant la sonde
+    'OPERATION_TIMEOUTS': {'read': 0.1, 'write': 0.2, 'script': 0.1},  # secondes
+    'FALLBACK_MAX_ENTRIES': 10000,
+    'FALLBACK_TIMEOUT': 60,        # durée de vie max. (s) d'une valeur de repli
+}
+
+# Erreurs qui comptent comme une indisponibilité (et non une erreur de commande).
+UNAVAILABLE_ERRORS = (ConnectionInterrupted, RedisConnectionError, RedisTimeoutError, socket.timeout, ConnectionError)
+
+
+def get_cache_resilience_setting(name):
+    return getattr(settings, 'CACHE_RESILIENCE', {}).get(name, DEFAULT_CACHE_RESILIENCE_SETTINGS[name])
+
+
+class CircuitOpen(RedisConnectionError):
+    """Redis n'est pas appelé : le disjoncteur est ouvert."""
+
+
+class CircuitBreaker:
+    """Fermé -> ouvert après `failure_threshold` échecs -> semi-ouvert (une sonde) après `reset_timeout`."""
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name, failure_threshold=None, reset_timeout=None, on_close=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or get_cache_resilience_setting('FAILURE_THRESHOLD')
+        self.reset_timeout = get_cache_resilience_setting('RESET_TIMEOUT') if reset_timeout is None else reset_timeout
+        self.on_close = on_close
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def allow(self):
+        """Vrai si l'appel peut être tenté (fermé, ou sonde du mode semi-ouvert)."""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def cancel_probe(self):
+        with self.lock:
+            self.probing = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            if self.state == self.CLOSED:
+                return
+            self.probing = False
+            self._set_state(self.CLOSED)
+        metrics.increment('cache_circuit_recoveries_total', cache=self.name)
+        logger.info("Cache %s : Redis de nouveau disponible, disjoncteur refermé.", self.name)
+        if self.on_close is not None:
+            self.on_close()
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == self.OPEN:
+                return
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self._set_state(self.OPEN)
+                tripped = True
+            else:
+                tripped = False
+        if tripped:
+            metrics.increment('cache_circuit_trips_total', cache=self.name)
+            logger.warning("Cache %s : Redis indisponible, disjoncteur ouvert.", self.name)
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge('cache_circuit_state', self.STATE_VALUES[state], cache=self.name)
+
+
+# ====================================================================
+# 2. BACKEND RÉSILIENT
+# ====================================================================
+
+# Opération -> classe de timeout ; opérations servies par le cache de repli.
+OPERATION_CLASSES = {
+    'get': 'read', 'get_many': 'read', 'has_key': 'read', 'ttl': 'read',
+    'set': 'write', 'add': 'write', 'delete': 'write', 'set_many': 'write',
+    'delete_many': 'write', 'incr': 'write', 'decr': 'write', 'touch': 'write',
+}
+FALLBACK_OPERATIONS = (
+    'get', 'set', 'add', 'delete', 'get_many', 'set_many', 'delete_many', 'incr', 'decr', 'has_key', 'touch',
+)
+RESILIENT_OPERATIONS = DEADLINE_OPERATIONS
+
+
+_fallback_disabled = ContextVar('cache_fallback_disabled', default=False)
+
+
+@contextmanager
+def without_fallback():
+    """Opérations du bloc sans repli local : `CircuitOpen` si Redis est indisponible."""
+    token = _fallback_disabled.set(True)
+    try:
+        yield
+    finally:
+        _fallback_disabled.reset(token)
+
+
+# Logique : Django crée une instance de backend par thread (et par contexte en ASGI) :
+# disjoncteur, repli et connexions dédiées sont partagés par tout le processus.
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+class _SharedResilience:
+
+    def __init__(self, alias):
+        self.fallback = LocMemCache(f'resilient-fallback-{alias}', {
+            'TIMEOUT': get_cache_resilience_setting('FALLBACK_TIMEOUT'),
+            'OPTIONS': {'MAX_ENTRIES': get_cache_resilience_setting('FALLBACK_MAX_ENTRIES')},
+        })
+        self.circuit = CircuitBreaker(alias, on_close=self.fallback.clear)
+        self.clients = {}
+
+
+class ResilientRedisCache(DeadlineRedisCache):
+    """`DeadlineRedisCache` avec timeouts par opération, disjoncteur et repli local (voir docstring du module)."""
+
+    def __init__(self, server, params):
+        super().__init__(server, params)
+        # Logique : Nom dans les métriques (l'URL, qui peut contenir un mot de passe, n'y figure pas).
+        self.alias = str(params.get('ALIAS', 'default'))
+        with _shared_lock:
+            self._shared = _shared.setdefault((self.alias, str(server)), _SharedResilience(self.alias))
+
+    @property
+    def circuit(self):
+        return self._shared.circuit
+
+    @property
+    def fallback(self):
+        return self._shared.fallback
+
+    def get_operation_client(self, operation_class):
+        """Client Redis dont le timeout est celui de `operation_class` ('read', 'write', 'script')."""
+        clients = self._shared.clients
+        with _shared_lock:
+            if operation_class not in clients:
+                factory = self.client.connection_factory
+                # Logique : Serveur principal (écritures) de la liste de django_redis.
+                params = factory.make_connection_params(self.client._server[0])
+                params['socket_timeout'] = get_cache_resilience_setting('OPERATION_TIMEOUTS')[operation_class]
+                # Logique : Pool dédié (`get_connection_pool` ne partage pas le pool par URL).
+                clients[operation_class] = factory.redis_client_cls(
+                    connection_pool=factory.get_connection_pool(params), **factory.redis_client_cls_kwargs,
+                )
+            return clients[operation_class]
+
+    def _call_fallback(self, name, args, kwargs):
+        if name not in FALLBACK_OPERATIONS or _fallback_disabled.get():
+            raise CircuitOpen(f"Cache {self.alias} indisponible (disjoncteur ouvert).")
+        kwargs = {key: value for key, value in kwargs.items() if key not in ('client', 'nx', 'xx')}
+        if name in ('set', 'add', 'set_many'):
+            # Logique : Valeurs de repli à durée de vie courte (aucune invalidation entre processus).
+            position = 1 if name == 'set_many' else 2
+            timeout = args[position] if len(args) > position else kwargs.pop('timeout', DEFAULT_TIMEOUT)
+            if len(args) > position + 1:
+                kwargs['version'] = args[position + 1]
+            args = args[:position]
+            limit = get_cache_resilience_setting('FALLBACK_TIMEOUT')
+            kwargs['timeout'] = limit if timeout in (DEFAULT_TIMEOUT, None) else min(timeout, limit)
+        return getattr(self.fallback, name)(*args, **kwargs)
+
+
+def _resilient(name, method):
+    operation_class = OPERATION_CLASSES.get(name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.circuit.allow():
+            metrics.increment('cache_fallback_total', cache=self.alias, operation=name, reason='open')
+            return self._call_fallback(name, args, kwargs)
+        try:
+            if operation_class is not None and len(self.client._server) == 1:
+                kwargs.setdefault('client', self.get_operation_client(operation_class))
+            result = method(self, *args, **kwargs)
+        except DeadlineExceeded:
+            # Logique : Redis n'a pas été appelé : ni succès ni échec.
+            self.circuit.cancel_probe()
+            raise
+        except UNAVAILABLE_ERRORS:
+            self.circuit.record_failure()
+            metrics.increment('cache_fallback_total', cache=self.alias, operation=name, reason='error')
+            return self._call_fallback(name, args, kwargs)
+        except Exception:
+            # Logique : Erreur de commande (ResponseError...) : Redis a répondu.
+            self.circuit.record_success()
+            raise
+        self.circuit.record_success()
+        return result
+    return wrapper
+
+
+for _name in RESILIENT_OPERATIONS:
+    setattr(ResilientRedisCache, _name, _resilient(_name, getattr(DeadlineRedisCache, _name)))
@@ -0,0 +1,279 @@
+# apps/common/concurrency.py
+
+"""
+Limite de concurrence adaptative et délestage (load shedding) par processus.
+
+Quand PostgreSQL ralentit, chaque worker continuait d'accepter des
+requêtes : elles s'empilaient et la latence de toutes explosait.
+`AdaptiveConcurrencyMiddleware` compte les requêtes en cours du processus
+et les compare à une limite ajustée en continu :
+
+  - à la manière de TCP Vegas, d'après la latence de chaque route (vue et
+    action) comparée à sa propre latence minimale récente (« à vide ») :
+    si la file estimée `limite x (1 - min / latence)` dépasse `BETA`, la
+    limite baisse d'une unité ; sous `ALPHA`, elle monte d'une unité
+    (seulement si la limite actuelle est réellement utilisée). Une référence
+    par route : un mélange d'endpoints rapides et lents n'est pas pris pour
+    de la file d'attente ;
+  - à la manière d'AIMD, une surcharge en aval divise la limite par
+    `BACKOFF` : réponse 504, échéance dépassée ou requête SQL annulée par
+    `statement_timeout`, ou réponse marquée par `mark_overloaded(response)`.
+    Les autres 503 (migration de shard, Redis indisponible, etc.) ne
+    disent rien de la charge et sont ignorés.
+
+Au-delà de sa part de la limite, une requête est refusée immédiatement
+(503 + `Retry-After`), avant tout travail. Les parts donnent la priorité
+aux lectures authentifiées, peu coûteuses ; le jeton (en-tête ou cookie)
+est vérifié (signature, expiration, sans accès base ni cache) : un en-tête
+quelconque ne donne pas la classe `read`.
+
+    read   GET/HEAD/OPTIONS avec un jeton d'accès valide        100 %
+    anon   GET/HEAD/OPTIONS sans jeton valide                    80 %
+    write  autres méthodes                                       60 %
+    heavy  déclarées coûteuses par la vue                        40 %
+
+Déclaration (même principe que `latency_budget(s)`) :
+
+    class UserProvisioningView(...):
+        load_class = 'heavy'
+    class CVViewSet(...):
+        load_classes = {'search': 'heavy'}
+
+État exporté (GET /api/v1/metrics/) : `concurrency_limit`,
+`concurrency_in_flight`, `concurrency_min_latency_seconds{route}`,
+`requests_shed_total{route_class}`, `request_latency_seconds{route_class}`.
+"""
+
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from . import metrics
+
+DEFAULT_ADAPTIVE_CONCURRENCY_SETTINGS = {
+    'ENABLED': True,
+    'INITIAL_LIMIT': 20,       # requêtes simultanées par processus
+    'MIN_LIMIT': 4,
+    'MAX_LIMIT': 200,
+    'ALPHA': 2,                # file estimée sous laquelle la limite monte
+    'BETA': 6,                 # file estimée au-delà de laquelle la limite baisse
+    'BACKOFF': 0.7,            # facteur appliqué sur surcharge en aval
+    'SMOOTHING': 0.2,          # poids d'un échantillon dans la latence lissée
+    'MIN_LATENCY_WINDOW': 30,  # secondes de mémoire de la latence minimale
+    'SHARES': {'read': 1.0, 'anon': 0.8, 'write': 0.6, 'heavy': 0.4},
+    'RETRY_AFTER': 1,          # secondes
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def get_concurrency_setting(name):
+    return getattr(settings, 'ADAPTIVE_CONCURRENCY', {}).get(name, DEFAULT_ADAPTIVE_CONCURRENCY_SETTINGS[name])
+
+
+# ====================================================================
+# 1. LIMITE ADAPTATIVE
+# ====================================================================
+
+class _MinLatency:
+    """Minimum glissant sur deux fenêtres : l'ancienne est oubliée à chaque rotation."""
+
+    def __init__(self):
+        self.current = self.previous = math.inf
+        self.rotated_at = time.monotonic()
+
+    def update(self, latency, now):
+        if now - self.rotated_at >= get_concurrency_setting('MIN_LATENCY_WINDOW'):
+            self.previous, self.current, self.rotated_at = self.current, math.inf, now
+        self.current = min(self.current, latency)
+        return min(self.current, self.previous)
+
+
+class AdaptiveLimiter:
+    """Requêtes en cours et limite du processus (voir docstring du module)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.limit = float(get_concurrency_setting('INITIAL_LIMIT'))
+        self.in_flight = 0
+        self.min_latency = {}   # route -> _MinLatency
+        self.latency = {}       # route -> latence lissée (s)
+
+    def try_acquire(self, route_class):
+        share = get_concurrency_setting('SHARES').get(route_class, 1.0)
+        with self.lock:
+            if self.in_flight >= max(int(self.limit * share), 1):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, route, latency, overloaded=False):
+        now = time.monotonic()
+        with self.lock:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            if overloaded:
+                self.limit *= get_concurrency_setting('BACKOFF')
+            else:
+                self._vegas(route, latency, in_flight, now)
+            self.limit = min(
+                max(self.limit, get_concurrency_setting('MIN_LIMIT')), get_concurrency_setting('MAX_LIMIT'),
+            )
+
+    def _vegas(self, route, latency, in_flight, now):
+        min_latency = self.min_latency.setdefault(route, _MinLatency()).update(latency, now)
+        smoothing = get_concurrency_setting('SMOOTHING')
+        smoothed = self.latency.get(route, latency) * (1 - smoothing) + latency * smoothing
+        self.latency[route] = smoothed
+        queue = self.limit * (1 - min_latency / smoothed) if smoothed > 0 else 0
+        if queue > get_concurrency_setting('BETA'):
+            self.limit -= 1
+        elif queue < get_concurrency_setting('ALPHA') and in_flight * 2 >= self.limit:
+            # Logique : Sans charge, la latence ne dit rien de la limite : on ne l'augmente pas.
+            self.limit += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'min_latency': {
+                    route: min(window.current, window.previous) for route, window in self.min_latency.items()
+                },
+            }
+
+
+limiter = AdaptiveLimiter()
+
+
+@metrics.register_collector
+def collect_concurrency_metrics():
+    state = limiter.snapshot()
+    metrics.set_gauge('concurrency_limit', state['limit'])
+    metrics.set_gauge('concurrency_in_flight', state['in_flight'])
+    for route, latency in state['min_latency'].items():
+        if latency != math.inf:
+            metrics.set_gauge('concurrency_min_latency_seconds', round(latency, 4), route=route)
+
+
+# ====================================================================
+# 2. MIDDLEWARE
+# ====================================================================
+
+def get_route_class(request, view_func):
+    """Classe déclarée par la vue (`load_class(es)`), sinon déduite de la méthode et des identifiants."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    declared = getattr(view_func, 'load_class', None)
+    if declared is None and view_class is not None:
+        action = getattr(view_func, 'actions', {}).get(request.method.lower())
+        declared = getattr(view_class, 'load_classes', {}).get(action) or getattr(view_class, 'load_class', None)
+    if declared is not None:
+        return declared
+    if request.method not in SAFE_METHODS:
+        return 'write'
+    return 'read' if has_valid_access_token(request) else 'anon'
+
+
+def get_route(request, view_func):
+    """Route de la requête (vue, et action pour un ViewSet) : clé des latences de référence."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    action = getattr(view_func, 'actions', {}).get(request.method.lower())
+    name = (view_class or view_func).__name__
+    return f'{name}.{action}' if action else f'{name}.{request.method.lower()}'
+
+
+def mark_overloaded(response):
+    """Signale au limiteur une réponse due à une surcharge en aval (voir docstring du module)."""
+    response.overloaded = True
+    return response
+
+
+def has_valid_access_token(request):
+    """Vrai si l'en-tête `Authorization` ou le cookie JWT porte un jeton d'accès signé et non expiré."""
+    authentication = JWTAuthentication()
+    try:
+        header = authentication.get_header(request)
+        raw_token = authentication.get_raw_token(header) if header is not None else None
+        if raw_token is None:
+            raw_token = request.COOKIES.get(getattr(settings, 'JWT_COOKIE_NAME', None))
+        if not raw_token:
+            return False
+        # Logique : Signature et expiration seulement ; la révocation est vérifiée par l'authentification.
+        authentication.get_validated_token(raw_token)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return True
+
+
+def overloaded_response():
+    response = JsonResponse(
+        {
+            'detail': "Le serveur est momentanément surchargé. Réessayez dans quelques instants.",
+            'code': 'overloaded',
+        },
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response['Retry-After'] = str(get_concurrency_setting('RETRY_AFTER'))
+    return response
+
+
+class AdaptiveConcurrencyMiddleware:
+    """Admet ou déleste chaque requête selon la limite adaptative (voir docstring du module)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._release(request, response)
+
+    async def __acall__(self, request):
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._release(request, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not get_concurrency_setting('ENABLED'):
+            return None
+        route_class = get_route_class(request, view_func)
+        if not limiter.try_acquire(route_class):
+            metrics.increment('requests_shed_total', route_class=route_class)
+            return overloaded_response()
+        request._concurrency_slot = (route_class, get_route(request, view_func), time.monotonic())
+        return None
+
+    def _release(self, request, response):
+        slot = getattr(request, '_concurrency_slot', None)
+        if slot is None:
+            return
+        del request._concurrency_slot
+        route_class, route, started = slot
+        latency = time.monotonic() - started
+        # Logique : Seule une surcharge avérée réduit la limite ; un 503 métier (shard
+        # en migration, Redis indisponible) ou nos propres refus ne disent rien de la charge.
+        overloaded = response is not None and (
+            response.status_code == status.HTTP_504_GATEWAY_TIMEOUT or getattr(response, 'overloaded', False)
+        )
+        limiter.release(route, latency, overloaded=overloaded)
+        metrics.observe('request_latency_seconds', latency, route_class=route_class)
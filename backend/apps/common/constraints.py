@@ -0,0 +1,96 @@
+# apps/common/constraints.py
+
+"""
+Validation d'unicité confiée aux contraintes de la base.
+
+Les validateurs d'unicité de DRF (`UniqueValidator`, `UniqueTogetherValidator`)
+émettent un SELECT avant chaque écriture, sans pour autant empêcher deux
+requêtes concurrentes d'insérer le même doublon. `ConstraintValidationMixin`
+les retire : l'écriture part directement et l'`IntegrityError` de la
+contrainte violée devient la même réponse 400, attachée au champ concerné.
+
+    class SkillSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
+        ...
+"""
+
+import re
+
+from django.db import IntegrityError, connections, router, transaction
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueTogetherValidator, UniqueValidator
+
+# Logique : Détail PostgreSQL « Key (cv_id, name)=(1, Python) already exists. »
+# et message SQLite « UNIQUE constraint failed: cv_app_skill.cv_id, cv_app_skill.name ».
+_POSTGRESQL_KEY = re.compile(r'Key \((?P<columns>[^)]*)\)=')
+_SQLITE_UNIQUE = re.compile(r'UNIQUE constraint failed: (?P<columns>.+)$')
+
+
+def get_violated_columns(exc):
+    """Colonnes de la contrainte d'unicité violée par `exc` (IntegrityError), ou None."""
+    diag = getattr(exc.__cause__, 'diag', None)
+    if diag is not None:
+        match = _POSTGRESQL_KEY.match(diag.message_detail or '')
+        if getattr(exc.__cause__, 'sqlstate', None) == '23505' and match:
+            return {column.strip().strip('"') for column in match['columns'].split(',')}
+        return None
+    match = _SQLITE_UNIQUE.search(str(exc))
+    if match:
+        return {column.strip().rsplit('.', 1)[-1] for column in match['columns'].split(',')}
+    return None
+
+
+def get_unique_check(model, columns):
+    """Noms des champs de la contrainte d'unicité de `model` portant sur `columns`, ou None."""
+    unique_checks, _date_checks = model()._get_unique_checks(include_meta_constraints=True)
+    for model_class, field_names in unique_checks:
+        if {model_class._meta.get_field(name).column for name in field_names} == columns:
+            return model_class, field_names
+    return None
+
+
+class ConstraintValidationMixin:
+    """
+    Mixin pour les ModelSerializer : unicité vérifiée par la base au moment
+    de l'écriture (aucun SELECT préalable). L'erreur est rattachée au dernier
+    champ de la contrainte exposé en écriture, sinon à `non_field_errors`.
+    """
+
+    def get_validators(self):
+        return [
+            validator for validator in super().get_validators()
+            if not isinstance(validator, UniqueTogetherValidator)
+        ]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+        return fields
+
+    def save(self, **kwargs):
+        try:
+            return super().save(**kwargs)
+        except IntegrityError as exc:
+            errors = self.get_constraint_errors(exc)
+            if errors is None:
+                raise
+            # Logique : Sous PostgreSQL la transaction est interrompue : la transaction
+            # de requête (voir apps/common/transactions.py) doit être annulée, pas validée.
+            using = router.db_for_write(self.Meta.model, instance=self.instance)
+            if connections[using].in_atomic_block:
+                transaction.set_rollback(True, using=using)
+            raise ValidationError(errors) from exc
+
+    def get_constraint_errors(self, exc):
+        """Erreurs de validation correspondant à `exc`, ou None si ce n'est pas une contrainte d'unicité du modèle."""
+        model = self.Meta.model
+        columns = get_violated_columns(exc)
+        unique_check = get_unique_check(model, columns) if columns else None
+        if unique_check is None:
+            return None
+
+        model_class, field_names = unique_check
+        message = model().unique_error_message(model_class, field_names).messages
+        writable = [name for name in field_names if name in self.fields and not self.fields[name].read_only]
+        return {writable[-1] if writable else api_settings.NON_FIELD_ERRORS_KEY: message}
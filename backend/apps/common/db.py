@@ -0,0 +1,148 @@
+# apps/common/db.py
+
+"""
+Suppressions rapides s'appuyant sur les clés étrangères `ON DELETE` de PostgreSQL.
+
+Django 5.2 ne sait déclarer `on_delete` qu'en Python : le Collector charge
+chaque ligne liée avant de la supprimer. Les migrations utilisant
+`DatabaseOnDelete` posent en plus la règle côté base, ce qui permet à
+`fast_delete()` d'émettre un seul `DELETE` et de laisser PostgreSQL
+propager la cascade.
+
+Les contraintes sont recréées `NOT VALID` (verrou ACCESS EXCLUSIVE bref, sans
+parcours de la table) ; `ValidateForeignKeys`, dans une migration suivante
+(donc une autre transaction), les valide sous un simple verrou
+SHARE UPDATE EXCLUSIVE, sans bloquer lectures ni écritures.
+
+ATTENTION : Un `AlterField` ultérieur sur l'un de ces champs recrée la
+contrainte sans `ON DELETE` ; il faut alors relancer `DatabaseOnDelete`.
+"""
+
+from django.db import connections, migrations
+
+
+def supports_db_on_delete(using='default'):
+    """Les règles ON DELETE ne sont posées que sur PostgreSQL."""
+    return connections[using].vendor == 'postgresql'
+
+
+def _get_foreign_keys(schema_editor, table, column):
+    """{nom de contrainte: (table référencée, colonne référencée)} des clés étrangères de `table.column`."""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        name: constraint['foreign_key'] for name, constraint in constraints.items()
+        if constraint['foreign_key'] and constraint['columns'] == [column]
+    }
+
+
+def _set_fk_on_delete(schema_editor, table, column, rule):
+    quote = schema_editor.quote_name
+    for name, (ref_table, ref_column) in _get_foreign_keys(schema_editor, table, column).items():
+        on_delete = f' ON DELETE {rule}' if rule else ''
+        # Logique : NOT VALID : les lignes existantes sont vérifiées par `ValidateForeignKeys`.
+        schema_editor.execute(
+            f'ALTER TABLE {quote(table)} DROP CONSTRAINT {quote(name)}, '
+            f'ADD CONSTRAINT {quote(name)} FOREIGN KEY ({quote(column)}) '
+            f'REFERENCES {quote(ref_table)} ({quote(ref_column)}){on_delete} '
+            f'DEFERRABLE INITIALLY DEFERRED NOT VALID'
+        )
+
+
+def _validate_fk(schema_editor, table, column):
+    quote = schema_editor.quote_name
+    for name in _get_foreign_keys(schema_editor, table, column):
+        schema_editor.execute(f'ALTER TABLE {quote(table)} VALIDATE CONSTRAINT {quote(name)}')
+
+
+class DatabaseOnDelete(migrations.RunPython):
+    """
+    Opération de migration posant `ON DELETE <règle>` sur des clés étrangères existantes.
+    `foreign_keys` : liste de (table, colonne, règle), ex: ('cv_app_skill', 'cv_id', 'CASCADE').
+    Sans effet hors PostgreSQL.
+    """
+
+    def __init__(self, foreign_keys):
+        self.foreign_keys = foreign_keys
+        super().__init__(self.apply, self.revert)
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.foreign_keys], {})
+
+    def apply(self, apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for table, column, rule in self.foreign_keys:
+            _set_fk_on_delete(schema_editor, table, column, rule)
+
+    def revert(self, apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for table, column, _rule in self.foreign_keys:
+            _set_fk_on_delete(schema_editor, table, column, None)
+            _validate_fk(schema_editor, table, column)
+
+
+class ValidateForeignKeys(migrations.RunPython):
+    """
+    Opération de migration validant les clés étrangères posées `NOT VALID` par
+    `DatabaseOnDelete`. À placer dans une migration distincte : la validation
+    parcourt la table sans bloquer les écritures, mais seulement une fois la
+    transaction de `DatabaseOnDelete` (et son verrou exclusif) terminée.
+    `foreign_keys` : liste de (table, colonne). Sans effet hors PostgreSQL.
+    """
+
+    def __init__(self, foreign_keys):
+        self.foreign_keys = foreign_keys
+        super().__init__(self.apply, migrations.RunPython.noop)
+
+    def deconstruct(self):
+        return (self.__class__.__name__, [self.foreign_keys], {})
+
+    def apply(self, apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for table, column in self.foreign_keys:
+            _validate_fk(schema_editor, table, column)
+
+
+def fast_delete(model, pks, using='default'):
+    """
+    Supprime les lignes `pks` de `model` en un seul `DELETE`, la base se
+    chargeant des tables liées. Aucun signal n'est émis : à réserver aux
+    modèles dont les suppressions n'ont pas besoin de signaux (ou qui
+    publient eux-mêmes leurs événements).
+    Hors PostgreSQL, repli sur le Collector Django.
+    Retourne le nombre de lignes supprimées dans la table de `model`.
+    """
+    pks = list(pks)
+    if not pks:
+        return 0
+    if not supports_db_on_delete(using):
+        deleted = model._base_manager.using(using).filter(pk__in=pks).delete()[1]
+        return deleted.get(model._meta.label, 0)
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} WHERE {quote(model._meta.pk.column)} = ANY(%s)',
+            [pks],
+        )
+        return cursor.rowcount
+
+
+class PostgreSQLOnlySQL(migrations.RunSQL):
+    """
+    `RunSQL` exécuté seulement sur PostgreSQL (index GIN, index d'expression...),
+    sans effet sur les autres moteurs (ex: SQLite des tests).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
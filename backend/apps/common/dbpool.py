@@ -0,0 +1,69 @@
+# apps/common/dbpool.py
+
+"""
+Pool de connexions psycopg3 (OPTIONS['pool'] de Django 5.1+) : options
+communes, ouverture anticipée et métriques.
+
+Chaque base PostgreSQL reçoit un pool par processus, borné par
+`DATABASE_POOL_MIN_SIZE`/`DATABASE_POOL_MAX_SIZE` ; une connexion est
+vérifiée (`SELECT 1`) avant d'être prêtée. Django rend la connexion au pool
+à la fin de chaque requête, en WSGI comme en ASGI, d'où `CONN_MAX_AGE = 0`.
+"""
+
+import logging
+
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def get_pooled_aliases():
+    return [alias for alias in connections if connections[alias].settings_dict['OPTIONS'].get('pool')]
+
+
+def open_connection_pools(wait=False, timeout=30.0):
+    """
+    Ouvre les pools au démarrage du processus (plutôt qu'à la première requête).
+    À appeler après le fork des workers, jamais avant : c'est le rôle du hook
+    `post_worker_init` de backend/gunicorn.conf.py.
+    """
+    for alias in get_pooled_aliases():
+        pool = connections[alias].pool
+        pool.open(wait=wait, timeout=timeout)
+        logger.info(f"Pool de connexions « {alias} » ouvert ({pool.min_size}-{pool.max_size}).")
+
+
+def get_pool_stats(alias):
+    """Statistiques psycopg_pool de la base `alias` (None sans pool ou pool fermé)."""
+    if alias not in get_pooled_aliases():
+        return None
+    pool = connections[alias].pool
+    if pool.closed:
+        return None
+    stats = pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    stats['connections_in_use'] = size - available
+    stats['occupancy'] = (size - available) / pool.max_size if pool.max_size else 0
+    requests = stats.get('requests_num', 0)
+    stats['requests_wait_ms_avg'] = stats.get('requests_wait_ms', 0) / requests if requests else 0
+    return stats
+
+
+@metrics.register_collector
+def collect_pool_metrics():
+    for alias in get_pooled_aliases():
+        stats = get_pool_stats(alias)
+        if stats is None:
+            continue
+        metrics.set_gauge('db_pool_size', stats.get('pool_size', 0), database=alias)
+        metrics.set_gauge('db_pool_max_size', stats.get('pool_max', 0), database=alias)
+        metrics.set_gauge('db_pool_connections_in_use', stats['connections_in_use'], database=alias)
+        metrics.set_gauge('db_pool_occupancy_ratio', round(stats['occupancy'], 3), database=alias)
+        metrics.set_gauge('db_pool_requests_waiting', stats.get('requests_waiting', 0), database=alias)
+        # Logique : Cumuls depuis l'ouverture du pool, exportés comme compteurs monotones.
+        metrics.set_counter('db_pool_requests_total', stats.get('requests_num', 0), database=alias)
+        metrics.set_counter('db_pool_requests_wait_seconds_total', stats.get('requests_wait_ms', 0) / 1000, database=alias)
+        metrics.set_counter('db_pool_requests_errors_total', stats.get('requests_errors', 0), database=alias)
+        metrics.set_counter('db_pool_returns_bad_total', stats.get('returns_bad', 0), database=alias)
@@ -0,0 +1,300 @@
+# apps/common/deadlines.py
+
+"""
+Budgets de latence par vue et échéance de requête.
+
+Chaque vue déclare un budget (secondes) ; `DeadlineMiddleware` en déduit
+une échéance absolue pour la requête et :
+  - l'applique à PostgreSQL via `statement_timeout` (temps restant, ramené
+    au temps restant avant une requête SQL quand l'écart dépasse
+    `STATEMENT_TIMEOUT_TOLERANCE`, remis à la valeur par défaut en fin de
+    requête pour ne pas polluer le pool) ;
+  - refuse toute requête SQL, opération de cache ou appel HTTP lancé après
+    l'échéance (`DeadlineExceeded`) ;
+  - transforme une requête annulée par `statement_timeout` en 503 propre,
+    comptée dans `request_deadline_exceeded_total`.
+
+Déclaration :
+
+    class CVViewSet(...):
+        latency_budget = 3.0                  # toutes les actions
+        latency_budgets = {'list': 5.0}       # par action
+
+    @latency_budget(10.0)                     # vues fonctions
+    @api_view(['POST'])
+    def google_auth(request): ...
+
+Sans déclaration : REQUEST_DEADLINES['PATH_BUDGETS'] (préfixe d'URL, ex: admin)
+puis REQUEST_DEADLINES['DEFAULT_BUDGET'].
+"""
+
+import logging
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, OperationalError, connections
+from django.http import JsonResponse
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+from .concurrency import mark_overloaded
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST_DEADLINES = {
+    'DEFAULT_BUDGET': 10.0,
+    'PATH_BUDGETS': {},
+    'RETRY_AFTER': 1,
+    # Écart toléré (fraction du temps restant) entre le statement_timeout posé et
+    # le temps restant avant de le reposer : évite un aller-retour par requête SQL.
+    'STATEMENT_TIMEOUT_TOLERANCE': 0.1,
+}
+
+# SQLSTATE de PostgreSQL pour une requête annulée (statement_timeout compris).
+QUERY_CANCELED = '57014'
+
+# Requêtes devant lesquelles on ne pose pas `statement_timeout` : SET TRANSACTION
+# doit rester la première requête de la transaction, et ROLLBACK TO SAVEPOINT
+# s'exécute dans une transaction en erreur, qui refuserait le set_config().
+_UNTIMED_STATEMENTS = ('SET TRANSACTION', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK')
+
+
+def get_deadline_setting(name):
+    return getattr(settings, 'REQUEST_DEADLINES', {}).get(name, DEFAULT_REQUEST_DEADLINES[name])
+
+
+class DeadlineExceeded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Le serveur n'a pas pu répondre dans le délai imparti. Réessayez dans quelques instants."
+    default_code = 'deadline_exceeded'
+
+    def __init__(self, stage='budget', detail=None):
+        super().__init__(detail)
+        self.stage = stage
+        # Logique : DRF ajoute l'en-tête Retry-After quand `wait` est renseigné.
+        self.wait = get_deadline_setting('RETRY_AFTER')
+
+
+# ====================================================================
+# 1. ÉCHÉANCE COURANTE
+# ====================================================================
+
+class _Deadline:
+    def __init__(self, budget, label):
+        self.budget = budget
+        self.label = label
+        self.expires_at = time.monotonic() + budget
+        # alias -> statement_timeout (ms) actuellement posé sur la connexion
+        self.statement_timeouts = {}
+        # Vrai dès qu'un travail a été refusé ou annulé faute de temps (surcharge)
+        self.exceeded = False
+
+    def remaining(self):
+        return self.expires_at - time.monotonic()
+
+
+_current = ContextVar('request_deadline', default=None)
+
+
+def get_remaining():
+    """Secondes restantes avant l'échéance de la requête courante (None sans échéance)."""
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def check_deadline(stage):
+    """Lève `DeadlineExceeded` si l'échéance de la requête courante est dépassée."""
+    deadline = _current.get()
+    if deadline is not None and deadline.remaining() <= 0:
+        deadline.exceeded = True
+        metrics.increment('request_deadline_exceeded_total', view=deadline.label, stage=stage)
+        raise DeadlineExceeded(stage)
+
+
+def get_timeout(default, stage='http'):
+    """Timeout d'un appel externe : `default` borné par le temps restant."""
+    check_deadline(stage)
+    remaining = get_remaining()
+    return default if remaining is None else min(default, remaining)
+
+
+def latency_budget(seconds):
+    """Décorateur déclarant le budget d'une vue fonction."""
+    def decorator(view_func):
+        view_func.latency_budget = seconds
+        return view_func
+    return decorator
+
+
+# ====================================================================
+# 2. PROPAGATION À POSTGRESQL (statement_timeout)
+# ====================================================================
+
+def _execute_with_deadline(execute, sql, params, many, context):
+    deadline = _current.get()
+    if deadline is None:
+        return execute(sql, params, many, context)
+
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        deadline.exceeded = True
+        metrics.increment('request_deadline_exceeded_total', view=deadline.label, stage='database')
+        raise DeadlineExceeded('database')
+
+    connection = context['connection']
+    if connection.vendor == 'postgresql' and not sql.startswith(_UNTIMED_STATEMENTS):
+        timeout_ms = max(1, int(remaining * 1000))
+        current = deadline.statement_timeouts.get(connection)
+        # Logique : Ramené au temps restant dès que l'écart dépasse la tolérance : une
+        # requête ne peut déborder de l'échéance que de cette fraction du temps restant.
+        if current is None or current > timeout_ms * (1 + get_deadline_setting('STATEMENT_TIMEOUT_TOLERANCE')):
+            # Logique : Curseur psycopg brut, pour ne pas repasser par les execute_wrappers.
+            context['cursor'].cursor.execute("SELECT set_config('statement_timeout', %s, false)", [str(timeout_ms)])
+            deadline.statement_timeouts[connection] = timeout_ms
+    return execute(sql, params, many, context)
+
+
+def _reset_statement_timeouts(deadline):
+    # Logique : Connexions du thread courant seulement (les connexions sont par thread).
+    for alias in connections:
+        connection = connections[alias]
+        if deadline.statement_timeouts.pop(connection, None) is None:
+            continue
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SET statement_timeout TO DEFAULT')
+        except DatabaseError:
+            connection.close()
+
+
+def reset_statement_timeouts():
+    """Remet `statement_timeout` par défaut sur les connexions du thread courant (avant de les rendre au pool)."""
+    deadline = _current.get()
+    if deadline is not None:
+        _reset_statement_timeouts(deadline)
+
+
+@contextmanager
+def database_deadline():
+    """
+    Applique l'échéance courante aux connexions du thread courant. À utiliser
+    dans les threads qui exécutent des requêtes SQL pour le compte de la
+    requête HTTP (ex: lectures parallèles de apps/common/asyncdb.py).
+    """
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(_execute_with_deadline))
+        try:
+            yield
+        finally:
+            reset_statement_timeouts()
+
+
+@contextmanager
+def deadline_scope(budget, label='-'):
+    """Applique une échéance de `budget` secondes au bloc (requêtes SQL comprises)."""
+    deadline = _Deadline(budget, label)
+    # Logique : set() plutôt que reset(token) : en ASGI, la sortie du bloc peut
+    # s'exécuter dans une copie du contexte (sync_to_async).
+    previous = _current.get()
+    _current.set(deadline)
+    try:
+        with database_deadline():
+            yield deadline
+    finally:
+        _current.set(previous)
+
+
+def is_query_canceled(exc):
+    cause = exc.__cause__
+    return isinstance(exc, OperationalError) and getattr(cause, 'sqlstate', None) == QUERY_CANCELED
+
+
+# ====================================================================
+# 3. MIDDLEWARE
+# ====================================================================
+
+class DeadlineMiddleware:
+    """Applique le budget de la vue résolue à toute la requête (voir docstring du module)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request._deadline_stack = ExitStack()
+        with request._deadline_stack:
+            return self.mark_overload(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        request._deadline_stack = ExitStack()
+        try:
+            return self.mark_overload(request, await self.get_response(request))
+        finally:
+            # Logique : En ASGI, process_view s'exécute dans le thread synchrone de la
+            # requête (sync_to_async) : on referme les wrappers SQL dans ce même thread.
+            await sync_to_async(request._deadline_stack.close)()
+
+    def mark_overload(self, request, response):
+        # Logique : Échéance dépassée ou requête annulée : la limite de concurrence doit
+        # reculer, même si l'erreur a été rendue par DRF (voir apps/common/concurrency.py).
+        deadline = getattr(request, '_deadline', None)
+        if deadline is not None and deadline.exceeded:
+            mark_overloaded(response)
+        return response
+
+    def get_budget(self, request, view_func):
+        budget = getattr(view_func, 'latency_budget', None)
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if budget is None and view_class is not None:
+            # Logique : Pour un ViewSet, `actions` associe la méthode HTTP à l'action.
+            action = getattr(view_func, 'actions', {}).get(request.method.lower())
+            budget = getattr(view_class, 'latency_budgets', {}).get(action)
+            if budget is None:
+                budget = getattr(view_class, 'latency_budget', None)
+        if budget is None:
+            for prefix, path_budget in get_deadline_setting('PATH_BUDGETS').items():
+                if request.path.startswith(prefix):
+                    budget = path_budget
+                    break
+        return budget if budget is not None else get_deadline_setting('DEFAULT_BUDGET')
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        label = (view_class or view_func).__name__
+        request._deadline = request._deadline_stack.enter_context(
+            deadline_scope(self.get_budget(request, view_func), label),
+        )
+        return None
+
+    def process_exception(self, request, exception):
+        deadline = _current.get()
+        if isinstance(exception, DeadlineExceeded):
+            stage = exception.stage
+        elif is_query_canceled(exception):
+            stage = 'database'
+            if deadline is not None:
+                deadline.exceeded = True
+            metrics.increment('request_deadline_exceeded_total', view=deadline.label if deadline else '-', stage=stage)
+        else:
+            return None
+
+        logger.warning(f"Échéance dépassée ({stage}) sur {request.method} {request.path}")
+        response = JsonResponse(
+            {'detail': str(DeadlineExceeded.default_detail), 'code': DeadlineExceeded.default_code},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+        response['Retry-After'] = str(get_deadline_setting('RETRY_AFTER'))
+        return response
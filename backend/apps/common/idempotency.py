@@ -0,0 +1,281 @@
+# apps/common/idempotency.py
+
+"""
+Prise en charge de l'en-tête `Idempotency-Key` sur les écritures (POST/PUT/PATCH).
+
+La première requête portant une clé prend un verrou court, s'exécute
+normalement, puis sa réponse est mémorisée (Redis via le cache Django,
+ou la base) pendant `TTL` secondes. Une requête rejouée avec la même clé
+reçoit la réponse mémorisée sans repasser par la vue ni par PostgreSQL.
+
+Sans Redis, le verrou n'est pas pris dans le repli local du cache (il
+n'exclurait que les requêtes du même processus) : la requête est refusée
+en 503 (`IdempotencyUnavailable`).
+"""
+
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .cache import CircuitOpen, without_fallback
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+REPLAYED_RESPONSE_HEADERS = ('Location',)
+
+DEFAULT_IDEMPOTENCY_SETTINGS = {
+    'STORE': 'apps.common.idempotency.CacheIdempotencyStore',
+    'TTL': 24 * 3600,
+    'LOCK_TIMEOUT': 10,
+    'WAIT_TIMEOUT': 5,
+}
+
+
+def get_idempotency_setting(name):
+    return getattr(settings, 'IDEMPOTENCY_SETTINGS', {}).get(name, DEFAULT_IDEMPOTENCY_SETTINGS[name])
+
+
+# ====================================================================
+# 1. STOCKAGES (Redis / Base de données)
+# ====================================================================
+
+class CacheIdempotencyStore:
+    """Stockage dans le cache Django (Redis en production). `cache.add` fournit le verrou atomique."""
+
+    key_prefix = 'idempotency'
+
+    def get(self, key):
+        return cache.get(f'{self.key_prefix}:{key}')
+
+    def save(self, key, record, ttl):
+        cache.set(f'{self.key_prefix}:{key}', record, ttl)
+
+    def acquire_lock(self, key, timeout):
+        try:
+            with without_fallback():
+                return cache.add(f'{self.key_prefix}:lock:{key}', 1, timeout)
+        except CircuitOpen:
+            raise IdempotencyUnavailable()
+
+    def release_lock(self, key):
+        cache.delete(f'{self.key_prefix}:lock:{key}')
+
+
+class DatabaseIdempotencyStore:
+    """
+    Stockage dans la table `IdempotencyRecord`.
+    Le verrou est la ligne elle-même : l'index unique sur `key` bloque un
+    doublon concurrent jusqu'à la fin de la transaction de la première requête.
+    """
+
+    def get(self, key):
+        from .models import IdempotencyRecord
+
+        record = (
+            IdempotencyRecord.objects
+            .filter(key=key, status_code__isnull=False, expires_at__gt=timezone.now())
+            .values('fingerprint', 'status_code', 'response_data', 'response_headers')
+            .first()
+        )
+        if record is None:
+            return None
+        return {
+            'fingerprint': record['fingerprint'],
+            'status_code': record['status_code'],
+            'data': record['response_data'],
+            'headers': record['response_headers'],
+        }
+
+    def save(self, key, record, ttl):
+        from .models import IdempotencyRecord
+
+        IdempotencyRecord.objects.update_or_create(
+            key=key,
+            defaults={
+                'fingerprint': record['fingerprint'],
+                'status_code': record['status_code'],
+                'response_data': record['data'],
+                'response_headers': record['headers'],
+                'expires_at': timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+
+    def acquire_lock(self, key, timeout):
+        from .models import IdempotencyRecord
+
+        # Logique : Les verrous et réponses expirés sont recyclés.
+        IdempotencyRecord.objects.filter(key=key, expires_at__lte=timezone.now()).delete()
+        try:
+            with transaction.atomic():
+                IdempotencyRecord.objects.create(
+                    key=key, fingerprint='', expires_at=timezone.now() + timedelta(seconds=timeout)
+                )
+        except IntegrityError:
+            return False
+        return True
+
+    def release_lock(self, key):
+        from .models import IdempotencyRecord
+
+        IdempotencyRecord.objects.filter(key=key, status_code__isnull=True).delete()
+
+
+def get_idempotency_store():
+    return import_string(get_idempotency_setting('STORE'))()
+
+
+# ====================================================================
+# 2. MIXIN POUR LES VIEWSETS
+# ====================================================================
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Une requête avec cette clé d'idempotence est déjà en cours. Réessayez plus tard."
+    default_code = 'idempotency_conflict'
+
+
+class IdempotencyUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Les requêtes avec clé d'idempotence sont momentanément indisponibles. Réessayez plus tard."
+    default_code = 'idempotency_unavailable'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "Cette clé d'idempotence a déjà été utilisée avec une requête différente."
+    default_code = 'idempotency_key_reused'
+
+
+class _IdempotentReplay(Exception):
+    """Interrompt le traitement DRF pour renvoyer une réponse mémorisée."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class IdempotencyMixin:
+    """
+    Mixin pour les APIView/ViewSets DRF : honore l'en-tête `Idempotency-Key`
+    sur les méthodes d'écriture. Sans en-tête, le comportement est inchangé.
+    À placer avant `TransactionPolicyMixin`.
+    """
+
+    idempotent_methods = ('POST', 'PUT', 'PATCH')
+
+    def dispatch(self, request, *args, **kwargs):
+        # Logique : Placé avant `TransactionPolicyMixin`, ce bloc englobe la transaction
+        # de la requête : le `finally` s'exécute une fois celle-ci validée ou annulée.
+        self._idempotency = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # Logique : Réponse non mémorisée (exception non gérée, erreur serveur,
+            # transaction annulée) : la clé est libérée pour un vrai nouvel essai.
+            pending, self._idempotency = self._idempotency, None
+            if pending is not None:
+                store, key, _fingerprint = pending
+                store.release_lock(key)
+
+    def initial(self, request, *args, **kwargs):
+        # Logique : Authentification, permissions et throttling d'abord,
+        # pour que la clé soit toujours rattachée à un utilisateur connu.
+        super().initial(request, *args, **kwargs)
+        self._idempotency = None
+
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in self.idempotent_methods:
+            return
+        if len(key) > 200:
+            raise ValidationError({IDEMPOTENCY_HEADER: ["La clé d'idempotence ne doit pas dépasser 200 caractères."]})
+
+        store = get_idempotency_store()
+        scoped_key = self.get_idempotency_scope(request, key)
+        fingerprint = self.get_request_fingerprint(request)
+
+        record = store.get(scoped_key)
+        if record is None:
+            if store.acquire_lock(scoped_key, get_idempotency_setting('LOCK_TIMEOUT')):
+                self._idempotency = (store, scoped_key, fingerprint)
+                return
+            # Logique : Doublon concurrent, on attend la réponse de la première requête.
+            record = self._wait_for_record(store, scoped_key)
+            if record is None:
+                raise IdempotencyConflict()
+
+        if record['fingerprint'] != fingerprint:
+            raise IdempotencyKeyReused()
+        raise _IdempotentReplay(self._build_replay_response(record))
+
+    def get_idempotency_scope(self, request, key):
+        """La clé n'a de sens que pour un utilisateur, une méthode et une URL donnés."""
+        user_id = request.user.pk if request.user.is_authenticated else 'anon'
+        return hashlib.sha256(f'{user_id}:{request.method}:{request.path}:{key}'.encode()).hexdigest()
+
+    def get_request_fingerprint(self, request):
+        body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    def _wait_for_record(self, store, key):
+        deadline = time.monotonic() + get_idempotency_setting('WAIT_TIMEOUT')
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            record = store.get(key)
+            if record is not None:
+                return record
+        return None
+
+    def _build_replay_response(self, record):
+        response = Response(record['data'], status=record['status_code'], headers=record['headers'])
+        response[REPLAYED_HEADER] = 'true'
+        return response
+
+    def handle_exception(self, exc):
+        if isinstance(exc, _IdempotentReplay):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        pending = getattr(self, '_idempotency', None)
+        if pending is None or response.status_code >= 500:
+            # Logique : Erreur serveur, le client doit pouvoir réessayer réellement
+            # (la clé est libérée par `dispatch`, après la transaction).
+            return response
+
+        store, key, fingerprint = pending
+
+        record = {
+            'fingerprint': fingerprint,
+            'status_code': response.status_code,
+            'data': json.loads(json.dumps(response.data, cls=DjangoJSONEncoder)),
+            'headers': {name: response[name] for name in REPLAYED_RESPONSE_HEADERS if response.has_header(name)},
+        }
+
+        def save_record():
+            self._idempotency = None
+            store.save(key, record, get_idempotency_setting('TTL'))
+            store.release_lock(key)
+
+        # Logique : Avec une transaction de requête, la réponse n'est mémorisée qu'une
+        # fois l'écriture validée (en autocommit, on_commit s'exécute immédiatement) ;
+        # après un rollback, le callback est abandonné et `dispatch` libère la clé.
+        transaction.on_commit(save_record, using=self.get_idempotency_commit_database())
+        return response
+
+    def get_idempotency_commit_database(self):
+        """Base dont le commit valide l'écriture : la première en transaction (shard compris)."""
+        for connection in connections.all(initialized_only=True):
+            if connection.in_atomic_block:
+                return connection.alias
+        return None
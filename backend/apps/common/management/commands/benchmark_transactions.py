@@ -0,0 +1,83 @@
+# apps/common/management/commands/benchmark_transactions.py
+
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.common.benchmarks import create_benchmark_user, delete_benchmark_user
+from apps.cv_app.views import CVViewSet
+from apps.users.views import UserDetailView
+
+
+class TransactionTimer:
+    """Mesure le temps passé par une connexion hors autocommit (transaction ouverte)."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.durations = []
+        self._started = None
+        self._original = connection.set_autocommit
+
+    def __enter__(self):
+        def set_autocommit(autocommit, *args, **kwargs):
+            if not autocommit:
+                self._started = time.perf_counter()
+            elif self._started is not None:
+                self.durations.append(time.perf_counter() - self._started)
+                self._started = None
+            return self._original(autocommit, *args, **kwargs)
+
+        self.connection.set_autocommit = set_autocommit
+        return self
+
+    def __exit__(self, *exc_info):
+        del self.connection.set_autocommit
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le temps de transaction ouverte par requête entre ATOMIC_REQUESTS "
+        "et les politiques transactionnelles par vue (GET de CVs et du profil)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--cvs', type=int, default=5, help="CVs du compte synthétique.")
+        parser.add_argument('--sections', type=int, default=20, help="Expériences et compétences par CV.")
+
+    def handle(self, *args, **options):
+        user = create_benchmark_user(options['cvs'], options['sections'])
+        try:
+            factory = APIRequestFactory()
+            endpoints = {
+                'GET /cvs/': (CVViewSet.as_view({'get': 'list'}), '/api/v1/cvs/'),
+                'GET /users/me/': (UserDetailView.as_view(), '/api/v1/users/me/'),
+            }
+            for name, (view, path) in endpoints.items():
+                for mode in ('ATOMIC_REQUESTS', 'politique par vue'):
+                    # Logique : Équivalent de BaseHandler.make_view_atomic() avec ATOMIC_REQUESTS.
+                    callback = transaction.atomic(using='default')(view) if mode == 'ATOMIC_REQUESTS' else view
+                    self.run(name, mode, callback, factory, path, user, options['requests'])
+        finally:
+            delete_benchmark_user(user)
+
+    def run(self, name, mode, callback, factory, path, user, total):
+        latencies = []
+        with TransactionTimer(connections['default']) as timer:
+            for _ in range(total):
+                request = factory.get(path)
+                force_authenticate(request, user=user)
+                start = time.perf_counter()
+                response = callback(request)
+                response.render()
+                latencies.append(time.perf_counter() - start)
+
+        held = sum(timer.durations)
+        self.stdout.write(
+            f"{name:<16} {mode:<18} latence médiane {statistics.median(latencies) * 1000:6.2f} ms | "
+            f"transactions : {len(timer.durations):4d}, connexion en transaction "
+            f"{held / total * 1000:6.2f} ms/requête ({held / sum(latencies):.0%} du temps)"
+        )
@@ -0,0 +1,26 @@
+# apps/common/management/commands/gc_media_blobs.py
+
+from django.core.management.base import BaseCommand
+
+from apps.common.blobs import collect_garbage, reconcile_references
+
+
+class Command(BaseCommand):
+    help = "Supprime, par lots, les fichiers médias (blobs) qui ne sont plus référencés."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Blobs supprimés par transaction.")
+        parser.add_argument('--grace', type=int, default=None, help="Délai (s) sans référence avant suppression.")
+        parser.add_argument(
+            '--skip-reconcile', action='store_true', help="Ne recompte pas les références des blobs encore utilisés.",
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_reconcile']:
+            repaired = sum(reconcile_references(options['batch_size']))
+            self.stdout.write(f"{repaired} compteur(s) de références corrigé(s).")
+        deleted = freed = 0
+        for batch_deleted, batch_freed in collect_garbage(options['batch_size'], options['grace']):
+            deleted += batch_deleted
+            freed += batch_freed
+        self.stdout.write(self.style.SUCCESS(f"{deleted} blob(s) supprimé(s), {freed} octet(s) libéré(s)."))
@@ -0,0 +1,20 @@
+# apps/common/management/commands/import_media_blobs.py
+
+from django.core.management.base import BaseCommand
+
+from apps.common.blobs import REFERENCING_FIELDS, import_existing_files
+
+
+class Command(BaseCommand):
+    help = "Convertit en blobs (stockage par contenu) les fichiers enregistrés sous leur nom d'envoi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--delete', action='store_true', help="Supprime les anciens fichiers convertis.")
+
+    def handle(self, *args, **options):
+        for model, attname in REFERENCING_FIELDS:
+            converted = 0
+            for batch in import_existing_files(model, attname, options['batch_size'], options['delete']):
+                converted += batch
+            self.stdout.write(self.style.SUCCESS(f"{model._meta.label}.{attname} : {converted} fichier(s) converti(s)."))
@@ -0,0 +1,114 @@
+# apps/common/management/commands/loadtest_db_pool.py
+
+import logging
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.common.benchmarks import create_benchmark_user, delete_benchmark_user, percentiles
+from apps.common.dbpool import get_pool_stats
+from apps.cv_app.views import CVViewSet
+
+APPLICATION_NAME = 'loadtest_db_pool'
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge du pool de connexions : N threads enchaînent des GET /cvs/ en rendant "
+        "la connexion après chaque requête, avec et sans pool (latences p50/p99, erreurs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=100, help="Requêtes par thread.")
+        parser.add_argument(
+            '--kill-interval', type=float, default=0.5,
+            help="Coupe côté serveur les connexions inactives du test toutes les N secondes (0 : jamais).",
+        )
+
+    def handle(self, *args, **options):
+        # Logique : Les connexions rejetées par la pré-vérification sont comptées, pas journalisées.
+        logging.getLogger('psycopg.pool').setLevel(logging.ERROR)
+        settings_dict = connections['default'].settings_dict
+        pool_options = settings_dict['OPTIONS'].get('pool')
+        if not pool_options:
+            raise CommandError("Aucun pool configuré sur 'default' (DATABASE_POOL=False ?).")
+
+        connections['default'].close_pool()
+        settings_dict['OPTIONS']['application_name'] = APPLICATION_NAME
+        user = create_benchmark_user(cvs=2, sections=10)
+        try:
+            for mode in ('connexion par requête', 'pool'):
+                if mode == 'pool':
+                    settings_dict['OPTIONS']['pool'] = pool_options
+                else:
+                    settings_dict['OPTIONS'].pop('pool')
+                self.run(mode, user, options)
+                connections['default'].close_pool()
+        finally:
+            settings_dict['OPTIONS']['pool'] = pool_options
+            # Logique : La connexion du thread principal a pu être coupée par le test.
+            connections.close_all()
+            delete_benchmark_user(user)
+
+    def run(self, mode, user, options):
+        view = CVViewSet.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+        latencies, errors = [], []
+        stop = threading.Event()
+
+        def worker():
+            for _ in range(options['requests']):
+                request = factory.get('/api/v1/cvs/')
+                force_authenticate(request, user=user)
+                start = time.perf_counter()
+                try:
+                    view(request).render()
+                except DatabaseError as exc:
+                    errors.append(exc)
+                latencies.append(time.perf_counter() - start)
+                # Logique : Fin de requête (request_finished) : connexion rendue ou fermée.
+                connections.close_all()
+
+        def killer():
+            # Logique : Simule des coupures réseau / redémarrages de PgBouncer en tuant les
+            # connexions du test inactives depuis un moment (celles qui dorment dans le pool).
+            while not stop.wait(options['kill_interval']):
+                with connections['default'].cursor() as cursor:
+                    cursor.execute("SET application_name = 'loadtest_db_pool_killer'")
+                    cursor.execute(
+                        "SELECT count(pg_terminate_backend(pid)) FROM pg_stat_activity "
+                        "WHERE application_name = %s AND state = 'idle' "
+                        "AND state_change < now() - interval '200 milliseconds'",
+                        [APPLICATION_NAME],
+                    )
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        killer_thread = threading.Thread(target=killer) if options['kill_interval'] else None
+        start = time.perf_counter()
+        for thread in threads + ([killer_thread] if killer_thread else []):
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stop.set()
+        if killer_thread:
+            killer_thread.join()
+        elapsed = time.perf_counter() - start
+
+        p50, p95, p99 = percentiles(latencies, 50, 95, 99)
+        self.stdout.write(
+            f"{mode:<22} {len(latencies) / elapsed:7.0f} req/s | p50 {p50:6.1f} ms  p95 {p95:6.1f} ms  "
+            f"p99 {p99:6.1f} ms | erreurs : {len(errors)}"
+        )
+        stats = get_pool_stats('default') if mode == 'pool' else None
+        if stats:
+            self.stdout.write(
+                f"  pool : {stats.get('connections_num', 0)} connexion(s) ouverte(s), "
+                f"attente moyenne {stats['requests_wait_ms_avg']:.2f} ms, "
+                f"{stats.get('returns_bad', 0)} connexion(s) rejetée(s), "
+                f"{stats.get('requests_errors', 0)} erreur(s) d'obtention"
+            )
@@ -0,0 +1,14 @@
+# apps/common/management/commands/purge_idempotency_keys.py
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.common.models import IdempotencyRecord
+
+
+class Command(BaseCommand):
+    help = "Supprime les clés d'idempotence expirées (stockage en base uniquement)."
+
+    def handle(self, *args, **options):
+        deleted, _ = IdempotencyRecord.objects.filter(expires_at__lte=timezone.now()).delete()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} clé(s) d'idempotence expirée(s) supprimée(s)."))
@@ -0,0 +1,112 @@
+# apps/common/metrics.py
+
+"""
+Métriques applicatives en mémoire, exposées au format texte Prometheus
+par `MetricsView` (GET /api/v1/metrics/, réservé au staff).
+
+Les valeurs sont propres à chaque processus (worker) : c'est au collecteur
+(Prometheus) d'agréger les workers. Trois types :
+
+    increment('db_deadline_exceeded_total', view='CVViewSet')   compteur
+    set_gauge('db_pool_connections_in_use', 3, database='default')  jauge
+    observe('db_pool_wait_seconds', 0.004, database='default')   résumé (count/sum/max)
+
+Les collecteurs (`register_collector`) sont appelés à chaque export, pour
+les valeurs lues à la demande (ex: statistiques du pool de connexions) ;
+un cumul tenu ailleurs s'y exporte en compteur avec `set_counter`.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_summaries = {}
+_collectors = []
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def increment(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_counter(name, value, **labels):
+    """Compteur dont le cumul est tenu ailleurs (ex: statistiques du pool), relu par un collecteur."""
+    with _lock:
+        _counters[_key(name, labels)] = value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    key = _key(name, labels)
+    with _lock:
+        count, total, maximum = _summaries.get(key, (0, 0.0, 0.0))
+        _summaries[key] = (count + 1, total + value, max(maximum, value))
+
+
+def get_counter(name, **labels):
+    return _counters.get(_key(name, labels), 0)
+
+
+def register_collector(func):
+    """Enregistre une fonction appelée avant chaque export (idempotent)."""
+    if func not in _collectors:
+        _collectors.append(func)
+    return func
+
+
+def reset():
+    """Remet toutes les métriques à zéro (tests, benchmarks)."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
+
+
+# ====================================================================
+# EXPORT (format texte Prometheus)
+# ====================================================================
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def render_prometheus():
+    for collector in list(_collectors):
+        collector()
+
+    with _lock:
+        counters, gauges, summaries = dict(_counters), dict(_gauges), dict(_summaries)
+
+    lines = []
+    for kind, values in (('counter', counters), ('gauge', gauges)):
+        for name in sorted({name for name, _labels in values}):
+            lines.append(f'# TYPE {name} {kind}')
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+
+    for name in sorted({name for name, _labels in summaries}):
+        lines.append(f'# TYPE {name} summary')
+        for (metric, labels), (count, total, maximum) in sorted(summaries.items()):
+            if metric == name:
+                lines.append(f'{name}_count{_format_labels(labels)} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {total}')
+                lines.append(f'{name}_max{_format_labels(labels)} {maximum}')
+
+    return '\n'.join(lines) + '\n'
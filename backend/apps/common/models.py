@@ -0,0 +1,59 @@
+# apps/common/models.py
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+# ====================================================================
+# 1. CLÉS D'IDEMPOTENCE (Stockage en base, alternative à Redis)
+# ====================================================================
+
+class IdempotencyRecord(models.Model):
+    """
+    Réponse mémorisée pour une clé `Idempotency-Key`.
+    Utilisé par `DatabaseIdempotencyStore` ; une ligne sans `status_code`
+    sert de verrou tant que la première requête n'est pas terminée.
+    """
+
+    key = models.CharField(max_length=255, unique=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_data = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    response_headers = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        verbose_name = "Clé d'idempotence"
+        verbose_name_plural = "Clés d'idempotence"
+
+    def __str__(self):
+        return self.key
+
+
+# ====================================================================
+# 2. FICHIERS ADRESSÉS PAR CONTENU (voir apps/common/blobs.py)
+# ====================================================================
+
+class Blob(models.Model):
+    """
+    Un fichier stocké une seule fois, sous l'empreinte SHA-256 de son contenu.
+    `refcount` compte les champs de modèles qui le désignent ; un blob sans
+    référence depuis plus de `GC_GRACE_SECONDS` est supprimé par `gc_media_blobs`.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    unreferenced_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    class Meta:
+        verbose_name = "Fichier (par contenu)"
+        verbose_name_plural = "Fichiers (par contenu)"
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,189 @@
+# apps/common/replicas.py
+
+"""
+Lectures sur réplicas PostgreSQL avec cohérence "lire ses propres écritures".
+
+- `ReplicaRoutingMixin` autorise les réplicas pour les requêtes GET/HEAD/OPTIONS
+  d'une vue DRF, sauf si l'utilisateur vient d'écrire : ses lectures restent
+  alors "collées" au primaire pendant `STICKY_SECONDS` (marqueur dans le cache
+  pour un utilisateur connecté, cookie sinon).
+- `ReplicaRouter` (apps/common/routers.py) choisit un réplica sain : un réplica
+  dont le retard de réplication dépasse `MAX_LAG_SECONDS`, ou injoignable, est
+  écarté jusqu'à la vérification suivante ; sans réplica sain, le primaire sert.
+"""
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPLICA_SETTINGS = {
+    'STICKY_SECONDS': 5,
+    'MAX_LAG_SECONDS': 2.0,
+    'LAG_CHECK_INTERVAL': 1.0,
+    'COOKIE_NAME': 'primary_reads_until',
+}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def get_replica_setting(name):
+    return getattr(settings, 'REPLICA_SETTINGS', {}).get(name, DEFAULT_REPLICA_SETTINGS[name])
+
+
+def get_replicas(primary):
+    """Alias des réplicas de la base `primary` (settings.DATABASE_REPLICAS)."""
+    return getattr(settings, 'DATABASE_REPLICAS', {}).get(primary, [])
+
+
+def get_primary_for(alias):
+    """Base primaire d'un réplica (ou `alias` lui-même s'il n'en est pas un)."""
+    for primary, replicas in getattr(settings, 'DATABASE_REPLICAS', {}).items():
+        if alias in replicas:
+            return primary
+    return alias
+
+
+# ====================================================================
+# 1. SANTÉ ET RETARD DES RÉPLICAS
+# ====================================================================
+
+# Logique : Retard mesuré en secondes, nul si le réplica a rejoué tout ce qu'il a reçu
+# (sinon un primaire inactif ferait croire à un retard croissant).
+REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# alias -> (instant de la mesure, retard en secondes ou None si injoignable)
+_lag_cache = {}
+
+
+def measure_replica_lag(alias):
+    """Retard de réplication de `alias` en secondes, None si la base est injoignable."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(REPLICA_LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError as exc:
+        logger.warning(f"Réplica {alias} injoignable : {exc}")
+        connection.close()
+        return None
+
+
+def get_replica_lag(alias):
+    """Retard de `alias`, mesuré au plus une fois par `LAG_CHECK_INTERVAL` et par processus."""
+    now = time.monotonic()
+    checked_at, lag = _lag_cache.get(alias, (None, None))
+    if checked_at is None or now - checked_at >= get_replica_setting('LAG_CHECK_INTERVAL'):
+        lag = measure_replica_lag(alias)
+        _lag_cache[alias] = (now, lag)
+    return lag
+
+
+def is_replica_healthy(alias):
+    lag = get_replica_lag(alias)
+    return lag is not None and lag <= get_replica_setting('MAX_LAG_SECONDS')
+
+
+def choose_replica(primary):
+    """Un réplica sain de `primary` au hasard, ou None pour rester sur le primaire."""
+    healthy = [alias for alias in get_replicas(primary) if is_replica_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+# ====================================================================
+# 2. CONTEXTE DE REQUÊTE ET "LIRE SES ÉCRITURES"
+# ====================================================================
+
+def replica_reads_enabled():
+    return _replica_reads.get()
+
+
+@contextmanager
+def use_replicas(enabled=True):
+    """Autorise (ou interdit) les lectures sur réplica dans le bloc."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def _sticky_cache_key(user_id):
+    return f'replica:sticky:{user_id}'
+
+
+def mark_recent_write(request, response):
+    """Colle les lectures de l'auteur d'une écriture au primaire pendant `STICKY_SECONDS`."""
+    sticky_seconds = get_replica_setting('STICKY_SECONDS')
+    until = time.time() + sticky_seconds
+    if request.user.is_authenticated:
+        cache.set(_sticky_cache_key(request.user.pk), until, sticky_seconds)
+    # Logique : Le cookie couvre aussi les écritures anonymes (inscription, connexion).
+    response.set_cookie(
+        get_replica_setting('COOKIE_NAME'), f'{until:.3f}',
+        max_age=sticky_seconds, httponly=True, samesite='Lax',
+    )
+
+
+def has_recent_write(request):
+    now = time.time()
+    try:
+        if float(request.COOKIES.get(get_replica_setting('COOKIE_NAME'), 0)) > now:
+            return True
+    except ValueError:
+        pass
+    if request.user.is_authenticated:
+        return (cache.get(_sticky_cache_key(request.user.pk)) or 0) > now
+    return False
+
+
+async def ahas_recent_write(request):
+    """Variante asynchrone de `has_recent_write` (vues ASGI)."""
+    now = time.time()
+    try:
+        if float(request.COOKIES.get(get_replica_setting('COOKIE_NAME'), 0)) > now:
+            return True
+    except ValueError:
+        pass
+    if request.user.is_authenticated:
+        return (await cache.aget(_sticky_cache_key(request.user.pk)) or 0) > now
+    return False
+
+
+class ReplicaRoutingMixin:
+    """
+    Mixin pour les vues DRF : les lectures (GET/HEAD/OPTIONS) peuvent être servies
+    par un réplica, sauf juste après une écriture du même utilisateur.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica_token = None
+        if request.method in SAFE_METHODS and not has_recent_write(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        token, self._replica_token = getattr(self, '_replica_token', None), None
+        if token is not None:
+            _replica_reads.reset(token)
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_recent_write(request, response)
+        return response
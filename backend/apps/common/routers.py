@@ -0,0 +1,47 @@
+# apps/common/routers.py
+
+from django.db import router as default_router
+
+from .replicas import choose_replica, get_primary_for, replica_reads_enabled
+
+
+class ReplicaRouter:
+    """
+    Premier routeur de DATABASE_ROUTERS : laisse les routeurs suivants (ex:
+    CVShardRouter) désigner la base primaire, puis
+      - en lecture, la remplace par un réplica sain si le contexte de requête
+        l'autorise (voir ReplicaRoutingMixin) ;
+      - en écriture, ramène vers son primaire une instance lue sur un réplica.
+    """
+
+    def _get_primary(self, method, model, **hints):
+        for other in default_router.routers:
+            if other is self or not hasattr(other, method):
+                continue
+            alias = getattr(other, method)(model, **hints)
+            if alias:
+                return get_primary_for(alias)
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return get_primary_for(instance._state.db)
+        return 'default'
+
+    def db_for_read(self, model, **hints):
+        if not replica_reads_enabled():
+            return None
+        primary = self._get_primary('db_for_read', model, **hints)
+        return choose_replica(primary) or primary
+
+    def db_for_write(self, model, **hints):
+        return self._get_primary('db_for_write', model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if get_primary_for(obj1._state.db) == get_primary_for(obj2._state.db):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Logique : Un réplica reçoit son schéma du primaire par la réplication.
+        if get_primary_for(db) != db:
+            return False
+        return None
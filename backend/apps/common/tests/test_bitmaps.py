@@ -0,0 +1,35 @@
+# apps/common/tests/test_bitmaps.py
+import random
+
+from django.test import SimpleTestCase
+
+from apps.common.bitmaps import ARRAY_MAX, Bitmap
+
+
+class BitmapTests(SimpleTestCase):
+
+    def test_operations_match_python_sets(self):
+        rng = random.Random(7)
+        # Blocs peu denses (tableaux) et denses (champs de bits), sur plusieurs blocs de 65 536 IDs
+        sparse = {rng.randrange(300_000) for _ in range(2000)}
+        dense = {rng.randrange(150_000) for _ in range(60_000)}
+        left, right = Bitmap(sparse), Bitmap(dense)
+
+        self.assertEqual(list(left & right), sorted(sparse & dense))
+        self.assertEqual(list(left | right), sorted(sparse | dense))
+        self.assertEqual(list(right - left), sorted(dense - sparse))
+        self.assertEqual(left.intersection_count(right), len(sparse & dense))
+        self.assertEqual(right.page(100, 5, reverse=True), sorted(dense, reverse=True)[100:105])
+        self.assertLess(left.size_in_bytes(), len(sparse) * 8)
+
+    def test_add_and_discard_convert_containers(self):
+        bitmap = Bitmap(range(ARRAY_MAX))
+        snapshot = Bitmap.union(bitmap)
+
+        bitmap.add(ARRAY_MAX)
+        bitmap.discard(0)
+
+        self.assertEqual(len(bitmap), ARRAY_MAX)
+        self.assertNotIn(0, bitmap)
+        # Les blocs ne sont jamais modifiés en place : un résultat antérieur reste intact.
+        self.assertEqual(list(snapshot), list(range(ARRAY_MAX)))
@@ -0,0 +1,96 @@
+# apps/common/tests/test_blobs.py
+
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.common.blobs import collect_garbage, get_blob_storage, import_existing_files, reconcile_references
+from apps.common.models import Blob
+from apps.users.purge import delete_users
+
+User = get_user_model()
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.alice = User.objects.create_user(email='alice@email.com', username='alice', password='password123')
+        self.bob = User.objects.create_user(email='bob@email.com', username='bob', password='password123')
+
+    def set_avatar(self, user, content, name='avatar.png'):
+        user.avatar.save(name, ContentFile(content))
+        return user.avatar.name
+
+    def test_identical_files_are_stored_once_and_counted(self):
+        alice_name = self.set_avatar(self.alice, b'meme contenu', 'alice.png')
+        bob_name = self.set_avatar(User.objects.get(pk=self.bob.pk), b'meme contenu', 'bob.PNG')
+
+        self.assertEqual(alice_name, bob_name)
+        self.assertTrue(alice_name.startswith('blobs/'))
+        blob = Blob.objects.get()
+        self.assertEqual((blob.refcount, blob.size, blob.unreferenced_at), (2, 12, None))
+
+        alice = User.objects.get(pk=self.alice.pk)
+        self.set_avatar(alice, b'autre contenu')
+        alice.delete()
+        self.assertEqual(Blob.objects.get(name=bob_name).refcount, 1)
+        self.assertEqual(Blob.objects.get(name__endswith='.png', refcount=0).size, 13)
+
+    def test_garbage_collection_deletes_only_unreferenced_blobs(self):
+        kept = self.set_avatar(self.alice, b'garde')
+        dropped = self.set_avatar(self.bob, b'remplace')
+        self.set_avatar(self.bob, b'nouveau')
+        # Logique : Référence posée sans passer par les compteurs : le GC la retrouve et rectifie.
+        Blob.objects.filter(name=kept).update(refcount=0, unreferenced_at=timezone.now())
+
+        batches = list(collect_garbage(batch_size=1, grace_seconds=0))
+
+        self.assertEqual(sum(deleted for deleted, _ in batches), 1)
+        self.assertFalse(get_blob_storage().exists(dropped))
+        self.assertTrue(get_blob_storage().exists(kept))
+        self.assertEqual(Blob.objects.get(name=kept).refcount, 1)
+        self.assertEqual(list(collect_garbage(grace_seconds=3600)), [])
+
+    def test_purged_users_release_their_blobs(self):
+        shared = self.set_avatar(self.alice, b'partage')
+        self.set_avatar(self.bob, b'partage')
+        own = self.set_avatar(User.objects.get(pk=self.alice.pk), b'propre')
+
+        delete_users([self.alice.pk])
+        self.assertEqual(list(Blob.objects.order_by('name').values_list('name', 'refcount')), sorted([(shared, 1), (own, 0)]))
+
+        self.assertEqual(sum(deleted for deleted, _ in collect_garbage(grace_seconds=0)), 1)
+        self.assertFalse(get_blob_storage().exists(own))
+        self.assertTrue(get_blob_storage().exists(shared))
+
+    def test_references_removed_by_update_are_reconciled(self):
+        name = self.set_avatar(self.alice, b'efface')
+        User.objects.filter(pk=self.alice.pk).update(avatar='')
+
+        self.assertEqual(sum(reconcile_references()), 1)
+        self.assertEqual(Blob.objects.get(name=name).refcount, 0)
+        self.assertEqual(sum(deleted for deleted, _ in collect_garbage(grace_seconds=0)), 1)
+
+    def test_existing_files_are_imported(self):
+        os.makedirs(os.path.join(self.media_root, 'avatars'))
+        with open(os.path.join(self.media_root, 'avatars', 'ancien.jpg'), 'wb') as legacy:
+            legacy.write(b'ancien avatar')
+        User.objects.filter(pk=self.alice.pk).update(avatar='avatars/ancien.jpg')
+
+        self.assertEqual(sum(import_existing_files(User, 'avatar', delete=True)), 1)
+
+        alice = User.objects.get(pk=self.alice.pk)
+        self.assertTrue(alice.avatar.name.startswith('blobs/') and alice.avatar.name.endswith('.jpg'))
+        self.assertEqual(alice.avatar.read(), b'ancien avatar')
+        self.assertEqual(Blob.objects.get().refcount, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'avatars', 'ancien.jpg')))
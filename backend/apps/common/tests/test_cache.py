@@ -0,0 +1,121 @@
+# apps/common/tests/test_cache.py
+
+import shutil
+import socket
+import subprocess
+import time
+from unittest import skipUnless
+
+from django.test import SimpleTestCase, override_settings
+
+from apps.common import metrics
+from apps.common.cache import CircuitBreaker, CircuitOpen, ResilientRedisCache, without_fallback
+
+RESILIENCE = {'FAILURE_THRESHOLD': 2, 'RESET_TIMEOUT': 0.2}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_cache(port, alias):
+    return ResilientRedisCache(f'redis://127.0.0.1:{port}/0', {
+        'ALIAS': alias,
+        'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.2, 'SOCKET_TIMEOUT': 0.2},
+    })
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def test_opens_after_failures_and_closes_after_a_successful_probe(self):
+        closed = []
+        circuit = CircuitBreaker('test', failure_threshold=2, reset_timeout=0, on_close=lambda: closed.append(True))
+        circuit.record_failure()
+        self.assertEqual(circuit.state, CircuitBreaker.CLOSED)
+        circuit.record_failure()
+        self.assertEqual(circuit.state, CircuitBreaker.OPEN)
+
+        # Logique : Semi-ouvert : une seule sonde à la fois ; un échec rouvre.
+        self.assertEqual([circuit.allow(), circuit.allow()], [True, False])
+        circuit.record_failure()
+        self.assertEqual(circuit.state, CircuitBreaker.OPEN)
+
+        self.assertTrue(circuit.allow())
+        circuit.record_success()
+        self.assertEqual((circuit.state, closed), (CircuitBreaker.CLOSED, [True]))
+
+
+@override_settings(CACHE_RESILIENCE=RESILIENCE)
+class ResilientRedisCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_unreachable_redis_falls_back_locally_and_fails_fast_once_open(self):
+        cache = make_cache(free_port(), 'injoignable')
+        cache.set('cle', 'valeur', 300)
+        self.assertEqual(cache.get('cle'), 'valeur')
+        self.assertEqual(cache.circuit.state, CircuitBreaker.OPEN)
+
+        started = time.monotonic()
+        for _ in range(100):
+            cache.get('cle')
+        self.assertLess(time.monotonic() - started, 0.1)
+        with self.assertRaises(CircuitOpen):
+            cache.delete_pattern('*')
+
+        self.assertEqual(metrics.get_counter('cache_circuit_trips_total', cache='injoignable'), 1)
+        self.assertEqual(
+            metrics.get_counter('cache_fallback_total', cache='injoignable', operation='get', reason='open'), 100,
+        )
+
+    def test_callers_can_refuse_the_fallback(self):
+        cache = make_cache(free_port(), 'sans-repli')
+        cache.set('cle', 'locale', 300)
+
+        with without_fallback():
+            with self.assertRaises(CircuitOpen):
+                cache.get('cle')
+            with self.assertRaises(CircuitOpen):
+                cache.add('verrou', 1, 10)
+        self.assertEqual(cache.get('cle'), 'locale')
+
+    @skipUnless(shutil.which('redis-server'), "redis-server absent")
+    def test_redis_killed_mid_test_then_restarted(self):
+        port = free_port()
+
+        def start_redis():
+            process = subprocess.Popen(
+                ['redis-server', '--port', str(port), '--save', '', '--appendonly', 'no'],
+                stdout=subprocess.DEVNULL,
+            )
+            self.addCleanup(process.kill)
+            for _ in range(50):
+                try:
+                    socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                    return process
+                except OSError:
+                    time.sleep(0.05)
+            self.fail("redis-server n'a pas démarré")
+
+        redis = start_redis()
+        cache = make_cache(port, 'tuee')
+        cache.set('cle', 'redis', 300)
+        self.assertEqual(cache.get('cle'), 'redis')
+
+        redis.kill()
+        redis.wait()
+        cache.set('cle', 'repli', 300)
+        cache.get('cle')
+        self.assertEqual(cache.circuit.state, CircuitBreaker.OPEN)
+        self.assertEqual(cache.get('cle'), 'repli')
+
+        start_redis()
+        time.sleep(RESILIENCE['RESET_TIMEOUT'])
+        # Logique : La sonde (semi-ouvert) referme le disjoncteur et le repli est oublié ;
+        # Redis a redémarré sans persistance.
+        self.assertIsNone(cache.get('cle'))
+        self.assertEqual(cache.circuit.state, CircuitBreaker.CLOSED)
+        self.assertIsNone(cache.fallback.get('cle'))
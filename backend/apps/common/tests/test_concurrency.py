@@ -0,0 +1,97 @@
+# apps/common/tests/test_concurrency.py
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from apps.common import concurrency
+from apps.common.concurrency import AdaptiveConcurrencyMiddleware, AdaptiveLimiter, get_route_class, mark_overloaded
+from apps.users.tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+
+@override_settings(ADAPTIVE_CONCURRENCY={'INITIAL_LIMIT': 10, 'MIN_LIMIT': 2, 'MAX_LIMIT': 50})
+class AdaptiveLimiterTests(SimpleTestCase):
+
+    def run_requests(self, limiter, latency, count, in_flight, route='CVViewSet.list'):
+        for _ in range(count):
+            limiter.in_flight = in_flight + 1
+            limiter.release(route, latency)
+
+    def test_limit_grows_under_load_at_base_latency_and_shrinks_when_latency_rises(self):
+        limiter = AdaptiveLimiter()
+        self.run_requests(limiter, 0.010, 5, in_flight=9)
+        self.assertEqual(limiter.limit, 15)
+
+        self.run_requests(limiter, 0.100, 20, in_flight=9)
+        self.assertLess(limiter.limit, 10)
+
+    def test_mixed_routes_are_compared_to_their_own_baseline(self):
+        limiter = AdaptiveLimiter()
+        for _ in range(20):
+            self.run_requests(limiter, 0.005, 1, in_flight=9, route='CVViewSet.retrieve')
+            self.run_requests(limiter, 0.200, 1, in_flight=9, route='CVViewSet.search')
+        self.assertGreater(limiter.limit, 10)
+
+    def test_downstream_overload_backs_off_multiplicatively_and_is_bounded(self):
+        limiter = AdaptiveLimiter()
+        limiter.in_flight = 1
+        limiter.release('write', 0.5, overloaded=True)
+        self.assertAlmostEqual(limiter.limit, 7)
+        for _ in range(10):
+            limiter.in_flight = 1
+            limiter.release('write', 0.5, overloaded=True)
+        self.assertEqual(limiter.limit, 2)
+
+
+class LoadSheddingTests(APITestCase):
+
+    def test_only_real_overload_backs_off(self):
+        middleware = AdaptiveConcurrencyMiddleware(lambda request: None)
+        limiter = AdaptiveLimiter()
+        responses = {
+            'unavailable': HttpResponse(status=503),  # ex: migration de shard, Redis indisponible
+            'overloaded': mark_overloaded(HttpResponse(status=503)),  # ex: échéance dépassée
+            'gateway_timeout': HttpResponse(status=504),
+        }
+        limits = {}
+        with mock.patch.object(concurrency, 'limiter', limiter):
+            for name, response in responses.items():
+                request = RequestFactory().get('/api/v1/cvs/')
+                request._concurrency_slot = ('read', 'CVViewSet.list', 0)
+                limiter.limit, limiter.in_flight = 10, 1
+                middleware._release(request, response)
+                limits[name] = limiter.limit
+        self.assertEqual(limits, {'unavailable': 10, 'overloaded': 7, 'gateway_timeout': 7})
+
+    def test_heavy_writes_are_shed_before_reads(self):
+        user = User.objects.create_user(email='charge@email.com', username='charge', password='password123')
+        self.client.force_authenticate(user)
+        limiter = AdaptiveLimiter()
+        limiter.limit, limiter.in_flight = 10, 6
+
+        with mock.patch.object(concurrency, 'limiter', limiter):
+            write = self.client.post('/api/v1/cvs/', {'title': 'Mon CV'})
+            read = self.client.get('/api/v1/cvs/')
+
+        self.assertEqual(write.status_code, 503)
+        self.assertEqual((write.json()['code'], write['Retry-After']), ('overloaded', '1'))
+        self.assertEqual(read.status_code, 200)
+        self.assertEqual(limiter.in_flight, 6)
+
+    def test_only_valid_access_tokens_get_the_read_class(self):
+        user = User.objects.create_user(email='classe@email.com', username='classe', password='password123')
+        view = mock.Mock(spec=[])
+        token = ClaimsRefreshToken.for_user(user).access_token
+
+        def route_class(**headers):
+            return get_route_class(RequestFactory().get('/api/v1/cvs/', **headers), view)
+
+        self.assertEqual(route_class(HTTP_AUTHORIZATION=f'Bearer {token}'), 'read')
+        self.assertEqual(route_class(HTTP_AUTHORIZATION='Bearer pas-un-jeton'), 'anon')
+        self.assertEqual(route_class(HTTP_AUTHORIZATION='n importe quoi'), 'anon')
+        self.assertEqual(route_class(), 'anon')
@@ -0,0 +1,62 @@
+# apps/common/tests/test_deadlines.py
+
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from apps.common import metrics
+from apps.common.deadlines import DeadlineExceeded, check_deadline, deadline_scope, get_timeout
+from apps.cv_app.views import CVViewSet
+
+User = get_user_model()
+
+
+class DeadlineTests(APITestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_timeouts_are_capped_by_remaining_budget(self):
+        self.assertEqual(get_timeout(10), 10)
+        with deadline_scope(1.0):
+            self.assertLessEqual(get_timeout(10), 1.0)
+        with deadline_scope(0):
+            with self.assertRaises(DeadlineExceeded):
+                check_deadline('cache')
+
+    def test_exhausted_budget_returns_503(self):
+        user = User.objects.create_user(email='deadline@email.com', username='deadline', password='password123')
+        self.client.force_authenticate(user)
+
+        with mock.patch.dict(CVViewSet.latency_budgets, {'list': 0}):
+            response = self.client.get('/api/v1/cvs/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertIs(response.overloaded, True)  # la limite de concurrence recule
+        # Logique : L'échéance est constatée par la première opération de la requête :
+        # le seau du throttle (cache Redis) ou, avec un autre cache, la requête SQL.
+        exceeded = {
+            stage: metrics.get_counter('request_deadline_exceeded_total', view='CVViewSet', stage=stage)
+            for stage in ('cache', 'database')
+        }
+        self.assertEqual(sum(exceeded.values()), 1, exceeded)
+
+    @skipUnless(connection.vendor == 'postgresql', 'statement_timeout est propre à PostgreSQL')
+    def test_statement_timeout_follows_remaining_budget(self):
+        def statement_timeout():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")
+                return int(cursor.fetchone()[0])
+
+        with deadline_scope(5.0) as deadline:
+            User.objects.exists()
+            initial = statement_timeout()
+            # Logique : Écart sous la tolérance : pas de nouvel aller-retour.
+            deadline.expires_at -= 0.2
+            self.assertEqual(statement_timeout(), initial)
+            # Au-delà, le timeout suit le temps restant
+            deadline.expires_at -= 1
+            self.assertLessEqual(statement_timeout(), 3800)
@@ -0,0 +1,48 @@
+# apps/common/tests/test_metrics.py
+
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from apps.common import metrics
+from apps.common.dbpool import get_pooled_aliases
+
+User = get_user_model()
+
+
+class MetricsTests(APITestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_metrics_are_rendered_in_prometheus_format(self):
+        metrics.increment('db_deadline_exceeded_total', view='CVViewSet')
+        metrics.observe('db_pool_wait_seconds', 0.5, database='default')
+
+        output = metrics.render_prometheus()
+
+        self.assertIn('# TYPE db_deadline_exceeded_total counter', output)
+        self.assertIn('db_deadline_exceeded_total{view="CVViewSet"} 1', output)
+        self.assertIn('db_pool_wait_seconds_count{database="default"} 1', output)
+
+    @skipUnless('default' in get_pooled_aliases(), "Pool de connexions non configuré (PostgreSQL).")
+    def test_pool_totals_are_exported_as_counters(self):
+        connection.ensure_connection()
+
+        output = metrics.render_prometheus()
+
+        self.assertIn('# TYPE db_pool_requests_total counter', output)
+        self.assertIn('# TYPE db_pool_connections_in_use gauge', output)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        user = User.objects.create_user(email='metrics@email.com', username='metrics', password='password123')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/api/v1/metrics/').status_code, 403)
+
+        user.is_staff = True
+        user.save()
+        response = self.client.get('/api/v1/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
@@ -0,0 +1,44 @@
+# apps/common/tests/test_replicas.py
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.common.replicas import has_recent_write
+from apps.common.routers import ReplicaRouter
+from apps.cv_app.models import CV
+
+User = get_user_model()
+
+
+class ReplicaRoutingTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='replica@email.com', username='replica@email.com', password='password123',
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_write_makes_following_reads_stick_to_primary(self):
+        response = self.client.post('/api/v1/cvs/', {'title': 'Nouveau CV'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('primary_reads_until', response.cookies)
+        request = response.wsgi_request
+        request.COOKIES = {}
+        self.assertTrue(has_recent_write(request))
+
+    def test_read_does_not_stick(self):
+        response = self.client.get('/api/v1/cvs/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('primary_reads_until', response.cookies)
+
+    @override_settings(DATABASE_REPLICAS={'default': ['replica_1']})
+    def test_instance_read_from_replica_is_written_to_primary(self):
+        cv = CV(owner=self.user, title='Lu sur réplica')
+        cv._state.db = 'replica_1'
+
+        self.assertEqual(ReplicaRouter().db_for_write(CV, instance=cv), 'default')
@@ -0,0 +1,62 @@
+# apps/common/tests/test_throttling.py
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.common import throttling
+
+User = get_user_model()
+
+
+class TokenBucketThrottleTests(APITestCase):
+
+    def setUp(self):
+        throttling.reset_rate_limits()
+        self.user = User.objects.create_user(email='limite@email.com', username='limite', password='password123')
+        self.client.force_authenticate(self.user)
+
+    @override_settings(API_RATE_LIMITS={'cv_creation': '2/hour'})
+    def test_scoped_limit_applies_to_declared_action_with_headers(self):
+        first = self.client.post('/api/v1/cvs/', {'title': 'CV 1'})
+        second = self.client.post('/api/v1/cvs/', {'title': 'CV 2'})
+        third = self.client.post('/api/v1/cvs/', {'title': 'CV 3'})
+
+        self.assertEqual([first.status_code, second.status_code, third.status_code], [201, 201, 429])
+        self.assertEqual((first['RateLimit-Limit'], first['RateLimit-Remaining']), ('2', '1'))
+        self.assertEqual(first['RateLimit-Policy'], '2;w=3600')
+        self.assertEqual(third['RateLimit-Remaining'], '0')
+        # Logique : Un jeton toutes les 30 minutes.
+        self.assertTrue(0 < int(third['Retry-After']) <= 1800)
+        # Les autres actions ne consomment pas la portée `cv_creation`.
+        self.assertEqual(self.client.get('/api/v1/cvs/').status_code, 200)
+
+    @override_settings(API_RATE_LIMITS={'cv_creation': '2/hour'})
+    def test_request_buckets_are_consumed_in_one_call(self):
+        with mock.patch.object(throttling, 'consume_many', wraps=throttling.consume_many) as consume_many:
+            response = self.client.post('/api/v1/cvs/', {'title': 'CV 1'})
+
+        self.assertEqual(response.status_code, 201)
+        consume_many.assert_called_once()
+        self.assertEqual(set(consume_many.call_args.args[0]), {f'user:user:{self.user.pk}', f'cv_creation:user:{self.user.pk}'})
+
+    def test_local_bucket_refills_over_time(self):
+        buckets = throttling.LocalTokenBuckets()
+        states = [buckets.consume('k', 2, 1) for _ in range(3)]
+        self.assertEqual([state.allowed for state in states], [True, True, False])
+        self.assertAlmostEqual(states[-1].retry_after, 0.5, delta=0.05)
+
+        key, (tokens, ts) = next(iter(buckets.buckets.items()))
+        buckets.buckets[key] = (tokens, ts - 0.6)  # Logique : 0,6 s plus tard, un jeton est revenu.
+        self.assertTrue(buckets.consume('k', 2, 1).allowed)
+
+    def test_denied_request_does_not_consume_its_other_buckets(self):
+        buckets = throttling.LocalTokenBuckets()
+        buckets.consume('portee', 1, 3600)
+
+        states = buckets.consume_many({'utilisateur': (5, 3600), 'portee': (1, 3600)})
+
+        self.assertEqual((states['utilisateur'].allowed, states['portee'].allowed), (True, False))
+        self.assertEqual(states['utilisateur'].remaining, 5)
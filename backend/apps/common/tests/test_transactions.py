@@ -0,0 +1,52 @@
+# apps/common/tests/test_transactions.py
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.common.transactions import ATOMIC, NO_TRANSACTION, TransactionPolicyMixin, atomic
+from apps.cv_app.views import CVViewSet
+
+
+class TransactionPolicyTests(SimpleTestCase):
+
+    def get_policy(self, view_class, method, action):
+        view = view_class()
+        view.action = action
+        return view.get_transaction_policy(getattr(APIRequestFactory(), method)('/'))
+
+    def test_safe_methods_default_to_autocommit_and_writes_to_atomic(self):
+        self.assertIs(self.get_policy(CVViewSet, 'get', 'list'), NO_TRANSACTION)
+        self.assertIs(self.get_policy(CVViewSet, 'post', 'create'), ATOMIC)
+
+    def test_action_policy_overrides_defaults(self):
+        serializable = atomic('serializable')
+
+        class BulkView(TransactionPolicyMixin):
+            transaction_policies = {'bulk_import': serializable}
+
+        self.assertIs(self.get_policy(BulkView, 'post', 'bulk_import'), serializable)
+        with self.assertRaises(ValueError):
+            atomic('snapshot')
+
+
+class TransactionRollbackTests(TestCase):
+
+    def test_handled_exception_rolls_back_earlier_writes(self):
+        """Une ValidationError levée après des écritures : réponse 400 et rien n'est enregistré."""
+        User = get_user_model()
+
+        class WriteThenFailView(TransactionPolicyMixin, APIView):
+            authentication_classes = []
+            permission_classes = []
+
+            def post(self, request):
+                User.objects.create_user(email='partial@email.com', username='partial', password='password123')
+                raise ValidationError({'detail': ['Refusé après écriture.']})
+
+        response = WriteThenFailView.as_view()(APIRequestFactory().post('/', {}, format='json'))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(email='partial@email.com').exists())
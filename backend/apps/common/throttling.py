@@ -0,0 +1,411 @@
+# apps/common/throttling.py
+
+"""
+Limitation de débit par seau à jetons (token bucket), atomique dans Redis.
+
+Les throttles de DRF (`UserRateThrottle`...) lisent puis réécrivent une
+liste d'horodatages dans le cache à chaque requête : deux allers-retours,
+et deux requêtes simultanées peuvent passer toutes les deux. Ici, tous les
+seaux de la requête (utilisateur, portée de l'action...) sont consommés par
+un seul appel Redis (script Lua, une clé par seau) : le premier throttle
+évalué par DRF consomme ceux de tous les throttles de la vue, les suivants
+lisent leur résultat. Le script recalcule chaque seau (`N/période` : N
+jetons au plus, rechargés en continu) et consomme un jeton dans chacun
+seulement si tous en ont un : une requête refusée par un seau n'entame
+pas les autres. L'horloge est celle de Redis : tous les processus partagent le même
+décompte.
+
+Sans Redis (cache local) ou s'il ne répond pas, les seaux sont tenus en
+mémoire du processus (`LocalTokenBuckets`) : la limite s'applique alors par
+processus. Après une erreur Redis, le repli dure `FALLBACK_SECONDS`, ou
+suit le disjoncteur du cache s'il s'agit de `ResilientRedisCache`.
+
+Portées nommées de `API_RATE_LIMITS`, par action ou méthode HTTP :
+
+    class CVViewSet(...):
+        throttle_scopes = {'create': 'cv_creation'}
+
+`RateLimitMiddleware` ajoute à la réponse les en-têtes `RateLimit-Limit`,
+`RateLimit-Remaining`, `RateLimit-Reset` (secondes avant un seau plein) et
+`RateLimit-Policy` de la limite la plus proche d'être atteinte.
+"""
+
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache, caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_LIMITING_SETTINGS = {
+    'KEY_PREFIX': 'ratelimit',
+    'FALLBACK_SECONDS': 10,       # repli local après une erreur Redis
+    'LOCAL_MAX_KEYS': 100_000,    # seaux en mémoire au-delà desquels les seaux pleins sont oubliés
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_rate_limit_setting(name):
+    return getattr(settings, 'RATE_LIMITING', {}).get(name, DEFAULT_RATE_LIMITING_SETTINGS[name])
+
+
+def parse_rate(rate):
+    """'5/hour' -> (5, 3600) ; même syntaxe que `DEFAULT_THROTTLE_RATES` de DRF."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+@dataclass
+class BucketState:
+    allowed: bool
+    limit: int
+    period: int
+    remaining: int
+    retry_after: float  # secondes avant le prochain jeton (0 si autorisé)
+    reset: float        # secondes avant un seau plein
+
+
+# ====================================================================
+# 1. SEAUX (Redis / mémoire du processus)
+# ====================================================================
+
+# Logique : Pour chaque clé, ARGV = capacité, jetons par milliseconde (par paires).
+# Tout ou rien : un jeton n'est pris dans chaque seau que si tous en ont un ;
+# sinon les seaux sont seulement rechargés (horodatage et TTL mis à jour).
+# Retourne à la suite, par clé : {jeton disponible, jetons restants, ms avant le
+# prochain jeton, ms avant un seau plein}.
+TOKEN_BUCKET_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local levels = {}
+local all_allowed = true
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+    levels[i] = tokens
+    if tokens < 1 then
+        all_allowed = false
+    end
+end
+local result = {}
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    local allowed = 0
+    local retry = 0
+    if tokens >= 1 then
+        allowed = 1
+        if all_allowed then
+            tokens = tokens - 1
+        end
+    else
+        retry = math.ceil((1 - tokens) / rate)
+    end
+    local full = math.ceil((capacity - tokens) / rate)
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+    redis.call('PEXPIRE', key, math.max(full, 1))
+    table.insert(result, allowed)
+    table.insert(result, math.floor(tokens))
+    table.insert(result, retry)
+    table.insert(result, full)
+end
+return result
+"""
+
+
+class RedisTokenBuckets:
+
+    def __init__(self, client):
+        self.script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume_many(self, buckets):
+        """{clé: (limite, période)} -> {clé: BucketState}, en un seul appel."""
+        keys = list(buckets)
+        args = []
+        for limit, period in buckets.values():
+            args += [limit, limit / (period * 1000)]
+        values = self.script(keys=keys, args=args)
+        states = {}
+        for i, key in enumerate(keys):
+            allowed, remaining, retry_ms, full_ms = values[4 * i:4 * i + 4]
+            limit, period = buckets[key]
+            states[key] = BucketState(bool(allowed), limit, period, int(remaining), retry_ms / 1000, full_ms / 1000)
+        return states
+
+
+class LocalTokenBuckets:
+    """Repli sans Redis : même calcul (tout ou rien), seaux du processus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}  # clé -> (jetons, horodatage monotone)
+
+    def consume_many(self, buckets):
+        """{clé: (limite, période)} -> {clé: BucketState}."""
+        now = time.monotonic()
+        with self.lock:
+            if len(self.buckets) >= get_rate_limit_setting('LOCAL_MAX_KEYS'):
+                self._forget_full(now)
+            levels = {}
+            for key, (limit, period) in buckets.items():
+                tokens, ts = self.buckets.get(key, (limit, now))
+                levels[key] = min(limit, tokens + (now - ts) * limit / period)
+            all_allowed = all(tokens >= 1 for tokens in levels.values())
+            states = {}
+            for key, (limit, period) in buckets.items():
+                tokens, rate = levels[key], limit / period
+                allowed = tokens >= 1
+                if all_allowed:
+                    tokens -= 1
+                self.buckets[key] = (tokens, now)
+                states[key] = BucketState(
+                    allowed, limit, period, math.floor(tokens),
+                    0 if allowed else (1 - tokens) / rate, (limit - tokens) / rate,
+                )
+        return states
+
+    def consume(self, key, limit, period):
+        return self.consume_many({key: (limit, period)})[key]
+
+    def _forget_full(self, now):
+        # Logique : Un seau rechargé jusqu'à sa capacité est identique à un seau absent. La
+        # capacité n'est pas connue ici : on oublie ceux inutilisés depuis une journée.
+        self.buckets = {key: state for key, state in self.buckets.items() if now - state[1] < PERIODS['d']}
+        if len(self.buckets) >= get_rate_limit_setting('LOCAL_MAX_KEYS'):
+            self.buckets.clear()
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+_local_buckets = LocalTokenBuckets()
+_redis_buckets = None
+_redis_down_until = 0.0
+
+
+def _get_redis_buckets():
+    global _redis_buckets
+    try:
+        from django_redis import get_redis_connection
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return None
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    if _redis_buckets is None:
+        # Logique : Avec `ResilientRedisCache`, connexions au timeout court des scripts.
+        get_client = getattr(backend, 'get_operation_client', None)
+        client = get_client('script') if get_client else get_redis_connection('default')
+        _redis_buckets = RedisTokenBuckets(client)
+    return _redis_buckets
+
+
+def _redis_available():
+    circuit = getattr(caches['default'], 'circuit', None)
+    if circuit is not None:
+        return circuit.allow()
+    return time.monotonic() >= _redis_down_until
+
+
+def consume_many(buckets):
+    """
+    Consomme un jeton de chaque seau de `buckets` ({clé: (limite, période)}),
+    seulement si tous en ont un ; un seul appel Redis pour tous. Retourne
+    {clé: BucketState} (`allowed` : le seau avait un jeton).
+    """
+    global _redis_down_until
+    if not buckets:
+        return {}
+    prefix = get_rate_limit_setting('KEY_PREFIX')
+    keys = {cache.make_key(f'{prefix}:{key}'): key for key in buckets}
+    redis_buckets = _get_redis_buckets()
+    if redis_buckets is not None and _redis_available():
+        from redis.exceptions import RedisError
+        circuit = getattr(caches['default'], 'circuit', None)
+        try:
+            states = redis_buckets.consume_many({full_key: buckets[key] for full_key, key in keys.items()})
+        except (RedisError, OSError):
+            if circuit is not None:
+                circuit.record_failure()
+            _redis_down_until = time.monotonic() + get_rate_limit_setting('FALLBACK_SECONDS')
+            metrics.increment('rate_limit_fallback_total')
+            logger.warning("Redis injoignable : limitation de débit en mémoire du processus.", exc_info=True)
+        else:
+            if circuit is not None:
+                circuit.record_success()
+            return {key: states[full_key] for full_key, key in keys.items()}
+    states = _local_buckets.consume_many({full_key: buckets[key] for full_key, key in keys.items()})
+    return {key: states[full_key] for full_key, key in keys.items()}
+
+
+def consume(key, limit, period):
+    """Consomme un jeton du seau `key` (`limit` jetons par `period` secondes)."""
+    return consume_many({key: (limit, period)})[key]
+
+
+def reset_rate_limits():
+    """
+    Vide les seaux (tests) : ceux du processus et, avec Redis, ceux du préfixe.
+    Redis injoignable n'est pas une erreur : ses seaux ne sont alors pas utilisés.
+    """
+    from django_redis.exceptions import ConnectionInterrupted
+    from redis.exceptions import RedisError
+
+    _local_buckets.reset()
+    if _get_redis_buckets() is not None:
+        try:
+            cache.delete_pattern(f"{get_rate_limit_setting('KEY_PREFIX')}:*")
+        except (RedisError, ConnectionInterrupted, OSError):
+            logger.warning("Redis injoignable : seuls les seaux du processus ont été vidés.")
+
+
+# ====================================================================
+# 2. THROTTLES DRF
+# ====================================================================
+
+class TokenBucketThrottle(BaseThrottle):
+    """Base : `get_rate()` donne le taux ('N/période') ou None, `get_cache_key()` l'identité limitée."""
+
+    scope = None
+
+    def get_rate(self, request, view):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'anon:{self.get_ident(request)}'
+
+    def get_bucket(self, request, view):
+        """(clé, limite, période) du seau que la requête consomme, ou None."""
+        rate = self.get_rate(request, view)
+        ident = self.get_cache_key(request, view) if rate else None
+        if ident is None:
+            return None
+        return (f'{self.scope}:{ident}', *parse_rate(rate))
+
+    def allow_request(self, request, view):
+        self.state = None
+        bucket = self.get_bucket(request, view)
+        if bucket is None:
+            return True
+        key, limit, period = bucket
+        states = _consume_view_buckets(request, view)
+        self.state = states[key] if key in states else consume(key, limit, period)
+        _record(request, self.state)
+        if not self.state.allowed:
+            metrics.increment('rate_limited_requests_total', scope=self.scope)
+        return self.state.allowed
+
+    def wait(self):
+        return math.ceil(self.state.retry_after) if self.state else None
+
+
+class AnonTokenBucketThrottle(TokenBucketThrottle):
+    """Visiteurs anonymes, par adresse IP (taux `anon`)."""
+
+    scope = 'anon'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        return f'anon:{self.get_ident(request)}'
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    """Utilisateurs connectés, par compte (taux `user`) ; les anonymes relèvent de `AnonTokenBucketThrottle`."""
+
+    scope = 'user'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        return f'user:{request.user.pk}'
+
+
+class ScopedTokenBucketThrottle(TokenBucketThrottle):
+    """Portée de `API_RATE_LIMITS` déclarée par la vue (`throttle_scopes`, par action ou méthode)."""
+
+    def get_rate(self, request, view):
+        action = getattr(view, 'action', None) or request.method.lower()
+        self.scope = getattr(view, 'throttle_scopes', {}).get(action)
+        if self.scope is None:
+            return None
+        return getattr(settings, 'API_RATE_LIMITS', {}).get(self.scope)
+
+
+def _consume_view_buckets(request, view):
+    """
+    Seaux de tous les throttles à seau de la vue, consommés en un seul appel au
+    premier throttle évalué ; mémorisés sur la requête pour les suivants.
+    """
+    django_request = getattr(request, '_request', request)
+    states = getattr(django_request, '_rate_limit_states', None)
+    if states is None:
+        buckets = {}
+        for throttle in view.get_throttles():
+            bucket = throttle.get_bucket(request, view) if isinstance(throttle, TokenBucketThrottle) else None
+            if bucket is not None:
+                buckets[bucket[0]] = bucket[1:]
+        states = django_request._rate_limit_states = consume_many(buckets)
+    return states
+
+
+def _record(request, state):
+    # Logique : Conservée sur la requête Django (et non la `Request` DRF) pour le middleware.
+    django_request = getattr(request, '_request', request)
+    current = getattr(django_request, 'rate_limit', None)
+    if current is None or (not state.allowed, -state.remaining) > (not current.allowed, -current.remaining):
+        django_request.rate_limit = state
+
+
+# ====================================================================
+# 3. EN-TÊTES RateLimit-*
+# ====================================================================
+
+def add_rate_limit_headers(request, response):
+    state = getattr(request, 'rate_limit', None)
+    if state is None:
+        return response
+    response['RateLimit-Limit'] = str(state.limit)
+    response['RateLimit-Remaining'] = str(state.remaining)
+    response['RateLimit-Reset'] = str(math.ceil(state.reset))
+    response['RateLimit-Policy'] = f'{state.limit};w={state.period}'
+    return response
+
+
+class RateLimitMiddleware:
+    """Ajoute les en-têtes `RateLimit-*` de la limite la plus contraignante de la requête."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return add_rate_limit_headers(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return add_rate_limit_headers(request, await self.get_response(request))
@@ -0,0 +1,169 @@
+# apps/common/transactions.py
+
+"""
+Politique transactionnelle déclarée par vue, en remplacement d'ATOMIC_REQUESTS.
+
+Avec ATOMIC_REQUESTS, chaque requête (même un simple GET) ouvrait un
+`BEGIN ... COMMIT` couvrant toute la vue : la connexion restait en
+transaction pendant la sérialisation. Ici, chaque vue choisit par action :
+
+    NO_TRANSACTION             autocommit (défaut des GET/HEAD/OPTIONS)
+    READ_ONLY                  transaction en lecture seule (instantané cohérent)
+    ATOMIC                     transaction en écriture (défaut des autres méthodes)
+    atomic('repeatable read')  idem avec un niveau d'isolation choisi
+
+    class CVViewSet(TransactionPolicyMixin, viewsets.ModelViewSet):
+        transaction_policies = {'bulk_import': atomic('serializable')}
+"""
+
+import sys
+import threading
+
+from django.db import connections, router, transaction
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+ISOLATION_LEVELS = ('read committed', 'repeatable read', 'serializable')
+
+
+class TransactionPolicy:
+    """Mode (`none`, `read_only`, `atomic`) et niveau d'isolation d'une action."""
+
+    def __init__(self, mode, isolation=None):
+        if mode not in ('none', 'read_only', 'atomic'):
+            raise ValueError(f"Politique transactionnelle inconnue : {mode}")
+        if isolation is not None and isolation not in ISOLATION_LEVELS:
+            raise ValueError(f"Niveau d'isolation inconnu : {isolation}")
+        self.mode = mode
+        self.isolation = isolation
+
+    def __repr__(self):
+        return f'TransactionPolicy({self.mode!r}, {self.isolation!r})'
+
+    def begin(self, using):
+        """Ouvre la transaction sur `using` ; retourne le bloc atomic à refermer (ou None)."""
+        if self.mode == 'none':
+            return None
+
+        connection = connections[using]
+        outermost = not connection.in_atomic_block
+        block = transaction.atomic(using=using)
+        block.__enter__()
+        # Logique : SET TRANSACTION doit précéder toute requête de la transaction ;
+        # dans un bloc existant (tests, appel imbriqué) on hérite de ses réglages.
+        if outermost and connection.vendor == 'postgresql':
+            options = []
+            if self.isolation:
+                options.append(f'ISOLATION LEVEL {self.isolation.upper()}')
+            if self.mode == 'read_only':
+                options.append('READ ONLY')
+            if options:
+                with connection.cursor() as cursor:
+                    cursor.execute(f"SET TRANSACTION {' '.join(options)}")
+        return block
+
+
+NO_TRANSACTION = TransactionPolicy('none')
+READ_ONLY = TransactionPolicy('read_only')
+ATOMIC = TransactionPolicy('atomic')
+
+
+def read_only(isolation=None):
+    return TransactionPolicy('read_only', isolation)
+
+
+def atomic(isolation=None):
+    return TransactionPolicy('atomic', isolation)
+
+
+class TransactionPolicyMixin:
+    """
+    Mixin pour les vues DRF (à placer en premier, ou juste après
+    `IdempotencyMixin`) : ouvre la transaction de l'action une fois
+    l'authentification et le routage de base faits, et la referme avant le
+    rendu de la réponse.
+
+    - `transaction_policies` : {action ou méthode HTTP en minuscules: politique}
+    - `safe_transaction_policy` / `unsafe_transaction_policy` : politiques par défaut
+    - `transaction_model` : modèle servant à choisir la base (défaut : celui du serializer)
+    """
+
+    transaction_policies = {}
+    safe_transaction_policy = NO_TRANSACTION
+    unsafe_transaction_policy = ATOMIC
+    transaction_model = None
+
+    def get_transaction_policy(self, request):
+        action = getattr(self, 'action', None) or request.method.lower()
+        if action in self.transaction_policies:
+            return self.transaction_policies[action]
+        if request.method in SAFE_METHODS:
+            return self.safe_transaction_policy
+        return self.unsafe_transaction_policy
+
+    def get_transaction_database(self):
+        model = self.transaction_model
+        if model is None:
+            serializer_class = getattr(self, 'serializer_class', None)
+            model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+        return router.db_for_write(model) if model is not None else 'default'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._transaction_block = self.get_transaction_policy(request).begin(self.get_transaction_database())
+
+    def dispatch(self, request, *args, **kwargs):
+        self._transaction_block = None
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except BaseException:
+            # Logique : Une exception non gérée par DRF annule la transaction.
+            self._end_transaction(*sys.exc_info())
+            raise
+        # Logique : Une exception gérée par DRF a marqué la transaction pour
+        # annulation (voir handle_exception) : le bloc se referme par un rollback.
+        self._end_transaction(None, None, None)
+        return response
+
+    def handle_exception(self, exc):
+        # Logique : Sans ATOMIC_REQUESTS, le set_rollback() de DRF est sans effet :
+        # une erreur transformée en réponse (4xx/5xx) annule ici les écritures déjà faites.
+        block = getattr(self, '_transaction_block', None)
+        if block is not None:
+            transaction.set_rollback(True, using=block.using)
+        return super().handle_exception(exc)
+
+    def _end_transaction(self, exc_type, exc_value, traceback):
+        block, self._transaction_block = self._transaction_block, None
+        if block is not None:
+            block.__exit__(exc_type, exc_value, traceback)
+
+
+_batches = threading.local()
+
+
+def _get_batch(callback, using):
+    if not hasattr(_batches, 'keys'):
+        _batches.keys = {}
+    return _batches.keys.setdefault((callback, using), set())
+
+
+def _flush_batch(callback, using):
+    keys = _get_batch(callback, using)
+    if not keys:
+        return
+    pending = list(keys)
+    keys.clear()
+    callback(pending, using)
+
+
+def on_commit_batch(callback, key, using='default'):
+    """
+    Programme `callback(clés, using)` au commit de la transaction en cours sur
+    `using` (immédiatement en autocommit). Les clés ajoutées pendant une même
+    transaction sont traitées en un seul appel, chacune une seule fois.
+    """
+    _get_batch(callback, using).add(key)
+    # Logique : Un callback par appel ; le premier exécuté vide le lot, les suivants
+    # ne font rien. Après un rollback, les clés restées en attente sont traitées au
+    # prochain commit (les traitements programmés ici doivent être idempotents).
+    transaction.on_commit(lambda: _flush_batch(callback, using), using=using)
@@ -0,0 +1,11 @@
+# apps/common/urls.py
+
+from django.urls import path
+
+from .views import MetricsView
+
+app_name = 'common'
+
+urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+]
@@ -0,0 +1,18 @@
+# apps/common/views.py
+
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from .metrics import render_prometheus
+
+
+class MetricsView(APIView):
+    """
+    Endpoint GET /api/v1/metrics/
+    Métriques du processus courant au format texte Prometheus (staff uniquement).
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
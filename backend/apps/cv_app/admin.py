@@ -41,6 +41,7 @@ class UserAdmin(BaseUserAdmin):
     # apps/cv_app/admin.py
 
 from django.contrib import admin
+from .search import build_search_query, search_cvs, supports_full_text_search
 from .models import (
     CV,
     Contact,
@@ -48,7 +49,9 @@ from .models import (
     Education,
     Skill,
     Language,
-    Interest
+    Interest,
+    OutboxEvent,
+    CVArchive
 )
 
 # --- 1. ADMIN INLINE (Sections imbriquées dans le CV) ---
@@ -103,12 +106,21 @@ class InterestInline(admin.TabularInline):
 @admin.register(CV)
 class CVAdmin(admin.ModelAdmin):
     """Personnalisation du modèle CV."""
-    list_display = ('title', 'owner', 'created_at', 'updated_at')
-    list_filter = ('created_at', 'updated_at')
+    list_display = ('title', 'owner', 'created_at', 'updated_at', 'archived_at')
+    list_filter = ('created_at', 'updated_at', ('archived_at', admin.EmptyFieldListFilter))
     
     # 💡 ESSENTIEL : Utilise les champs de recherche définis dans UserAdmin
     search_fields = ('title', 'summary', 'owner__email', 'owner__first_name')
     autocomplete_fields = ['owner']
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Sous PostgreSQL, recherche plein texte indexée (search_vector, voir search.py)
+        au lieu des `icontains` sur chaque champ ; un e-mail cherche le propriétaire.
+        """
+        if not search_term or '@' in search_term or not supports_full_text_search(queryset.db):
+            return super().get_search_results(request, queryset, search_term)
+        return search_cvs(queryset, search_term), False
     
     fieldsets = (
         ('Informations Générales', {
@@ -135,6 +147,12 @@ class ExperienceAdmin(admin.ModelAdmin):
     search_fields = ('title', 'company', 'description', 'cv__title')
     raw_id_fields = ('cv',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Restreint d'abord aux CVs trouvés par l'index plein texte, puis filtre ligne à ligne."""
+        if search_term and supports_full_text_search(queryset.db):
+            queryset = queryset.filter(cv__search_vector=build_search_query(search_term))
+        return super().get_search_results(request, queryset, search_term)
+
 @admin.register(Education)
 class EducationAdmin(admin.ModelAdmin):
     list_display = ('degree', 'institution', 'cv', 'end_date')
@@ -151,4 +169,29 @@ class SkillAdmin(admin.ModelAdmin):
 
 # Enregistrement simple des autres modèles
 admin.site.register(Language)
-admin.site.register(Interest)
\ No newline at end of file
+admin.site.register(Interest)
+
+# --- 4. OUTBOX (Lecture seule, pour le suivi du relais) ---
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'aggregate_id', 'created_at', 'processed_at', 'attempts', 'next_attempt_at')
+    list_filter = (
+        'event_type', ('processed_at', admin.EmptyFieldListFilter), ('dead_lettered_at', admin.EmptyFieldListFilter),
+    )
+    search_fields = ('=aggregate_id',)
+    readonly_fields = (
+        'aggregate_id', 'event_type', 'payload', 'created_at', 'processed_at', 'attempts', 'last_error',
+        'next_attempt_at', 'dead_lettered_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(CVArchive)
+class CVArchiveAdmin(admin.ModelAdmin):
+    list_display = ('cv', 'section_rows', 'raw_size', 'compressed_size', 'archived_at')
+    raw_id_fields = ('cv',)
+    exclude = ('document',)
+    readonly_fields = ('section_rows', 'raw_size', 'compressed_size', 'archived_at')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CvAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.cv_app'
+
+    def ready(self):
+        # Logique : Branche les signaux qui alimentent l'outbox transactionnelle.
+        from . import signals  # noqa: F401
@@ -0,0 +1,224 @@
+# apps/cv_app/archival.py
+
+"""
+Archivage froid des CVs inactifs.
+
+Les sections d'un CV non modifié depuis N mois sont sérialisées en un seul
+document JSON compressé (`CVArchive`) puis supprimées des tables chaudes.
+Le CV lui-même reste en place (`archived_at` renseigné) et ses sections
+sont réhydratées, avec leurs IDs d'origine, au premier accès via l'API.
+Une clé de cache par propriétaire (« aucun CV archivé ») évite de chercher
+ses CVs archivés à chaque requête ; l'archivage la supprime.
+"""
+
+import json
+import logging
+import zlib
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from apps.common.cache import without_fallback
+from apps.users.models import User
+
+from . import outbox
+from .models import CV, CVArchive, Contact, Experience, Education, Skill, Language, Interest
+
+logger = logging.getLogger(__name__)
+
+# Logique : Durée de la clé « aucun CV archivé » ; borne aussi le retard d'une
+# réhydratation si la clé est reposée pendant l'archivage d'un CV du propriétaire.
+NO_ARCHIVED_CVS_TIMEOUT = 3600
+
+# Logique : Clé du document -> modèle de section (toutes liées par `cv_id`).
+SECTION_MODELS = {
+    'contact': Contact,
+    'experiences': Experience,
+    'educations': Education,
+    'skills': Skill,
+    'languages': Language,
+    'interests': Interest,
+}
+
+
+# ====================================================================
+# 1. ARCHIVAGE
+# ====================================================================
+
+def get_cutoff(months, now=None):
+    return (now or timezone.now()) - timedelta(days=30 * months)
+
+
+def get_archivable_cvs(months, using='default', now=None):
+    """
+    CVs non modifiés depuis `months` mois sur la base `using`.
+    Sans jointure sur le propriétaire (qui peut vivre sur un autre shard) :
+    voir `exclude_active_owners()`.
+    """
+    return CV.objects.using(using).filter(archived_at__isnull=True, updated_at__lt=get_cutoff(months, now))
+
+
+def exclude_active_owners(cvs, months, now=None):
+    """Écarte les CVs dont le propriétaire s'est connecté depuis `months` mois."""
+    owner_ids = {cv.owner_id for cv in cvs}
+    active = set(
+        User.objects
+        .filter(pk__in=owner_ids, last_login__gte=get_cutoff(months, now))
+        .values_list('pk', flat=True)
+    )
+    return [cv for cv in cvs if cv.owner_id not in active]
+
+
+def archive_cv(cv):
+    """
+    Déplace toutes les sections du CV dans un `CVArchive`.
+    Doit être appelé dans une transaction ; publie un seul événement `cv.archived`.
+    """
+    using = router.db_for_write(CV, instance=cv)
+    document, section_rows = {}, 0
+    for key, model in SECTION_MODELS.items():
+        rows = list(model.objects.using(using).filter(cv_id=cv.pk).values())
+        document[key] = rows
+        section_rows += len(rows)
+
+    raw = json.dumps(document, cls=DjangoJSONEncoder).encode('utf-8')
+    compressed = zlib.compress(raw, 9)
+
+    CVArchive.objects.using(using).create(
+        cv=cv,
+        document=compressed,
+        section_rows=section_rows,
+        raw_size=len(raw),
+        compressed_size=len(compressed),
+    )
+    with outbox.muted():
+        for model in SECTION_MODELS.values():
+            model.objects.using(using).filter(cv_id=cv.pk).delete()
+
+    # Logique : update() pour ne pas toucher `updated_at` (auto_now).
+    cv.archived_at = timezone.now()
+    CV.objects.using(using).filter(pk=cv.pk).update(archived_at=cv.archived_at)
+    outbox.record_event(cv, 'archived')
+    forget_no_archived_cvs(cv.owner_id, using)
+    return section_rows
+
+
+def archive_batch(months, batch_size=100, using='default', after_id=0):
+    """
+    Archive les CVs éligibles parmi les `batch_size` suivants (IDs > `after_id`)
+    de la base `using`, dans une seule transaction courte. Les CVs verrouillés
+    par une écriture en cours sont ignorés (SKIP LOCKED).
+    Retourne (dernier ID examiné ou None si terminé, CVs archivés, lignes déplacées).
+    """
+    with transaction.atomic(using=using):
+        candidates = list(
+            get_archivable_cvs(months, using)
+            .filter(pk__gt=after_id)
+            .select_for_update(skip_locked=True)
+            .order_by('id')[:batch_size]
+        )
+        if not candidates:
+            return None, 0, 0
+        cvs = exclude_active_owners(candidates, months)
+        rows = sum(archive_cv(cv) for cv in cvs)
+    return candidates[-1].pk, len(cvs), rows
+
+
+# ====================================================================
+# 2. RÉHYDRATATION
+# ====================================================================
+
+def read_archive_document(document):
+    """Sections d'un `CVArchive.document` : {clé de SECTION_MODELS: [lignes]}."""
+    return json.loads(zlib.decompress(bytes(document)))
+
+
+def rehydrate_cv(cv):
+    """Réinsère les sections archivées du CV dans les tables chaudes."""
+    # Logique : `cv` peut avoir été lu sur un réplica ; l'écriture va au primaire.
+    using = router.db_for_write(CV, instance=cv)
+    with transaction.atomic(using=using):
+        archive = CVArchive.objects.using(using).select_for_update().filter(cv_id=cv.pk).first()
+        if archive is None:
+            # Logique : Déjà réhydraté par une requête concurrente.
+            return False
+
+        document = read_archive_document(archive.document)
+        for key, model in SECTION_MODELS.items():
+            model.objects.using(using).bulk_create(model(**row) for row in document.get(key, []))
+
+        archive.delete()
+        cv.archived_at = None
+        CV.objects.using(using).filter(pk=cv.pk).update(archived_at=None)
+        outbox.record_event(cv, 'restored')
+
+    logger.info(f"CV {cv.pk} réhydraté ({archive.section_rows} lignes).")
+    return True
+
+
+def _no_archived_cvs_key(owner_id):
+    return f'cv_app:no_archived_cvs:{owner_id}'
+
+
+def forget_no_archived_cvs(owner_id, using):
+    """
+    Retire la clé « aucun CV archivé » du propriétaire, dans la transaction de
+    l'archivage puis à son commit (une requête concurrente a pu la reposer).
+    """
+    key = _no_archived_cvs_key(owner_id)
+    # Logique : Sans repli local : une suppression faite dans le repli serait oubliée au
+    # retour de Redis et les sections resteraient archivées. Redis indisponible -> erreur.
+    with without_fallback():
+        cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key), using=using)
+
+
+def rehydrate_user_cvs(user):
+    """
+    Réhydrate les CVs archivés de l'utilisateur (une lecture de cache s'il
+    n'en a pas, une requête indexée si la clé a expiré).
+    Retourne le nombre de CVs réhydratés.
+    """
+    key = _no_archived_cvs_key(user.pk)
+    if cache.get(key):
+        return 0
+    # Logique : Lu sur le primaire : un réplica en retard sur un archivage poserait la clé à tort.
+    archived = CV.objects.using(router.db_for_write(CV)).filter(owner=user, archived_at__isnull=False)
+    rehydrated = sum(rehydrate_cv(cv) for cv in archived)
+    cache.set(key, True, NO_ARCHIVED_CVS_TIMEOUT)
+    return rehydrated
+
+
+# ====================================================================
+# 3. MÉTRIQUES
+# ====================================================================
+
+def get_archive_stats(using='default'):
+    """Volume archivé et gain de place par rapport aux tables chaudes, pour une base."""
+    stats = CVArchive.objects.using(using).aggregate(
+        archived_cvs=Count('id'),
+        section_rows=Sum('section_rows'),
+        raw_bytes=Sum('raw_size'),
+        compressed_bytes=Sum('compressed_size'),
+    )
+    stats = {key: value or 0 for key, value in stats.items()}
+    stats['hot_rows'] = {key: model.objects.using(using).count() for key, model in SECTION_MODELS.items()}
+    stats['table_bytes'] = get_section_table_sizes(using)
+    return stats
+
+
+def get_section_table_sizes(using='default'):
+    """Taille disque (table + index) des tables de sections, PostgreSQL uniquement."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return {}
+    sizes = {}
+    with connection.cursor() as cursor:
+        for key, model in SECTION_MODELS.items():
+            cursor.execute('SELECT pg_total_relation_size(%s)', [model._meta.db_table])
+            sizes[key] = cursor.fetchone()[0]
+    return sizes
@@ -0,0 +1,194 @@
+# apps/cv_app/async_views.py
+
+"""
+Chemin de lecture asynchrone des CVs, pour un déploiement ASGI.
+
+Mêmes réponses que les actions `list`/`retrieve` des ViewSets DRF (qui sont
+synchrones), mais sans bloquer de thread pendant les accès base et cache :
+
+    GET /api/v1/cvs/async/                 liste paginée des CVs (CVViewSet.list)
+    GET /api/v1/cvs/async/<pk>/            détail d'un CV (CVViewSet.retrieve)
+    GET /api/v1/cvs/async/<section>/       liste d'une section (ex: experiences)
+
+Le comptage et la page sont lus en parallèle, puis les cinq sections des CVs
+de la page (voir apps/common/asyncdb.py). L'annuaire des shards et le
+marqueur "lire ses écritures" sont lus via l'API asynchrone du cache.
+"""
+
+import abc
+import logging
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from apps.common.asyncdb import gather_reads
+from apps.common.replicas import ahas_recent_write, use_replicas
+
+from .archival import rehydrate_user_cvs
+from .models import CV, Education, Experience, Interest, Language, Skill
+from .serializers import (
+    CVSerializer, EducationSerializer, ExperienceSerializer,
+    InterestSerializer, LanguageSerializer, SkillSerializer,
+)
+from .sharding import aget_assignment, use_shard
+
+logger = logging.getLogger(__name__)
+
+# Sections listées par CVSerializer : related_name -> (modèle, sérialiseur)
+SECTIONS = {
+    'experiences': (Experience, ExperienceSerializer),
+    'educations': (Education, EducationSerializer),
+    'skills': (Skill, SkillSerializer),
+    'languages': (Language, LanguageSerializer),
+    'interests': (Interest, InterestSerializer),
+}
+
+
+# ====================================================================
+# 1. OUTILS (authentification, pagination, sections)
+# ====================================================================
+
+async def authenticate(request):
+    """Authentifie la requête avec les authentificateurs DRF configurés."""
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    user = await sync_to_async(lambda: drf_request.user)()
+    if not user.is_authenticated:
+        raise NotAuthenticated()
+    request.user = user
+    return user
+
+
+def get_page(request):
+    """(numéro de page, taille) selon les conventions de PageNumberPagination."""
+    try:
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise NotFound("Page non valide.")
+    if page < 1:
+        raise NotFound("Page non valide.")
+    return page, api_settings.PAGE_SIZE
+
+
+async def paginate(request, queryset):
+    """Lit le total et la page en parallèle ; retourne le corps paginé façon DRF (sans sérialiser)."""
+    page, size = get_page(request)
+    offset = (page - 1) * size
+    count, objects = await gather_reads(queryset.count, partial(list, queryset[offset:offset + size]))
+    if not objects and page != 1:
+        raise NotFound("Page non valide.")
+
+    url = request.build_absolute_uri()
+    previous = None
+    if page > 1:
+        previous = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return objects, {
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if offset + size < count else None,
+        'previous': previous,
+    }
+
+
+async def attach_sections(cvs, owner):
+    """
+    Équivalent asynchrone de `prefetch_related` sur les sections : une requête
+    par section, toutes en parallèle, rangées dans le cache de préchargement.
+    """
+    if not cvs:
+        return
+    ids = [cv.pk for cv in cvs]
+    names = list(SECTIONS)
+    rows = await gather_reads(*(partial(list, SECTIONS[name][0].objects.filter(cv_id__in=ids)) for name in names))
+
+    for cv in cvs:
+        cv.owner = owner  # Logique : Évite une requête par CV pour `owner_email`.
+        cv._prefetched_objects_cache = {}
+    by_id = {cv.pk: cv for cv in cvs}
+    for name, objects in zip(names, rows):
+        grouped = {cv_id: [] for cv_id in ids}
+        for obj in objects:
+            grouped[obj.cv_id].append(obj)
+        for cv_id, items in grouped.items():
+            # Logique : Même forme que prefetch_related (QuerySet déjà évalué).
+            queryset = SECTIONS[name][0].objects.filter(cv_id=cv_id)
+            queryset._result_cache = items
+            queryset._prefetch_done = True
+            by_id[cv_id]._prefetched_objects_cache[name] = queryset
+
+
+# ====================================================================
+# 2. VUES
+# ====================================================================
+
+class AsyncCVReadView(View, metaclass=abc.ABCMeta):
+    """
+    Base des vues de lecture asynchrones : authentification, shard de
+    l'utilisateur, lectures sur réplica (hors "lire ses écritures"),
+    réhydratation des CVs archivés, erreurs au format DRF.
+    """
+
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            user = await authenticate(request)
+            shard, _locked = await aget_assignment(user.pk)
+            with use_shard(shard), use_replicas(not await ahas_recent_write(request)):
+                if await sync_to_async(rehydrate_user_cvs)(user):
+                    # Logique : Les sections réinsérées ne sont peut-être pas encore sur le réplica.
+                    with use_replicas(False):
+                        data = await self.read(request, user, *args, **kwargs)
+                else:
+                    data = await self.read(request, user, *args, **kwargs)
+        except APIException as exc:
+            response = JsonResponse({'detail': exc.detail}, status=exc.status_code, encoder=JSONEncoder)
+            if getattr(exc, 'wait', None):
+                response['Retry-After'] = '%d' % exc.wait
+            return response
+        return JsonResponse(data, encoder=JSONEncoder, safe=False)
+
+    @abc.abstractmethod
+    async def read(self, request, user, *args, **kwargs):
+        """Corps de la réponse (données sérialisées) pour l'utilisateur authentifié."""
+
+
+class AsyncCVListView(AsyncCVReadView):
+    latency_budget = 5.0
+
+    async def read(self, request, user):
+        queryset = CV.objects.filter(owner=user).select_related('contact').order_by('-updated_at')
+        cvs, body = await paginate(request, queryset)
+        await attach_sections(cvs, user)
+        body['results'] = CVSerializer(cvs, many=True).data
+        return body
+
+
+class AsyncCVDetailView(AsyncCVReadView):
+    latency_budget = 3.0
+
+    async def read(self, request, user, pk):
+        try:
+            cv = await CV.objects.filter(owner=user).select_related('contact').aget(pk=pk)
+        except CV.DoesNotExist:
+            raise NotFound("Aucun CV ne correspond à la requête.")
+        await attach_sections([cv], user)
+        return CVSerializer(cv).data
+
+
+class AsyncSectionListView(AsyncCVReadView):
+    latency_budget = 2.0
+
+    async def read(self, request, user, section):
+        if section not in SECTIONS:
+            raise NotFound("Section inconnue.")
+        model, serializer_class = SECTIONS[section]
+        queryset = model.objects.filter(cv__owner=user).order_by('-id')
+        objects, body = await paginate(request, queryset)
+        body['results'] = serializer_class(objects, many=True).data
+        return body
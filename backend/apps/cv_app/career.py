@@ -0,0 +1,131 @@
+# apps/cv_app/career.py
+
+"""
+Indicateurs de parcours dérivés des sections d'un CV, stockés et indexés sur
+`CV` pour pouvoir filtrer les listes sans parcourir les sections :
+
+    experience_months     mois d'expérience (périodes qui se chevauchent fusionnées)
+    current_position      intitulé du poste en cours ('' si aucun)
+    largest_gap_months    plus longue interruption entre deux périodes d'emploi
+    latest_education_end  fin de la formation terminée la plus récente
+
+Ils sont recalculés au commit pour chaque CV dont une expérience ou une
+formation a changé (une fois par CV et par transaction). Un poste en cours
+compte jusqu'à la date du calcul : `refresh_cv_metrics --current` remet à
+jour ces CVs (à planifier chaque mois).
+"""
+
+from datetime import date
+
+from django.utils import timezone
+
+from apps.common.transactions import on_commit_batch
+
+from .archival import read_archive_document
+from .models import CV, CVArchive, Education, Experience
+
+METRIC_FIELDS = ('experience_months', 'current_position', 'largest_gap_months', 'latest_education_end')
+
+
+# ====================================================================
+# 1. CALCUL
+# ====================================================================
+
+def _as_date(value):
+    # Logique : Les documents d'archive stockent les dates au format ISO.
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def months_between(start, end):
+    """Mois entiers écoulés de `start` à `end` (0 si `end` précède `start`)."""
+    months = (end.year - start.year) * 12 + end.month - start.month
+    if end.day < start.day:
+        months -= 1
+    return max(months, 0)
+
+
+def merge_periods(periods, today):
+    """Fusionne les périodes (début, fin ou None = en cours) qui se chevauchent ; triées par début."""
+    merged = []
+    for start, end in sorted((start, max(end or today, start)) for start, end in periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def compute_career_metrics(experiences, educations, today=None):
+    """
+    Indicateurs d'un CV à partir de ses expériences (dicts `title`,
+    `start_date`, `end_date`) et de ses formations (dicts `end_date`).
+    """
+    today = today or timezone.localdate()
+    experiences = [
+        (row['title'], _as_date(row['start_date']), _as_date(row['end_date'])) for row in experiences
+    ]
+
+    periods = merge_periods([(start, end) for _title, start, end in experiences], today)
+    current = [(start, title) for title, start, end in experiences if end is None or end >= today]
+    education_ends = [end for end in (_as_date(row['end_date']) for row in educations) if end is not None]
+
+    return {
+        'experience_months': sum(months_between(start, end) for start, end in periods),
+        # Logique : Plusieurs postes en cours : le plus récemment commencé.
+        'current_position': max(current)[1] if current else '',
+        'largest_gap_months': max(
+            (months_between(previous[1], following[0]) for previous, following in zip(periods, periods[1:])),
+            default=0,
+        ),
+        'latest_education_end': max(education_ends, default=None),
+    }
+
+
+# ====================================================================
+# 2. MISE À JOUR
+# ====================================================================
+
+def load_career_sections(cv_ids, using):
+    """{cv_id: (expériences, formations)} des CVs `cv_ids` de la base `using` (CVs archivés compris)."""
+    sections, archived = {}, []
+    for cv_id, archived_at in CV.objects.using(using).filter(pk__in=cv_ids).values_list('pk', 'archived_at'):
+        sections[cv_id] = ([], [])
+        if archived_at is not None:
+            archived.append(cv_id)
+
+    hot = [cv_id for cv_id in sections if cv_id not in archived]
+    for row in Experience.objects.using(using).filter(cv_id__in=hot).values('cv_id', 'title', 'start_date', 'end_date'):
+        sections[row['cv_id']][0].append(row)
+    for row in Education.objects.using(using).filter(cv_id__in=hot).values('cv_id', 'end_date'):
+        sections[row['cv_id']][1].append(row)
+
+    # Logique : Les sections des CVs archivés ne sont plus dans les tables chaudes.
+    for cv_id, document in CVArchive.objects.using(using).filter(cv_id__in=archived).values_list('cv_id', 'document'):
+        document = read_archive_document(document)
+        sections[cv_id] = (document.get('experiences', []), document.get('educations', []))
+
+    return sections
+
+
+def refresh_career_metrics(cv_ids, using='default', today=None):
+    """Recalcule les indicateurs des CVs `cv_ids`. Retourne le nombre de CVs mis à jour."""
+    cvs = [
+        CV(pk=cv_id, **compute_career_metrics(experiences, educations, today))
+        for cv_id, (experiences, educations) in load_career_sections(list(cv_ids), using).items()
+    ]
+    # Logique : bulk_update() (une requête) ne touche pas `updated_at` (pas de auto_now) :
+    # l'archivage des CVs inactifs n'est pas retardé par ce recalcul.
+    CV.objects.using(using).bulk_update(cvs, METRIC_FIELDS)
+    return len(cvs)
+
+
+def schedule_refresh(cv_id, using):
+    """Programme le recalcul des indicateurs du CV au commit de la transaction en cours sur `using`."""
+    on_commit_batch(refresh_career_metrics, cv_id, using)
+
+
+def get_open_ended_cvs(using='default'):
+    """CVs dont un poste est en cours : leur durée d'expérience augmente avec le temps."""
+    return CV.objects.using(using).exclude(current_position='')
@@ -0,0 +1,149 @@
+# apps/cv_app/completeness.py
+
+"""
+Score de complétude d'un CV (0 à 100), pondéré par section :
+
+    summary                   10  résumé renseigné
+    contact                   20  part des champs de contact renseignés
+    experiences               20  au moins une expérience
+    experience_descriptions   15  part des expériences décrites
+    educations                10  au moins une formation
+    skills                    15  jusqu'à TARGET_SKILLS compétences
+    languages                  5  au moins une langue
+    interests                  5  au moins un centre d'intérêt
+
+Le CV stocke, en plus du score, les compteurs de chaque section
+(`section_counts`). Une écriture sur une section ne recompte que cette
+section pour ce CV (au commit, une fois par transaction) ; le score est
+ensuite recalculé à partir des compteurs stockés, sans relire le reste du CV.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+
+from apps.common.transactions import on_commit_batch
+
+from .archival import read_archive_document
+from .models import CV, CVArchive, Contact, Education, Experience, Interest, Language, Skill
+
+COMPLETENESS_WEIGHTS = {
+    'summary': 10,
+    'contact': 20,
+    'experiences': 20,
+    'experience_descriptions': 15,
+    'educations': 10,
+    'skills': 15,
+    'languages': 5,
+    'interests': 5,
+}
+
+CONTACT_FIELDS = ('email', 'phone_number', 'city', 'country', 'website_url', 'linkedin_url', 'github_url')
+
+# Logique : Nombre de compétences au-delà duquel la section ne rapporte plus de points.
+TARGET_SKILLS = 5
+
+# Clé de section (celle des documents d'archive) -> (modèle, champs nécessaires au comptage)
+SECTIONS = {
+    'contact': (Contact, CONTACT_FIELDS),
+    'experiences': (Experience, ('description',)),
+    'educations': (Education, ()),
+    'skills': (Skill, ()),
+    'languages': (Language, ()),
+    'interests': (Interest, ()),
+}
+
+
+# ====================================================================
+# 1. CALCUL
+# ====================================================================
+
+def _filled(value):
+    return bool(value and str(value).strip())
+
+
+def count_section(section, rows):
+    """Compteurs d'une section à partir de ses lignes (dicts)."""
+    if section == 'contact':
+        return {'contact_fields': max((sum(_filled(row.get(field)) for field in CONTACT_FIELDS) for row in rows), default=0)}
+    if section == 'experiences':
+        return {'experiences': len(rows), 'described_experiences': sum(_filled(row.get('description')) for row in rows)}
+    return {section: len(rows)}
+
+
+def compute_completeness(counts, summary):
+    """Score (0 à 100) à partir des compteurs de sections et du résumé."""
+    experiences = counts.get('experiences', 0)
+    ratios = {
+        'summary': _filled(summary),
+        'contact': counts.get('contact_fields', 0) / len(CONTACT_FIELDS),
+        'experiences': min(experiences, 1),
+        'experience_descriptions': counts.get('described_experiences', 0) / experiences if experiences else 0,
+        'educations': min(counts.get('educations', 0), 1),
+        'skills': min(counts.get('skills', 0), TARGET_SKILLS) / TARGET_SKILLS,
+        'languages': min(counts.get('languages', 0), 1),
+        'interests': min(counts.get('interests', 0), 1),
+    }
+    return round(sum(COMPLETENESS_WEIGHTS[key] * ratio for key, ratio in ratios.items()))
+
+
+# ====================================================================
+# 2. MISE À JOUR
+# ====================================================================
+
+def _load_rows(section, cvs, using):
+    """{cv_id: lignes de la section} pour les CVs `cvs` (CVs archivés compris)."""
+    rows = {cv.pk: [] for cv in cvs}
+    model, fields = SECTIONS[section]
+    hot = [cv.pk for cv in cvs if cv.archived_at is None]
+    for row in model.objects.using(using).filter(cv_id__in=hot).values('cv_id', *fields):
+        rows[row['cv_id']].append(row)
+
+    # Logique : Les sections des CVs archivés ne sont plus dans les tables chaudes.
+    archived = [cv.pk for cv in cvs if cv.archived_at is not None]
+    for cv_id, document in CVArchive.objects.using(using).filter(cv_id__in=archived).values_list('cv_id', 'document'):
+        rows[cv_id] = read_archive_document(document).get(section, [])
+    return rows
+
+
+def refresh_completeness(keys, using='default'):
+    """
+    Recompte les sections `(cv_id, section)` de `keys` (section None : score
+    seul, par ex. après modification du résumé) et recalcule le score des CVs.
+    Retourne le nombre de CVs mis à jour.
+    """
+    sections = defaultdict(set)
+    for cv_id, section in keys:
+        sections[cv_id].add(section)
+
+    with transaction.atomic(using=using):
+        # Logique : Verrouiller les CVs AVANT de recompter : deux transactions
+        # concurrentes sur la même section ne peuvent pas écrire dans le désordre.
+        cvs = list(
+            CV.objects.using(using).select_for_update()
+            .filter(pk__in=list(sections))
+            .only('pk', 'summary', 'archived_at', 'section_counts')
+        )
+        for section in SECTIONS:
+            targets = [cv for cv in cvs if section in sections[cv.pk]]
+            if not targets:
+                continue
+            rows = _load_rows(section, targets, using)
+            for cv in targets:
+                cv.section_counts = {**cv.section_counts, **count_section(section, rows[cv.pk])}
+
+        for cv in cvs:
+            cv.completeness = compute_completeness(cv.section_counts, cv.summary)
+        # Logique : bulk_update() ne touche pas `updated_at` (pas de auto_now).
+        CV.objects.using(using).bulk_update(cvs, ['section_counts', 'completeness'])
+    return len(cvs)
+
+
+def recount_completeness(cv_ids, using='default'):
+    """Recompte toutes les sections des CVs (rattrapage après migration, réparation)."""
+    return refresh_completeness([(cv_id, section) for cv_id in cv_ids for section in SECTIONS], using)
+
+
+def schedule_refresh(cv_id, section, using):
+    """Programme le recomptage de `section` (ou le seul recalcul du score) au commit de la transaction en cours."""
+    on_commit_batch(refresh_completeness, (cv_id, section), using)
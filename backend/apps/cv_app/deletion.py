@@ -0,0 +1,32 @@
+# apps/cv_app/deletion.py
+
+"""
+Suppression rapide de CVs : un seul `DELETE` sur `cv_app_cv`, PostgreSQL
+propageant la cascade aux sections (migration 0006). Les signaux ligne par
+ligne sont court-circuités ; un événement outbox `cv.deleted` est publié
+par CV dans la même transaction.
+"""
+
+from django.db import router, transaction
+
+from apps.common.db import fast_delete
+
+from . import outbox
+from .models import CV, OutboxEvent
+
+
+def delete_cvs(cv_ids, using=None):
+    """
+    Supprime les CVs `cv_ids` (tous sur la base `using`) et toutes leurs sections.
+    Retourne le nombre de CVs supprimés.
+    """
+    cv_ids = list(cv_ids)
+    if not cv_ids:
+        return 0
+    using = using or router.db_for_write(CV)
+    with transaction.atomic(using=using):
+        OutboxEvent.objects.using(using).bulk_create(outbox.build_event(CV(pk=cv_id), 'deleted') for cv_id in cv_ids)
+        # Logique : muted() évite les événements en double si fast_delete
+        # se replie sur le Collector (hors PostgreSQL).
+        with outbox.muted():
+            return fast_delete(CV, cv_ids, using=using)
@@ -0,0 +1,517 @@
+# apps/cv_app/facets.py
+
+"""
+Recherche à facettes des CVs (filtres « recruteur ») sur un index bitmap en mémoire.
+
+Pour chaque valeur de facette, l'index garde l'ensemble des IDs de CV
+concernés dans un `Bitmap` compressé (apps/common/bitmaps.py) :
+
+    skill        nom de compétence           'python'
+    skill_level  compétence et niveau        ('python', 7)
+    category     catégorie de compétence     'tech'
+    city         ville du contact            'lyon'
+    country      pays du contact             'france'
+    language     langue parlée               'anglais'
+
+Une requête est une suite de clauses combinées en ET, chacune étant un OU
+de valeurs, soit en paramètres d'URL :
+
+    ?skill=python&skill=django|flask&skill_level=python:7-10&city=lyon|paris
+
+Les valeurs sont normalisées (casse, espaces). Les IDs de CV étant uniques
+entre shards, un seul index couvre tous les shards.
+
+Cycle de vie, dans chaque processus :
+    - l'index est chargé depuis l'instantané écrit par `rebuild_cv_facets`
+      (ou, à défaut, construit depuis la base) dans un thread d'arrière-plan ;
+    - il est tenu à jour en relisant l'outbox de chaque shard (événements
+      `cv.*`, `skill.*`, `contact.*`, `language.*`) au plus toutes les
+      REFRESH_INTERVAL secondes : les CVs concernés sont relus en base.
+"""
+
+import heapq
+import logging
+import operator
+import os
+import pickle
+import threading
+import time
+from array import array
+from datetime import timedelta
+from functools import reduce
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from apps.common import metrics
+from apps.common.bitmaps import Bitmap
+
+from .archival import read_archive_document
+from .models import CV, CVArchive, Contact, Language, OutboxEvent, Skill
+from .sharding import attach_owners, get_cv_shards
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('skill', 'category', 'city', 'country', 'language')
+FILTERS = FACETS + ('skill_level',)
+MAX_SKILL_LEVEL = 10
+
+# Logique : Seuls ces événements changent les facettes d'un CV.
+FACET_EVENT_PREFIXES = ('cv.', 'skill.', 'contact.', 'language.')
+
+DEFAULT_FACET_INDEX_SETTINGS = {
+    'SNAPSHOT_PATH': '',
+    'REFRESH_INTERVAL': 2.0,
+    'SETTLE_SECONDS': 60,
+    'BATCH_SIZE': 5000,
+}
+
+
+def get_facet_setting(name):
+    """Lit une option de `settings.FACET_INDEX` avec valeur par défaut."""
+    return getattr(settings, 'FACET_INDEX', {}).get(name, DEFAULT_FACET_INDEX_SETTINGS[name])
+
+
+def normalize(value):
+    return ' '.join(str(value).split()).casefold() if value is not None else ''
+
+
+def _chunked(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+# ====================================================================
+# 1. FACETTES D'UN CV (lues en base ou dans son archive)
+# ====================================================================
+
+def document_keys(skills=(), contact=None, languages=()):
+    """Clés (facette, valeur) d'un CV à partir de ses lignes de sections (dicts)."""
+    keys = set()
+    for skill in skills:
+        name, category = normalize(skill['name']), normalize(skill['category'])
+        if name:
+            keys.update({('skill', name), ('skill_level', (name, skill['level']))})
+        if category:
+            keys.add(('category', category))
+    for facet in ('city', 'country'):
+        value = normalize((contact or {}).get(facet))
+        if value:
+            keys.add((facet, value))
+    for language in languages:
+        name = normalize(language['name'])
+        if name:
+            keys.add(('language', name))
+    return keys
+
+
+def load_facet_keys(cv_ids, using):
+    """{cv_id: clés} des CVs `cv_ids` existant sur la base `using` (CVs archivés compris)."""
+    documents, archived = {}, set()
+    for cv_id, archived_at in CV.objects.using(using).filter(pk__in=cv_ids).values_list('pk', 'archived_at'):
+        documents[cv_id] = {'skills': [], 'contact': None, 'languages': []}
+        if archived_at is not None:
+            archived.add(cv_id)
+
+    # Logique : Les sections des CVs archivés ne sont plus dans les tables chaudes.
+    hot = [cv_id for cv_id in documents if cv_id not in archived]
+    for row in Skill.objects.using(using).filter(cv_id__in=hot).values('cv_id', 'name', 'category', 'level'):
+        documents[row['cv_id']]['skills'].append(row)
+    for row in Contact.objects.using(using).filter(cv_id__in=hot).values('cv_id', 'city', 'country'):
+        documents[row['cv_id']]['contact'] = row
+    for row in Language.objects.using(using).filter(cv_id__in=hot).values('cv_id', 'name'):
+        documents[row['cv_id']]['languages'].append(row)
+
+    for cv_id, document in CVArchive.objects.using(using).filter(cv_id__in=archived).values_list('cv_id', 'document'):
+        sections = read_archive_document(document)
+        documents[cv_id].update(
+            skills=sections.get('skills', []),
+            contact=next(iter(sections.get('contact', [])), None),
+            languages=sections.get('languages', []),
+        )
+
+    return {cv_id: document_keys(**document) for cv_id, document in documents.items()}
+
+
+# ====================================================================
+# 2. INDEX
+# ====================================================================
+
+class FacetIndex:
+    """Bitmaps de CVs par valeur de facette, avec la position de lecture de l'outbox de chaque shard."""
+
+    def __init__(self, bitmaps=None, documents=None, cursors=None, built_at=None):
+        # Logique : {facette: {valeur: Bitmap}} ; `documents` = tous les CVs indexés.
+        self._bitmaps = bitmaps or {}
+        self._documents = documents or Bitmap()
+        # Logique : Par shard, ID outbox sous lequel tous les événements sont déjà
+        # appliqués, et IDs appliqués au-delà (en attente de stabilisation).
+        self._cursors = cursors or {}
+        self._seen = {}
+        self.built_at = built_at or timezone.now()
+        self.refreshed_at = 0.0
+        self.snapshot_mtime = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    # --- Construction ---
+
+    @classmethod
+    def from_documents(cls, documents, **kwargs):
+        """Index construit d'un bloc à partir de couples (cv_id, clés)."""
+        ids, postings = array('q'), {}
+        for cv_id, keys in documents:
+            ids.append(cv_id)
+            for key in keys:
+                postings.setdefault(key, array('q')).append(cv_id)
+
+        bitmaps = {}
+        for (facet, value), cv_ids in postings.items():
+            bitmaps.setdefault(facet, {})[value] = Bitmap(cv_ids)
+        return cls(bitmaps, Bitmap(ids), **kwargs)
+
+    @classmethod
+    def build(cls, batch_size=None):
+        """Construit l'index depuis la base : tous les CVs de tous les shards, par lots."""
+        batch_size = batch_size or get_facet_setting('BATCH_SIZE')
+        built_at = timezone.now()
+        # Logique : Positions relevées AVANT la lecture : les modifications faites
+        # pendant la construction seront rejouées au premier rattrapage.
+        cursors = {alias: _get_settled_event_id(alias, built_at) for alias in get_cv_shards()}
+
+        def documents():
+            for alias in get_cv_shards():
+                cvs, last_id = CV.objects.using(alias).order_by('pk'), 0
+                while True:
+                    batch = list(cvs.filter(pk__gt=last_id).values_list('pk', flat=True)[:batch_size])
+                    if not batch:
+                        break
+                    yield from load_facet_keys(batch, alias).items()
+                    last_id = batch[-1]
+
+        return cls.from_documents(documents(), cursors=cursors, built_at=built_at)
+
+    # --- Mise à jour incrémentale ---
+
+    def apply(self, cv_ids, documents):
+        """Remplace les facettes des CVs `cv_ids` par `documents` ({cv_id: clés}) ; absents = supprimés."""
+        changed, added = Bitmap(cv_ids), {}
+        for cv_id, keys in documents.items():
+            for key in keys:
+                added.setdefault(key, []).append(cv_id)
+
+        # Logique : Les bitmaps sont remplacés, jamais modifiés : un résultat de
+        # requête en cours de pagination reste cohérent.
+        with self._lock:
+            for values in self._bitmaps.values():
+                for value, bitmap in list(values.items()):
+                    if bitmap.isdisjoint(changed):
+                        continue
+                    bitmap = bitmap - changed
+                    if bitmap:
+                        values[value] = bitmap
+                    else:
+                        del values[value]
+            for (facet, value), ids in added.items():
+                values = self._bitmaps.setdefault(facet, {})
+                values[value] = values[value] | Bitmap(ids) if value in values else Bitmap(ids)
+            self._documents = (self._documents - changed) | Bitmap(documents)
+
+    def catch_up(self):
+        """Relit en base les CVs modifiés d'après l'outbox de chaque shard. Retourne leur nombre."""
+        batch_size = get_facet_setting('BATCH_SIZE')
+        settle = timedelta(seconds=get_facet_setting('SETTLE_SECONDS'))
+        refreshed = 0
+        for alias in get_cv_shards():
+            cursor, seen = self._cursors.get(alias, 0), self._seen.setdefault(alias, set())
+            now = timezone.now()
+            events = list(
+                OutboxEvent.objects.using(alias)
+                .filter(_facet_events_filter(), pk__gt=cursor)
+                .order_by('pk')
+                .values_list('pk', 'aggregate_id', 'created_at')
+            )
+            changed = sorted({aggregate_id for pk, aggregate_id, _created in events if pk not in seen})
+            for batch in _chunked(changed, batch_size):
+                self.apply(batch, load_facet_keys(batch, alias))
+            seen.update(pk for pk, _aggregate_id, _created in events)
+            refreshed += len(changed)
+
+            # Logique : Un ID outbox est attribué à l'insertion, mais visible au commit :
+            # un événement d'ID inférieur peut apparaître après un ID supérieur. On ne
+            # fait avancer le curseur que sous les événements plus vieux que
+            # SETTLE_SECONDS (aucune transaction n'est supposée durer aussi longtemps) ;
+            # au-delà, `seen` évite de relire deux fois le même événement.
+            settled = [pk for pk, _aggregate_id, created_at in events if created_at < now - settle]
+            if settled:
+                self._cursors[alias] = max(settled)
+                seen.difference_update([pk for pk in seen if pk <= self._cursors[alias]])
+
+        self.refreshed_at = time.monotonic()
+        return refreshed
+
+    def maybe_refresh(self):
+        """Rattrape l'outbox si le dernier rattrapage date de plus de REFRESH_INTERVAL (un seul thread à la fois)."""
+        if time.monotonic() - self.refreshed_at < get_facet_setting('REFRESH_INTERVAL'):
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self.catch_up()
+        finally:
+            self._refresh_lock.release()
+
+    # --- Requêtes ---
+
+    def query(self, clauses):
+        """CVs satisfaisant toutes les clauses (chacune : liste de clés en OU). Sans clause : tous les CVs."""
+        start = time.perf_counter()
+        with self._lock:
+            if not clauses:
+                return self._documents
+            resolved = [
+                [self._bitmaps[facet][value] for facet, value in keys if value in self._bitmaps.get(facet, {})]
+                for keys in clauses
+            ]
+        # Logique : On part de la clause la plus sélective ; les suivantes sont
+        # intersectées valeur par valeur avec le résultat déjà réduit
+        # ((A | B) & R = (A & R) | (B & R)), sans construire leur union complète.
+        resolved.sort(key=lambda bitmaps: sum(len(bitmap) for bitmap in bitmaps))
+        matches = Bitmap.union(*resolved[0])
+        for bitmaps in resolved[1:]:
+            if not matches:
+                break
+            matches = Bitmap.union(*(bitmap & matches for bitmap in bitmaps))
+        metrics.observe('cv_facet_query_seconds', time.perf_counter() - start)
+        return matches
+
+    def count_values(self, matches, facet, limit=10):
+        """Les `limit` valeurs de `facet` les plus fréquentes parmi `matches`, avec leur nombre de CVs."""
+        with self._lock:
+            unfiltered = matches is self._documents
+            candidates = [(len(bitmap), value, bitmap) for value, bitmap in self._bitmaps.get(facet, {}).items()]
+        # Logique : Par taille décroissante : dès qu'une valeur compte moins de CVs
+        # au total que le plus petit compte retenu, les suivantes aussi.
+        candidates.sort(key=operator.itemgetter(0), reverse=True)
+        best = []
+        for size, value, bitmap in candidates:
+            if len(best) == limit and size <= best[0][0]:
+                break
+            count = size if unfiltered else matches.intersection_count(bitmap)
+            if not count:
+                continue
+            if len(best) < limit:
+                heapq.heappush(best, (count, value))
+            elif count > best[0][0]:
+                heapq.heapreplace(best, (count, value))
+        return [{'value': value, 'count': count} for count, value in sorted(best, reverse=True)]
+
+    def stats(self):
+        with self._lock:
+            bitmaps = [bitmap for values in self._bitmaps.values() for bitmap in values.values()]
+            return {
+                'cvs': len(self._documents),
+                'values': {facet: len(values) for facet, values in self._bitmaps.items()},
+                'postings': sum(len(bitmap) for bitmap in bitmaps),
+                'bytes': sum(bitmap.size_in_bytes() for bitmap in bitmaps),
+            }
+
+    # --- Instantané ---
+
+    def save(self, path):
+        """Écrit l'index (pickle) dans `path`, de façon atomique pour les processus qui le relisent."""
+        with self._lock:
+            state = {
+                'bitmaps': self._bitmaps,
+                'documents': self._documents,
+                'cursors': self._cursors,
+                'built_at': self.built_at,
+            }
+            data = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as handle:
+            handle.write(data)
+        os.replace(temporary, path)
+        return len(data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as handle:
+            index = cls(**pickle.load(handle))
+        index.snapshot_mtime = os.path.getmtime(path)
+        return index
+
+
+def _facet_events_filter():
+    return reduce(operator.or_, (Q(event_type__startswith=prefix) for prefix in FACET_EVENT_PREFIXES))
+
+
+def _get_settled_event_id(alias, now):
+    """Plus grand ID outbox antérieur à `now - SETTLE_SECONDS` (parcours de l'index de clé primaire à rebours)."""
+    settled_before = now - timedelta(seconds=get_facet_setting('SETTLE_SECONDS'))
+    return (
+        OutboxEvent.objects.using(alias)
+        .filter(created_at__lt=settled_before)
+        .order_by('-pk')
+        .values_list('pk', flat=True)
+        .first()
+    ) or 0
+
+
+# ====================================================================
+# 3. INDEX DU PROCESSUS
+# ====================================================================
+
+class FacetIndexUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "L'index de recherche à facettes est en cours de chargement. Réessayez dans quelques instants."
+    default_code = 'facet_index_loading'
+    wait = 5
+
+
+_index = None
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def _load_index():
+    global _index
+    path = get_facet_setting('SNAPSHOT_PATH')
+    start = time.perf_counter()
+    try:
+        if path and os.path.exists(path):
+            index = FacetIndex.load(path)
+            index.catch_up()
+        else:
+            index = FacetIndex.build()
+    except Exception:
+        logger.exception("Chargement de l'index à facettes impossible.")
+        return
+    finally:
+        # Logique : Thread d'arrière-plan : on rend ses connexions au pool.
+        connections.close_all()
+    _index = index
+    logger.info(f"Index à facettes prêt en {time.perf_counter() - start:.1f}s ({index.stats()['cvs']} CVs).")
+
+
+def _snapshot_is_newer(index):
+    path = get_facet_setting('SNAPSHOT_PATH')
+    if not path or not os.path.exists(path):
+        return False
+    return index.snapshot_mtime is None or os.path.getmtime(path) > index.snapshot_mtime
+
+
+def get_facet_index():
+    """
+    Index du processus, rattrapé sur l'outbox si besoin. Lève
+    `FacetIndexUnavailable` (503) tant que le premier chargement n'est pas
+    terminé. Un nouvel instantané est chargé en arrière-plan ; l'index
+    courant continue de servir en attendant.
+    """
+    global _loader
+    index = _index
+    if index is None or _snapshot_is_newer(index):
+        with _loader_lock:
+            if _loader is None or not _loader.is_alive():
+                # Logique : Un thread neuf ne reçoit pas le contexte de la requête (échéance, shard).
+                _loader = threading.Thread(target=_load_index, name='cv-facet-index', daemon=True)
+                _loader.start()
+    if index is None:
+        raise FacetIndexUnavailable()
+    index.maybe_refresh()
+    return index
+
+
+@metrics.register_collector
+def collect_facet_index_metrics():
+    if _index is None:
+        return
+    stats = _index.stats()
+    metrics.set_gauge('cv_facet_index_cvs', stats['cvs'])
+    metrics.set_gauge('cv_facet_index_bytes', stats['bytes'])
+
+
+# ====================================================================
+# 4. PARAMÈTRES DE REQUÊTE ET RÉSULTATS
+# ====================================================================
+
+class InvalidFacetFilter(ValueError):
+
+    def __init__(self, param, message):
+        super().__init__(message)
+        self.param = param
+
+
+def _parse_level_range(value):
+    name, separator, bounds = value.rpartition(':')
+    low, _dash, high = bounds.partition('-')
+    try:
+        low, high = int(low), int(high) if high else MAX_SKILL_LEVEL
+    except ValueError:
+        low = high = None
+    if not separator or not normalize(name) or low is None:
+        raise InvalidFacetFilter('skill_level', "Format attendu : compétence:min ou compétence:min-max.")
+    if not 0 <= low <= high <= MAX_SKILL_LEVEL:
+        raise InvalidFacetFilter('skill_level', f"Les niveaux vont de 0 à {MAX_SKILL_LEVEL}.")
+    return [('skill_level', (normalize(name), level)) for level in range(low, high + 1)]
+
+
+def parse_filters(params):
+    """
+    Clauses de la requête (QueryDict) : une clause par paramètre (répétable),
+    valeurs séparées par « | » en OU. `skill_level` : « compétence:min » ou
+    « compétence:min-max ».
+    """
+    clauses = []
+    for facet in FILTERS:
+        for raw in params.getlist(facet):
+            values = [value for value in raw.split('|') if normalize(value)]
+            if not values:
+                raise InvalidFacetFilter(facet, "Valeur vide.")
+            if facet == 'skill_level':
+                clauses.append([key for value in values for key in _parse_level_range(value)])
+            else:
+                clauses.append([(facet, normalize(value)) for value in values])
+    return clauses
+
+
+def parse_requested_facets(params):
+    """Facettes dont compter les valeurs (paramètre `facets=city,language`)."""
+    names = [name.strip() for name in params.get('facets', '').split(',') if name.strip()]
+    unknown = sorted(set(names) - set(FACETS))
+    if unknown:
+        raise InvalidFacetFilter('facets', f"Facettes inconnues : {', '.join(unknown)}.")
+    return names
+
+
+class FacetResults:
+    """
+    CVs d'un bitmap de résultats, du plus récent (ID le plus grand) au plus
+    ancien, paginables par le paginateur Django/DRF : seuls les CVs de la
+    page sont lus, sur tous les shards.
+    """
+
+    def __init__(self, matches):
+        self.matches = matches
+
+    def count(self):
+        return len(self.matches)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        ids = self.matches.page(start, stop - start, reverse=True)
+        cvs = {}
+        for alias in get_cv_shards():
+            cvs.update((cv.pk, cv) for cv in CV.objects.using(alias).filter(pk__in=ids))
+        # Logique : Un CV supprimé depuis le dernier rattrapage est simplement omis.
+        return attach_owners([cvs[cv_id] for cv_id in ids if cv_id in cvs])
@@ -0,0 +1,30 @@
+# apps/cv_app/filters.py
+
+from django_filters import rest_framework as filters
+
+from .models import CV
+
+
+class CVFilter(filters.FilterSet):
+    """
+    Filtres de la liste des CVs sur les indicateurs de parcours (colonnes
+    indexées, voir apps/cv_app/career.py), par ex. :
+    /api/v1/cvs/?min_experience_months=24&currently_employed=true&max_gap_months=6
+    """
+
+    min_experience_months = filters.NumberFilter(field_name='experience_months', lookup_expr='gte')
+    max_experience_months = filters.NumberFilter(field_name='experience_months', lookup_expr='lte')
+    currently_employed = filters.BooleanFilter(method='filter_currently_employed')
+    min_gap_months = filters.NumberFilter(field_name='largest_gap_months', lookup_expr='gte')
+    max_gap_months = filters.NumberFilter(field_name='largest_gap_months', lookup_expr='lte')
+    education_ended_after = filters.DateFilter(field_name='latest_education_end', lookup_expr='gte')
+    education_ended_before = filters.DateFilter(field_name='latest_education_end', lookup_expr='lte')
+
+    class Meta:
+        model = CV
+        fields = ['current_position']
+
+    def filter_currently_employed(self, queryset, name, value):
+        if value:
+            return queryset.exclude(current_position='')
+        return queryset.filter(current_position='')
@@ -0,0 +1,63 @@
+# apps/cv_app/management/commands/archive_inactive_cvs.py
+
+from django.core.management.base import BaseCommand
+
+from apps.cv_app.archival import archive_batch, get_archivable_cvs, get_archive_stats
+from apps.cv_app.sharding import get_cv_shards
+
+
+class Command(BaseCommand):
+    help = "Déplace les sections des CVs inactifs vers l'archive froide compressée, par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12, help="Inactivité minimale (mois).")
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--max-batches', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true', help="Compte les CVs éligibles sans rien déplacer.")
+        parser.add_argument('--stats', action='store_true', help="Affiche uniquement les métriques d'archivage.")
+
+    def handle(self, *args, **options):
+        # Logique : Chaque shard est archivé indépendamment (transactions locales).
+        for alias in get_cv_shards():
+            self.stdout.write(f"Base « {alias} » :")
+            self.handle_shard(alias, options)
+
+    def handle_shard(self, using, options):
+        if options['stats']:
+            self.print_stats(using)
+            return
+
+        if options['dry_run']:
+            count = get_archivable_cvs(options['months'], using).count()
+            self.stdout.write(f"{count} CV(s) non modifié(s) depuis {options['months']} mois (avant filtre sur la dernière connexion).")
+            return
+
+        before = get_archive_stats(using)
+        total_cvs = total_rows = batches = 0
+        last_id = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            last_id, cvs, rows = archive_batch(options['months'], options['batch_size'], using, after_id=last_id)
+            if last_id is None:
+                break
+            batches += 1
+            total_cvs += cvs
+            total_rows += rows
+            self.stdout.write(f"Lot {batches} : {cvs} CV(s), {rows} ligne(s) déplacée(s).")
+
+        self.stdout.write(self.style.SUCCESS(f"{total_cvs} CV(s) archivé(s), {total_rows} ligne(s) retirée(s) des tables chaudes."))
+        self.print_stats(using, before)
+
+    def print_stats(self, using, before=None):
+        stats = get_archive_stats(using)
+        ratio = stats['compressed_bytes'] / stats['raw_bytes'] if stats['raw_bytes'] else 0
+        self.stdout.write(
+            f"Archives : {stats['archived_cvs']} CV(s), {stats['section_rows']} ligne(s), "
+            f"{stats['raw_bytes']} → {stats['compressed_bytes']} octets (ratio {ratio:.2f})."
+        )
+        for key, rows in stats['hot_rows'].items():
+            line = f"  {key}: {rows} ligne(s) chaude(s)"
+            if key in stats['table_bytes']:
+                line += f", {stats['table_bytes'][key]} octets"
+                if before and key in before['table_bytes']:
+                    line += f" (avant : {before['table_bytes'][key]})"
+            self.stdout.write(line)
@@ -0,0 +1,118 @@
+# apps/cv_app/management/commands/benchmark_async_reads.py
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+
+from apps.common.benchmarks import create_benchmark_user, delete_benchmark_user, percentiles
+from apps.users.tokens import ClaimsRefreshToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit (req/s) des lectures de CVs à forte concurrence : vue DRF servie en "
+        "WSGI (un thread par requête) contre vue asynchrone servie en ASGI (boucle d'événements)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64, help="Requêtes simultanées.")
+        parser.add_argument('--requests', type=int, default=2000, help="Requêtes par scénario.")
+        parser.add_argument('--cvs', type=int, default=5, help="CVs du compte synthétique.")
+        parser.add_argument('--sections', type=int, default=10, help="Expériences et compétences par CV.")
+        parser.add_argument('--host', default='localhost', help="En-tête Host (doit figurer dans ALLOWED_HOSTS).")
+
+    def handle(self, *args, **options):
+        user = create_benchmark_user(options['cvs'], options['sections'])
+        # Logique : Les requêtes passent par toute la pile (middlewares, authentification JWT).
+        authorization = f'Bearer {ClaimsRefreshToken.for_user(user).access_token}'
+        try:
+            scenarios = (
+                ('WSGI', 'vue DRF', '/api/v1/cvs/'),
+                ('ASGI', 'vue DRF', '/api/v1/cvs/'),
+                ('ASGI', 'vue async', '/api/v1/cvs/async/'),
+            )
+            for server, view, path in scenarios:
+                run = self.run_wsgi if server == 'WSGI' else self.run_asgi
+                latencies, statuses, elapsed = run(path, authorization, options)
+                self.report(f'{server} {view}', latencies, statuses, elapsed)
+        finally:
+            connections.close_all()
+            delete_benchmark_user(user)
+
+    def run_wsgi(self, path, authorization, options):
+        application = WSGIHandler()
+        environ = RequestFactory()._base_environ(
+            PATH_INFO=path, HTTP_HOST=options['host'], HTTP_AUTHORIZATION=authorization,
+        )
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split()[0]))
+
+        def request():
+            start = time.perf_counter()
+            response = application(dict(environ), start_response)
+            b''.join(response)
+            response.close()  # Logique : request_finished, la connexion retourne au pool.
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            latencies = list(executor.map(lambda _: request(), range(options['requests'])))
+        return latencies, statuses, time.perf_counter() - start
+
+    def run_asgi(self, path, authorization, options):
+        application = ASGIHandler()
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+            'headers': [(b'host', options['host'].encode()), (b'authorization', authorization.encode())],
+            'client': ('127.0.0.1', 50000), 'server': (options['host'], 80),
+        }
+        latencies, statuses = [], []
+
+        async def request():
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Logique : Le client ne se déconnecte jamais (Django écoute http.disconnect).
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    statuses.append(message['status'])
+
+            start = time.perf_counter()
+            await application(dict(scope), receive, send)
+            latencies.append(time.perf_counter() - start)
+
+        async def worker(remaining):
+            while remaining:
+                remaining.pop()
+                await request()
+
+        async def main():
+            remaining = list(range(options['requests']))
+            await asyncio.gather(*(worker(remaining) for _ in range(options['concurrency'])))
+
+        start = time.perf_counter()
+        asyncio.run(main())
+        return latencies, statuses, time.perf_counter() - start
+
+    def report(self, name, latencies, statuses, elapsed):
+        p50, p99 = percentiles(latencies, 50, 99)
+        errors = sum(1 for status in statuses if status != 200)
+        self.stdout.write(
+            f"{name:<16} {len(latencies) / elapsed:7.0f} req/s | p50 {p50:7.1f} ms  p99 {p99:7.1f} ms | "
+            f"réponses non 200 : {errors}"
+        )
@@ -0,0 +1,83 @@
+# apps/cv_app/management/commands/benchmark_cv_facets.py
+
+import random
+import time
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.http import QueryDict
+
+from apps.common.benchmarks import percentiles
+from apps.cv_app.facets import FacetIndex, document_keys, parse_filters
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure l'index à facettes sur des CVs synthétiques générés en mémoire (sans base) : "
+        "construction, taille des bitmaps et latence des requêtes ET/OU avec comptages."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cvs', type=int, default=1_000_000)
+        parser.add_argument('--skills', type=int, default=2000, help="Taille du vocabulaire de compétences.")
+        parser.add_argument('--repeat', type=int, default=50, help="Exécutions par requête.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+        index = FacetIndex.from_documents(self.generate(rng, options))
+        build = time.perf_counter() - start
+
+        stats = index.stats()
+        self.stdout.write(
+            f"{stats['cvs']} CVs indexés en {build:.1f}s | {sum(stats['values'].values())} valeurs | "
+            f"bitmaps {stats['bytes'] / 2**20:.1f} Mo (listes d'IDs 64 bits : {stats['postings'] * 8 / 2**20:.1f} Mo)"
+        )
+
+        scenarios = (
+            ('1 compétence', {'skill': ['compétence 0']}, []),
+            ('2 compétences (ET)', {'skill': ['compétence 0', 'compétence 1']}, []),
+            ('OU + ville', {'skill': ['compétence 2|compétence 3|compétence 4'], 'city': ['ville 0|ville 1']}, []),
+            ('niveau + pays + langue', {'skill_level': ['compétence 0:7-10'], 'country': ['pays 0'], 'language': ['langue 1']}, []),
+            ('ET + comptage villes', {'skill': ['compétence 0', 'compétence 1']}, ['city']),
+            ('tout + comptage compétences', {}, ['skill']),
+        )
+        for name, params, facets in scenarios:
+            clauses = parse_filters(QueryDict(urlencode(params, doseq=True)))
+            durations = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                matches = index.query(clauses)
+                total = len(matches)
+                for facet in facets:
+                    index.count_values(matches, facet)
+                durations.append(time.perf_counter() - start)
+            p50, p99 = percentiles(durations, 50, 99)
+            self.stdout.write(f"{name:<28} {total:>8} CVs | p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+
+    def generate(self, rng, options):
+        """Couples (cv_id, clés) ; fréquences des valeurs en loi de Zipf, comme un vrai vivier de CVs."""
+        def vocabulary(label, size):
+            values = [f'{label} {rank}' for rank in range(size)]
+            return values, [1 / (rank + 1) for rank in range(size)]
+
+        skills, skill_weights = vocabulary('compétence', options['skills'])
+        cities, city_weights = vocabulary('ville', 500)
+        countries, country_weights = vocabulary('pays', 50)
+        languages, language_weights = vocabulary('langue', 30)
+        categories = ['TECH', 'SOFT', 'TOOL']
+
+        for cv_id in range(1, options['cvs'] + 1):
+            yield cv_id, document_keys(
+                skills=[
+                    {'name': name, 'category': rng.choice(categories), 'level': rng.randint(0, 10)}
+                    for name in rng.choices(skills, skill_weights, k=rng.randint(3, 15))
+                ],
+                contact={
+                    'city': rng.choices(cities, city_weights)[0],
+                    'country': rng.choices(countries, country_weights)[0],
+                },
+                languages=[{'name': name} for name in rng.choices(languages, language_weights, k=rng.randint(1, 3))],
+            )
+
@@ -0,0 +1,60 @@
+# apps/cv_app/management/commands/benchmark_outbox.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.cv_app.models import OutboxEvent
+from apps.cv_app.outbox import OutboxRelay, register_handler, unregister_handler
+
+BENCHMARK_EVENT_TYPE = 'benchmark.noop'
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit du relais outbox (événements/s) sur des événements synthétiques."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--aggregates', type=int, default=500, help="Nombre de CVs synthétiques.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        total, aggregates = options['events'], options['aggregates']
+        events = OutboxEvent.objects.using(options['database'])
+
+        # Logique : IDs négatifs pour ne jamais croiser de vrais CVs.
+        events.bulk_create(
+            [
+                OutboxEvent(aggregate_id=-(i % aggregates) - 1, event_type=BENCHMARK_EVENT_TYPE, payload={'seq': i})
+                for i in range(total)
+            ],
+            batch_size=1000,
+        )
+
+        last_seen = {}
+        out_of_order = 0
+
+        def handler(event):
+            nonlocal out_of_order
+            if event.payload['seq'] < last_seen.get(event.aggregate_id, -1):
+                out_of_order += 1
+            last_seen[event.aggregate_id] = event.payload['seq']
+
+        register_handler(BENCHMARK_EVENT_TYPE)(handler)
+        try:
+            start = time.perf_counter()
+            delivered = OutboxRelay(
+                batch_size=options['batch_size'], event_types=[BENCHMARK_EVENT_TYPE], using=options['database'],
+            ).drain()
+            elapsed = time.perf_counter() - start
+        finally:
+            unregister_handler(handler)
+            events.filter(event_type=BENCHMARK_EVENT_TYPE).delete()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{delivered} événements livrés en {elapsed:.2f}s "
+                f"({delivered / elapsed:.0f} évt/s), {out_of_order} hors ordre."
+            )
+        )
@@ -0,0 +1,47 @@
+# apps/cv_app/management/commands/rebalance_cv_shards.py
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cv_app.sharding import get_cv_shards, get_misplaced_owners, init_shard_sequences, move_owner
+
+
+class Command(BaseCommand):
+    help = "Déplace les CVs des propriétaires mal placés vers le shard donné par l'anneau de hachage."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--init-sequences', action='store_true', help="Recale les séquences d'IDs entrelacées puis quitte.")
+        parser.add_argument('--owner', type=int, action='append', help="Limite le rééquilibrage à ce propriétaire (répétable).")
+        parser.add_argument('--to', dest='target', default=None, help="Shard cible forcé (avec --owner).")
+        parser.add_argument('--limit', type=int, default=None, help="Nombre maximal de propriétaires déplacés.")
+        parser.add_argument('--dry-run', action='store_true', help="Liste les déplacements sans rien copier.")
+
+    def handle(self, *args, **options):
+        if options['init_sequences']:
+            init_shard_sequences(settings.CV_SHARD_ID_STRIDE)
+            self.stdout.write(self.style.SUCCESS(f"Séquences recalées (pas de {settings.CV_SHARD_ID_STRIDE}) sur {', '.join(get_cv_shards())}."))
+            return
+
+        target = options['target']
+        if target is not None:
+            if not options['owner']:
+                raise CommandError("--to nécessite --owner.")
+            if target not in get_cv_shards():
+                raise CommandError(f"Shard inconnu : {target}")
+            moves = ((owner_id, None, target) for owner_id in options['owner'])
+        else:
+            owners = set(options['owner'] or [])
+            moves = (move for move in get_misplaced_owners() if not owners or move[0] in owners)
+
+        moved = 0
+        for owner_id, source, destination in moves:
+            if options['limit'] is not None and moved >= options['limit']:
+                break
+            if options['dry_run']:
+                self.stdout.write(f"Propriétaire {owner_id} : {source} → {destination}")
+            else:
+                rows = move_owner(owner_id, destination)
+                self.stdout.write(f"Propriétaire {owner_id} → {destination} : {rows} ligne(s) copiée(s).")
+            moved += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{moved} propriétaire(s) {'à déplacer' if options['dry_run'] else 'déplacé(s)'}."))
@@ -0,0 +1,37 @@
+# apps/cv_app/management/commands/rebuild_cv_facets.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.cv_app.facets import FacetIndex, get_facet_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruit l'index à facettes depuis tous les shards et l'écrit dans l'instantané "
+        "FACET_INDEX['SNAPSHOT_PATH'] : les workers le rechargent puis rattrapent l'outbox."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help="Fichier de l'instantané (défaut : FACET_INDEX['SNAPSHOT_PATH']).")
+        parser.add_argument('--batch-size', type=int, default=None, help="CVs lus par lot.")
+
+    def handle(self, *args, **options):
+        path = options['output'] or get_facet_setting('SNAPSHOT_PATH')
+        if not path:
+            raise CommandError("Aucun instantané configuré : définissez FACET_INDEX_SNAPSHOT_PATH ou --output.")
+
+        start = time.perf_counter()
+        index = FacetIndex.build(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - start
+        size = index.save(path)
+
+        stats = index.stats()
+        values = ', '.join(f"{facet} {count}" for facet, count in sorted(stats['values'].items()))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{stats['cvs']} CVs indexés en {elapsed:.1f}s ({values or 'aucune valeur'}) ; "
+                f"bitmaps {stats['bytes'] / 1024:.0f} Ko, instantané {size / 1024:.0f} Ko -> {path}"
+            )
+        )
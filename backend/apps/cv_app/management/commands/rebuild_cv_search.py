@@ -0,0 +1,37 @@
+# apps/cv_app/management/commands/rebuild_cv_search.py
+
+from django.core.management.base import BaseCommand
+
+from apps.cv_app.models import CV
+from apps.cv_app.search import refresh_search_vectors, supports_full_text_search
+from apps.cv_app.sharding import get_cv_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Calcule le document plein texte (search_vector) des CVs, par lots : "
+        "après la migration 0008, ou pour réparer l'index."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--missing', action='store_true', help="Seulement les CVs sans document.")
+
+    def handle(self, *args, **options):
+        for alias in get_cv_shards():
+            if not supports_full_text_search(alias):
+                self.stdout.write(f"Base « {alias} » : recherche plein texte non supportée, ignorée.")
+                continue
+            cvs = CV.objects.using(alias).filter(archived_at__isnull=True).order_by('pk')
+            if options['missing']:
+                cvs = cvs.filter(search_vector__isnull=True)
+
+            # Logique : Pagination par clé (pk > dernier traité), une transaction courte par lot.
+            total, last_id = 0, 0
+            while True:
+                batch = list(cvs.filter(pk__gt=last_id).values_list('pk', flat=True)[:options['batch_size']])
+                if not batch:
+                    break
+                total += refresh_search_vectors(batch, alias)
+                last_id = batch[-1]
+            self.stdout.write(self.style.SUCCESS(f"Base « {alias} » : {total} document(s) recalculé(s)."))
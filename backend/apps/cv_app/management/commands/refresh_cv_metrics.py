@@ -0,0 +1,37 @@
+# apps/cv_app/management/commands/refresh_cv_metrics.py
+
+from django.core.management.base import BaseCommand
+
+from apps.cv_app.career import get_open_ended_cvs, refresh_career_metrics
+from apps.cv_app.completeness import recount_completeness
+from apps.cv_app.models import CV
+from apps.cv_app.sharding import get_cv_shards
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule les indicateurs dérivés des CVs (parcours, score de complétude), "
+        "par lots : après les migrations 0009 et 0010, ou pour les réparer. Avec "
+        "--current (à planifier chaque mois), seulement le parcours des CVs ayant un poste en cours."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--current', action='store_true', help="Seulement les CVs ayant un poste en cours.")
+
+    def handle(self, *args, **options):
+        for alias in get_cv_shards():
+            cvs = get_open_ended_cvs(alias) if options['current'] else CV.objects.using(alias)
+            cvs = cvs.order_by('pk')
+
+            # Logique : Pagination par clé (pk > dernier traité), une transaction courte par lot.
+            total, last_id = 0, 0
+            while True:
+                batch = list(cvs.filter(pk__gt=last_id).values_list('pk', flat=True)[:options['batch_size']])
+                if not batch:
+                    break
+                total += refresh_career_metrics(batch, alias)
+                if not options['current']:
+                    recount_completeness(batch, alias)
+                last_id = batch[-1]
+            self.stdout.write(self.style.SUCCESS(f"Base « {alias} » : {total} CV(s) recalculé(s)."))
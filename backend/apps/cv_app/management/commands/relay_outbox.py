@@ -0,0 +1,43 @@
+# apps/cv_app/management/commands/relay_outbox.py
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.cv_app.outbox import OutboxRelay, load_configured_handlers, purge_processed
+
+
+class Command(BaseCommand):
+    help = "Relaie les événements de l'outbox CV vers les handlers enregistrés."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Vide la file puis s'arrête.")
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--database', default='default', help="Base (shard) dont la file est relayée.")
+        parser.add_argument('--interval', type=float, default=None, help="Pause (s) quand la file est vide.")
+        parser.add_argument(
+            '--purge-days', type=int, default=None,
+            help="Supprime d'abord les événements traités depuis plus de N jours.",
+        )
+
+    def handle(self, *args, **options):
+        load_configured_handlers()
+        relay = OutboxRelay(batch_size=options['batch_size'], using=options['database'])
+
+        if options['purge_days'] is not None:
+            deleted = purge_processed(
+                timezone.now() - timedelta(days=options['purge_days']), using=options['database']
+            )
+            self.stdout.write(f"{deleted} événement(s) traité(s) purgé(s).")
+
+        if options['once']:
+            delivered = relay.drain()
+            self.stdout.write(self.style.SUCCESS(f"{delivered} événement(s) livré(s)."))
+            return
+
+        self.stdout.write("Relais outbox démarré (Ctrl+C pour arrêter).")
+        try:
+            relay.run_forever(poll_interval=options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Relais outbox arrêté.")
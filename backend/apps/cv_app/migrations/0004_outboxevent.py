@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:50
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0003_alter_education_end_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('aggregate_id', models.BigIntegerField(verbose_name='ID du CV')),
+                ('event_type', models.CharField(max_length=100, verbose_name="Type d'événement")),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'verbose_name': 'Événement Outbox',
+                'verbose_name_plural': 'Événements Outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('processed_at__isnull', True)), fields=['id'], name='outbox_pending_idx'), models.Index(fields=['aggregate_id', 'id'], name='outbox_aggregate_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0004_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='archived_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='CVArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('document', models.BinaryField()),
+                ('section_rows', models.PositiveIntegerField(default=0, verbose_name='Lignes déplacées')),
+                ('raw_size', models.PositiveIntegerField(default=0, verbose_name='Taille JSON (octets)')),
+                ('compressed_size', models.PositiveIntegerField(default=0, verbose_name='Taille compressée (octets)')),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('cv', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='archive', to='cv_app.cv')),
+            ],
+            options={
+                'verbose_name': 'Archive de CV',
+                'verbose_name_plural': 'Archives de CV',
+            },
+        ),
+    ]
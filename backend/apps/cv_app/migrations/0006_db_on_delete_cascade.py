@@ -0,0 +1,26 @@
+# Pose ON DELETE CASCADE côté PostgreSQL sur les clés étrangères des CVs,
+# pour les suppressions rapides de apps/common/db.py (fast_delete).
+
+from django.db import migrations
+
+from apps.common.db import DatabaseOnDelete
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0005_cv_archived_at_cvarchive'),
+    ]
+
+    operations = [
+        DatabaseOnDelete([
+            ('cv_app_cv', 'owner_id', 'CASCADE'),
+            ('cv_app_contact', 'cv_id', 'CASCADE'),
+            ('cv_app_experience', 'cv_id', 'CASCADE'),
+            ('cv_app_education', 'cv_id', 'CASCADE'),
+            ('cv_app_skill', 'cv_id', 'CASCADE'),
+            ('cv_app_language', 'cv_id', 'CASCADE'),
+            ('cv_app_interest', 'cv_id', 'CASCADE'),
+            ('cv_app_cvarchive', 'cv_id', 'CASCADE'),
+        ]),
+    ]
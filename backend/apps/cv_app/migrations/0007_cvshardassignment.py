@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def register_existing_owners(apps, schema_editor):
+    """Les propriétaires existants restent sur `default` : on les inscrit à l'annuaire."""
+    CV = apps.get_model('cv_app', 'CV')
+    CVShardAssignment = apps.get_model('cv_app', 'CVShardAssignment')
+    db_alias = schema_editor.connection.alias
+    owner_ids = CV.objects.using(db_alias).values_list('owner_id', flat=True).distinct()
+    CVShardAssignment.objects.using(db_alias).bulk_create(
+        [CVShardAssignment(owner_id=owner_id, shard='default') for owner_id in owner_ids],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0006_db_on_delete_cascade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVShardAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('owner_id', models.BigIntegerField(unique=True)),
+                ('shard', models.CharField(max_length=100)),
+                ('locked', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Affectation de shard',
+                'verbose_name_plural': 'Affectations de shard',
+            },
+        ),
+        migrations.AlterField(
+            model_name='cv',
+            name='owner',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='cvs', to=settings.AUTH_USER_MODEL, verbose_name='Propriétaire'),
+        ),
+        migrations.RunPython(
+            register_existing_owners,
+            migrations.RunPython.noop,
+            hints={'model_name': 'cvshardassignment'},
+        ),
+    ]
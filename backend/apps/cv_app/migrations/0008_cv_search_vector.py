@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from apps.common.db import PostgreSQLOnlySQL
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0007_cvshardassignment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        # Logique : Index GIN hors état des modèles (GinIndex n'existe pas sous SQLite).
+        # Les documents existants se calculent avec `rebuild_cv_search`.
+        PostgreSQLOnlySQL(
+            'CREATE INDEX cv_app_cv_search_vector_gin ON cv_app_cv USING gin (search_vector)',
+            'DROP INDEX IF EXISTS cv_app_cv_search_vector_gin',
+        ),
+    ]
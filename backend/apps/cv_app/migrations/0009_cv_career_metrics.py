@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0008_cv_search_vector'),
+    ]
+
+    # Logique : Les indicateurs des CVs existants se calculent avec `refresh_cv_metrics`.
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='current_position',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='Poste actuel'),
+        ),
+        migrations.AddField(
+            model_name='cv',
+            name='experience_months',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name="Mois d'expérience"),
+        ),
+        migrations.AddField(
+            model_name='cv',
+            name='largest_gap_months',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False, verbose_name='Plus longue interruption (mois)'),
+        ),
+        migrations.AddField(
+            model_name='cv',
+            name='latest_education_end',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Fin de la dernière formation'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0009_cv_career_metrics'),
+    ]
+
+    # Logique : Les scores des CVs existants se calculent avec `refresh_cv_metrics`.
+    operations = [
+        migrations.AddField(
+            model_name='cv',
+            name='completeness',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, verbose_name='Complétude (%)'),
+        ),
+        migrations.AddField(
+            model_name='cv',
+            name='section_counts',
+            field=models.JSONField(default=dict, editable=False, verbose_name='Compteurs par section'),
+        ),
+    ]
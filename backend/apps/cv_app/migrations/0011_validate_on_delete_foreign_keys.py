@@ -0,0 +1,25 @@
+# Valide les clés étrangères posées NOT VALID par 0006 (voir apps/common/db.py),
+# dans une transaction distincte et sans verrou exclusif.
+
+from django.db import migrations
+
+from apps.common.db import ValidateForeignKeys
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cv_app', '0010_cv_completeness'),
+    ]
+
+    operations = [
+        ValidateForeignKeys([
+            ('cv_app_contact', 'cv_id'),
+            ('cv_app_experience', 'cv_id'),
+            ('cv_app_education', 'cv_id'),
+            ('cv_app_skill', 'cv_id'),
+            ('cv_app_language', 'cv_id'),
+            ('cv_app_interest', 'cv_id'),
+            ('cv_app_cvarchive', 'cv_id'),
+        ]),
+    ]
@@ -1,18 +1,49 @@
-from django.db import models
+from django.contrib.postgres.search import SearchVectorField
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
 from apps.users.models import User
 
+
+class OutboxTrackedModel(models.Model):
+    """
+    Modèle dont chaque `save()` enregistre son événement outbox dans la même
+    transaction que l'écriture (voir apps/cv_app/outbox.py). Les suppressions
+    passent par le signal post_delete, émis dans la transaction du Collector.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        from . import outbox
+
+        created = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            if not outbox.is_muted():
+                outbox.record_event(self, 'created' if created else 'updated', using=using)
+
+
 # ====================================================================
 # 1. MODÈLE PRINCIPAL : CV
 # ====================================================================
 
-class CV(models.Model):
+class CV(OutboxTrackedModel):
     """Représente le document CV principal, lié à un utilisateur."""
     
+    # Logique : Sans contrainte en base, car le CV peut vivre sur un autre shard
+    # que l'utilisateur (voir apps/cv_app/sharding.py). PostgreSQL ne supprime
+    # donc plus les CVs avec leur propriétaire (ON DELETE CASCADE de la migration
+    # 0006, retiré par 0007) : `User.delete()` les supprime sur chaque shard
+    # (signal pre_delete, apps/cv_app/signals.py) et `purge_inactive_users`
+    # par `delete_cvs`. Les sections gardent leur cascade vers le CV.
     owner = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
         related_name='cvs',
-        verbose_name="Propriétaire"
+        verbose_name="Propriétaire",
+        db_constraint=False
     )
     
     title = models.CharField(max_length=255, default="Mon CV Professionnel")
@@ -22,6 +53,26 @@ class CV(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Logique : Renseigné quand les sections du CV ont été déplacées dans CVArchive
+    # (voir apps/cv_app/archival.py). Remis à None à la réhydratation.
+    archived_at = models.DateTimeField(blank=True, null=True, db_index=True)
+
+    # Logique : Document plein texte pondéré (titre, résumé, sections), tenu à
+    # jour par apps/cv_app/search.py ; index GIN posé par la migration 0008.
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+
+    # Logique : Indicateurs de parcours dérivés des expériences et formations,
+    # recalculés au commit par apps/cv_app/career.py ; indexés pour les filtres.
+    experience_months = models.PositiveIntegerField(default=0, editable=False, db_index=True, verbose_name="Mois d'expérience")
+    current_position = models.CharField(max_length=255, blank=True, default='', editable=False, db_index=True, verbose_name="Poste actuel")
+    largest_gap_months = models.PositiveIntegerField(default=0, editable=False, db_index=True, verbose_name="Plus longue interruption (mois)")
+    latest_education_end = models.DateField(blank=True, null=True, editable=False, db_index=True, verbose_name="Fin de la dernière formation")
+
+    # Logique : Score de complétude (0 à 100) et compteurs par section dont il
+    # dérive, tenus à jour section par section par apps/cv_app/completeness.py.
+    completeness = models.PositiveSmallIntegerField(default=0, editable=False, db_index=True, verbose_name="Complétude (%)")
+    section_counts = models.JSONField(default=dict, editable=False, verbose_name="Compteurs par section")
+
     class Meta:
         verbose_name = "CV"
         verbose_name_plural = "CVs"
@@ -34,7 +85,7 @@ class CV(models.Model):
 # 2. MODÈLE DE CONTACT
 # ====================================================================
 
-class Contact(models.Model):
+class Contact(OutboxTrackedModel):
     """Contient toutes les informations de contact pour un CV donné."""
     
     cv = models.OneToOneField(
@@ -84,7 +135,7 @@ class Contact(models.Model):
 # 3. EXPÉRIENCES PROFESSIONNELLES
 # ====================================================================
 
-class Experience(models.Model):
+class Experience(OutboxTrackedModel):
     """Expérience professionnelle liée à un CV."""
     
     cv = models.ForeignKey(
@@ -117,7 +168,7 @@ class Experience(models.Model):
 # 4. ÉDUCATION / FORMATION
 # ====================================================================
 
-class Education(models.Model):
+class Education(OutboxTrackedModel):
     """Formation ou diplôme lié à un CV."""
     
     cv = models.ForeignKey(
@@ -150,7 +201,7 @@ SKILL_TYPE_CHOICES = [
     ('TOOL', 'Outil/Autre'),
 ]
 
-class Skill(models.Model):
+class Skill(OutboxTrackedModel):
     """Compétence technique ou humaine liée à un CV."""
     
     cv = models.ForeignKey(
@@ -182,7 +233,7 @@ class Skill(models.Model):
 # 6. LANGUES
 # ====================================================================
 
-class Language(models.Model):
+class Language(OutboxTrackedModel):
     """Langue parlée liée à un CV."""
     
     cv = models.ForeignKey(
@@ -209,7 +260,7 @@ class Language(models.Model):
 # 7. CENTRES D'INTÉRÊT
 # ====================================================================
 
-class Interest(models.Model):
+class Interest(OutboxTrackedModel):
     """Centre d'intérêt lié à un CV."""
     
     cv = models.ForeignKey(
@@ -224,4 +275,102 @@ class Interest(models.Model):
         verbose_name_plural = "Centres d'Intérêt"
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+# ====================================================================
+# 8. OUTBOX TRANSACTIONNELLE (Flux d'événements de modification)
+# ====================================================================
+
+class OutboxEvent(models.Model):
+    """
+    Événement de modification d'un CV ou d'une de ses sections.
+    Écrit dans la MÊME transaction que la modification, puis relayé
+    vers les consommateurs (indexation, pré-rendu PDF, analytics) par
+    le relais `apps.cv_app.outbox.OutboxRelay`.
+    """
+
+    # Logique : Tous les événements d'un même CV partagent le même agrégat,
+    # ce qui permet au relais de garantir l'ordre de livraison par CV.
+    aggregate_id = models.BigIntegerField(verbose_name="ID du CV")
+    event_type = models.CharField(max_length=100, verbose_name="Type d'événement")
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    # Logique : Prochain essai (attente après un échec, ou réservation par un relais en cours).
+    next_attempt_at = models.DateTimeField(blank=True, null=True)
+    # Lettre morte : abandonné après MAX_ATTEMPTS échecs (processed_at aussi renseigné)
+    dead_lettered_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Événement Outbox"
+        verbose_name_plural = "Événements Outbox"
+        indexes = [
+            # Logique : Index partiel, ne couvre que les événements en attente
+            # (le relais ne lit jamais les événements déjà traités).
+            models.Index(
+                fields=['id'],
+                name='outbox_pending_idx',
+                condition=models.Q(processed_at__isnull=True),
+            ),
+            models.Index(fields=['aggregate_id', 'id'], name='outbox_aggregate_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} (CV {self.aggregate_id})"
+
+
+# ====================================================================
+# 9. ARCHIVES FROIDES (CVs inactifs)
+# ====================================================================
+
+class CVArchive(models.Model):
+    """
+    Document compressé (JSON + zlib) contenant toutes les sections d'un CV
+    archivé. Les lignes correspondantes ont été retirées des tables de sections.
+    """
+
+    cv = models.OneToOneField(
+        CV,
+        on_delete=models.CASCADE,
+        related_name='archive'
+    )
+    document = models.BinaryField()
+
+    # Métriques de réduction des tables chaudes
+    section_rows = models.PositiveIntegerField(default=0, verbose_name="Lignes déplacées")
+    raw_size = models.PositiveIntegerField(default=0, verbose_name="Taille JSON (octets)")
+    compressed_size = models.PositiveIntegerField(default=0, verbose_name="Taille compressée (octets)")
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archive de CV"
+        verbose_name_plural = "Archives de CV"
+
+    def __str__(self):
+        return f"Archive du CV {self.cv_id}"
+
+
+# ====================================================================
+# 10. ANNUAIRE DE SHARDING (Toujours sur la base `default`)
+# ====================================================================
+
+class CVShardAssignment(models.Model):
+    """Base (alias de settings.DATABASES) hébergeant les données CV d'un utilisateur."""
+
+    owner_id = models.BigIntegerField(unique=True)
+    shard = models.CharField(max_length=100)
+    # Logique : Vrai pendant un déplacement par `rebalance_cv_shards` (écritures refusées).
+    locked = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Affectation de shard"
+        verbose_name_plural = "Affectations de shard"
+
+    def __str__(self):
+        return f"Utilisateur {self.owner_id} -> {self.shard}"
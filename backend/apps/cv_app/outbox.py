@@ -0,0 +1,318 @@
+# apps/cv_app/outbox.py
+
+"""
+Outbox transactionnelle pour les modifications de CV.
+
+- `record_event()` écrit un `OutboxEvent` dans la transaction courante :
+  `OutboxTrackedModel.save()` (apps/cv_app/models.py) ouvre une transaction
+  autour de l'écriture et de son événement ; les suppressions passent par
+  le signal post_delete, émis dans la transaction du Collector.
+- Les écritures en masse (`QuerySet.update()`, `bulk_create()`,
+  `bulk_update()`, `fast_delete()`) ne produisent aucun événement : elles
+  doivent publier les leurs avec `build_event()` dans la même transaction
+  (voir `delete_cvs`, `archive_cv`, le provisionnement), ou ne toucher que
+  des champs dérivés (score, indicateurs, document plein texte).
+- `OutboxRelay` réserve les événements en attente par lots (`SKIP LOCKED`,
+  réservation validée avant la livraison) et les livre aux handlers
+  enregistrés hors de toute transaction : livraison "au moins une fois",
+  ordonnée par CV. Un événement en échec est repris avec un délai
+  exponentiel, puis mis en lettre morte après `MAX_ATTEMPTS` échecs.
+"""
+
+import fnmatch
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Min, Q
+from django.forms.models import model_to_dict
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX_SETTINGS = {
+    'HANDLERS': [],
+    'BATCH_SIZE': 100,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 10,
+    'RETRY_DELAY': 2.0,          # secondes avant le 1er nouvel essai, doublées à chaque échec
+    'MAX_RETRY_DELAY': 3600.0,
+    'CLAIM_TIMEOUT': 300.0,      # réservation d'un lot : repris par un autre relais au-delà
+}
+
+
+def get_outbox_setting(name):
+    """Lit une option de `settings.OUTBOX_SETTINGS` avec valeur par défaut."""
+    return getattr(settings, 'OUTBOX_SETTINGS', {}).get(name, DEFAULT_OUTBOX_SETTINGS[name])
+
+
+# ====================================================================
+# 1. ÉCRITURE DES ÉVÉNEMENTS
+# ====================================================================
+
+_muted = ContextVar('outbox_muted', default=False)
+
+
+@contextmanager
+def muted():
+    """
+    Suspend les événements ligne par ligne des signaux, pour les opérations
+    de masse qui publient elles-mêmes un événement global (ex: archivage).
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+def is_muted():
+    return _muted.get()
+
+
+def get_aggregate_id(instance):
+    """Retourne l'ID du CV auquel appartient l'instance (CV ou section)."""
+    if instance._meta.model_name == 'cv':
+        return instance.pk
+    return instance.cv_id
+
+
+def build_event(instance, action):
+    """Construit (sans l'enregistrer) l'événement `<modèle>.<action>` de l'instance."""
+    model_name = instance._meta.model_name
+    payload = {
+        'model': model_name,
+        'id': instance.pk,
+        'action': action,
+    }
+    # Logique : Un instantané des champs évite aux consommateurs de relire
+    # la table principale ; inutile pour une suppression.
+    if action != 'deleted':
+        payload['data'] = model_to_dict(instance)
+
+    return OutboxEvent(
+        aggregate_id=get_aggregate_id(instance),
+        event_type=f"{model_name}.{action}",
+        payload=payload,
+    )
+
+
+def record_event(instance, action, using=None):
+    """
+    Enregistre un événement `<modèle>.<action>` pour l'instance.
+    Doit être appelé dans la transaction de la modification elle-même :
+    si celle-ci est annulée, l'événement l'est aussi.
+    """
+    event = build_event(instance, action)
+    # Logique : Même base (shard primaire) que l'instance, donc même transaction.
+    event.save(using=using or router.db_for_write(type(instance), instance=instance))
+    return event
+
+
+# ====================================================================
+# 2. REGISTRE DES HANDLERS
+# ====================================================================
+
+_handlers = []
+
+
+def register_handler(pattern):
+    """
+    Décorateur enregistrant un handler pour les types d'événements
+    correspondant au motif (ex: 'experience.*', 'cv.deleted', '*').
+    Le handler reçoit l'`OutboxEvent` et doit être idempotent
+    (livraison au moins une fois).
+    """
+    def decorator(func):
+        _handlers.append((pattern, func))
+        return func
+    return decorator
+
+
+def unregister_handler(func):
+    """Retire un handler du registre (utile pour les tests et benchmarks)."""
+    _handlers[:] = [(pattern, handler) for pattern, handler in _handlers if handler is not func]
+
+
+def load_configured_handlers():
+    """Importe les modules listés dans OUTBOX_SETTINGS['HANDLERS'] (qui s'enregistrent à l'import)."""
+    for dotted_path in get_outbox_setting('HANDLERS'):
+        import_string(dotted_path)
+
+
+def get_handlers(event_type):
+    return [handler for pattern, handler in _handlers if fnmatch.fnmatchcase(event_type, pattern)]
+
+
+# ====================================================================
+# 3. RELAIS
+# ====================================================================
+
+class OutboxRelay:
+    """
+    Relais des événements en attente vers les handlers.
+
+    Chaque lot est verrouillé avec `SELECT ... FOR UPDATE SKIP LOCKED` le
+    temps de le réserver (`next_attempt_at` repoussé de `CLAIM_TIMEOUT`) ;
+    la réservation est validée avant la livraison, qui ne garde donc aucun
+    verrou. Plusieurs relais peuvent tourner en parallèle ; un relais arrêté
+    en cours de lot voit ses événements repris à la fin de la réservation.
+    L'ordre par CV est garanti ainsi :
+      - un CV dont un événement plus ancien est encore en attente hors du
+        lot (réservé par un autre relais, ou en attente d'un nouvel essai)
+        est ignoré pour ce lot ;
+      - un échec de handler bloque les événements suivants du même CV
+        jusqu'au nouvel essai de l'événement en échec.
+    """
+
+    def __init__(self, batch_size=None, max_attempts=None, event_types=None, using='default'):
+        # Logique : Un relais par base ; avec le sharding, lancer un relais par shard.
+        self.using = using
+        self.batch_size = batch_size or get_outbox_setting('BATCH_SIZE')
+        self.max_attempts = max_attempts or get_outbox_setting('MAX_ATTEMPTS')
+        # Logique : Restreint le relais à certains types (ex: benchmark isolé).
+        self.event_types = event_types
+
+    def dispatch(self, event):
+        for handler in get_handlers(event.event_type):
+            handler(event)
+
+    def run_once(self):
+        """Traite un lot. Retourne le nombre d'événements livrés."""
+        delivered, _last_id = self._run_batch()
+        return delivered
+
+    def get_retry_delay(self, attempts):
+        """Délai (s) avant le nouvel essai d'un événement en échec `attempts` fois."""
+        delay = get_outbox_setting('RETRY_DELAY') * 2 ** (attempts - 1)
+        return min(delay, get_outbox_setting('MAX_RETRY_DELAY'))
+
+    def _claim_batch(self, after_id):
+        """
+        Réserve le lot des événements dus d'ID > `after_id` (transaction courte).
+        Retourne (événements à livrer, ID du dernier événement du lot ou None si rien n'est dû).
+        """
+        now = timezone.now()
+        pending = OutboxEvent.objects.using(self.using).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+            processed_at__isnull=True, pk__gt=after_id,
+        )
+        if self.event_types is not None:
+            pending = pending.filter(event_type__in=self.event_types)
+
+        with transaction.atomic(using=self.using):
+            batch = list(
+                pending
+                .select_for_update(skip_locked=True)
+                .order_by('id')[:self.batch_size]
+            )
+            if not batch:
+                return [], None
+            blocked = self._get_blocked_aggregates(batch)
+            claimed = [event for event in batch if event.aggregate_id not in blocked]
+            OutboxEvent.objects.using(self.using).filter(pk__in=[event.pk for event in claimed]).update(
+                next_attempt_at=now + timedelta(seconds=get_outbox_setting('CLAIM_TIMEOUT')),
+            )
+        return claimed, batch[-1].pk
+
+    def _run_batch(self, after_id=0):
+        """
+        Réserve puis livre le lot des événements dus d'ID > `after_id`.
+        Retourne (événements livrés, ID du dernier événement du lot ou None si rien n'est dû).
+        """
+        claimed, last_id = self._claim_batch(after_id)
+        if last_id is None:
+            return 0, None
+
+        delivered, failed, released, failing = [], [], [], set()
+        for event in claimed:
+            if event.aggregate_id in failing:
+                # Logique : Après l'échec d'un événement du CV, les suivants attendent son nouvel essai.
+                event.next_attempt_at = None
+                released.append(event)
+                continue
+            try:
+                self.dispatch(event)
+            except Exception as exc:
+                now = timezone.now()
+                event.attempts += 1
+                event.last_error = repr(exc)
+                if event.attempts >= self.max_attempts:
+                    # Logique : Lettre morte, on la sort de la file pour ne pas
+                    # bloquer indéfiniment le CV ; last_error reste renseigné.
+                    logger.error(f"Événement outbox {event.pk} abandonné après {event.attempts} tentatives: {exc!r}")
+                    event.processed_at = event.dead_lettered_at = now
+                    event.next_attempt_at = None
+                else:
+                    delay = self.get_retry_delay(event.attempts)
+                    logger.warning(f"Échec du handler pour l'événement outbox {event.pk} (nouvel essai dans {delay:.0f} s): {exc!r}")
+                    event.next_attempt_at = now + timedelta(seconds=delay)
+                    failing.add(event.aggregate_id)
+                failed.append(event)
+            else:
+                event.processed_at = timezone.now()
+                event.next_attempt_at = None
+                delivered.append(event)
+
+        events = OutboxEvent.objects.using(self.using)
+        with transaction.atomic(using=self.using):
+            events.bulk_update(delivered, ['processed_at', 'next_attempt_at'])
+            events.bulk_update(released, ['next_attempt_at'])
+            events.bulk_update(failed, ['attempts', 'last_error', 'processed_at', 'next_attempt_at', 'dead_lettered_at'])
+
+        return len(delivered), last_id
+
+    def _get_blocked_aggregates(self, batch):
+        """CVs dont l'événement en attente le plus ancien n'est pas dans ce lot."""
+        first_in_batch = {}
+        for event in batch:
+            first_in_batch.setdefault(event.aggregate_id, event.pk)
+
+        first_pending = (
+            OutboxEvent.objects.using(self.using)
+            .filter(processed_at__isnull=True, aggregate_id__in=first_in_batch.keys())
+            .values('aggregate_id')
+            .annotate(first_id=Min('id'))
+            .values_list('aggregate_id', 'first_id')
+        )
+        return {
+            aggregate_id for aggregate_id, first_id in first_pending
+            if first_id < first_in_batch[aggregate_id]
+        }
+
+    def drain(self):
+        """
+        Parcourt toute la file, lot après lot. Retourne le total livré.
+        Un lot sans livraison (échecs, CVs retenus) n'arrête pas le parcours :
+        les lots suivants sont lus au-delà de son dernier ID ; les événements
+        restés en attente seront repris à leur prochain essai (`next_attempt_at`).
+        """
+        total, after_id = 0, 0
+        while True:
+            delivered, after_id = self._run_batch(after_id)
+            if after_id is None:
+                return total
+            total += delivered
+
+    def run_forever(self, poll_interval=None):
+        poll_interval = poll_interval or get_outbox_setting('POLL_INTERVAL')
+        while True:
+            if not self.drain():
+                time.sleep(poll_interval)
+
+
+def purge_processed(older_than, using='default'):
+    """Supprime les événements traités avant `older_than` (datetime) ; les lettres mortes sont conservées."""
+    deleted, _ = (
+        OutboxEvent.objects.using(using)
+        .filter(processed_at__lt=older_than, dead_lettered_at__isnull=True)
+        .delete()
+    )
+    return deleted
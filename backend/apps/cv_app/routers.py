@@ -0,0 +1,67 @@
+# apps/cv_app/routers.py
+
+from .sharding import DIRECTORY_DATABASE, get_current_shard, get_cv_shards, get_shard_for_owner
+
+CV_APP_LABEL = 'cv_app'
+
+
+class CVShardRouter:
+    """
+    Route les modèles de cv_app vers le shard du propriétaire (voir sharding.py).
+    Ordre de résolution :
+      1. instance déjà chargée depuis un shard (instance._state.db) ;
+      2. CV neuf (owner_id) ou utilisateur passé en indice -> annuaire ;
+      3. section neuve dont le CV est déjà chargé -> shard du CV ;
+      4. shard activé pour la requête (ShardRoutingMixin / use_shard) ;
+      5. sinon, comportement par défaut de Django.
+    L'annuaire lui-même vit toujours sur `default`.
+    """
+
+    def _db_for_cv_model(self, model, instance):
+        if model._meta.model_name == 'cvshardassignment':
+            return DIRECTORY_DATABASE
+
+        if instance is not None:
+            if instance._meta.app_label == CV_APP_LABEL:
+                if instance._state.db:
+                    return instance._state.db
+                if instance._meta.model_name == 'cv' and instance.owner_id:
+                    return get_shard_for_owner(instance.owner_id)
+                cv = instance._state.fields_cache.get('cv')
+                if cv is not None and cv._state.db:
+                    return cv._state.db
+            elif instance._meta.label == 'users.User' and instance.pk:
+                # Logique : `cv.owner = user` / `user.cvs.all()`.
+                return get_shard_for_owner(instance.pk)
+
+        return get_current_shard()
+
+    def _db_for_model(self, model, **hints):
+        instance = hints.get('instance')
+        if model._meta.app_label == CV_APP_LABEL:
+            return self._db_for_cv_model(model, instance)
+        # Logique : `cv.owner` sur un CV d'un shard doit lire l'utilisateur sur `default`,
+        # alors que Django suivrait par défaut la base de l'instance.
+        if instance is not None and instance._meta.app_label == CV_APP_LABEL:
+            return DIRECTORY_DATABASE
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_model(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_model(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Logique : CV.owner relie un shard à `default` (clé étrangère sans contrainte).
+        labels = {obj1._meta.app_label, obj2._meta.app_label}
+        if CV_APP_LABEL in labels:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if app_label != CV_APP_LABEL:
+            return None
+        if model_name == 'cvshardassignment':
+            return db == DIRECTORY_DATABASE
+        return db in get_cv_shards()
@@ -0,0 +1,168 @@
+# apps/cv_app/search.py
+
+"""
+Recherche plein texte sur le contenu des CVs (PostgreSQL).
+
+Chaque CV porte un `search_vector` pondéré, calculé dans chaque configuration
+PostgreSQL correspondant à `settings.LANGUAGES` (français et anglais) :
+
+    A  titre du CV, intitulés de poste, diplômes
+    B  compétences, entreprises, établissements
+    C  résumé
+    D  descriptions des expériences et formations
+
+Il est recalculé en une requête `UPDATE` après chaque écriture du CV ou d'une
+section (une fois par CV et par transaction, au commit), et indexé en GIN :
+la recherche n'a plus besoin de parcourir les tables de sections.
+
+Les CVs archivés gardent le document calculé avant l'archivage (leurs
+sections ne sont plus dans les tables chaudes) : ils restent trouvables.
+"""
+
+import logging
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from apps.common.transactions import on_commit_batch
+
+from .models import CV, Education, Experience, Skill
+from .sharding import attach_owners
+
+logger = logging.getLogger(__name__)
+
+# Code de langue (settings.LANGUAGES) -> configuration de recherche PostgreSQL
+SEARCH_CONFIGS = {
+    'fr': 'french',
+    'en': 'english',
+}
+
+
+def get_search_configs():
+    return [SEARCH_CONFIGS[code] for code, _name in settings.LANGUAGES if code in SEARCH_CONFIGS]
+
+
+def supports_full_text_search(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+# ====================================================================
+# 1. CALCUL DU DOCUMENT
+# ====================================================================
+
+def _section_text(model, field):
+    """Texte concaténé d'un champ sur toutes les lignes de la section du CV."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(cv=OuterRef('pk')).order_by().values('cv')
+            .annotate(text=StringAgg(field, ' ')).values('text')
+        ),
+        Value(''),
+        output_field=TextField(),
+    )
+
+
+def _weighted_fields():
+    return (
+        ('A', [F('title'), _section_text(Experience, 'title'), _section_text(Education, 'degree')]),
+        ('B', [_section_text(Skill, 'name'), _section_text(Experience, 'company'), _section_text(Education, 'institution')]),
+        ('C', [F('summary')]),
+        ('D', [_section_text(Experience, 'description'), _section_text(Education, 'description')]),
+    )
+
+
+def build_search_vector():
+    """Expression du document pondéré d'un CV, dans toutes les configurations."""
+    vectors = [
+        SearchVector(*fields, config=config, weight=weight)
+        for config in get_search_configs()
+        for weight, fields in _weighted_fields()
+    ]
+    return reduce(operator.add, vectors)
+
+
+def refresh_search_vectors(cv_ids, using='default'):
+    """Recalcule le document des CVs (hors CVs archivés). Retourne le nombre de CVs mis à jour."""
+    if not supports_full_text_search(using):
+        return 0
+    # Logique : update() ne touche pas `updated_at` (pas de auto_now) : l'archivage
+    # des CVs inactifs n'est pas retardé par la maintenance de l'index.
+    return (
+        CV.objects.using(using)
+        .filter(pk__in=list(cv_ids), archived_at__isnull=True)
+        .update(search_vector=build_search_vector())
+    )
+
+
+# ====================================================================
+# 2. MAINTENANCE INCRÉMENTALE (au commit)
+# ====================================================================
+
+def schedule_refresh(cv_id, using):
+    """
+    Programme le recalcul du document du CV au commit de la transaction en
+    cours sur `using` (immédiatement en autocommit). Les écritures d'une même
+    transaction sur un CV ne déclenchent qu'un recalcul.
+    """
+    if not supports_full_text_search(using):
+        return
+    on_commit_batch(refresh_search_vectors, cv_id, using)
+
+
+# ====================================================================
+# 3. RECHERCHE
+# ====================================================================
+
+def build_search_query(text):
+    """Requête « moteur de recherche » (guillemets, OR, -exclusion) dans toutes les configurations."""
+    return reduce(operator.or_, (
+        SearchQuery(text, config=config, search_type='websearch') for config in get_search_configs()
+    ))
+
+
+def search_cvs(queryset, text):
+    """Filtre `queryset` (CVs) sur `text` et trie par pertinence décroissante."""
+    query = build_search_query(text)
+    return (
+        queryset
+        .filter(search_vector=query)
+        .annotate(rank=SearchRank(F('search_vector'), query))
+        .order_by('-rank', '-updated_at', '-pk')
+    )
+
+
+class ShardedSearchResults:
+    """
+    Résultats classés de `search_cvs` sur plusieurs shards, paginables par
+    le paginateur Django/DRF : chaque page interroge chaque shard pour ses
+    `offset + limit` meilleurs CVs puis fusionne par pertinence.
+    """
+
+    def __init__(self, text, aliases):
+        self.text = text
+        self.aliases = list(aliases)
+
+    def _queryset(self, alias):
+        return search_cvs(CV.objects.using(alias), self.text)
+
+    def count(self):
+        return sum(self._queryset(alias).count() for alias in self.aliases)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        results = []
+        for alias in self.aliases:
+            results.extend(self._queryset(alias)[:stop])
+        results.sort(key=lambda cv: (cv.rank, cv.updated_at, cv.pk), reverse=True)
+        return attach_owners(results[start:stop])
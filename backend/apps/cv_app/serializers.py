@@ -1,6 +1,9 @@
 # serializers.py
 
 from rest_framework import serializers
+
+from apps.common.constraints import ConstraintValidationMixin
+
 from .models import (
     CV, 
     Contact, 
@@ -16,7 +19,7 @@ from .models import (
 # ====================================================================
 
 # 1. Contact
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
     """Sérialiseur pour la section Contact (OneToOneField)."""
     cv = serializers.PrimaryKeyRelatedField(read_only=True)
     
@@ -143,7 +146,7 @@ class EducationSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 # 4. Compétence
-class SkillSerializer(serializers.ModelSerializer):
+class SkillSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
     """Sérialiseur pour une Compétence (ForeignKey)."""
     category_display = serializers.CharField(source='get_category_display', read_only=True)
     cv = serializers.PrimaryKeyRelatedField(queryset=CV.objects.all())
@@ -177,7 +180,7 @@ class InterestSerializer(serializers.ModelSerializer):
 # SÉRIALISEUR PARENT : CVSerializer
 # ====================================================================
 
-class CVSerializer(serializers.ModelSerializer):
+class CVSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
     """Sérialiseur principal pour le document CV."""
     
     contact = ContactSerializer(required=False)
@@ -187,16 +190,28 @@ class CVSerializer(serializers.ModelSerializer):
     languages = LanguageSerializer(many=True, read_only=True)
     interests = InterestSerializer(many=True, read_only=True)
 
-    owner_email = serializers.ReadOnlyField(source='owner.email')
+    owner_email = serializers.SerializerMethodField()
     
     class Meta:
         model = CV
         fields = [
             'id', 'owner', 'owner_email', 'title', 'summary', 'contact',  
             'experiences', 'educations', 'skills', 'languages', 'interests',
-            'created_at', 'updated_at'
+            'experience_months', 'current_position', 'largest_gap_months', 'latest_education_end',
+            'completeness', 'created_at', 'updated_at'
         ]
-        read_only_fields = ('id', 'owner', 'owner_email', 'created_at', 'updated_at')
+        read_only_fields = (
+            'id', 'owner', 'owner_email', 'experience_months', 'current_position',
+            'largest_gap_months', 'latest_education_end', 'completeness', 'created_at', 'updated_at',
+        )
+
+    def get_owner_email(self, obj):
+        # Logique : Le propriétaire est presque toujours l'utilisateur connecté, déjà
+        # connu par les claims de son jeton : pas de lecture de la table des utilisateurs.
+        user = getattr(self.context.get('request'), 'user', None)
+        if user is not None and user.pk == obj.owner_id:
+            return user.email
+        return obj.owner.email
 
     def create(self, validated_data):
         contact_data = validated_data.pop('contact', None)
@@ -210,7 +225,9 @@ class CVSerializer(serializers.ModelSerializer):
         
         instance.title = validated_data.get('title', instance.title)
         instance.summary = validated_data.get('summary', instance.summary)
-        instance.save()
+        # Logique : Les colonnes dérivées (document plein texte, indicateurs) sont
+        # tenues à jour au commit : ne pas les écraser avec les valeurs lues ici.
+        instance.save(update_fields=['title', 'summary', 'updated_at'])
 
         if contact_data:
             contact_instance, created = Contact.objects.get_or_create(cv=instance)
@@ -218,4 +235,25 @@ class CVSerializer(serializers.ModelSerializer):
                 setattr(contact_instance, attr, value)
             contact_instance.save()
 
-        return instance
\ No newline at end of file
+        return instance
+
+class CVSearchResultSerializer(serializers.ModelSerializer):
+    """Résultat de recherche plein texte : CV sans ses sections, avec sa pertinence."""
+
+    owner_email = serializers.ReadOnlyField(source='owner.email')
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = CV
+        fields = ['id', 'owner', 'owner_email', 'title', 'summary', 'completeness', 'updated_at', 'rank']
+        read_only_fields = fields
+
+
+class CVFacetResultSerializer(CVSearchResultSerializer):
+    """Résultat de recherche à facettes : sans pertinence (CVs du plus récent au plus ancien)."""
+
+    rank = None
+
+    class Meta(CVSearchResultSerializer.Meta):
+        fields = ['id', 'owner', 'owner_email', 'title', 'summary', 'completeness', 'updated_at']
+        read_only_fields = fields
@@ -0,0 +1,358 @@
+# apps/cv_app/sharding.py
+
+"""
+Sharding horizontal des données CV par propriétaire.
+
+Chaque utilisateur a tous ses CVs (et leurs sections, archives et
+événements outbox) sur UNE base de `settings.CV_SHARDS`. Le placement
+initial est donné par un anneau de hachage cohérent sur `owner_id`, puis
+figé dans l'annuaire `CVShardAssignment` (base `default`) : ajouter un
+shard ne déplace donc personne tant que `rebalance_cv_shards` n'a pas
+été lancé.
+
+Dans une requête API, `ShardRoutingMixin` active le shard de
+l'utilisateur connecté et `CVShardRouter` y envoie toutes les requêtes
+sur les modèles de cv_app. Hors requête (commandes, shell), encadrer les
+créations par `use_shard(get_shard_for_owner(owner_id))` ou passer par
+`.using(alias)` : `QuerySet.create()` ne transmet aucune instance au routeur.
+"""
+
+import bisect
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DIRECTORY_DATABASE = 'default'
+DIRECTORY_CACHE_TIMEOUT = 300
+VIRTUAL_NODES = 100
+
+_current_shard = ContextVar('cv_current_shard', default=None)
+
+
+def get_cv_shards():
+    return list(getattr(settings, 'CV_SHARDS', [DIRECTORY_DATABASE]))
+
+
+# ====================================================================
+# 1. ANNEAU DE HACHAGE COHÉRENT
+# ====================================================================
+
+def _hash(value):
+    return int(hashlib.md5(str(value).encode()).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Anneau de hachage cohérent avec nœuds virtuels."""
+
+    def __init__(self, nodes, virtual_nodes=VIRTUAL_NODES):
+        self._ring = sorted(
+            (_hash(f'{node}#{index}'), node)
+            for node in nodes
+            for index in range(virtual_nodes)
+        )
+        self._keys = [key for key, _node in self._ring]
+
+    def get_node(self, key):
+        index = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._ring[index][1]
+
+
+_ring_cache = {}
+
+
+def get_ring():
+    shards = tuple(get_cv_shards())
+    if shards not in _ring_cache:
+        _ring_cache[shards] = HashRing(shards)
+    return _ring_cache[shards]
+
+
+# ====================================================================
+# 2. ANNUAIRE (owner_id -> shard)
+# ====================================================================
+
+def _directory_cache_key(owner_id):
+    return f'cv_shard:owner:{owner_id}'
+
+
+def get_assignment(owner_id):
+    """Retourne (shard, verrouillé) pour le propriétaire, en l'inscrivant à l'annuaire si besoin."""
+    from .models import CVShardAssignment
+
+    cached = cache.get(_directory_cache_key(owner_id))
+    if cached is not None:
+        return cached
+
+    assignments = CVShardAssignment.objects.using(DIRECTORY_DATABASE)
+    entry = assignments.filter(owner_id=owner_id).values_list('shard', 'locked').first()
+    if entry is None:
+        try:
+            with transaction.atomic(using=DIRECTORY_DATABASE):
+                assignments.create(owner_id=owner_id, shard=get_ring().get_node(owner_id))
+        except IntegrityError:
+            pass  # Inscription concurrente : on relit la valeur gagnante.
+        entry = assignments.filter(owner_id=owner_id).values_list('shard', 'locked').get()
+
+    entry = tuple(entry)
+    cache.set(_directory_cache_key(owner_id), entry, DIRECTORY_CACHE_TIMEOUT)
+    return entry
+
+
+def get_shard_for_owner(owner_id):
+    return get_assignment(owner_id)[0]
+
+
+def assign_owners(owner_ids):
+    """Inscrit d'un coup des propriétaires à l'annuaire (import en masse) ; retourne {owner_id: shard}."""
+    from .models import CVShardAssignment
+
+    ring = get_ring()
+    assignments = CVShardAssignment.objects.using(DIRECTORY_DATABASE)
+    assignments.bulk_create(
+        (CVShardAssignment(owner_id=owner_id, shard=ring.get_node(owner_id)) for owner_id in owner_ids),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return dict(assignments.filter(owner_id__in=owner_ids).values_list('owner_id', 'shard'))
+
+
+async def aget_assignment(owner_id):
+    """Variante asynchrone de `get_assignment` : annuaire lu dans le cache sans bloquer."""
+    cached = await cache.aget(_directory_cache_key(owner_id))
+    if cached is not None:
+        return cached
+    return await sync_to_async(get_assignment)(owner_id)
+
+
+def invalidate_assignment(owner_id):
+    cache.delete(_directory_cache_key(owner_id))
+
+
+# ====================================================================
+# 3. SHARD COURANT (contexte de requête)
+# ====================================================================
+
+def get_current_shard():
+    return _current_shard.get()
+
+
+@contextmanager
+def use_shard(alias):
+    """Envoie les requêtes cv_app sans indice de routage vers `alias`."""
+    token = _current_shard.set(alias)
+    try:
+        yield
+    finally:
+        _current_shard.reset(token)
+
+
+def attach_owners(cvs):
+    """
+    Charge en une requête les propriétaires de `cvs` (CVs lus sur n'importe
+    quel shard) et les attache. Les utilisateurs ne sont que sur `default` :
+    un `select_related('owner')` sur un autre shard ferait une jointure
+    interne vers une table vide et perdrait les CVs.
+    """
+    owner_ids = {cv.owner_id for cv in cvs}
+    owners = get_user_model().objects.in_bulk(owner_ids) if owner_ids else {}
+    for cv in cvs:
+        cv.owner = owners.get(cv.owner_id)
+    return cvs
+
+
+class ShardMoving(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Vos données CV sont en cours de migration. Réessayez dans quelques instants."
+    default_code = 'cv_shard_moving'
+
+
+class ShardRoutingMixin:
+    """
+    Mixin pour les ViewSets cv_app : active le shard de l'utilisateur connecté
+    pendant toute la requête. Les écritures sont refusées (503) pendant un
+    déplacement de shard ; les lectures continuent sur le shard source.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._shard_token = None
+        if not request.user.is_authenticated:
+            return
+        shard, locked = get_assignment(request.user.pk)
+        if locked and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            raise ShardMoving()
+        self._shard_token = _current_shard.set(shard)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        token, self._shard_token = getattr(self, '_shard_token', None), None
+        if token is not None:
+            _current_shard.reset(token)
+        return response
+
+
+# ====================================================================
+# 4. SÉQUENCES ENTRELACÉES (IDs uniques entre shards)
+# ====================================================================
+
+def init_shard_sequences(stride):
+    """
+    Recale les séquences des tables cv_app pour que chaque shard produise des IDs
+    disjoints (shard k : IDs ≡ k modulo `stride`), au-delà de tous les IDs existants.
+    Indispensable avant de déplacer des données entre shards. PostgreSQL uniquement.
+    """
+    from django.apps import apps
+
+    shards = get_cv_shards()
+    if len(shards) > stride:
+        raise ValueError(f"{len(shards)} shards pour un pas de {stride} : augmentez CV_SHARD_ID_STRIDE.")
+
+    models = [model for model in apps.get_app_config('cv_app').get_models() if model._meta.model_name != 'cvshardassignment']
+    for model in models:
+        table, column = model._meta.db_table, model._meta.pk.column
+        global_max = 0
+        for alias in shards:
+            with connections[alias].cursor() as cursor:
+                cursor.execute(f'SELECT COALESCE(MAX("{column}"), 0) FROM "{table}"')
+                global_max = max(global_max, cursor.fetchone()[0])
+
+        base = (global_max // stride + 1) * stride
+        for index, alias in enumerate(shards):
+            connection = connections[alias]
+            if connection.vendor != 'postgresql':
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [table, column])
+                sequence = cursor.fetchone()[0]
+                cursor.execute(f'ALTER SEQUENCE {sequence} INCREMENT BY {int(stride)} RESTART WITH {base + index}')
+
+
+# ====================================================================
+# 5. DÉPLACEMENT D'UN PROPRIÉTAIRE (rééquilibrage)
+# ====================================================================
+
+def _copy_rows(model, queryset, target, keep_ids=True):
+    """Copie les lignes vers `target` en conservant leurs clés étrangères (et leurs IDs si `keep_ids`)."""
+    fields = [field.attname for field in model._meta.concrete_fields if keep_ids or not field.primary_key]
+    rows = [model(**values) for values in queryset.order_by('pk').values(*fields)]
+    model.objects.using(target).bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+MOVE_PASSES = 3
+
+
+def move_owner(owner_id, target):
+    """
+    Déplace tous les CVs d'un propriétaire (sections, archives, événements
+    outbox en attente) vers le shard `target`, sans changer leurs IDs.
+
+    1. l'entrée d'annuaire est verrouillée : les écritures de l'utilisateur
+       reçoivent un 503 (`ShardMoving`), les lectures restent servies ;
+    2. sur la source, les CVs et leurs lignes sont verrouillés (FOR UPDATE),
+       copiés vers `target`, puis supprimés, dans une même transaction :
+       une écriture commencée avant le verrou d'annuaire est attendue puis
+       copiée, aucune ne peut s'intercaler entre la copie et la suppression ;
+    3. un CV créé sur la source par une telle requête après ce passage
+       (aucune ligne existante à verrouiller) est repris par un passage suivant ;
+    4. l'annuaire bascule sur `target` et est déverrouillé.
+    Un déplacement interrompu peut être relancé : les CVs encore présents
+    sur la source sont recopiés (leur copie partielle sur la cible est
+    d'abord effacée). Si une partie des CVs est déjà sur la cible,
+    l'annuaire reste verrouillé jusqu'à cette reprise.
+    Retourne le nombre de lignes copiées.
+    """
+    from .models import CV, CVShardAssignment
+
+    source = get_shard_for_owner(owner_id)
+    if source == target:
+        return 0
+
+    assignments = CVShardAssignment.objects.using(DIRECTORY_DATABASE).filter(owner_id=owner_id)
+    assignments.update(locked=True)
+    invalidate_assignment(owner_id)
+
+    copied = 0
+    try:
+        for _attempt in range(MOVE_PASSES):
+            copied += _move_owner_rows(owner_id, source, target)
+            if not CV.objects.using(source).filter(owner_id=owner_id).exists():
+                break
+        else:
+            raise RuntimeError(f"Des CVs du propriétaire {owner_id} sont encore créés sur « {source} ».")
+    except Exception:
+        # Logique : Rien n'a encore quitté la source : l'utilisateur y retrouve tout.
+        if not CV.objects.using(target).filter(owner_id=owner_id).exists():
+            assignments.update(locked=False)
+        invalidate_assignment(owner_id)
+        raise
+
+    assignments.update(shard=target, locked=False)
+    invalidate_assignment(owner_id)
+    return copied
+
+
+def _move_owner_rows(owner_id, source, target):
+    """Un passage de `move_owner` : copie puis supprime, sous verrou, les CVs du propriétaire présents sur la source."""
+    from .archival import SECTION_MODELS
+    from .models import CV, CVArchive, OutboxEvent
+    from .outbox import muted
+    from apps.common.db import fast_delete
+
+    copied = 0
+    with muted(), transaction.atomic(using=source):
+        # Logique : Insérer une section verrouille (KEY SHARE) la ligne de son CV :
+        # FOR UPDATE sur les CVs bloque aussi les ajouts de sections.
+        cv_ids = list(
+            CV.objects.using(source).select_for_update()
+            .filter(owner_id=owner_id).order_by('pk').values_list('id', flat=True)
+        )
+        if not cv_ids:
+            return 0
+        conflicts = CV.objects.using(target).filter(pk__in=cv_ids).exclude(owner_id=owner_id)
+        if conflicts.exists():
+            raise ValueError(f"IDs de CV déjà utilisés sur « {target} » : lancez `rebalance_cv_shards --init-sequences`.")
+
+        related = [*SECTION_MODELS.values(), CVArchive]
+        for model in related:
+            list(model.objects.using(source).select_for_update().filter(cv_id__in=cv_ids).values_list('pk', flat=True))
+        # Logique : Verrouillés aussi pour que le relais de la source les ignore (SKIP LOCKED).
+        pending = OutboxEvent.objects.using(source).filter(aggregate_id__in=cv_ids, processed_at__isnull=True)
+        list(pending.select_for_update().values_list('pk', flat=True))
+
+        with transaction.atomic(using=target):
+            # Logique : Reprise après interruption, on repart d'une cible propre pour ces CVs.
+            fast_delete(CV, CV.objects.using(target).filter(pk__in=cv_ids).values_list('id', flat=True), using=target)
+            OutboxEvent.objects.using(target).filter(aggregate_id__in=cv_ids, processed_at__isnull=True).delete()
+
+            copied += _copy_rows(CV, CV.objects.using(source).filter(pk__in=cv_ids), target)
+            for model in related:
+                copied += _copy_rows(model, model.objects.using(source).filter(cv_id__in=cv_ids), target)
+            # Logique : Nouveaux IDs pris sur la séquence cible, pour que les
+            # événements déplacés restent avant les suivants (ordre par CV).
+            copied += _copy_rows(OutboxEvent, pending, target, keep_ids=False)
+
+        # Logique : La cible est validée avant la suppression ; si le commit de la
+        # source échoue, les lignes restent des deux côtés et la reprise recopie.
+        pending.delete()
+        fast_delete(CV, cv_ids, using=source)
+    return copied
+
+
+def get_misplaced_owners():
+    """Propriétaires dont le shard actuel diffère de celui donné par l'anneau."""
+    from .models import CVShardAssignment
+
+    ring = get_ring()
+    for owner_id, shard in CVShardAssignment.objects.using(DIRECTORY_DATABASE).values_list('owner_id', 'shard').iterator():
+        expected = ring.get_node(owner_id)
+        if expected != shard:
+            yield owner_id, shard, expected
@@ -0,0 +1,121 @@
+# apps/cv_app/signals.py
+
+from django.db import router
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.utils import timezone
+
+from apps.users.models import User
+
+from . import career, completeness, search
+from .deletion import delete_cvs
+from .models import CV, Contact, Experience, Education, Skill, Language, Interest
+from .outbox import get_aggregate_id, is_muted, record_event
+from .sharding import get_cv_shards
+
+# Logique : Modèles dont chaque suppression produit un événement outbox.
+TRACKED_MODELS = (CV, Contact, Experience, Education, Skill, Language, Interest)
+
+# Logique : Sections dont l'écriture rafraîchit `CV.updated_at`.
+SECTION_MODELS = (Contact, Experience, Education, Skill, Language, Interest)
+
+# Logique : Modèles entrant dans le document plein texte du CV (voir search.py).
+SEARCH_MODELS = (CV, Experience, Education, Skill)
+
+# Logique : Sections dont dérivent les indicateurs de parcours (voir career.py).
+CAREER_MODELS = (Experience, Education)
+
+# Logique : Modèle -> section recomptée pour le score de complétude (voir completeness.py) ;
+# None pour le CV lui-même (seul le résumé compte, le score est recalculé).
+COMPLETENESS_MODELS = {
+    CV: None,
+    Contact: 'contact',
+    Experience: 'experiences',
+    Education: 'educations',
+    Skill: 'skills',
+    Language: 'languages',
+    Interest: 'interests',
+}
+
+
+def on_cv_deleted(sender, instance, **kwargs):
+    """
+    Le Collector émet post_delete dans sa transaction : l'événement est atomique
+    avec la suppression. Les enregistrements publient le leur dans
+    `OutboxTrackedModel.save()`.
+    """
+    if is_muted():
+        return
+    record_event(instance, 'deleted', using=kwargs.get('using'))
+
+
+def on_section_changed(sender, instance, raw=False, **kwargs):
+    """
+    Une section modifiée rend le CV récent (`updated_at`), dans la transaction de
+    l'écriture : un CV en cours d'édition n'est pas éligible à l'archivage.
+    """
+    if raw or is_muted():
+        return
+    # Logique : update() : ni signal, ni événement outbox pour ce simple horodatage.
+    CV.objects.using(router.db_for_write(sender, instance=instance)).filter(pk=instance.cv_id).update(
+        updated_at=timezone.now()
+    )
+
+
+def on_search_content_changed(sender, instance, raw=False, **kwargs):
+    """Recalcule le document plein texte du CV au commit (les opérations de masse s'en chargent elles-mêmes)."""
+    if raw or is_muted():
+        return
+    if sender is CV and kwargs.get('signal') is post_delete:
+        return
+    search.schedule_refresh(get_aggregate_id(instance), router.db_for_write(sender, instance=instance))
+
+
+def on_career_section_changed(sender, instance, raw=False, **kwargs):
+    """Recalcule les indicateurs de parcours du CV au commit."""
+    if raw or is_muted():
+        return
+    career.schedule_refresh(instance.cv_id, router.db_for_write(sender, instance=instance))
+
+
+def on_completeness_content_changed(sender, instance, raw=False, **kwargs):
+    """Recompte la section modifiée et recalcule le score de complétude du CV au commit."""
+    if raw or is_muted():
+        return
+    if sender is CV and kwargs.get('signal') is post_delete:
+        return
+    completeness.schedule_refresh(
+        get_aggregate_id(instance), COMPLETENESS_MODELS[sender], router.db_for_write(sender, instance=instance)
+    )
+
+
+def on_user_deleted(sender, instance, using, **kwargs):
+    """
+    `CV.owner` n'a pas de contrainte en base (shards) : le Collector ne supprime
+    que les CVs de la base de l'utilisateur. Ceux des autres shards sont
+    supprimés ici, avec leurs événements outbox.
+    """
+    for alias in get_cv_shards():
+        if alias != using:
+            delete_cvs(CV.objects.using(alias).filter(owner_id=instance.pk).values_list('id', flat=True), using=alias)
+
+
+pre_delete.connect(on_user_deleted, sender=User, dispatch_uid='cv_shards_user_delete')
+
+for model in TRACKED_MODELS:
+    post_delete.connect(on_cv_deleted, sender=model, dispatch_uid=f'outbox_delete_{model._meta.model_name}')
+
+for model in SECTION_MODELS:
+    post_save.connect(on_section_changed, sender=model, dispatch_uid=f'section_save_{model._meta.model_name}')
+    post_delete.connect(on_section_changed, sender=model, dispatch_uid=f'section_delete_{model._meta.model_name}')
+
+for model in SEARCH_MODELS:
+    post_save.connect(on_search_content_changed, sender=model, dispatch_uid=f'search_save_{model._meta.model_name}')
+    post_delete.connect(on_search_content_changed, sender=model, dispatch_uid=f'search_delete_{model._meta.model_name}')
+
+for model in CAREER_MODELS:
+    post_save.connect(on_career_section_changed, sender=model, dispatch_uid=f'career_save_{model._meta.model_name}')
+    post_delete.connect(on_career_section_changed, sender=model, dispatch_uid=f'career_delete_{model._meta.model_name}')
+
+for model in COMPLETENESS_MODELS:
+    post_save.connect(on_completeness_content_changed, sender=model, dispatch_uid=f'completeness_save_{model._meta.model_name}')
+    post_delete.connect(on_completeness_content_changed, sender=model, dispatch_uid=f'completeness_delete_{model._meta.model_name}')
@@ -0,0 +1,89 @@
+# apps/cv_app/tests/test_archival.py
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.cv_app.archival import archive_batch
+from apps.cv_app.models import CV, CVArchive, Contact, Experience, Skill
+
+User = get_user_model()
+
+
+class CVArchivalTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='archive@email.com', username='archive@email.com',
+            password='password123', first_name='Ar', last_name='Chive',
+        )
+        self.cv = CV.objects.create(owner=self.user, title='Ancien CV')
+        Contact.objects.create(cv=self.cv, email='archive@email.com', city='Cotonou')
+        self.experience = Experience.objects.create(
+            cv=self.cv, title='Dev', company='ACME', start_date=date(2019, 3, 1)
+        )
+        Skill.objects.create(cv=self.cv, name='Python', level=8)
+        CV.objects.filter(pk=self.cv.pk).update(updated_at=timezone.now() - timedelta(days=400))
+
+    def test_inactive_cv_sections_move_to_archive(self):
+        _last_id, archived, rows = archive_batch(months=12)
+
+        self.assertEqual((archived, rows), (1, 3))
+        self.assertFalse(Experience.objects.exists())
+        self.assertFalse(Contact.objects.exists())
+        archive = CVArchive.objects.get(cv=self.cv)
+        self.assertLess(archive.compressed_size, archive.raw_size)
+        self.assertIsNotNone(CV.objects.get(pk=self.cv.pk).archived_at)
+
+    def test_recent_cv_is_not_archived(self):
+        CV.objects.filter(pk=self.cv.pk).update(updated_at=timezone.now())
+
+        self.assertEqual(archive_batch(months=12)[1:], (0, 0))
+
+    def test_archived_cv_is_rehydrated_on_access(self):
+        archive_batch(months=12)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(f'/api/v1/cvs/{self.cv.pk}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['experiences'][0]['id'], self.experience.pk)
+        self.assertEqual(response.data['contact']['city'], 'Cotonou')
+        self.assertEqual(response.data['skills'][0]['name'], 'Python')
+        self.assertFalse(CVArchive.objects.exists())
+        self.assertIsNone(CV.objects.get(pk=self.cv.pk).archived_at)
+
+    def test_archived_cv_sections_are_rehydrated_on_section_list(self):
+        archive_batch(months=12)
+        self.client.force_authenticate(self.user)
+
+        experiences = self.client.get('/api/v1/cvs/experiences/')
+        skills = self.client.get('/api/v1/cvs/skills/')
+
+        self.assertEqual(experiences.status_code, 200)
+        self.assertEqual([row['id'] for row in experiences.data['results']], [self.experience.pk])
+        self.assertEqual([row['name'] for row in skills.data['results']], ['Python'])
+        self.assertFalse(CVArchive.objects.exists())
+
+    def test_archived_cvs_are_looked_up_again_only_after_an_archival(self):
+        self.client.force_authenticate(self.user)
+        self.client.get('/api/v1/cvs/')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/v1/cvs/').status_code, 200)
+        self.assertFalse([query['sql'] for query in queries if '"archived_at" IS NOT NULL' in query['sql']])
+
+        archive_batch(months=12)
+        response = self.client.get('/api/v1/cvs/')
+        self.assertEqual(response.data['results'][0]['experiences'][0]['id'], self.experience.pk)
+
+    def test_section_edit_makes_the_cv_recent(self):
+        self.experience.title = 'Lead dev'
+        self.experience.save()
+
+        self.assertEqual(archive_batch(months=12)[1:], (0, 0))
@@ -0,0 +1,43 @@
+# apps/cv_app/tests/test_async_views.py
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.cv_app.models import CV, Contact, Experience, Skill
+
+User = get_user_model()
+
+
+class AsyncCVReadTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='async@email.com', username='async', password='password123')
+        self.cv = CV.objects.create(owner=self.user, title='CV asynchrone')
+        Contact.objects.create(cv=self.cv, email='async@email.com', city='Cotonou')
+        Experience.objects.create(cv=self.cv, title='Dev', company='ACME', start_date=date(2020, 1, 1))
+        Skill.objects.create(cv=self.cv, name='Python', level=8)
+        self.auth = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def test_async_endpoints_match_sync_responses(self):
+        for async_path, sync_path in (
+            ('/api/v1/cvs/async/', '/api/v1/cvs/'),
+            (f'/api/v1/cvs/async/{self.cv.pk}/', f'/api/v1/cvs/{self.cv.pk}/'),
+            ('/api/v1/cvs/async/experiences/', '/api/v1/cvs/experiences/'),
+        ):
+            response = await self.async_client.get(async_path, headers=self.auth)
+            self.assertEqual(response.status_code, 200)
+            expected = (await self.async_client.get(sync_path, headers=self.auth)).json()
+            self.assertEqual(response.json(), expected)
+
+    async def test_other_owner_cv_is_not_found(self):
+        other = await User.objects.acreate(email='other@email.com', username='other')
+        auth = {'Authorization': f'Bearer {AccessToken.for_user(other)}'}
+
+        response = await self.async_client.get(f'/api/v1/cvs/async/{self.cv.pk}/', headers=auth)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual((await self.async_client.get('/api/v1/cvs/async/')).status_code, 401)
@@ -0,0 +1,70 @@
+# apps/cv_app/tests/test_career.py
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from apps.cv_app.career import compute_career_metrics
+from apps.cv_app.models import CV, Education, Experience
+
+User = get_user_model()
+
+
+class CareerMetricsTests(SimpleTestCase):
+
+    def test_overlapping_periods_are_merged_and_gaps_measured(self):
+        metrics = compute_career_metrics(
+            [
+                {'title': 'Stagiaire', 'start_date': date(2015, 1, 1), 'end_date': date(2015, 7, 1)},
+                {'title': 'Développeur', 'start_date': date(2016, 1, 1), 'end_date': date(2019, 1, 1)},
+                # Chevauche le poste précédent : ne compte qu'une fois
+                {'title': 'Freelance', 'start_date': date(2018, 6, 1), 'end_date': date(2019, 6, 1)},
+                {'title': 'Lead', 'start_date': '2020-01-01', 'end_date': None},
+            ],
+            [{'end_date': date(2014, 6, 30)}, {'end_date': None}],
+            today=date(2021, 1, 1),
+        )
+
+        self.assertEqual(metrics, {
+            'experience_months': 6 + 41 + 12,
+            'current_position': 'Lead',
+            'largest_gap_months': 7,
+            'latest_education_end': date(2014, 6, 30),
+        })
+
+    def test_empty_cv(self):
+        self.assertEqual(compute_career_metrics([], []), {
+            'experience_months': 0, 'current_position': '', 'largest_gap_months': 0, 'latest_education_end': None,
+        })
+
+
+class CareerFilterTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='parcours@email.com', username='parcours', password='password123')
+        self.junior = CV.objects.create(owner=self.user, title='Junior')
+        self.senior = CV.objects.create(owner=self.user, title='Senior')
+        self.client.force_authenticate(self.user)
+
+    def list_ids(self, query):
+        response = self.client.get(f'/api/v1/cvs/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return {row['id'] for row in response.data['results']}
+
+    def test_section_writes_update_metrics_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            experience = Experience.objects.create(
+                cv=self.senior, title='Architecte', company='ACME', start_date=date(2010, 1, 1),
+            )
+            Education.objects.create(cv=self.senior, degree='Master', institution='INSA', start_date=date(2005, 9, 1), end_date=date(2009, 6, 30))
+
+        self.senior.refresh_from_db()
+        self.assertEqual(self.senior.current_position, 'Architecte')
+        self.assertEqual(self.list_ids('min_experience_months=120&currently_employed=true'), {self.senior.pk})
+        self.assertEqual(self.list_ids('education_ended_before=2010-01-01'), {self.senior.pk})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            experience.delete()
+
+        self.assertEqual(self.list_ids('currently_employed=false'), {self.junior.pk, self.senior.pk})
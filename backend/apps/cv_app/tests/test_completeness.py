@@ -0,0 +1,60 @@
+# apps/cv_app/tests/test_completeness.py
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.cv_app.completeness import recount_completeness
+from apps.cv_app.models import CV, Contact, Experience, Skill
+
+User = get_user_model()
+
+
+class CompletenessTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='complet@email.com', username='complet', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.empty = CV.objects.create(owner=self.user, title='Vide')
+            self.cv = CV.objects.create(owner=self.user, title='Complet', summary='Développeur backend')
+            Contact.objects.create(cv=self.cv, email='contact@email.com', city='Lyon', country='France')
+            self.experience = Experience.objects.create(
+                cv=self.cv, title='Développeur', company='ACME', start_date=date(2020, 1, 1),
+            )
+            for name in ('Python', 'Django'):
+                Skill.objects.create(cv=self.cv, name=name)
+
+    def test_section_writes_update_the_score_incrementally(self):
+        self.cv.refresh_from_db()
+        # résumé 10 + contact 3/7 de 20 + expérience 20 + 2/5 compétences de 15
+        self.assertEqual(self.cv.completeness, 10 + 9 + 20 + 6)
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.experience.description = 'API REST et migrations de données'
+                self.experience.save()
+        # Seule la section modifiée est relue : ni contact ni compétences.
+        reads = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertFalse([sql for sql in reads if 'FROM "cv_app_skill"' in sql or 'FROM "cv_app_contact"' in sql])
+
+        self.cv.refresh_from_db()
+        self.assertEqual(self.cv.completeness, 60)
+        self.assertEqual(self.cv.section_counts['described_experiences'], 1)
+
+        counts = self.cv.section_counts
+        CV.objects.filter(pk=self.cv.pk).update(completeness=0, section_counts={})
+        recount_completeness([self.cv.pk])
+        self.cv.refresh_from_db()
+        self.assertEqual(self.cv.completeness, 60)
+        self.assertEqual({key: count for key, count in self.cv.section_counts.items() if count}, counts)
+
+    def test_list_exposes_and_sorts_by_completeness(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/cvs/', {'ordering': '-completeness'})
+
+        self.assertEqual(
+            [(row['id'], row['completeness']) for row in response.data['results']],
+            [(self.cv.pk, 45), (self.empty.pk, 0)],
+        )
@@ -0,0 +1,43 @@
+# apps/cv_app/tests/test_constraints.py
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.cv_app.models import CV, Contact, Skill
+
+User = get_user_model()
+
+
+class ConstraintValidationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='contraintes@email.com', username='contraintes', password='password123')
+        self.cv = CV.objects.create(owner=self.user, title='Mon CV')
+        Skill.objects.create(cv=self.cv, name='Python')
+        self.client.force_authenticate(self.user)
+
+    def test_duplicates_are_rejected_by_the_database_with_field_errors(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/v1/cvs/skills/', {'cv': self.cv.pk, 'name': 'Python'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), ['name'])
+        # Aucun SELECT d'unicité avant l'INSERT
+        self.assertFalse([q for q in queries if q['sql'].startswith('SELECT') and 'FROM "cv_app_skill"' in q['sql']])
+
+        response = self.client.post('/api/v1/cvs/', {'title': 'Mon CV'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), ['title'])
+
+        # La transaction de requête a été annulée proprement : la suivante passe.
+        response = self.client.post('/api/v1/cvs/skills/', {'cv': self.cv.pk, 'name': 'Django'})
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_second_contact_is_rejected(self):
+        response = self.client.post('/api/v1/cvs/contacts/', {'cv': self.cv.pk, 'email': 'moi@email.com'})
+        self.assertEqual(response.status_code, 201, response.data)
+
+        response = self.client.post('/api/v1/cvs/contacts/', {'cv': self.cv.pk, 'email': 'autre@email.com'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+        self.assertEqual(Contact.objects.get(cv=self.cv).email, 'moi@email.com')
@@ -0,0 +1,70 @@
+# apps/cv_app/tests/test_facets.py
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from apps.cv_app import facets
+from apps.cv_app.facets import FacetIndex
+from apps.cv_app.models import CV, Contact, Language, Skill
+
+User = get_user_model()
+
+
+class FacetSearchTests(APITestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email='recruteur@email.com', username='recruteur', password='password123', is_staff=True,
+        )
+        self.python_lyon = self.create_cv('Dev Python', 'Lyon', [('Python', 8), ('Django', 6)], ['Anglais'])
+        self.python_paris = self.create_cv('Data', 'Paris', [('python', 5)], ['Anglais', 'Allemand'])
+        self.java_lyon = self.create_cv('Dev Java', ' lyon ', [('Java', 9)], [])
+
+        self.index = FacetIndex.build()
+        patcher = mock.patch.object(facets, '_index', self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(self.staff)
+
+    def create_cv(self, title, city, skills, languages):
+        cv = CV.objects.create(owner=self.staff, title=title)
+        Contact.objects.create(cv=cv, email='contact@email.com', city=city, country='France')
+        for name, level in skills:
+            Skill.objects.create(cv=cv, name=name, level=level)
+        for name in languages:
+            Language.objects.create(cv=cv, name=name)
+        return cv
+
+    def search(self, query):
+        response = self.client.get(f'/api/v1/cvs/facets/?{query}')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_clauses_combine_with_and_values_with_or(self):
+        data = self.search('skill=python&city=lyon|paris&facets=city,language')
+
+        # Valeurs normalisées (casse, espaces) ; CVs du plus récent au plus ancien
+        self.assertEqual([row['id'] for row in data['results']], [self.python_paris.pk, self.python_lyon.pk])
+        self.assertEqual(data['facets']['language'], [{'value': 'anglais', 'count': 2}, {'value': 'allemand', 'count': 1}])
+
+        data = self.search('skill_level=python:7-10')
+        self.assertEqual([row['id'] for row in data['results']], [self.python_lyon.pk])
+
+    def test_index_catches_up_from_outbox_events(self):
+        Skill.objects.create(cv=self.java_lyon, name='Python', level=7)
+        Contact.objects.filter(cv=self.python_paris).delete()
+        self.python_lyon.delete()
+
+        self.index.refreshed_at = 0
+        data = self.search('skill=python&facets=city')
+
+        self.assertEqual([row['id'] for row in data['results']], [self.java_lyon.pk, self.python_paris.pk])
+        self.assertEqual(data['facets']['city'], [{'value': 'lyon', 'count': 1}])
+
+    def test_invalid_filters_and_non_staff_are_rejected(self):
+        self.assertEqual(self.client.get('/api/v1/cvs/facets/?skill_level=python:12').status_code, 400)
+
+        user = User.objects.create_user(email='candidat@email.com', username='candidat', password='password123')
+        self.client.force_authenticate(user)
+        self.assertEqual(self.client.get('/api/v1/cvs/facets/?skill=python').status_code, 403)
@@ -0,0 +1,90 @@
+# apps/cv_app/tests/test_idempotency.py
+import socket
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.common import idempotency
+from apps.common.cache import ResilientRedisCache
+from apps.cv_app.models import CV, Experience
+from apps.cv_app.views import ExperienceViewSet
+
+User = get_user_model()
+
+
+class IdempotencyKeyTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='idem@email.com', username='idem@email.com',
+            password='password123', first_name='Idem', last_name='Potent',
+        )
+        self.cv = CV.objects.create(owner=self.user, title='CV Idempotent')
+        self.client.force_authenticate(self.user)
+        self.url = '/api/v1/cvs/experiences/'
+        self.payload = {'cv': self.cv.pk, 'title': 'Dev', 'company': 'ACME', 'start_date': '2020-01'}
+
+    def post(self, payload, key='retry-1'):
+        # La réponse n'est mémorisée qu'au commit de la transaction.
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def check_retry_is_replayed(self):
+        first = self.post(self.payload)
+        retry = self.post(self.payload)
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Experience.objects.count(), 1)
+
+    def test_retry_is_replayed_from_cache(self):
+        self.check_retry_is_replayed()
+
+    @override_settings(IDEMPOTENCY_SETTINGS={'STORE': 'apps.common.idempotency.DatabaseIdempotencyStore'})
+    def test_retry_is_replayed_from_database(self):
+        self.check_retry_is_replayed()
+
+    def test_key_reused_with_other_payload_is_rejected(self):
+        self.post(self.payload)
+        response = self.post({**self.payload, 'company': 'Autre'})
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Experience.objects.count(), 1)
+
+    def test_requests_without_key_are_not_deduplicated(self):
+        self.client.post(self.url, self.payload, format='json')
+        self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(Experience.objects.count(), 2)
+
+    def test_unhandled_exception_releases_the_key(self):
+        """Une exception non gérée ne laisse pas la clé verrouillée : le nouvel essai s'exécute."""
+        with mock.patch.object(ExperienceViewSet, 'perform_create', side_effect=RuntimeError('panne')):
+            with self.assertRaises(RuntimeError):
+                self.post(self.payload)
+
+        response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Experience.objects.count(), 1)
+
+    def test_lock_fails_closed_while_redis_is_unavailable(self):
+        """Sans Redis, un verrou local n'exclurait que le processus : la requête est refusée."""
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        unreachable = ResilientRedisCache(f'redis://127.0.0.1:{port}/0', {
+            'ALIAS': 'idempotence-panne', 'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.2, 'SOCKET_TIMEOUT': 0.2},
+        })
+        with mock.patch.object(idempotency, 'cache', unreachable):
+            response = self.post(self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(Experience.objects.exists())
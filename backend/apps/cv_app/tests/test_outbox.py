@@ -0,0 +1,138 @@
+# apps/cv_app/tests/test_outbox.py
+from datetime import date, timedelta
+
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.cv_app.models import CV, Experience, OutboxEvent
+from apps.cv_app import outbox
+from apps.cv_app.outbox import OutboxRelay, purge_processed, register_handler, unregister_handler
+
+User = get_user_model()
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='outbox@email.com', username='outbox@email.com',
+            password='password123', first_name='Out', last_name='Box',
+        )
+        self.cv = CV.objects.create(owner=self.user, title='CV Outbox')
+        self.received = []
+        register_handler('*')(self.handler)
+
+    def tearDown(self):
+        unregister_handler(self.handler)
+
+    def handler(self, event):
+        self.received.append(event.event_type)
+
+    def add_experience(self):
+        return Experience.objects.create(
+            cv=self.cv, title='Dev', company='ACME', start_date=date(2020, 1, 1)
+        )
+
+    def test_writes_record_events_for_the_cv(self):
+        """Chaque écriture sur le CV ou une section produit un événement sur l'agrégat du CV."""
+        experience = self.add_experience()
+        experience.delete()
+
+        events = list(OutboxEvent.objects.values_list('event_type', 'aggregate_id'))
+        self.assertEqual(events, [
+            ('cv.created', self.cv.pk),
+            ('experience.created', self.cv.pk),
+            ('experience.deleted', self.cv.pk),
+        ])
+
+    def test_relay_delivers_in_order_and_marks_processed(self):
+        self.add_experience()
+
+        delivered = OutboxRelay().drain()
+
+        self.assertEqual(delivered, 2)
+        self.assertEqual(self.received, ['cv.created', 'experience.created'])
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+
+    def test_failed_handler_blocks_later_events_of_the_same_cv(self):
+        """Un échec laisse l'événement en attente et retient les suivants du même CV."""
+        self.add_experience()
+
+        def failing(event):
+            if event.event_type == 'cv.created':
+                raise RuntimeError('indisponible')
+
+        register_handler('cv.*')(failing)
+        try:
+            self.assertEqual(OutboxRelay().run_once(), 0)
+        finally:
+            unregister_handler(failing)
+
+        self.assertEqual(OutboxEvent.objects.filter(processed_at__isnull=True).count(), 2)
+        failed = OutboxEvent.objects.get(event_type='cv.created')
+        self.assertEqual(failed.attempts, 1)
+
+        # Le handler est rétabli : rien avant le nouvel essai, puis les deux événements dans l'ordre.
+        self.received.clear()
+        self.assertEqual(OutboxRelay().drain(), 0)
+        OutboxEvent.objects.filter(pk=failed.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(OutboxRelay().drain(), 2)
+        self.assertEqual(self.received, ['cv.created', 'experience.created'])
+
+    def test_failures_back_off_then_dead_letter(self):
+        def failing(event):
+            raise RuntimeError('indisponible')
+
+        register_handler('cv.created')(failing)
+        try:
+            relay = OutboxRelay(max_attempts=3)
+            delays = []
+            for _ in range(3):
+                before = timezone.now()
+                relay.drain()
+                event = OutboxEvent.objects.get(event_type='cv.created')
+                if event.next_attempt_at is not None:
+                    delays.append(round((event.next_attempt_at - before).total_seconds()))
+                    OutboxEvent.objects.filter(pk=event.pk).update(next_attempt_at=before)
+        finally:
+            unregister_handler(failing)
+
+        self.assertEqual(delays, [2, 4])
+        self.assertEqual(event.attempts, 3)
+        self.assertIsNotNone(event.dead_lettered_at)
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(purge_processed(timezone.now() + timedelta(days=1)), 0)
+
+    def test_handlers_run_outside_the_claim_transaction(self):
+        depths = []
+
+        def record_depth(event):
+            depths.append(len(connection.atomic_blocks))
+
+        register_handler('cv.created')(record_depth)
+        try:
+            OutboxRelay().drain()
+        finally:
+            unregister_handler(record_depth)
+
+        # Logique : Seuls les blocs ouverts par le test (TestCase) sont actifs pendant la livraison.
+        self.assertEqual(depths, [len(connection.atomic_blocks)])
+
+
+class OutboxAtomicityTests(TransactionTestCase):
+    """Hors de toute transaction appelante (autocommit), comme une vue sans politique ATOMIC."""
+
+    def test_failed_event_write_rolls_back_the_save(self):
+        user = User.objects.create_user(
+            email='atomic@email.com', username='atomic@email.com',
+            password='password123', first_name='At', last_name='Omic',
+        )
+        with mock.patch.object(outbox, 'record_event', side_effect=RuntimeError('outbox indisponible')):
+            with self.assertRaises(RuntimeError):
+                CV.objects.create(owner=user, title='CV sans événement')
+
+        self.assertFalse(CV.objects.filter(title='CV sans événement').exists())
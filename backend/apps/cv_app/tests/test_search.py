@@ -0,0 +1,47 @@
+# apps/cv_app/tests/test_search.py
+from datetime import date
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from apps.cv_app.models import CV, Experience, Skill
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'postgresql', "Recherche plein texte PostgreSQL")
+class CVSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='search@email.com', username='search', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data_cv = CV.objects.create(owner=self.user, title='Ingénieur données')
+            self.web_cv = CV.objects.create(owner=self.user, title='Développeur web')
+            Experience.objects.create(
+                cv=self.web_cv, title='Développeur', company='ACME', start_date=date(2020, 1, 1),
+                description='Migration des pipelines de données vers PostgreSQL',
+            )
+
+    def test_section_writes_refresh_the_document(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(cv=self.data_cv, name='Kubernetes', level=7)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.get('/api/v1/cvs/search/', {'q': 'kubernetes'})
+
+        self.assertEqual([row['id'] for row in response.data['results']], [self.data_cv.pk])
+
+    def test_results_are_ranked_and_scoped_to_owner(self):
+        other = User.objects.create_user(email='other@email.com', username='other', password='password123')
+        with self.captureOnCommitCallbacks(execute=True):
+            CV.objects.create(owner=other, title='Analyste données')
+
+        self.client.force_authenticate(self.user)
+        # Logique : "données" (fr) et "data" ne partagent pas de racine : on cherche le mot français.
+        response = self.client.get('/api/v1/cvs/search/', {'q': 'données'})
+
+        self.assertEqual(response.data['count'], 2)
+        # Titre (poids A) avant description (poids D)
+        self.assertEqual([row['id'] for row in response.data['results']], [self.data_cv.pk, self.web_cv.pk])
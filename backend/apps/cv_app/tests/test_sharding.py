@@ -0,0 +1,148 @@
+# apps/cv_app/tests/test_sharding.py
+
+from datetime import date
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from apps.common.bitmaps import Bitmap
+from apps.cv_app import sharding
+from apps.cv_app.facets import FacetResults
+from apps.cv_app.models import CV, CVShardAssignment, Experience, OutboxEvent
+from apps.cv_app.search import refresh_search_vectors, supports_full_text_search
+from apps.cv_app.sharding import HashRing, get_shard_for_owner, move_owner
+from apps.users.models import User
+
+
+class ShardingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_adding_a_shard_moves_only_part_of_the_owners(self):
+        before = HashRing(['default', 'cv_shard_1'])
+        after = HashRing(['default', 'cv_shard_1', 'cv_shard_2'])
+
+        moved = [owner_id for owner_id in range(1000) if before.get_node(owner_id) != after.get_node(owner_id)]
+
+        self.assertTrue(all(after.get_node(owner_id) == 'cv_shard_2' for owner_id in moved))
+        self.assertLess(len(moved), 500)
+
+    def test_owner_is_registered_in_directory_on_first_lookup(self):
+        user = User.objects.create_user(email='shard@example.com', password='Secret123!', username='shard')
+
+        shard = sharding.get_ring().get_node(user.pk)
+        self.assertEqual(get_shard_for_owner(user.pk), shard)
+        self.assertTrue(CVShardAssignment.objects.filter(owner_id=user.pk, shard=shard).exists())
+
+
+# Lancer avec un second shard, ex. :
+# CV_SHARD_DATABASE_URLS=sqlite:////tmp/cv_shard_1.sqlite3 pytest apps/cv_app/tests/test_sharding.py
+@skipUnless('cv_shard_1' in settings.DATABASES, "Second shard non configuré (CV_SHARD_DATABASE_URLS).")
+class MultiShardTests(APITestCase):
+
+    databases = {'default', 'cv_shard_1'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='multi@example.com', password='Secret123!', username='multi')
+        CVShardAssignment.objects.create(owner_id=self.user.pk, shard='default')
+        self.client.force_authenticate(self.user)
+
+    def create_cv(self, title='CV'):
+        cv = CV.objects.create(owner=self.user, title=title)
+        Experience.objects.create(cv=cv, title='Dev', company='ACME', start_date=date(2020, 1, 1))
+        return cv
+
+    def test_api_writes_and_reads_go_to_the_owner_shard(self):
+        CVShardAssignment.objects.filter(owner_id=self.user.pk).update(shard='cv_shard_1')
+
+        response = self.client.post('/api/v1/cvs/', {'title': 'CV sur shard'}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(CV.objects.using('cv_shard_1').filter(pk=response.data['id'], owner_id=self.user.pk).exists())
+        self.assertFalse(CV.objects.using('default').filter(owner_id=self.user.pk).exists())
+        listed = self.client.get('/api/v1/cvs/')
+        self.assertEqual([cv['id'] for cv in listed.data['results']], [response.data['id']])
+
+    def test_staff_search_returns_cvs_of_every_shard_with_their_owner(self):
+        if not supports_full_text_search('cv_shard_1'):
+            self.skipTest("Recherche plein texte PostgreSQL")
+        local = self.create_cv('Développeur Django')
+        other = User.objects.create_user(email='distant@example.com', password='Secret123!', username='distant')
+        remote = CV.objects.using('cv_shard_1').create(owner=other, title='Développeur Django')
+        refresh_search_vectors([local.pk])
+        refresh_search_vectors([remote.pk], using='cv_shard_1')
+        self.user.is_staff = True
+        self.user.save()
+
+        response = self.client.get('/api/v1/cvs/search/', {'q': 'django'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            {(cv['id'], cv['owner_email']) for cv in response.data['results']},
+            {(local.pk, 'multi@example.com'), (remote.pk, 'distant@example.com')},
+        )
+
+    def test_facet_results_load_cvs_of_every_shard_with_their_owner(self):
+        local = self.create_cv()
+        other = User.objects.create_user(email='distant@example.com', password='Secret123!', username='distant')
+        # Logique : IDs distincts entre shards (séquences entrelacées en production).
+        remote = CV.objects.using('cv_shard_1').create(pk=local.pk + 1, owner=other, title='CV distant')
+
+        with self.assertNumQueries(1, using='cv_shard_1'):
+            page = FacetResults(Bitmap([local.pk, remote.pk]))[0:2]
+
+        self.assertEqual(
+            {(cv.pk, cv.owner.email) for cv in page},
+            {(local.pk, 'multi@example.com'), (remote.pk, 'distant@example.com')},
+        )
+
+    def test_move_owner_copies_then_deletes_the_source_rows(self):
+        cv = self.create_cv()
+
+        copied = move_owner(self.user.pk, 'cv_shard_1')
+
+        self.assertGreaterEqual(copied, 2)
+        self.assertFalse(CV.objects.using('default').filter(owner_id=self.user.pk).exists())
+        self.assertEqual(Experience.objects.using('cv_shard_1').get(cv_id=cv.pk).company, 'ACME')
+        self.assertTrue(OutboxEvent.objects.using('cv_shard_1').filter(aggregate_id=cv.pk).exists())
+        self.assertEqual(
+            list(CVShardAssignment.objects.filter(owner_id=self.user.pk).values_list('shard', 'locked')),
+            [('cv_shard_1', False)],
+        )
+        response = self.client.get(f'/api/v1/cvs/{cv.pk}/')
+        self.assertEqual(response.data['experiences'][0]['company'], 'ACME')
+
+    def test_cv_created_on_the_source_during_the_move_is_not_lost(self):
+        """Une écriture commencée avant le verrou d'annuaire et validée après le premier passage est reprise."""
+        first = self.create_cv('Premier')
+        move_rows = sharding._move_owner_rows
+        late = []
+
+        def move_then_late_write(owner_id, source, target):
+            copied = move_rows(owner_id, source, target)
+            if not late:
+                late.append(CV.objects.using(source).create(owner=self.user, title='Tardif'))
+            return copied
+
+        with mock.patch.object(sharding, '_move_owner_rows', side_effect=move_then_late_write):
+            move_owner(self.user.pk, 'cv_shard_1')
+
+        self.assertEqual(
+            set(CV.objects.using('cv_shard_1').filter(owner_id=self.user.pk).values_list('pk', flat=True)),
+            {first.pk, late[0].pk},
+        )
+        self.assertFalse(CV.objects.using('default').filter(owner_id=self.user.pk).exists())
+
+    def test_deleting_a_user_deletes_cvs_on_every_shard(self):
+        CVShardAssignment.objects.filter(owner_id=self.user.pk).update(shard='cv_shard_1')
+        cv = CV.objects.using('cv_shard_1').create(owner=self.user, title='CV distant')
+
+        self.user.delete()
+
+        self.assertFalse(CV.objects.using('cv_shard_1').filter(pk=cv.pk).exists())
@@ -1,5 +1,6 @@
 # backend/apps/cv_app/urls.py
 
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 from .views import (
     CVViewSet, 
@@ -12,6 +13,7 @@ from .views import (
     
     
 )
+from .async_views import AsyncCVDetailView, AsyncCVListView, AsyncSectionListView
 
 # Définition du namespace pour les reverses (recommandé pour Django)
 app_name = 'cv_app' 
@@ -20,11 +22,7 @@ app_name = 'cv_app'
 # Initialisation du routeur. C'est lui qui va générer les chemins RESTful (GET, POST, PUT, DELETE).
 router = DefaultRouter()
 
-# 1. Vue principale du document CV
-# Endpoints générés : /cvs/ (LIST & CREATE) et /cvs/{pk}/ (RETRIEVE, UPDATE, DESTROY)
-router.register(r'', CVViewSet, basename='cv')
-
-# 2. Vues des sections (chacune a son propre endpoint CRUD indépendant)
+# 1. Vues des sections (chacune a son propre endpoint CRUD indépendant)
 # Ces chemins sont préférables aux chemins imbriqués (ex: cvs/1/experiences/) pour la simplicité.
 # Le lien logique au CV est géré dans les ViewSets (BaseSectionViewSet).
 router.register(r'contacts', ContactViewSet, basename='contact')
@@ -34,6 +32,20 @@ router.register(r'skills', SkillViewSet, basename='skill')
 router.register(r'languages', LanguageViewSet, basename='language')
 router.register(r'interests', InterestViewSet, basename='interest')
 
+# 2. Vue principale du document CV
+# Endpoints générés : /cvs/ (LIST & CREATE) et /cvs/{pk}/ (RETRIEVE, UPDATE, DESTROY)
+# Logique : Enregistrée EN DERNIER, sinon le motif /cvs/{pk}/ capture
+# /cvs/experiences/ & co. (pk='experiences') avant les routes des sections.
+router.register(r'', CVViewSet, basename='cv')
+
+
+# 3. Lectures asynchrones (déploiement ASGI, voir async_views.py)
+# Logique : Avant router.urls, sinon /cvs/{pk}/ capture /cvs/async/.
+async_urlpatterns = [
+    path('async/', AsyncCVListView.as_view(), name='cv-async-list'),
+    path('async/<int:pk>/', AsyncCVDetailView.as_view(), name='cv-async-detail'),
+    path('async/<str:section>/', AsyncSectionListView.as_view(), name='section-async-list'),
+]
 
 # Le router.urls contient la liste complète des chemins générés
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = async_urlpatterns + router.urls
\ No newline at end of file
@@ -1,12 +1,27 @@
 # cv_app/views.py
 
+from django.db import router
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+
+from apps.common.idempotency import IdempotencyMixin
+from apps.common.replicas import ReplicaRoutingMixin
+from apps.common.transactions import TransactionPolicyMixin
+
+from .archival import rehydrate_cv, rehydrate_user_cvs
+from .deletion import delete_cvs
+from .filters import CVFilter
+from .facets import FacetResults, InvalidFacetFilter, get_facet_index, parse_filters, parse_requested_facets
+from .search import ShardedSearchResults, search_cvs
+from .sharding import ShardRoutingMixin, get_cv_shards
 
 from .models import CV, Contact, Experience, Education, Skill, Language, Interest
 from .serializers import (
     CVSerializer, 
+    CVFacetResultSerializer,
+    CVSearchResultSerializer,
     ContactSerializer, 
     ExperienceSerializer, 
     EducationSerializer, 
@@ -23,20 +38,35 @@ logger = logging.getLogger(__name__)
 # 1. CV VIEWSET (Gestion du document CV principal)
 # ====================================================================
 
-class CVViewSet(viewsets.ModelViewSet):
+class CVViewSet(IdempotencyMixin, TransactionPolicyMixin, ReplicaRoutingMixin, ShardRoutingMixin, viewsets.ModelViewSet):
     """
     ViewSet pour la gestion des documents CV (Création/Mise à jour du titre/résumé).
     Gère la logique de création initiale du CV et de son Contact associé.
     """
     serializer_class = CVSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_class = CVFilter
+    # Tri : ?ordering=-completeness (colonnes indexées ; défaut : -updated_at)
+    ordering_fields = ['updated_at', 'created_at', 'completeness', 'experience_months']
+    # Budgets de latence (secondes, voir apps/common/deadlines.py)
+    latency_budget = 3.0
+    latency_budgets = {'list': 5.0, 'search': 3.0}
+    # Portées de API_RATE_LIMITS (voir apps/common/throttling.py)
+    throttle_scopes = {'create': 'cv_creation'}
+    # Classes de charge (délestage, voir apps/common/concurrency.py)
+    load_classes = {'search': 'heavy'}
     
     def get_queryset(self):
         """
         Optimisation anti N+1 : utilise prefetch_related pour charger toutes 
         les sections du CV en un nombre minimal de requêtes.
+        Les CVs archivés de l'utilisateur sont réhydratés au passage.
         """
-        return CV.objects.filter(owner=self.request.user).prefetch_related(
+        queryset = CV.objects.all()
+        if rehydrate_user_cvs(self.request.user):
+            # Logique : Les sections réinsérées ne sont peut-être pas encore sur le réplica.
+            queryset = queryset.using(router.db_for_write(CV))
+        return queryset.filter(owner=self.request.user).prefetch_related(
             'experiences', 
             'educations', 
             'skills', 
@@ -50,12 +80,60 @@ class CVViewSet(viewsets.ModelViewSet):
         """Associe le CV créé à l'utilisateur connecté."""
         serializer.save(owner=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Suppression rapide : la base supprime les sections en cascade (un seul DELETE)."""
+        delete_cvs([instance.pk], using=router.db_for_write(CV, instance=instance))
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Endpoint GET /api/v1/cvs/search/?q=...
+        Recherche plein texte classée par pertinence (syntaxe : "expression exacte",
+        OR, -exclusion). Un membre du staff cherche dans tous les CVs (tous shards),
+        les autres utilisateurs dans leurs propres CVs.
+        """
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            raise ValidationError({'q': ['Ce paramètre est obligatoire.']})
+
+        if request.user.is_staff:
+            results = ShardedSearchResults(text, get_cv_shards())
+        else:
+            results = search_cvs(CV.objects.filter(owner=request.user), text)
+        page = self.paginate_queryset(results)
+        if not request.user.is_staff:
+            # Logique : Pas de select_related('owner') : la table des utilisateurs est vide sur les shards.
+            for cv in page:
+                cv.owner = request.user
+        return self.get_paginated_response(CVSearchResultSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def facets(self, request):
+        """
+        Endpoint GET /api/v1/cvs/facets/?skill=python&skill_level=django:7-10&city=lyon|paris&facets=country
+        Filtres recruteur sur tous les CVs (staff uniquement), servis par l'index
+        bitmap en mémoire (voir apps/cv_app/facets.py) : paramètres en ET, valeurs
+        séparées par « | » en OU. `facets` liste les facettes dont compter les valeurs.
+        """
+        index = get_facet_index()
+        try:
+            clauses = parse_filters(request.query_params)
+            requested = parse_requested_facets(request.query_params)
+        except InvalidFacetFilter as exc:
+            raise ValidationError({exc.param: [str(exc)]})
+
+        matches = index.query(clauses)
+        page = self.paginate_queryset(FacetResults(matches))
+        response = self.get_paginated_response(CVFacetResultSerializer(page, many=True).data)
+        response.data['facets'] = {facet: index.count_values(matches, facet) for facet in requested}
+        return response
+
 
 # ====================================================================
 # 2. VUES ABSTRAITES ET SECTIONS VIEWSETS (Expérience, Éducation, etc.)
 # ====================================================================
 
-class BaseSectionViewSet(viewsets.ModelViewSet):
+class BaseSectionViewSet(IdempotencyMixin, TransactionPolicyMixin, ReplicaRoutingMixin, ShardRoutingMixin, viewsets.ModelViewSet):
     """
     Classe de base pour tous les ViewSets de sections (ForeignKey to CV).
     Implémente la sécurité et l'accès aux ressources.
@@ -64,18 +142,26 @@ class BaseSectionViewSet(viewsets.ModelViewSet):
     car le frontend envoie déjà le champ 'cv' dans les données.
     """
     permission_classes = [permissions.IsAuthenticated]
+    latency_budget = 2.0
     cv_relation_name = None
 
     def get_queryset(self):
         """
         Récupère les objets de la section liés aux CVs de l'utilisateur.
         Permet l'accès à toutes les ressources des CVs de l'utilisateur.
+        Les CVs archivés de l'utilisateur sont réhydratés au passage.
         """
+        queryset, cvs = self.queryset.all(), CV.objects.all()
+        if rehydrate_user_cvs(self.request.user):
+            # Logique : Les sections réinsérées ne sont peut-être pas encore sur le réplica.
+            using = router.db_for_write(CV)
+            queryset, cvs = queryset.using(using), cvs.using(using)
+
         # Récupère tous les IDs de CVs appartenant à l'utilisateur
-        user_cv_ids = CV.objects.filter(owner=self.request.user).values_list('id', flat=True)
+        user_cv_ids = cvs.filter(owner=self.request.user).values_list('id', flat=True)
         
         # Retourne les objets de la section liés à ces CVs
-        return self.queryset.filter(cv_id__in=user_cv_ids).order_by('-id')
+        return queryset.filter(cv_id__in=user_cv_ids).order_by('-id')
 
     def create(self, request, *args, **kwargs):
         """
@@ -98,13 +184,17 @@ class BaseSectionViewSet(viewsets.ModelViewSet):
         # Vérifier que le CV existe et appartient à l'utilisateur
         try:
             cv = CV.objects.get(id=cv_id)
-            if cv.owner != request.user:
+            if cv.owner_id != request.user.pk:
                 logger.error(f"CV {cv_id} n'appartient pas à {request.user.email}")
                 return Response(
                     {'error': 'Ce CV ne vous appartient pas.'}, 
                     status=status.HTTP_403_FORBIDDEN
                 )
             logger.info(f"CV validé: {cv.title} (ID: {cv.id})")
+            # Logique : Les sections archivées reviennent avant tout ajout,
+            # sinon la réhydratation pourrait violer les contraintes d'unicité.
+            if cv.archived_at:
+                rehydrate_cv(cv)
         except CV.DoesNotExist:
             logger.error(f"CV {cv_id} introuvable")
             return Response(
@@ -141,7 +231,7 @@ class BaseSectionViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         # Vérifier que le CV de la ressource appartient à l'utilisateur
-        if instance.cv.owner != request.user:
+        if instance.cv.owner_id != request.user.pk:
             return Response(
                 {'error': 'Vous ne pouvez pas modifier cette ressource.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -157,7 +247,7 @@ class BaseSectionViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         
         # Vérifier que le CV de la ressource appartient à l'utilisateur
-        if instance.cv.owner != request.user:
+        if instance.cv.owner_id != request.user.pk:
             return Response(
                 {'error': 'Vous ne pouvez pas supprimer cette ressource.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -207,19 +297,24 @@ class InterestViewSet(BaseSectionViewSet):
 # 3. CONTACT VIEWSET (Singleton par CV)
 # ====================================================================
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(IdempotencyMixin, TransactionPolicyMixin, ReplicaRoutingMixin, ShardRoutingMixin, viewsets.ModelViewSet):
     """
     Gère la section Contact (relation OneToOne).
     Permet de créer le contact (POST) ou de le modifier (PUT/PATCH) une fois.
     """
     serializer_class = ContactSerializer
     permission_classes = [permissions.IsAuthenticated]
+    latency_budget = 2.0
     queryset = Contact.objects.all()
 
     def get_queryset(self):
-        """Retourne les objets Contact liés aux CVs de l'utilisateur."""
-        user_cv_ids = CV.objects.filter(owner=self.request.user).values_list('id', flat=True)
-        return Contact.objects.filter(cv_id__in=user_cv_ids)
+        """Retourne les objets Contact liés aux CVs de l'utilisateur (CVs archivés réhydratés)."""
+        contacts, cvs = Contact.objects.all(), CV.objects.all()
+        if rehydrate_user_cvs(self.request.user):
+            using = router.db_for_write(CV)
+            contacts, cvs = contacts.using(using), cvs.using(using)
+        user_cv_ids = cvs.filter(owner=self.request.user).values_list('id', flat=True)
+        return contacts.filter(cv_id__in=user_cv_ids)
 
     def create(self, request, *args, **kwargs):
         """Validation avant création du contact."""
@@ -233,32 +328,40 @@ class ContactViewSet(viewsets.ModelViewSet):
         
         try:
             cv = CV.objects.get(id=cv_id)
-            if cv.owner != request.user:
+            if cv.owner_id != request.user.pk:
                 return Response(
                     {'error': 'Ce CV ne vous appartient pas.'}, 
                     status=status.HTTP_403_FORBIDDEN
                 )
             
-            # Vérifier si un contact existe déjà pour ce CV
-            if Contact.objects.filter(cv=cv).exists():
-                return Response(
-                    {'error': 'Un contact existe déjà pour ce CV. Utilisez PUT/PATCH pour modifier.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-                
+            if cv.archived_at:
+                rehydrate_cv(cv)
         except CV.DoesNotExist:
             return Response(
                 {'cv': ['CV introuvable.']}, 
                 status=status.HTTP_404_NOT_FOUND
             )
-        
-        return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Logique : Pas de SELECT préalable, la contrainte OneToOne sur `cv` refuse
+        # le second contact (voir apps/common/constraints.py).
+        try:
+            serializer.save(cv=cv)
+        except ValidationError:
+            return Response(
+                {'error': 'Un contact existe déjà pour ce CV. Utilisez PUT/PATCH pour modifier.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def update(self, request, *args, **kwargs):
         """Validation avant mise à jour du contact."""
         instance = self.get_object()
         
-        if instance.cv.owner != request.user:
+        if instance.cv.owner_id != request.user.pk:
             return Response(
                 {'error': 'Vous ne pouvez pas modifier ce contact.'},
                 status=status.HTTP_403_FORBIDDEN
@@ -0,0 +1,244 @@
+# apps/users/activity.py
+
+"""
+Écriture différée (write-behind) de `User.last_login` et `User.last_activity`.
+
+Les connexions (émission d'un jeton) et l'activité (requête authentifiée)
+ne mettent plus à jour `users_user` de façon synchrone : l'horodatage est
+consigné dans un tampon Redis (un ZSET par champ, `ZADD GT` ne garde que
+le plus récent par utilisateur), puis `flush_activity` l'écrit en base
+par lots, toutes les quelques secondes (commande `flush_user_activity`).
+
+Reprise sur incident : le tampon est d'abord renommé atomiquement en clé
+« en cours » ; chaque lot n'en est retiré qu'après le commit de son UPDATE.
+Un vidage interrompu est repris tel quel au passage suivant. L'UPDATE ne
+fait jamais reculer un horodatage (`GREATEST`) : rejouer un lot ou écrire
+dans le désordre ne change pas le résultat.
+
+Sans Redis (cache local en développement / tests), un tampon en mémoire
+du processus prend le relais et se vide lui-même à l'intervalle configuré.
+Il sert aussi de repli si Redis ne répond pas (pendant `FALLBACK_SECONDS`,
+ou tant que le disjoncteur de `ResilientRedisCache` est ouvert) : le suivi
+de l'activité ne fait jamais échouer l'authentification.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import router
+from django.db.models import Case, DateTimeField, F, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_ACTIVITY_SETTINGS = {
+    'FLUSH_INTERVAL': 5,          # secondes entre deux vidages
+    'BATCH_SIZE': 500,            # utilisateurs par UPDATE
+    'ACTIVITY_RESOLUTION': 60,    # secondes : une activité par utilisateur et par processus au plus
+    'FALLBACK_SECONDS': 10,       # tampon local après une erreur Redis
+}
+
+ACTIVITY_FIELDS = ('last_login', 'last_activity')
+
+
+def get_activity_setting(name):
+    return getattr(settings, 'USER_ACTIVITY', {}).get(name, DEFAULT_USER_ACTIVITY_SETTINGS[name])
+
+
+# ====================================================================
+# 1. TAMPONS (Redis / mémoire du processus)
+# ====================================================================
+
+# Logique : Renomme le tampon en clé « en cours » sauf si un vidage précédent
+# n'a pas été terminé (il est alors repris d'abord).
+CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then return 1 end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[2])
+    return 1
+end
+return 0
+"""
+
+
+class RedisActivityBuffer:
+    """Un ZSET `user_id -> timestamp` par champ, plus sa copie en cours de vidage."""
+
+    def __init__(self, client):
+        self.client = client
+        self.claim_script = client.register_script(CLAIM_SCRIPT)
+
+    def _keys(self, field):
+        key = cache.make_key(f'users:activity:{field}')
+        return key, f'{key}:flushing'
+
+    def record(self, field, user_id, timestamp):
+        self.client.zadd(self._keys(field)[0], {user_id: timestamp}, gt=True)
+
+    def claim(self, field):
+        return bool(self.claim_script(keys=self._keys(field)))
+
+    def read(self, field, count):
+        rows = self.client.zrange(self._keys(field)[1], 0, count - 1, withscores=True)
+        return [(int(user_id), timestamp) for user_id, timestamp in rows]
+
+    def ack(self, field, user_ids):
+        self.client.zrem(self._keys(field)[1], *user_ids)
+
+
+class LocalActivityBuffer:
+    """Repli sans Redis : mêmes opérations sur des dictionnaires du processus."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {field: {} for field in ACTIVITY_FIELDS}
+        self.flushing = {field: {} for field in ACTIVITY_FIELDS}
+        self.last_flush = time.monotonic()
+
+    def record(self, field, user_id, timestamp):
+        with self.lock:
+            pending = self.pending[field]
+            pending[user_id] = max(timestamp, pending.get(user_id, timestamp))
+        if time.monotonic() - self.last_flush >= get_activity_setting('FLUSH_INTERVAL'):
+            self.last_flush = time.monotonic()
+            flush_activity(buffer=self)
+
+    def claim(self, field):
+        with self.lock:
+            if not self.flushing[field]:
+                self.flushing[field], self.pending[field] = self.pending[field], {}
+            return bool(self.flushing[field])
+
+    def read(self, field, count):
+        with self.lock:
+            return sorted(self.flushing[field].items(), key=lambda row: row[1])[:count]
+
+    def ack(self, field, user_ids):
+        with self.lock:
+            for user_id in user_ids:
+                self.flushing[field].pop(user_id, None)
+
+
+_local_buffer = LocalActivityBuffer()
+_redis_buffer = None
+_redis_down_until = 0.0
+
+
+def get_activity_buffer():
+    global _redis_buffer
+    try:
+        from django_redis import get_redis_connection
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return _local_buffer
+    if not isinstance(caches['default'], RedisCache):
+        return _local_buffer
+    if _redis_buffer is None:
+        # Logique : Avec `ResilientRedisCache`, connexions au timeout court des écritures.
+        get_client = getattr(caches['default'], 'get_operation_client', None)
+        _redis_buffer = RedisActivityBuffer(get_client('write') if get_client else get_redis_connection('default'))
+    return _redis_buffer
+
+
+def _redis_available():
+    circuit = getattr(caches['default'], 'circuit', None)
+    if circuit is not None:
+        return circuit.allow()
+    return time.monotonic() >= _redis_down_until
+
+
+# ====================================================================
+# 2. ENREGISTREMENT
+# ====================================================================
+
+_recent_activity = {}
+
+
+def _record(field, user_id, timestamp):
+    """Consigne l'horodatage dans le tampon Redis, ou dans le tampon local si Redis ne répond pas."""
+    global _redis_down_until
+    buffer = get_activity_buffer()
+    if buffer is not _local_buffer and _redis_available():
+        from redis.exceptions import RedisError
+        circuit = getattr(caches['default'], 'circuit', None)
+        try:
+            buffer.record(field, user_id, timestamp)
+        except (RedisError, OSError):
+            if circuit is not None:
+                circuit.record_failure()
+            _redis_down_until = time.monotonic() + get_activity_setting('FALLBACK_SECONDS')
+            metrics.increment('user_activity_fallback_total', field=field)
+            logger.warning("Redis injoignable : activité consignée en mémoire du processus.", exc_info=True)
+        else:
+            if circuit is not None:
+                circuit.record_success()
+            return
+    _local_buffer.record(field, user_id, timestamp)
+
+
+def record_login(user_id, timestamp=None):
+    """Connexion de `user_id` (émission d'un jeton), écrite au prochain vidage."""
+    _record('last_login', user_id, timestamp or time.time())
+
+
+def record_activity(user_id, timestamp=None):
+    """Requête authentifiée de `user_id`, au plus une fois par `ACTIVITY_RESOLUTION` et par processus."""
+    now = time.monotonic()
+    if now - _recent_activity.get(user_id, float('-inf')) < get_activity_setting('ACTIVITY_RESOLUTION'):
+        return
+    if len(_recent_activity) > 100_000:
+        _recent_activity.clear()
+    _recent_activity[user_id] = now
+    _record('last_activity', user_id, timestamp or time.time())
+
+
+# ====================================================================
+# 3. VIDAGE VERS LA BASE
+# ====================================================================
+
+def write_timestamps(field, rows, using=None):
+    """Un seul UPDATE pour le lot `[(user_id, timestamp)]`, sans jamais reculer la valeur en base."""
+    User = get_user_model()
+    using = using or router.db_for_write(User)
+    # Logique : Ordre des clés primaires constant -> pas d'interblocage entre vidages concurrents.
+    rows = sorted(rows)
+    value = Case(
+        *[When(pk=user_id, then=Value(datetime.fromtimestamp(ts, tz=dt_timezone.utc))) for user_id, ts in rows],
+        output_field=DateTimeField(),
+    )
+    return (
+        User.objects.using(using)
+        .filter(pk__in=[user_id for user_id, _ in rows])
+        .update(**{field: Greatest(Coalesce(F(field), value), value)})
+    )
+
+
+def flush_activity(buffer=None, batch_size=None):
+    """Écrit en base tout le tampon, lot par lot. Renvoie le nombre d'horodatages écrits."""
+    buffer = buffer or get_activity_buffer()
+    batch_size = batch_size or get_activity_setting('BATCH_SIZE')
+    written = 0
+    for field in ACTIVITY_FIELDS:
+        if not buffer.claim(field):
+            continue
+        while rows := buffer.read(field, batch_size):
+            write_timestamps(field, rows)
+            buffer.ack(field, [user_id for user_id, _ in rows])
+            written += len(rows)
+            metrics.increment('user_activity_flushed_total', len(rows), field=field)
+    return written
+
+
+def run_forever(interval=None):
+    interval = interval or get_activity_setting('FLUSH_INTERVAL')
+    while True:
+        started = time.monotonic()
+        flush_activity()
+        time.sleep(max(interval - (time.monotonic() - started), 0))
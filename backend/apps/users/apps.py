@@ -4,3 +4,28 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
+
+    def ready(self):
+        # Logique : Les connexions par session (admin) passent elles aussi par
+        # l'écriture différée de last_login (voir activity.py).
+        from django.contrib.auth.signals import user_logged_in
+        from django.db.models.signals import post_delete
+
+        from .activity import record_login
+        from .authentication import publish_auth_versions
+
+        user_logged_in.disconnect(dispatch_uid='update_last_login')
+        user_logged_in.connect(
+            lambda sender, user, **kwargs: record_login(user.pk),
+            dispatch_uid='apps.users.record_login',
+            weak=False,
+        )
+
+        # Logique : Un compte supprimé publie la version « absent » : ses jetons
+        # sont refusés sans attendre l'expiration de la version en cache.
+        post_delete.connect(
+            lambda sender, instance, using, **kwargs: publish_auth_versions([instance.pk], using=using),
+            sender=self.get_model('User'),
+            dispatch_uid='apps.users.revoke_deleted_user',
+            weak=False,
+        )
@@ -0,0 +1,183 @@
+# apps/users/authentication.py
+
+"""
+Authentification JWT sans requête sur la table des utilisateurs.
+
+Les jetons émis par `apps.users.tokens` portent, en plus de `user_id`,
+l'email, `is_staff`, `is_premium_subscriber` et la version d'authentification
+de l'utilisateur (`User.auth_version`). `ClaimsJWTAuthentication` reconstruit
+l'utilisateur à partir de ces claims signés ; seule la version courante est
+relue, depuis le cache Redis (la base n'est interrogée qu'en cas d'absence).
+
+La version est incrémentée par `User.save()` et `User.objects.update()`
+quand le mot de passe, `is_active`, `is_staff` ou `is_superuser` changent :
+tous les jetons émis auparavant (accès et rafraîchissement) sont alors
+refusés. La suppression d'un compte (`delete()`, purge par `fast_delete`)
+publie une version « absent » qui refuse aussi ses jetons. L'email et
+l'abonnement sont mis à jour au prochain rafraîchissement du jeton.
+Si Redis est indisponible, ces écritures échouent (503) plutôt que de
+laisser l'ancienne version en cache.
+
+ATTENTION : `request.user` ne charge que ces champs (les autres sont
+différés et lus en base à la demande). Les vues qui modifient l'utilisateur
+relisent la ligne complète (voir `get_request_user`).
+"""
+
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import router, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.common import metrics
+from apps.common.cache import CircuitOpen, without_fallback
+
+from .activity import record_activity
+from .token_store import TokenStoreUnavailable
+
+logger = logging.getLogger(__name__)
+
+AUTH_VERSION_CLAIM = 'auth_version'
+# Logique : Claim -> champ du modèle, tous chargés dans l'utilisateur reconstruit.
+USER_CLAIMS = {
+    'email': 'email',
+    'is_staff': 'is_staff',
+    'is_premium_subscriber': 'is_premium_subscriber',
+    AUTH_VERSION_CLAIM: 'auth_version',
+}
+
+# Logique : Invalidée explicitement à chaque changement ; l'expiration ne sert
+# qu'à libérer la mémoire des utilisateurs inactifs.
+AUTH_VERSION_TIMEOUT = 24 * 3600
+
+
+# ====================================================================
+# 1. VERSIONS D'AUTHENTIFICATION (cache Redis)
+# ====================================================================
+
+def _version_key(user_id):
+    return f'users:auth_version:{user_id}'
+
+
+def get_auth_version(user_id):
+    """Version d'authentification courante de l'utilisateur (None s'il n'existe plus ou est inactif)."""
+    version = cache.get(_version_key(user_id))
+    if version is not None:
+        return version if version >= 0 else None
+
+    metrics.increment('auth_version_cache_misses_total')
+    row = get_user_model().objects.filter(pk=user_id).values_list('auth_version', 'is_active').first()
+    # Logique : -1 mémorise « utilisateur absent ou inactif » (pas de requête à chaque jeton refusé).
+    version = row[0] if row and row[1] else -1
+    # Logique : add() et non set() : une lecture antérieure à un changement ne doit pas
+    # écraser la version publiée par `publish_auth_version`.
+    cache.add(_version_key(user_id), version, AUTH_VERSION_TIMEOUT)
+    return version if version >= 0 else None
+
+
+def _invalidate_auth_versions(user_ids):
+    # Logique : Avant le commit et sans repli local : une version écrite dans le repli
+    # serait oubliée au retour de Redis, qui garderait l'ancienne (jetons révoqués
+    # acceptés de nouveau). Redis indisponible -> 503 et la transaction est annulée.
+    try:
+        with without_fallback():
+            cache.delete_many([_version_key(user_id) for user_id in user_ids])
+    except CircuitOpen:
+        raise TokenStoreUnavailable()
+
+
+def _set_auth_versions(versions):
+    # Logique : Au commit, au mieux : si Redis tombe entre-temps, la clé supprimée
+    # avant le commit fait relire la base.
+    try:
+        with without_fallback():
+            cache.set_many({_version_key(user_id): version for user_id, version in versions.items()}, AUTH_VERSION_TIMEOUT)
+    except CircuitOpen:
+        logger.warning("Redis indisponible : versions d'authentification relues en base au prochain accès.")
+
+
+def publish_auth_version(user):
+    """
+    Publie la nouvelle version de `user` : retire la version en cache dans la
+    transaction de l'écriture (qui échoue si Redis est indisponible), puis
+    écrit la nouvelle au commit.
+    """
+    using = router.db_for_write(type(user), instance=user)
+    _invalidate_auth_versions([user.pk])
+    version = user.auth_version if user.is_active else -1
+    transaction.on_commit(lambda: _set_auth_versions({user.pk: version}), using=using)
+
+
+def publish_auth_versions(user_ids, using=None):
+    """
+    Republie les versions de `user_ids` relues en base au commit (écritures de
+    masse, suppressions : un compte absent est publié à -1). Comme
+    `publish_auth_version`, à appeler dans la transaction de l'écriture.
+    """
+    User = get_user_model()
+    user_ids = list(user_ids)
+    using = using or router.db_for_write(User)
+    if not user_ids:
+        return
+    _invalidate_auth_versions(user_ids)
+
+    def publish():
+        rows = User.objects.using(using).filter(pk__in=user_ids).values_list('pk', 'auth_version', 'is_active')
+        versions = {pk: version if is_active else -1 for pk, version, is_active in rows}
+        _set_auth_versions({pk: versions.get(pk, -1) for pk in user_ids})
+
+    transaction.on_commit(publish, using=using)
+
+
+# ====================================================================
+# 2. AUTHENTIFICATION DRF
+# ====================================================================
+
+def build_user_from_claims(validated_token):
+    """Utilisateur (instance du modèle, non relue en base) décrit par les claims du jeton."""
+    User = get_user_model()
+    try:
+        # Logique : simplejwt sérialise l'identifiant en chaîne ; on le retype comme le ferait la base.
+        user_id = User._meta.get_field(api_settings.USER_ID_FIELD).to_python(validated_token[api_settings.USER_ID_CLAIM])
+        values = {
+            api_settings.USER_ID_FIELD: user_id,
+            'is_active': True,
+            **{field: validated_token[claim] for claim, field in USER_CLAIMS.items()},
+        }
+    except KeyError:
+        raise InvalidToken("Le jeton ne contient pas les informations de l'utilisateur.")
+    # Logique : from_db() (valeurs dans l'ordre des champs du modèle) marque les autres
+    # champs comme différés : un accès les lit en base et save() n'écrit que les champs chargés.
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in values]
+    return User.from_db(router.db_for_read(User), names, [values[name] for name in names])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication` sans lecture de l'utilisateur : les claims du jeton
+    suffisent, la révocation est vérifiée sur la version en cache. Les jetons
+    antérieurs (sans claim de version) passent par le chemin standard.
+    """
+
+    def get_user(self, validated_token):
+        if AUTH_VERSION_CLAIM not in validated_token:
+            metrics.increment('auth_legacy_tokens_total')
+            user = super().get_user(validated_token)
+        else:
+            user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+            if user_id is None:
+                raise InvalidToken("Le jeton ne contient aucun identifiant d'utilisateur reconnaissable.")
+            if get_auth_version(user_id) != validated_token[AUTH_VERSION_CLAIM]:
+                raise AuthenticationFailed("Ce jeton a été révoqué.", code='token_revoked')
+            user = build_user_from_claims(validated_token)
+        record_activity(user.pk)
+        return user
+
+
+def get_request_user(request):
+    """Ligne complète de l'utilisateur connecté (pour les vues qui le modifient)."""
+    User = get_user_model()
+    return User.objects.using(router.db_for_write(User)).get(pk=request.user.pk)
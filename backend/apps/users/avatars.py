@@ -0,0 +1,248 @@
+# apps/users/avatars.py
+
+"""
+Traitement des avatars : validation à l'envoi, déclinaisons en tâche de fond.
+
+À l'envoi (`AvatarUploadView`), seul l'en-tête de l'image est lu
+(`Image.open` est paresseux) : format, dimensions et poids sont vérifiés
+sans décoder les pixels, puis l'original est enregistré tel quel.
+
+Après le commit, un worker (pool de threads du processus) produit pour
+chaque alias `profile_pic_*` de `THUMBNAIL_ALIASES` une version WebP et
+une version JPEG. Les JPEG sont décodés directement à taille réduite
+(`Image.draft`). Les noms de fichiers contiennent l'empreinte de
+l'original : une URL de déclinaison ne change jamais de contenu et peut
+être mise en cache un an (`immutable`). La commande
+`generate_avatar_renditions` reprend les avatars restés sans déclinaisons
+(redémarrage, anciens comptes).
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from django.views.static import serve
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from apps.common import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AVATAR_SETTINGS = {
+    'ALIAS_PREFIX': 'profile_pic_',     # alias de THUMBNAIL_ALIASES déclinés
+    'FORMATS': ('webp', 'jpeg'),
+    'ALLOWED_FORMATS': ('JPEG', 'PNG', 'WEBP', 'GIF'),
+    'MAX_UPLOAD_SIZE': 5 * 1024 * 1024,  # octets
+    'MAX_PIXELS': 40_000_000,            # largeur x hauteur
+    'QUALITY': {'webp': 80, 'jpeg': 85},
+    'WORKERS': 2,
+    'EAGER': False,                      # True : déclinaisons produites au commit, dans le thread courant
+    'CACHE_CONTROL': 'public, max-age=31536000, immutable',
+    'RENDITIONS_DIR': 'avatars/renditions',
+}
+
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+
+
+def get_avatar_setting(name):
+    return getattr(settings, 'AVATARS', {}).get(name, DEFAULT_AVATAR_SETTINGS[name])
+
+
+def get_aliases():
+    """Alias d'avatar de `THUMBNAIL_ALIASES` : {nom: options (size, crop)}."""
+    prefix = get_avatar_setting('ALIAS_PREFIX')
+    aliases = getattr(settings, 'THUMBNAIL_ALIASES', {}).get('', {})
+    return {name: options for name, options in aliases.items() if name.startswith(prefix)}
+
+
+# ====================================================================
+# 1. VALIDATION DE L'ENVOI (en-tête seulement)
+# ====================================================================
+
+def validate_avatar_header(upload):
+    """Lève `ValidationError` si le fichier n'est pas une image acceptable ; ne décode pas les pixels."""
+    if upload.size > get_avatar_setting('MAX_UPLOAD_SIZE'):
+        raise ValidationError(_("L'image ne doit pas dépasser %(size)s Mo."), params={
+            'size': get_avatar_setting('MAX_UPLOAD_SIZE') // (1024 * 1024),
+        })
+    position = upload.tell()
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError(_("Le fichier envoyé n'est pas une image valide."))
+    finally:
+        upload.seek(position)
+    if image_format not in get_avatar_setting('ALLOWED_FORMATS'):
+        raise ValidationError(_("Format d'image non pris en charge (%(format)s)."), params={'format': image_format})
+    if width * height > get_avatar_setting('MAX_PIXELS'):
+        raise ValidationError(_("L'image est trop grande (%(width)s x %(height)s)."), params={
+            'width': width, 'height': height,
+        })
+
+
+# ====================================================================
+# 2. DÉCLINAISONS
+# ====================================================================
+
+def _prepare(image, size):
+    """Décode l'image au plus près de `size`, dans le bon sens, en RGB (fond blanc sous la transparence)."""
+    # Logique : Pour un JPEG, le décodeur ne produit que l'échelle nécessaire (1/2, 1/4, 1/8).
+    image.draft('RGB', (size[0] * 2, size[1] * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def render(source, size, crop, fmt):
+    """Octets de la déclinaison `size` de l'image `source` (fichier) au format `fmt`."""
+    source.seek(0)
+    with Image.open(source) as image:
+        image = _prepare(image, size)
+        if crop:
+            image = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        else:
+            image.thumbnail(size, Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        quality = get_avatar_setting('QUALITY')[fmt]
+        if fmt == 'jpeg':
+            image.save(output, PIL_FORMATS[fmt], quality=quality, optimize=True, progressive=True)
+        else:
+            image.save(output, PIL_FORMATS[fmt], quality=quality, method=4)
+    return output.getvalue()
+
+
+def rendition_name(user_id, digest, alias, fmt):
+    return f"{get_avatar_setting('RENDITIONS_DIR')}/{user_id}/{digest[:16]}_{alias}.{fmt}"
+
+
+def generate_renditions(user_id, storage=None):
+    """
+    Produit les déclinaisons de l'avatar actuel de l'utilisateur et les
+    enregistre dans `User.avatar_renditions`. Sans effet si l'avatar a
+    changé entre-temps (le traitement du nouvel avatar s'en charge).
+    """
+    User = get_user_model()
+    storage = storage or default_storage
+    user = User.objects.filter(pk=user_id).only('avatar', 'avatar_renditions').first()
+    if user is None or not user.avatar or user.avatar_renditions.get('source') == user.avatar.name:
+        return False
+
+    source_name = user.avatar.name
+    with user.avatar.storage.open(source_name, 'rb') as stored:
+        source = io.BytesIO(stored.read())
+    digest = hashlib.sha256(source.getvalue()).hexdigest()
+
+    renditions, written = {'source': source_name}, []
+    for alias, options in get_aliases().items():
+        size, crop = tuple(options['size']), options.get('crop', False)
+        renditions[alias] = {}
+        for fmt in get_avatar_setting('FORMATS'):
+            name = storage.save(rendition_name(user_id, digest, alias, fmt), ContentFile(render(source, size, crop, fmt)))
+            renditions[alias][fmt] = name
+            written.append(name)
+
+    # Logique : Mise à jour conditionnelle : un avatar remplacé pendant le traitement n'est pas écrasé.
+    updated = User.objects.filter(pk=user_id, avatar=source_name).update(avatar_renditions=renditions)
+    if not updated:
+        _delete_files(written, storage)
+        return False
+    _delete_files(_rendition_files(user.avatar_renditions), storage)
+    metrics.increment('avatar_renditions_generated_total', len(written))
+    return True
+
+
+def _rendition_files(renditions):
+    return [name for alias, files in renditions.items() if alias != 'source' for name in files.values()]
+
+
+def _delete_files(names, storage):
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError:
+            logger.warning("Déclinaison d'avatar non supprimée : %s", name)
+
+
+def get_rendition_urls(user, storage=None):
+    """{alias: {format: URL}} des déclinaisons de l'avatar actuel, None si elles ne sont pas (encore) prêtes."""
+    renditions = user.avatar_renditions or {}
+    if not user.avatar or renditions.get('source') != user.avatar.name:
+        return None
+    storage = storage or default_storage
+    return {
+        alias: {fmt: storage.url(name) for fmt, name in files.items()}
+        for alias, files in renditions.items() if alias != 'source'
+    }
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """`django.views.static.serve` (développement) ; les déclinaisons sont servies comme immuables."""
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if path.startswith(get_avatar_setting('RENDITIONS_DIR') + '/'):
+        response['Cache-Control'] = get_avatar_setting('CACHE_CONTROL')
+    return response
+
+
+# ====================================================================
+# 3. WORKER EN TÂCHE DE FOND
+# ====================================================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_avatar_setting('WORKERS'), thread_name_prefix='avatar-renditions',
+            )
+        return _executor
+
+
+def _run(user_id):
+    try:
+        generate_renditions(user_id)
+    except Exception:
+        metrics.increment('avatar_renditions_failed_total')
+        logger.exception("Déclinaisons de l'avatar de l'utilisateur %s impossibles.", user_id)
+    finally:
+        if not get_avatar_setting('EAGER'):
+            # Logique : Le thread du pool est réutilisé : on rend sa connexion.
+            from django.db import connections
+            connections.close_all()
+
+
+def schedule_renditions(user):
+    """Demande les déclinaisons de l'avatar de `user`, au commit de son enregistrement."""
+    def submit():
+        if get_avatar_setting('EAGER'):
+            _run(user.pk)
+        else:
+            get_executor().submit(_run, user.pk)
+
+    transaction.on_commit(submit, using=router.db_for_write(type(user), instance=user))
+
+
+def get_pending_user_ids():
+    """Utilisateurs dont l'avatar n'a pas (ou plus) de déclinaisons à jour."""
+    User = get_user_model()
+    users = User.objects.exclude(avatar='').exclude(avatar__isnull=True).only('avatar', 'avatar_renditions')
+    for user in users.iterator(chunk_size=500):
+        if (user.avatar_renditions or {}).get('source') != user.avatar.name:
+            yield user.pk
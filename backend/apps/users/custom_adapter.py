@@ -5,7 +5,8 @@ from allauth.socialaccount.providers.google.views import GoogleOAuth2Adapter
 from allauth.socialaccount.providers.oauth2.client import OAuth2Client
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from rest_framework_simplejwt.tokens import RefreshToken
+
+from .tokens import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -40,7 +41,7 @@ class CustomSocialAccountAdapter(DefaultSocialAccountAdapter):
         user = super().save_user(request, sociallogin, form=form)
         
         # Génère les tokens JWT
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         
         # Stocke les tokens dans sociallogin.state
         sociallogin.state['access_token'] = str(refresh.access_token)
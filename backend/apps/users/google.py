@@ -0,0 +1,220 @@
+# apps/users/google.py
+
+"""
+Vérification locale des ID Tokens Google (connexion « Sign in with Google »).
+
+`google.oauth2.id_token.verify_oauth2_token` retélécharge les certificats de
+Google à chaque appel, sur une nouvelle connexion. Ici, le JWKS est :
+  - téléchargé via une session HTTP partagée (pool de connexions keep-alive) ;
+  - conservé en mémoire du processus le temps indiqué par `Cache-Control`
+    (`max-age` moins `Age`) ;
+  - rafraîchi en tâche de fond peu avant son expiration, sans faire attendre
+    les connexions en cours ; une clé inconnue (rotation) force un
+    rafraîchissement immédiat, au plus une fois par `MIN_REFRESH_INTERVAL` ;
+  - après un téléchargement en échec, plus retéléchargé pendant
+    `FAILURE_BACKOFF` : les clés précédentes restent utilisées et, sans clé
+    utilisable, les connexions échouent aussitôt (`GoogleCertificatesUnavailable`)
+    au lieu d'attendre chacune le timeout.
+
+La signature et les claims (audience, émetteur, expiration) sont vérifiés
+localement (PyJWT). `averify_id_token` est la variante pour les vues asynchrones.
+"""
+
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from apps.common import metrics
+from apps.common.deadlines import get_timeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GOOGLE_ID_TOKEN_SETTINGS = {
+    'CERTS_URL': 'https://www.googleapis.com/oauth2/v3/certs',
+    'ISSUERS': ('accounts.google.com', 'https://accounts.google.com'),
+    'DEFAULT_MAX_AGE': 3600,        # secondes, sans Cache-Control exploitable
+    'REFRESH_MARGIN': 300,          # secondes avant expiration : rafraîchissement en fond
+    'MIN_REFRESH_INTERVAL': 30,     # secondes entre deux téléchargements forcés (clé inconnue)
+    'FAILURE_BACKOFF': 30,          # secondes sans téléchargement après un échec
+    'TIMEOUT': 5,                   # secondes par téléchargement
+    'POOL_SIZE': 10,
+    'CLOCK_SKEW': 10,               # secondes de tolérance sur exp / iat
+}
+
+MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+
+def get_google_setting(name):
+    return getattr(settings, 'GOOGLE_ID_TOKEN', {}).get(name, DEFAULT_GOOGLE_ID_TOKEN_SETTINGS[name])
+
+
+class InvalidGoogleToken(ValueError):
+    """ID Token refusé (signature, audience, émetteur, expiration ou clé inconnue)."""
+
+
+class GoogleCertificatesUnavailable(Exception):
+    """Certificats Google impossibles à télécharger et aucune clé utilisable en mémoire."""
+
+
+def get_max_age(headers):
+    """Durée de validité (s) du document selon `Cache-Control` et `Age`."""
+    cache_control = headers.get('Cache-Control', '')
+    match = MAX_AGE_RE.search(cache_control)
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    if match is None:
+        return get_google_setting('DEFAULT_MAX_AGE')
+    try:
+        age = int(headers.get('Age', 0))
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
+
+
+# ====================================================================
+# 1. CERTIFICATS (JWKS en cache)
+# ====================================================================
+
+class GoogleCertificates:
+    """Clés publiques de Google par `kid`, partagées par tous les threads du processus."""
+
+    def __init__(self, url=None):
+        self.url = url or get_google_setting('CERTS_URL')
+        self.session = requests.Session()
+        pool_size = get_google_setting('POOL_SIZE')
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.lock = threading.Lock()
+        self.keys = {}
+        self.expires_at = 0.0
+        self.fetched_at = float('-inf')
+        self.failed_until = 0.0
+        self.refreshing = False
+
+    def fetch(self):
+        """Télécharge le JWKS et remplace les clés en mémoire."""
+        started = time.monotonic()
+        response = self.session.get(self.url, timeout=get_timeout(get_google_setting('TIMEOUT')))
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            try:
+                keys[jwk['kid']] = jwt.PyJWK(jwk).key
+            except (KeyError, jwt.PyJWKError):
+                logger.warning("Clé JWKS Google ignorée : %s", jwk.get('kid'))
+        with self.lock:
+            self.keys = keys
+            self.fetched_at = time.monotonic()
+            self.expires_at = self.fetched_at + get_max_age(response.headers)
+        metrics.increment('google_certs_fetched_total')
+        metrics.observe('google_certs_fetch_seconds', time.monotonic() - started)
+
+    def _record_failure(self):
+        with self.lock:
+            self.failed_until = time.monotonic() + get_google_setting('FAILURE_BACKOFF')
+        metrics.increment('google_certs_fetch_failures_total')
+
+    def _refresh_in_background(self):
+        try:
+            self.fetch()
+        except Exception:
+            self._record_failure()
+            logger.exception("Rafraîchissement des certificats Google impossible.")
+        finally:
+            self.refreshing = False
+
+    def get_key(self, kid):
+        now = time.monotonic()
+        with self.lock:
+            key = self.keys.get(kid)
+            expired = now >= self.expires_at
+            backing_off = now < self.failed_until
+            refresh_soon = now >= self.expires_at - get_google_setting('REFRESH_MARGIN')
+            can_force = now - self.fetched_at >= get_google_setting('MIN_REFRESH_INTERVAL')
+            start_background = key is not None and not expired and refresh_soon and not backing_off and not self.refreshing
+            if start_background:
+                self.refreshing = True
+
+        if start_background:
+            # Logique : Les clés actuelles restent valides : la requête n'attend pas le téléchargement.
+            threading.Thread(target=self._refresh_in_background, daemon=True).start()
+        elif backing_off:
+            # Logique : Échec récent : aucun téléchargement bloquant avant la fin de `FAILURE_BACKOFF`.
+            if key is None and expired:
+                raise GoogleCertificatesUnavailable("Certificats Google indisponibles.")
+        elif expired or (key is None and can_force):
+            try:
+                self.fetch()
+            except (requests.RequestException, ValueError) as exc:
+                self._record_failure()
+                # Logique : Google injoignable : on garde les clés connues plutôt que de refuser les connexions.
+                if key is None:
+                    raise GoogleCertificatesUnavailable("Certificats Google indisponibles.") from exc
+                logger.exception("Certificats Google expirés non rafraîchis, clés précédentes conservées.")
+            with self.lock:
+                key = self.keys.get(kid, key)
+        if key is None:
+            raise InvalidGoogleToken("Clé de signature Google inconnue.")
+        return key
+
+    def needs_fetch(self, kid):
+        """Vrai si `get_key(kid)` devra télécharger le JWKS (et donc bloquer)."""
+        with self.lock:
+            now = time.monotonic()
+            return now >= self.failed_until and (now >= self.expires_at or kid not in self.keys)
+
+
+_certificates = None
+_certificates_lock = threading.Lock()
+
+
+def get_certificates():
+    global _certificates
+    with _certificates_lock:
+        if _certificates is None:
+            _certificates = GoogleCertificates()
+        return _certificates
+
+
+# ====================================================================
+# 2. VÉRIFICATION
+# ====================================================================
+
+def verify_id_token(token, audience=None, certificates=None):
+    """Claims de l'ID Token `token` s'il est valide, sinon `InvalidGoogleToken`."""
+    certificates = certificates or get_certificates()
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+        claims = jwt.decode(
+            token,
+            certificates.get_key(kid),
+            algorithms=['RS256'],
+            audience=audience or settings.GOOGLE_OAUTH_CLIENT_ID,
+            issuer=get_google_setting('ISSUERS'),
+            leeway=get_google_setting('CLOCK_SKEW'),
+            options={'require': ['exp', 'iat', 'aud', 'iss', 'sub']},
+        )
+    except jwt.PyJWTError as exc:
+        metrics.increment('google_id_tokens_rejected_total')
+        raise InvalidGoogleToken(str(exc)) from exc
+    metrics.increment('google_id_tokens_verified_total')
+    return claims
+
+
+async def averify_id_token(token, audience=None, certificates=None):
+    """Variante asynchrone : la vérification (CPU) reste dans la boucle, seul un téléchargement passe en thread."""
+    certificates = certificates or get_certificates()
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+    except jwt.PyJWTError as exc:
+        raise InvalidGoogleToken(str(exc)) from exc
+    if certificates.needs_fetch(kid):
+        return await sync_to_async(verify_id_token, thread_sensitive=False)(token, audience, certificates)
+    return verify_id_token(token, audience, certificates)
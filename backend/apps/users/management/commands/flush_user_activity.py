@@ -0,0 +1,25 @@
+# apps/users/management/commands/flush_user_activity.py
+
+from django.core.management.base import BaseCommand
+
+from apps.users.activity import flush_activity, run_forever
+
+
+class Command(BaseCommand):
+    help = "Écrit en base, par lots, les horodatages last_login / last_activity mis en tampon dans Redis."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Vide le tampon puis s'arrête.")
+        parser.add_argument('--interval', type=float, default=None, help="Pause (s) entre deux vidages.")
+
+    def handle(self, *args, **options):
+        if options['once']:
+            written = flush_activity()
+            self.stdout.write(self.style.SUCCESS(f"{written} horodatage(s) écrit(s)."))
+            return
+
+        self.stdout.write("Vidage de l'activité démarré (Ctrl+C pour arrêter).")
+        try:
+            run_forever(interval=options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write("Vidage de l'activité arrêté.")
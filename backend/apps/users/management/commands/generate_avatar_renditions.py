@@ -0,0 +1,19 @@
+# apps/users/management/commands/generate_avatar_renditions.py
+
+from django.core.management.base import BaseCommand
+
+from apps.users.avatars import generate_renditions, get_pending_user_ids
+
+
+class Command(BaseCommand):
+    help = "Produit les déclinaisons WebP / JPEG des avatars qui n'en ont pas (ou plus) d'à jour."
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for user_id in get_pending_user_ids():
+            try:
+                generated += generate_renditions(user_id)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"Utilisateur {user_id} : {exc}")
+        self.stdout.write(self.style.SUCCESS(f"{generated} avatar(s) décliné(s), {failed} échec(s)."))
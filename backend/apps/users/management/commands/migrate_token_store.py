@@ -0,0 +1,29 @@
+# apps/users/management/commands/migrate_token_store.py
+
+from django.core.management.base import BaseCommand
+
+from apps.users.token_store import get_token_store, migrate_database_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Recopie les jetons encore valides des tables OutstandingToken / BlacklistedToken "
+        "dans le stockage de jetons configuré (JWT_TOKEN_STORE), par lots."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--delete', action='store_true', help="Supprime les lignes recopiées (et les expirées).")
+
+    def handle(self, *args, **options):
+        store = get_token_store()
+        if not hasattr(store, 'import_tokens'):
+            self.stderr.write(self.style.ERROR(f"{type(store).__name__} est déjà le stockage en base : rien à migrer."))
+            return
+
+        total = 0
+        for last_id, copied in migrate_database_tokens(store, options['batch_size'], delete=options['delete']):
+            total += copied
+            self.stdout.write(f"Jusqu'à l'ID {last_id} : {copied} jeton(s) recopié(s).")
+
+        self.stdout.write(self.style.SUCCESS(f"Migration terminée : {total} jeton(s) recopié(s)."))
@@ -0,0 +1,38 @@
+# apps/users/management/commands/provision_users.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.provisioning import FORMATS, detect_format, provision_users, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Crée des comptes en masse depuis un fichier CSV ou NDJSON (email, username, first_name, "
+        "last_name, password) : validation par lots, hachage parallèle, bulk_create."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier CSV (avec en-tête) ou NDJSON.")
+        parser.add_argument('--format', choices=FORMATS, default=None, help="Par défaut : d'après l'extension.")
+        parser.add_argument('--create-cv', action='store_true', help="Crée un CV vide par compte.")
+        parser.add_argument('--cv-title', default=None)
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or detect_format(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as lines:
+                report = provision_users(
+                    read_rows(lines, fmt),
+                    create_cvs=options['create_cv'],
+                    cv_title=options['cv_title'],
+                    batch_size=options['batch_size'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report['errors']:
+            self.stderr.write(f"Ligne {error['line']} : {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} compte(s) créé(s), {report['cvs']} CV(s), {len(report['errors'])} ligne(s) rejetée(s)."
+        ))
@@ -0,0 +1,36 @@
+# apps/users/management/commands/purge_inactive_users.py
+
+from django.core.management.base import BaseCommand
+
+from apps.users.purge import get_inactive_users, purge_inactive_users
+
+
+class Command(BaseCommand):
+    help = "Supprime les comptes inactifs et leurs données par petits lots (reprend après interruption)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=730, help="Inactivité minimale (jours).")
+        parser.add_argument('--chunk-size', type=int, default=50)
+        parser.add_argument('--pause', type=float, default=0.1, help="Pause entre deux lots (s).")
+        parser.add_argument('--lock-timeout', type=int, default=2000, help="lock_timeout par lot (ms).")
+        parser.add_argument('--restart', action='store_true', help="Ignore le point de reprise enregistré.")
+        parser.add_argument('--dry-run', action='store_true', help="Compte les comptes concernés sans rien supprimer.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = get_inactive_users(options['days']).count()
+            self.stdout.write(f"{count} compte(s) inactif(s) à purger.")
+            return
+
+        total = 0
+        for last_id, deleted in purge_inactive_users(
+            options['days'],
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            lock_timeout_ms=options['lock_timeout'],
+            restart=options['restart'],
+        ):
+            total += deleted
+            self.stdout.write(f"Jusqu'à l'ID {last_id} : {deleted} compte(s) supprimé(s).")
+
+        self.stdout.write(self.style.SUCCESS(f"Purge terminée : {total} compte(s) supprimé(s)."))
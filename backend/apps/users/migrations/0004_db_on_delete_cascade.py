@@ -0,0 +1,30 @@
+# Pose les règles ON DELETE côté PostgreSQL sur les clés étrangères vers users_user
+# (mêmes règles que les on_delete Python), pour les suppressions rapides de
+# apps/common/db.py (fast_delete).
+
+from django.db import migrations
+
+from apps.common.db import DatabaseOnDelete
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_registration_method'),
+        ('admin', '__latest__'),
+        ('account', '__latest__'),
+        ('authtoken', '__latest__'),
+        ('token_blacklist', '__latest__'),
+    ]
+
+    operations = [
+        DatabaseOnDelete([
+            ('users_user_groups', 'user_id', 'CASCADE'),
+            ('users_user_user_permissions', 'user_id', 'CASCADE'),
+            ('django_admin_log', 'user_id', 'CASCADE'),
+            ('account_emailaddress', 'user_id', 'CASCADE'),
+            ('authtoken_token', 'user_id', 'CASCADE'),
+            ('token_blacklist_outstandingtoken', 'user_id', 'SET NULL'),
+            ('token_blacklist_blacklistedtoken', 'token_id', 'CASCADE'),
+        ]),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='dernière activité'),
+        ),
+    ]
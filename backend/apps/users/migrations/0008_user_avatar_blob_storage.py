@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:11
+
+import apps.common.blobs
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_user_avatar_renditions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=apps.common.blobs.ContentAddressedImageField(blank=True, help_text="Image de profil de l'utilisateur, stockée sous l'empreinte de son contenu.", null=True, storage=apps.common.blobs.get_blob_storage, upload_to='avatars/', verbose_name='Avatar / Photo de profil'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Valide les clés étrangères posées NOT VALID par 0004 (voir apps/common/db.py),
+# dans une transaction distincte et sans verrou exclusif.
+
+from django.db import migrations
+
+from apps.common.db import ValidateForeignKeys
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_user_avatar_blob_storage'),
+    ]
+
+    operations = [
+        ValidateForeignKeys([
+            ('users_user_groups', 'user_id'),
+            ('users_user_user_permissions', 'user_id'),
+            ('django_admin_log', 'user_id'),
+            ('account_emailaddress', 'user_id'),
+            ('authtoken_token', 'user_id'),
+            ('token_blacklist_outstandingtoken', 'user_id'),
+            ('token_blacklist_blacklistedtoken', 'token_id'),
+        ]),
+    ]
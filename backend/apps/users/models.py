@@ -1,9 +1,13 @@
 # apps/users/models.py
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import UserManager as BaseUserManager
+from django.db import models, router, transaction
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.blobs import ContentAddressedImageField
+
 # Logique : Définir les méthodes d'inscription possibles pour garantir la cohérence des données.
 REGISTRATION_CHOICES = [
     ('email', _('Email & Password')), # Utilisateur standard (inscription classique)
@@ -11,7 +15,32 @@ REGISTRATION_CHOICES = [
 ]
 
 # =========================================================================
-# 1. Modèle Utilisateur Personnalisé (Hérite d'AbstractUser)
+# 1. QuerySet : révocation des jetons sur les écritures de masse
+# =========================================================================
+
+class UserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        # Logique : Comme `User.save()`, toucher un champ révoquant incrémente
+        # `auth_version` et republie la version des comptes modifiés.
+        if not any(name in kwargs for name in self.model.REVOKING_FIELDS):
+            return super().update(**kwargs)
+        from .authentication import publish_auth_versions
+
+        kwargs.setdefault('auth_version', F('auth_version') + 1)
+        with transaction.atomic(using=self.db):
+            user_ids = list(self.values_list('pk', flat=True))
+            rows = super(UserQuerySet, self.filter(pk__in=user_ids)).update(**kwargs)
+            publish_auth_versions(user_ids, using=self.db)
+        return rows
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
+# =========================================================================
+# 2. Modèle Utilisateur Personnalisé (Hérite d'AbstractUser)
 # =========================================================================
 
 class User(AbstractUser):
@@ -48,14 +77,20 @@ class User(AbstractUser):
     )
     
     # Nouveau champ pour l'avatar/photo de profil
-    avatar = models.ImageField(
+    # Logique : Stockée par contenu (apps/common/blobs.py) : une image identique n'est écrite
+    # qu'une fois et l'avatar remplacé est supprimé par `gc_media_blobs` quand plus rien ne le désigne.
+    avatar = ContentAddressedImageField(
         _("Avatar / Photo de profil"), 
         upload_to='avatars/', 
         null=True, 
         blank=True,
-        help_text=_("Image de profil de l'utilisateur. Stockée dans le dossier 'avatars/'.")
+        help_text=_("Image de profil de l'utilisateur, stockée sous l'empreinte de son contenu.")
     )
     
+    # Logique : Déclinaisons (WebP / JPEG par alias `profile_pic_*`) produites en tâche
+    # de fond : {'source': nom de l'original, alias: {format: nom du fichier}} (voir avatars.py).
+    avatar_renditions = models.JSONField(_("déclinaisons de l'avatar"), default=dict, blank=True, editable=False)
+
     # Champ de Monétisation
     is_premium_subscriber = models.BooleanField(
         _("abonné premium"),
@@ -63,13 +98,64 @@ class User(AbstractUser):
         help_text=_("Indique si l'utilisateur a un abonnement mensuel actif (pour l'évolution future).")
     )
     
+    # --- Activité ---
+
+    # Logique : Écrit en différé par lots, comme `last_login` (voir apps/users/activity.py).
+    last_activity = models.DateTimeField(_("dernière activité"), null=True, blank=True, editable=False)
+
+    # --- Révocation des jetons ---
+
+    # Logique : Recopiée dans les jetons JWT et comparée à chaque requête à la
+    # valeur en cache (voir apps/users/authentication.py) ; l'incrémenter
+    # révoque tous les jetons émis.
+    auth_version = models.PositiveIntegerField(_("version d'authentification"), default=0, editable=False)
+
+    # Logique : Champs dont la modification incrémente `auth_version`.
+    REVOKING_FIELDS = ('password', 'is_active', 'is_staff', 'is_superuser')
+
+    objects = UserManager()
+
     # --- Champs par défaut (hérités) ---
     # AbstractUser fournit également : password, is_staff, is_active, is_superuser, date_joined, groups, user_permissions.
 
     class Meta:
         verbose_name = _('Utilisateur')
         verbose_name_plural = _('Utilisateurs')
-        
+
     def __str__(self):
         # Logique : Retourne l'email pour une identification claire dans l'administration et les logs.
-        return self.email
\ No newline at end of file
+        return self.email
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        user._revoking_values = user._get_revoking_values()
+        return user
+
+    def _get_revoking_values(self):
+        # Logique : Seuls les champs chargés (les champs différés n'ont pas pu changer).
+        return {name: self.__dict__[name] for name in self.REVOKING_FIELDS if name in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_revoking_values', None)
+        revoked = bool(loaded) and any(self.__dict__.get(name, value) != value for name, value in loaded.items())
+        if not revoked:
+            super().save(*args, **kwargs)
+            self._revoking_values = self._get_revoking_values()
+            return
+
+        from .authentication import publish_auth_version
+
+        self.auth_version += 1
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'auth_version'}
+        # Logique : La publication retire d'abord la version en cache ; si Redis est
+        # indisponible, elle lève et l'écriture est annulée (révocation jamais perdue).
+        try:
+            with transaction.atomic(using=kwargs.get('using') or router.db_for_write(type(self), instance=self)):
+                super().save(*args, **kwargs)
+                publish_auth_version(self)
+        except BaseException:
+            self.auth_version -= 1
+            raise
+        self._revoking_values = self._get_revoking_values()
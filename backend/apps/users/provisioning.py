@@ -0,0 +1,258 @@
+# apps/users/provisioning.py
+
+"""
+Création de comptes en masse (inscription d'une promotion entière).
+
+Les lignes (CSV ou NDJSON : email, username, first_name, last_name,
+password) sont traitées par lots de `BATCH_SIZE` :
+  1. validation des champs et du mot de passe (règles AUTH_PASSWORD_VALIDATORS),
+     sans requête par ligne ;
+  2. unicité de l'email et du nom d'utilisateur vérifiée pour tout le lot en
+     deux requêtes (doublons internes au fichier compris) ;
+  3. hachage des mots de passe (PBKDF2, l'étape coûteuse) réparti sur un pool
+     de processus ;
+  4. `bulk_create` des comptes dans une transaction par lot, puis, si demandé,
+     un CV vide par compte sur son shard (événements outbox compris).
+
+Les lignes invalides sont ignorées et rapportées (numéro de ligne, erreurs) ;
+un mot de passe absent donne un compte sans mot de passe utilisable.
+"""
+
+import csv
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.password_validation import validate_password
+from django.core import exceptions as django_exceptions
+from django.db import IntegrityError, router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from apps.common import metrics
+from apps.common.constraints import ConstraintValidationMixin
+
+User = get_user_model()
+
+DEFAULT_USER_PROVISIONING_SETTINGS = {
+    'BATCH_SIZE': 1000,       # lignes par lot (validation, hachage, INSERT)
+    'HASH_WORKERS': None,     # processus de hachage (None : nombre de CPU)
+    'HASH_CHUNK_SIZE': 50,    # mots de passe envoyés à la fois à un processus
+    'MAX_ROWS': 20000,        # lignes acceptées par appel de l'API
+}
+
+FORMATS = ('csv', 'ndjson')
+
+
+def get_provisioning_setting(name):
+    return getattr(settings, 'USER_PROVISIONING', {}).get(name, DEFAULT_USER_PROVISIONING_SETTINGS[name])
+
+
+# ====================================================================
+# 1. LECTURE (CSV / NDJSON)
+# ====================================================================
+
+def detect_format(name='', content_type=''):
+    """'csv' ou 'ndjson' d'après le nom de fichier ou le type de contenu (CSV par défaut)."""
+    if name.endswith(('.ndjson', '.jsonl')) or 'ndjson' in content_type or 'jsonlines' in content_type:
+        return 'ndjson'
+    return 'csv'
+
+
+def read_rows(lines, fmt):
+    """Génère `(numéro de ligne, dict ou None si illisible)` depuis un itérable de lignes de texte."""
+    if fmt == 'csv':
+        # Logique : La ligne 1 est l'en-tête ; une cellule vide vaut un champ absent.
+        for line_number, row in enumerate(csv.DictReader(lines), start=2):
+            yield line_number, {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+# ====================================================================
+# 2. VALIDATION
+# ====================================================================
+
+class ProvisionedUserSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
+    """Une ligne d'import ; l'unicité est vérifiée pour tout le lot (voir `validate_batch`)."""
+
+    password = serializers.CharField(write_only=True, required=False, allow_blank=True, style={'input_type': 'password'})
+
+    class Meta:
+        model = User
+        fields = ('email', 'username', 'first_name', 'last_name', 'password')
+        extra_kwargs = {
+            'username': {'required': False},
+            'first_name': {'required': True},
+            'last_name': {'required': True},
+        }
+
+    def validate(self, data):
+        data['email'] = User.objects.normalize_email(data['email'])
+        data.setdefault('username', data['email'])
+        password = data.pop('password', '')
+        if password:
+            try:
+                validate_password(password, user=User(**data))
+            except django_exceptions.ValidationError as e:
+                raise serializers.ValidationError({"password": list(e.messages)})
+        data['password'] = password
+        return data
+
+
+def validate_batch(rows):
+    """Sépare le lot `[(ligne, dict)]` en `(valides, erreurs)` ; deux requêtes pour l'unicité."""
+    valid, errors = [], []
+    for line_number, row in rows:
+        if row is None:
+            errors.append({'line': line_number, 'errors': {'non_field_errors': [_("Ligne illisible.")]}})
+            continue
+        serializer = ProvisionedUserSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((line_number, serializer.validated_data))
+        else:
+            errors.append({'line': line_number, 'errors': serializer.errors})
+
+    taken = {
+        'email': set(
+            User.objects.filter(email__in=[data['email'] for _line, data in valid]).values_list('email', flat=True)
+        ),
+        'username': set(
+            User.objects.filter(username__in=[data['username'] for _line, data in valid]).values_list('username', flat=True)
+        ),
+    }
+    unique = []
+    for line_number, data in valid:
+        duplicates = {field: [_("Déjà utilisé.")] for field in taken if data[field] in taken[field]}
+        if duplicates:
+            errors.append({'line': line_number, 'errors': duplicates})
+            continue
+        for field in taken:
+            taken[field].add(data[field])  # Logique : Doublons internes au fichier.
+        unique.append((line_number, data))
+    return unique, errors
+
+
+# ====================================================================
+# 3. HACHAGE PARALLÈLE
+# ====================================================================
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+
+def get_hash_workers():
+    return get_provisioning_setting('HASH_WORKERS') or os.cpu_count() or 1
+
+
+def get_hash_pool():
+    """Pool de processus partagé (créé au premier import, réutilisé ensuite)."""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # Logique : 'spawn' et non 'fork' : on ne duplique pas un serveur multithread
+            # (connexions, verrous) ; chaque processus initialise Django une fois.
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=get_hash_workers(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _hash_pool
+
+
+def hash_passwords(passwords):
+    """Hachés de `passwords` dans l'ordre ; une chaîne vide donne un mot de passe inutilisable."""
+    chunk_size = get_provisioning_setting('HASH_CHUNK_SIZE')
+    to_hash = [password for password in passwords if password]
+    if get_hash_workers() > 1 and len(to_hash) > chunk_size:
+        hashed = iter(get_hash_pool().map(make_password, to_hash, chunksize=chunk_size))
+    else:
+        hashed = iter([make_password(password) for password in to_hash])
+    return [next(hashed) if password else make_password(None) for password in passwords]
+
+
+# ====================================================================
+# 4. CRÉATION
+# ====================================================================
+
+def create_cv_shells(owner_ids, title):
+    """Un CV vide par propriétaire, sur son shard ; retourne le nombre de CVs créés."""
+    from apps.cv_app import search
+    from apps.cv_app.models import CV, OutboxEvent
+    from apps.cv_app.outbox import build_event
+    from apps.cv_app.sharding import assign_owners
+
+    by_shard = {}
+    for owner_id, shard in assign_owners(owner_ids).items():
+        by_shard.setdefault(shard, []).append(owner_id)
+
+    created = 0
+    for shard, owners in by_shard.items():
+        with transaction.atomic(using=shard):
+            cvs = CV.objects.using(shard).bulk_create(CV(owner_id=owner_id, title=title) for owner_id in owners)
+            OutboxEvent.objects.using(shard).bulk_create(build_event(cv, 'created') for cv in cvs)
+            transaction.on_commit(
+                lambda ids=[cv.pk for cv in cvs], shard=shard: search.refresh_search_vectors(ids, shard), using=shard,
+            )
+        created += len(cvs)
+    return created
+
+
+def create_users(rows):
+    """`bulk_create` des comptes validés `[(ligne, data)]` ; retourne les utilisateurs créés."""
+    passwords = hash_passwords([data['password'] for _line, data in rows])
+    users = [User(**{**data, 'password': password}) for (_line, data), password in zip(rows, passwords)]
+    with transaction.atomic(using=router.db_for_write(User)):
+        return User.objects.bulk_create(users)
+
+
+def provision_users(rows, create_cvs=False, cv_title=None, batch_size=None):
+    """
+    Importe `rows` (itérable de `(ligne, dict)`, voir `read_rows`) par lots.
+    Retourne `{'created': n, 'cvs': n, 'errors': [{'line', 'errors'}]}`.
+    """
+    batch_size = batch_size or get_provisioning_setting('BATCH_SIZE')
+    report = {'created': 0, 'cvs': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        valid, errors = validate_batch(batch)
+        report['errors'].extend(errors)
+        batch.clear()
+        if not valid:
+            return
+        try:
+            users = create_users(valid)
+        except IntegrityError:
+            # Logique : Inscription concurrente entre la vérification et l'INSERT : le lot est à relancer.
+            report['errors'].extend(
+                {'line': line_number, 'errors': {'non_field_errors': [_("Conflit avec une inscription concurrente, à relancer.")]}}
+                for line_number, _data in valid
+            )
+            return
+        report['created'] += len(users)
+        metrics.increment('users_provisioned_total', len(users))
+        if create_cvs:
+            report['cvs'] += create_cv_shells([user.pk for user in users], cv_title or str(_("Mon CV")))
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    report['errors'].sort(key=lambda error: error['line'])
+    return report
@@ -0,0 +1,113 @@
+# apps/users/purge.py
+
+"""
+Purge des comptes inactifs, par petits lots reprenables.
+
+Chaque lot est supprimé dans sa propre transaction courte, avec un
+`lock_timeout` : un lot qui attendrait un verrou est abandonné (et
+retenté au prochain passage) plutôt que de bloquer les tables de
+production. La progression est mémorisée dans le cache, ce qui permet
+de reprendre une purge interrompue là où elle s'était arrêtée.
+"""
+
+import logging
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.common.blobs import release_references
+from apps.common.db import fast_delete
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+CHECKPOINT_CACHE_KEY = 'purge_inactive_users:last_id'
+
+
+def get_inactive_users(inactive_days, now=None):
+    """Comptes non staff sans connexion (ou jamais connectés) depuis `inactive_days` jours."""
+    cutoff = (now or timezone.now()) - timedelta(days=inactive_days)
+    return (
+        User.objects
+        .filter(is_staff=False, is_superuser=False)
+        .filter(Q(last_login__lt=cutoff) | Q(last_login__isnull=True, date_joined__lt=cutoff))
+    )
+
+
+def delete_users(user_ids):
+    """
+    Supprime les comptes et toutes leurs données en s'appuyant sur la cascade de la base.
+    Les CVs passent par `delete_cvs` pour publier leurs événements outbox ;
+    `fast_delete` n'émet aucun signal : la révocation des jetons et la libération
+    des avatars (compteurs de blobs) sont donc faites ici.
+    """
+    # Import local : cv_app dépend déjà de users.
+    from apps.cv_app.deletion import delete_cvs
+    from apps.cv_app.models import CV
+    from apps.cv_app.sharding import get_cv_shards
+
+    from .authentication import publish_auth_versions
+
+    with transaction.atomic():
+        # Logique : Les CVs peuvent vivre sur d'autres shards (sans clé étrangère
+        # vers users_user) ; ils sont supprimés avant les comptes.
+        for alias in get_cv_shards():
+            cv_ids = CV.objects.using(alias).filter(owner_id__in=user_ids).values_list('id', flat=True)
+            delete_cvs(cv_ids, using=alias)
+        publish_auth_versions(user_ids)
+        release_references(User, user_ids)
+        return fast_delete(User, user_ids)
+
+
+def _set_local_lock_timeout(lock_timeout_ms):
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT set_config(%s, %s, true)', ['lock_timeout', f'{int(lock_timeout_ms)}ms'])
+
+
+def purge_inactive_users(inactive_days, chunk_size=50, pause=0.1, lock_timeout_ms=2000, restart=False):
+    """
+    Générateur : supprime les comptes inactifs par lots de `chunk_size` (ordre des IDs)
+    et produit (dernier ID traité, nombre de comptes supprimés) après chaque lot.
+    """
+    last_id = 0 if restart else cache.get(CHECKPOINT_CACHE_KEY, 0)
+
+    while True:
+        chunk = list(
+            get_inactive_users(inactive_days)
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not chunk:
+            cache.delete(CHECKPOINT_CACHE_KEY)
+            return
+
+        deleted = 0
+        try:
+            with transaction.atomic():
+                _set_local_lock_timeout(lock_timeout_ms)
+                # Logique : Re-vérifie l'inactivité sous verrou ; un compte en
+                # cours d'utilisation (ligne verrouillée) est ignoré.
+                locked = list(
+                    get_inactive_users(inactive_days)
+                    .filter(pk__in=chunk)
+                    .select_for_update(skip_locked=True)
+                    .values_list('pk', flat=True)
+                )
+                deleted = delete_users(locked)
+        except OperationalError as exc:
+            logger.warning(f"Lot de purge {chunk[0]}-{chunk[-1]} abandonné (verrou) : {exc}")
+
+        last_id = chunk[-1]
+        cache.set(CHECKPOINT_CACHE_KEY, last_id, None)
+        yield last_id, deleted
+
+        if pause:
+            time.sleep(pause)
@@ -6,6 +6,10 @@ from django.contrib.auth.password_validation import validate_password
 from django.core import exceptions as django_exceptions
 from django.utils.translation import gettext_lazy as _
 
+from apps.common.constraints import ConstraintValidationMixin
+
+from .avatars import get_rendition_urls, validate_avatar_header
+
 User = get_user_model()
 
 # Logique : Nous avons retiré les importations inutilisées de dj_rest_auth/allauth car nous utilisons la méthode ID Token.
@@ -16,7 +20,7 @@ User = get_user_model()
 # Logique : Utilisé pour l'inscription classique (email et mot de passe).
 # =========================================================================
 
-class UserRegisterSerializer(serializers.ModelSerializer):
+class UserRegisterSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
     """Sérialiseur pour la création d'un nouvel utilisateur (inscription classique)."""
     
     # Logique : Champs en 'write_only' pour ne jamais exposer les mots de passe lors de la lecture.
@@ -94,11 +98,13 @@ class LoginSerializer(serializers.Serializer):
 # Logique : Permet de lire et mettre à jour les informations du profil.
 # =========================================================================
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ConstraintValidationMixin, serializers.ModelSerializer):
     """Sérialiseur pour la lecture et la mise à jour du profil utilisateur."""
     
     # Logique : 'source='avatar'' mappe le champ de fichier à une URL lisible, 'read_only' car il n'est pas uploadé via ce champ.
     avatar_url = serializers.ImageField(source='avatar', read_only=True)
+    # Logique : {alias: {'webp': URL, 'jpeg': URL}}, null tant que les déclinaisons ne sont pas prêtes.
+    avatar_renditions = serializers.SerializerMethodField()
     
     class Meta:
         model = User
@@ -110,11 +116,19 @@ class UserSerializer(serializers.ModelSerializer):
             'last_name', 
             'is_premium_subscriber', 
             'avatar_url', 
+            'avatar_renditions',
             'is_staff', 
             'date_joined'
         )
         # Logique : Ces champs ne peuvent pas être modifiés par l'utilisateur via cette API.
         read_only_fields = ('id', 'email', 'is_premium_subscriber', 'is_staff', 'date_joined')
+
+    def get_avatar_renditions(self, obj):
+        urls = get_rendition_urls(obj)
+        request = self.context.get('request')
+        if urls is None or request is None:
+            return urls
+        return {alias: {fmt: request.build_absolute_uri(url) for fmt, url in files.items()} for alias, files in urls.items()}
         
 # =========================================================================
 # 4. TÉLÉCHARGEMENT D'AVATAR (PATCH /users/me/avatar/)
@@ -125,7 +139,9 @@ class UserAvatarSerializer(serializers.ModelSerializer):
     """Sérialiseur pour la mise à jour du champ avatar uniquement."""
     class Meta:
         model = User
-        fields = ('avatar',) 
+        fields = ('avatar',)
+        # Logique : Format, poids et dimensions lus dans l'en-tête, sans décoder l'image.
+        extra_kwargs = {'avatar': {'validators': [validate_avatar_header]}}
 
 # Note : La classe CustomSocialLoginSerializer a été retirée car nous utilisons la méthode ID Token/Simple JWT, 
 # qui ne nécessite pas les bibliothèques dj-rest-auth ou django-allauth.
\ No newline at end of file
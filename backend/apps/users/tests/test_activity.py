@@ -0,0 +1,79 @@
+# apps/users/tests/test_activity.py
+from datetime import datetime, timezone
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from apps.users import activity
+from apps.users.tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+T1 = datetime(2026, 3, 2, 8, 0, tzinfo=timezone.utc).timestamp()
+T2 = T1 + 60
+
+
+class ActivityWriteBehindTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='activite@email.com', username='activite', password='password123')
+        self.buffer = activity.LocalActivityBuffer()
+        patcher = mock.patch.object(activity, 'get_activity_buffer', return_value=self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def last_login(self):
+        return User.objects.values_list('last_login', flat=True).get(pk=self.user.pk)
+
+    def test_login_is_buffered_then_flushed_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            ClaimsRefreshToken.for_user(self.user)
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('UPDATE')])
+        self.assertIsNone(self.last_login())
+
+        self.assertEqual(activity.flush_activity(), 1)
+        self.assertIsNotNone(self.last_login())
+
+    def test_timestamps_never_move_backwards(self):
+        activity.record_login(self.user.pk, T2)
+        activity.record_login(self.user.pk, T1)
+        activity.flush_activity()
+        self.assertEqual(self.last_login().timestamp(), T2)
+
+        # Horodatage plus ancien arrivé après un vidage
+        activity.record_login(self.user.pk, T1)
+        activity.flush_activity()
+        self.assertEqual(self.last_login().timestamp(), T2)
+
+    def test_interrupted_flush_is_resumed(self):
+        activity.record_login(self.user.pk, T1)
+        with mock.patch.object(activity, 'write_timestamps', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                activity.flush_activity()
+        activity.record_login(self.user.pk, T2)
+
+        self.assertEqual(activity.flush_activity(), 1)  # lot interrompu
+        self.assertEqual(activity.flush_activity(), 1)  # horodatage suivant
+        self.assertEqual(self.last_login().timestamp(), T2)
+
+
+class ActivityRedisFallbackTests(TestCase):
+
+    def test_redis_errors_fall_back_to_the_local_buffer(self):
+        user = User.objects.create_user(email='panne@email.com', username='panne', password='password123')
+        redis_buffer = mock.Mock()
+        redis_buffer.record.side_effect = RedisConnectionError
+        local_buffer = activity.LocalActivityBuffer()
+
+        with mock.patch.object(activity, 'get_activity_buffer', return_value=redis_buffer), \
+                mock.patch.object(activity, '_local_buffer', local_buffer), \
+                mock.patch.object(activity, '_redis_down_until', 0.0):
+            activity.record_login(user.pk, T1)
+            activity.record_login(user.pk, T2)
+
+        self.assertEqual(activity.flush_activity(buffer=local_buffer), 1)
+        self.assertEqual(User.objects.get(pk=user.pk).last_login.timestamp(), T2)
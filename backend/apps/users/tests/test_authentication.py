@@ -0,0 +1,115 @@
+# apps/users/tests/test_authentication.py
+import socket
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.common.cache import ResilientRedisCache
+from apps.cv_app.models import CV
+from apps.users import authentication
+from apps.users.purge import delete_users
+from apps.users.token_store import TokenStoreUnavailable
+from apps.users.tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+
+class ClaimsAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='claims@email.com', username='claims', password='password123', first_name='Claire', last_name='Dupont',
+        )
+        # Logique : Relu en base, comme au login (suivi des champs révoquant les jetons).
+        self.user = User.objects.get(pk=self.user.pk)
+        CV.objects.create(owner=self.user, title='Mon CV')
+        self.refresh = ClaimsRefreshToken.for_user(self.user)
+
+    def get_cvs(self, token):
+        return self.client.get('/api/v1/cvs/', HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_requests_do_not_read_the_user_table(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)  # version mise en cache
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_cvs(self.refresh.access_token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['owner_email'], 'claims@email.com')
+        self.assertFalse([query['sql'] for query in queries if 'FROM "users_user"' in query['sql']])
+
+    def test_password_change_revokes_issued_tokens(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('nouveau-mot-de-passe')
+            self.user.save()
+
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 401)
+        response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_revocation_fails_closed_while_redis_is_unavailable(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)  # version mise en cache
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        unreachable = ResilientRedisCache(f'redis://127.0.0.1:{port}/0', {
+            'ALIAS': 'versions-panne', 'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.2, 'SOCKET_TIMEOUT': 0.2},
+        })
+
+        # Panne : le changement de mot de passe est refusé, rien n'est écrit
+        with mock.patch.object(authentication, 'cache', unreachable):
+            for _ in range(4):  # au-delà du seuil d'ouverture du disjoncteur
+                self.user.set_password('nouveau-mot-de-passe')
+                with self.assertRaises(TokenStoreUnavailable):
+                    self.user.save()
+        stored = User.objects.get(pk=self.user.pk)
+        self.assertEqual(stored.auth_version, self.user.auth_version)
+        self.assertTrue(stored.check_password('password123'))
+
+        # Retour de Redis : la version en cache est toujours celle de la base
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 401)
+
+    def test_refresh_updates_claims(self):
+        User.objects.filter(pk=self.user.pk).update(is_premium_subscriber=True)
+
+        response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIs(ClaimsRefreshToken(response.data['refresh'])['is_premium_subscriber'], True)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/v1/users/me/').data['first_name'], 'Claire')
+
+    def test_deleted_user_tokens_are_revoked(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)  # version mise en cache
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 401)
+
+    def test_purged_user_tokens_are_revoked(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_users([self.user.pk])
+
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 401)
+
+    def test_bulk_deactivation_revokes_issued_tokens(self):
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.get_cvs(self.refresh.access_token).status_code, 401)
+        self.assertEqual(User.objects.get(pk=self.user.pk).auth_version, self.user.auth_version + 1)
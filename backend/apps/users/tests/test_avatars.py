@@ -0,0 +1,74 @@
+# apps/users/tests/test_avatars.py
+import io
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from apps.users import avatars
+
+User = get_user_model()
+
+
+def image_upload(name='avatar.png', size=(400, 300), fmt='PNG'):
+    output = io.BytesIO()
+    Image.new('RGBA', size, (200, 30, 30, 128)).save(output, fmt)
+    return SimpleUploadedFile(name, output.getvalue(), content_type=f'image/{fmt.lower()}')
+
+
+class AvatarRenditionTests(APITestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, AVATARS={'EAGER': True})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(email='avatar@email.com', username='avatar', password='password123')
+        self.client.force_authenticate(self.user)
+
+    def test_upload_generates_webp_and_jpeg_renditions_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch('/api/v1/users/me/avatar/', {'avatar': image_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertIsNone(response.data['avatar_renditions'])  # Logique : Produites après la réponse.
+
+        self.user.refresh_from_db()
+        urls = avatars.get_rendition_urls(self.user)
+        self.assertEqual(set(urls), {'profile_pic_small', 'profile_pic_medium'})
+        self.assertEqual(set(urls['profile_pic_small']), {'webp', 'jpeg'})
+
+        name = self.user.avatar_renditions['profile_pic_medium']['webp']
+        with Image.open(f'{self.media_root}/{name}') as rendition:
+            self.assertEqual((rendition.format, rendition.size), ('WEBP', (150, 150)))
+
+    def test_replaced_avatar_gets_new_renditions_and_old_files_are_removed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/v1/users/me/avatar/', {'avatar': image_upload()}, format='multipart')
+        self.user.refresh_from_db()
+        old_name = self.user.avatar_renditions['profile_pic_small']['jpeg']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/v1/users/me/avatar/', {'avatar': image_upload(size=(80, 60))}, format='multipart')
+        self.user.refresh_from_db()
+
+        self.assertNotEqual(self.user.avatar_renditions['profile_pic_small']['jpeg'], old_name)
+        self.assertFalse(avatars.default_storage.exists(old_name))
+        self.assertEqual(list(avatars.get_pending_user_ids()), [])
+
+    def test_invalid_or_oversized_upload_is_rejected(self):
+        response = self.client.patch(
+            '/api/v1/users/me/avatar/',
+            {'avatar': SimpleUploadedFile('avatar.png', b'pas une image', content_type='image/png')},
+            format='multipart',
+        )
+        self.assertEqual(response.status_code, 400)
+
+        with override_settings(AVATARS={'MAX_PIXELS': 100 * 100}):
+            response = self.client.patch('/api/v1/users/me/avatar/', {'avatar': image_upload()}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('avatar', response.data)
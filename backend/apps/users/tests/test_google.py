@@ -0,0 +1,126 @@
+# apps/users/tests/test_google.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from apps.users import google
+
+User = get_user_model()
+
+CLIENT_ID = 'client-test.apps.googleusercontent.com'
+
+
+class StubJWKSServer:
+    """Serveur JWKS local : une clé RSA, `Cache-Control: max-age` configurable."""
+
+    def __init__(self, max_age=3600):
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(self.private_key.public_key()))
+        self.body = json.dumps({'keys': [{**jwk, 'kid': 'cle-1', 'alg': 'RS256', 'use': 'sig'}]}).encode()
+        self.max_age = max_age
+        self.failing = False
+        self.hits = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def do_GET(self):
+                stub.hits += 1
+                if stub.failing:
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Cache-Control', f'public, max-age={stub.max_age}')
+                self.send_header('Content-Length', str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/certs'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def sign(self, email='google@email.com', **claims):
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': CLIENT_ID, 'sub': '1234',
+            'iat': now, 'exp': now + 600, 'email': email, 'given_name': 'Gaël', 'family_name': 'Test',
+            **claims,
+        }
+        return jwt.encode(payload, self.private_key, algorithm='RS256', headers={'kid': 'cle-1'})
+
+
+@override_settings(GOOGLE_OAUTH_CLIENT_ID=CLIENT_ID)
+class GoogleIDTokenTests(TestCase):
+
+    def setUp(self):
+        self.stub = StubJWKSServer()
+        self.addCleanup(self.stub.stop)
+        self.certificates = google.GoogleCertificates(self.stub.url)
+        google._certificates = self.certificates
+        self.addCleanup(setattr, google, '_certificates', None)
+
+    def test_certificates_are_fetched_once_while_fresh(self):
+        for _ in range(3):
+            self.assertEqual(google.verify_id_token(self.stub.sign())['email'], 'google@email.com')
+        self.assertEqual(self.stub.hits, 1)
+
+        with self.assertRaises(google.InvalidGoogleToken):
+            google.verify_id_token(self.stub.sign(aud='autre-client'))
+        with self.assertRaises(google.InvalidGoogleToken):
+            google.verify_id_token(self.stub.sign(exp=int(time.time()) - 3600))
+
+    def test_expired_certificates_are_fetched_again(self):
+        self.stub.max_age = 0
+        google.verify_id_token(self.stub.sign())
+        google.verify_id_token(self.stub.sign())
+        self.assertEqual(self.stub.hits, 2)
+
+    def test_failed_refresh_backs_off_and_keeps_previous_keys(self):
+        self.stub.max_age = 0
+        google.verify_id_token(self.stub.sign())
+        self.stub.failing = True
+
+        for _ in range(3):
+            self.assertEqual(google.verify_id_token(self.stub.sign())['email'], 'google@email.com')
+        self.assertEqual(self.stub.hits, 2)  # un seul essai pendant FAILURE_BACKOFF
+
+    async def test_async_view_returns_503_without_certificates(self):
+        self.stub.failing = True
+        for _ in range(2):
+            response = await self.async_client.post(
+                '/api/v1/users/google-auth/async/', {'id_token': self.stub.sign()}, content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.stub.hits, 1)
+
+    async def test_async_view_logs_the_user_in(self):
+        response = await self.async_client.post(
+            '/api/v1/users/google-auth/async/', {'id_token': self.stub.sign()}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+        user = await User.objects.aget(email='google@email.com')
+        self.assertEqual((user.registration_method, user.username), ('google', 'google@email.com'))
+        self.assertFalse(user.has_usable_password())
+
+        response = await self.async_client.post(
+            '/api/v1/users/google-auth/async/', {'id_token': 'pas-un-jeton'}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,71 @@
+# apps/users/tests/test_provisioning.py
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from apps.cv_app.models import CV, OutboxEvent
+from apps.users import provisioning
+
+User = get_user_model()
+
+
+class UserProvisioningTests(APITestCase):
+
+    def setUp(self):
+        User.objects.create_user(email='deja@email.com', username='deja', password='password123')
+        admin = User.objects.create_superuser(email='admin@email.com', username='admin', password='password123')
+        self.client.force_authenticate(admin)
+
+    def test_csv_import_reports_rejected_lines_and_creates_cv_shells(self):
+        content = (
+            "email,username,first_name,last_name,password\n"
+            "alice@ecole.fr,alice,Alice,Martin,Motdepasse-solide-1\n"
+            "deja@email.com,autre,Déjà,Inscrit,Motdepasse-solide-2\n"
+            "bob@ecole.fr,bob,Bob,Durand,123\n"
+            "alice@ecole.fr,alice2,Alice,Doublon,Motdepasse-solide-3\n"
+            "carla@ecole.fr,,Carla,Petit,\n"
+        )
+        response = self.client.post(
+            '/api/v1/users/provision/?create_cv=1',
+            {'file': SimpleUploadedFile('promo.csv', content.encode(), content_type='text/csv')},
+            format='multipart',
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data["created"], response.data["cvs"]), (2, 2), response.data)
+        self.assertEqual([error['line'] for error in response.data['errors']], [3, 4, 5])
+        self.assertEqual(list(response.data['errors'][0]['errors']), ['email'])
+
+        alice = User.objects.get(email='alice@ecole.fr')
+        self.assertTrue(alice.check_password('Motdepasse-solide-1'))
+        carla = User.objects.get(email='carla@ecole.fr')
+        self.assertEqual(carla.username, 'carla@ecole.fr')
+        self.assertFalse(carla.has_usable_password())
+        self.assertTrue(CV.objects.filter(owner=alice).exists())
+        self.assertEqual(OutboxEvent.objects.filter(event_type='cv.created').count(), 2)
+
+    @override_settings(USER_PROVISIONING={'HASH_WORKERS': 2, 'HASH_CHUNK_SIZE': 2})
+    def test_ndjson_passwords_are_hashed_in_worker_processes(self):
+        self.addCleanup(self.shutdown_pool)
+        lines = [
+            {'email': f'eleve{i}@ecole.fr', 'first_name': 'Élève', 'last_name': str(i), 'password': f'Secret-eleve-{i}'}
+            for i in range(6)
+        ]
+        body = '\n'.join(json.dumps(line) for line in lines) + '\n{pas du json\n'
+
+        response = self.client.generic(
+            'POST', '/api/v1/users/provision/', body.encode(), content_type='application/x-ndjson',
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['created'], 6)
+        self.assertEqual(response.data['errors'][0]['line'], 7)
+        self.assertTrue(User.objects.get(email='eleve5@ecole.fr').check_password('Secret-eleve-5'))
+
+    def shutdown_pool(self):
+        if provisioning._hash_pool is not None:
+            provisioning._hash_pool.shutdown()
+            provisioning._hash_pool = None
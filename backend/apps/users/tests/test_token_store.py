@@ -0,0 +1,95 @@
+# apps/users/tests/test_token_store.py
+import socket
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from apps.common.cache import ResilientRedisCache
+from apps.users import token_store
+from apps.users.token_store import CacheTokenStore, migrate_database_tokens
+from apps.users.tokens import ClaimsRefreshToken
+
+User = get_user_model()
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class CacheTokenStoreTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='jetons@email.com', username='jetons', password='password123')
+        self.refresh = ClaimsRefreshToken.for_user(self.user)
+
+    def test_refresh_and_logout_do_not_write_to_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+            self.assertEqual(response.status_code, 200, response.data)
+            rotated = response.data['refresh']
+
+            # Le jeton remplacé est révoqué
+            response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+            self.assertEqual(response.status_code, 401)
+
+            response = self.client.post('/api/v1/auth/logout/', {'refresh': rotated})
+            self.assertEqual(response.status_code, 200)
+            response = self.client.post('/auth/token/refresh/', {'refresh': rotated})
+            self.assertEqual(response.status_code, 401)
+
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith(WRITES)])
+        self.assertFalse(OutstandingToken.objects.exists())
+
+    def test_concurrent_rotations_of_one_token_yield_a_single_new_token(self):
+        # Logique : La rotation concurrente a déjà révoqué le jeton après notre vérification.
+        CacheTokenStore().blacklist_once(*self.refresh._store_args())
+        with mock.patch.object(CacheTokenStore, 'is_blacklisted', return_value=False):
+            response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_existing_rows_are_migrated(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        revoked = OutstandingToken.objects.create(user=self.user, jti='revoque', token='', expires_at=expires_at)
+        BlacklistedToken.objects.create(token=revoked)
+        OutstandingToken.objects.create(user=self.user, jti='valide', token='', expires_at=expires_at)
+        OutstandingToken.objects.create(user=self.user, jti='expire', token='', expires_at=timezone.now() - timedelta(days=1))
+
+        store = CacheTokenStore()
+        batches = list(migrate_database_tokens(store, batch_size=2, delete=True))
+
+        self.assertEqual([copied for _, copied in batches], [2, 0])
+        self.assertTrue(store.is_blacklisted('revoque'))
+        self.assertFalse(store.is_blacklisted('valide'))
+        self.assertFalse(OutstandingToken.objects.exists())
+
+
+class CacheTokenStoreOutageTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='panne@email.com', username='panne', password='password123')
+        self.refresh = ClaimsRefreshToken.for_user(self.user)
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        # Logique : Redis injoignable : le disjoncteur s'ouvre et le repli local ne connaît aucune révocation.
+        unreachable = ResilientRedisCache(f'redis://127.0.0.1:{port}/0', {
+            'ALIAS': 'jetons-panne', 'OPTIONS': {'SOCKET_CONNECT_TIMEOUT': 0.2, 'SOCKET_TIMEOUT': 0.2},
+        })
+        patcher = mock.patch.object(token_store, 'cache', unreachable)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_revocation_fails_closed_while_redis_is_unavailable(self):
+        for _ in range(4):  # au-delà du seuil d'ouverture du disjoncteur
+            response = self.client.post('/auth/token/refresh/', {'refresh': str(self.refresh)})
+            self.assertEqual(response.status_code, 503)
+
+        response = self.client.post('/api/v1/auth/logout/', {'refresh': str(self.refresh)})
+        self.assertEqual(response.status_code, 503)
@@ -0,0 +1,176 @@
+# apps/users/token_store.py
+
+"""
+Stockage des jetons de rafraîchissement émis (« outstanding ») et révoqués
+(« blacklisted ») par `apps.users.tokens.ClaimsRefreshToken`.
+
+Par défaut, les JTI sont conservés dans Redis (cache Django) avec une durée
+de vie égale à l'expiration du jeton : rien ne s'accumule, et ni le
+rafraîchissement ni la déconnexion n'écrivent en base. `DatabaseTokenStore`
+conserve le comportement de `rest_framework_simplejwt.token_blacklist`
+(tables `OutstandingToken` / `BlacklistedToken`), d'où l'on migre les lignes
+existantes avec la commande `migrate_token_store`.
+
+La liste noire est la source de vérité de la révocation : sans Redis, elle
+n'est ni lue ni écrite dans le repli local du cache (voir apps/common/cache.py)
+et la requête échoue en 503 (`TokenStoreUnavailable`) plutôt que d'accepter
+un jeton révoqué ou de perdre une déconnexion.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from apps.common import metrics
+from apps.common.cache import CircuitOpen, without_fallback
+
+DEFAULT_TOKEN_STORE = 'apps.users.token_store.CacheTokenStore'
+
+
+class TokenStoreUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "La vérification des jetons est momentanément indisponible. Réessayez dans quelques instants."
+    default_code = 'token_store_unavailable'
+
+
+def _ttl(exp):
+    # Logique : Un jeton déjà expiré est refusé par simplejwt ; une seconde suffit.
+    return max(int(exp - time.time()), 1)
+
+
+# ====================================================================
+# 1. STOCKAGES (Redis / Base de données)
+# ====================================================================
+
+class CacheTokenStore:
+    """JTI dans le cache Django (Redis en production), expirant avec le jeton."""
+
+    key_prefix = 'jwt'
+
+    def _key(self, kind, jti):
+        return f'{self.key_prefix}:{kind}:{jti}'
+
+    def outstand(self, jti, user_id, exp):
+        cache.set(self._key('outstanding', jti), user_id, _ttl(exp))
+
+    def blacklist(self, jti, user_id, exp):
+        try:
+            with without_fallback():
+                cache.set(self._key('blacklisted', jti), user_id, _ttl(exp))
+        except CircuitOpen:
+            raise TokenStoreUnavailable()
+        metrics.increment('jwt_tokens_blacklisted_total', store='cache')
+
+    def blacklist_once(self, jti, user_id, exp):
+        """Révoque le jeton ; False s'il l'était déjà (rotation concurrente du même jeton)."""
+        # Logique : add() est atomique dans Redis : une seule des rotations concurrentes l'emporte.
+        try:
+            with without_fallback():
+                added = cache.add(self._key('blacklisted', jti), user_id, _ttl(exp))
+        except CircuitOpen:
+            raise TokenStoreUnavailable()
+        if added:
+            metrics.increment('jwt_tokens_blacklisted_total', store='cache')
+        return added
+
+    def is_blacklisted(self, jti):
+        # Logique : Le repli local ignorerait les révocations : on refuse plutôt que d'accepter.
+        try:
+            with without_fallback():
+                return cache.get(self._key('blacklisted', jti)) is not None
+        except CircuitOpen:
+            raise TokenStoreUnavailable()
+
+    def import_tokens(self, tokens):
+        """Reprise d'un lot `(jti, user_id, exp, blacklisted)` (voir `migrate_token_store`)."""
+        for jti, user_id, exp, blacklisted in tokens:
+            self.outstand(jti, user_id, exp)
+            if blacklisted:
+                cache.set(self._key('blacklisted', jti), user_id, _ttl(exp))
+
+
+class DatabaseTokenStore:
+    """Tables de `rest_framework_simplejwt.token_blacklist` (comportement historique)."""
+
+    def _outstanding(self, jti, user_id, exp):
+        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+        token, _ = OutstandingToken.objects.get_or_create(
+            jti=jti,
+            defaults={
+                'user': get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first(),
+                'created_at': timezone.now(),
+                'expires_at': datetime_from_epoch(exp),
+            },
+        )
+        return token
+
+    def outstand(self, jti, user_id, exp):
+        self._outstanding(jti, user_id, exp)
+
+    def blacklist(self, jti, user_id, exp):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        BlacklistedToken.objects.get_or_create(token=self._outstanding(jti, user_id, exp))
+        metrics.increment('jwt_tokens_blacklisted_total', store='database')
+
+    def blacklist_once(self, jti, user_id, exp):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        # Logique : Unicité de BlacklistedToken.token : get_or_create ne crée qu'une fois.
+        _, created = BlacklistedToken.objects.get_or_create(token=self._outstanding(jti, user_id, exp))
+        if created:
+            metrics.increment('jwt_tokens_blacklisted_total', store='database')
+        return created
+
+    def is_blacklisted(self, jti):
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+
+def get_token_store():
+    return import_string(getattr(settings, 'JWT_TOKEN_STORE', DEFAULT_TOKEN_STORE))()
+
+
+# ====================================================================
+# 2. MIGRATION DES LIGNES EXISTANTES
+# ====================================================================
+
+def migrate_database_tokens(store, batch_size=1000, delete=False):
+    """
+    Recopie dans `store`, par lots de clés primaires croissantes, les jetons
+    encore valides des tables de simplejwt. Génère `(last_id, copied)` par lot.
+    Avec `delete`, les lignes recopiées (et les expirées) sont supprimées.
+    """
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+    last_id = 0
+    while True:
+        rows = list(
+            OutstandingToken.objects
+            .filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', 'jti', 'user_id', 'expires_at', 'blacklistedtoken__id')[:batch_size]
+        )
+        if not rows:
+            return
+        now = timezone.now()
+        store.import_tokens(
+            (jti, user_id, expires_at.timestamp(), blacklisted_id is not None)
+            for _, jti, user_id, expires_at, blacklisted_id in rows
+            if expires_at > now
+        )
+        last_id = rows[-1][0]
+        if delete:
+            # Logique : CASCADE supprime aussi les BlacklistedToken du lot.
+            OutstandingToken.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        yield last_id, sum(1 for row in rows if row[3] > now)
@@ -0,0 +1,125 @@
+# apps/users/tokens.py
+
+"""
+Jetons JWT portant les claims de l'utilisateur lus par
+`apps.users.authentication.ClaimsJWTAuthentication` (email, `is_staff`,
+`is_premium_subscriber`, version d'authentification).
+
+Les claims sont posés à l'émission (`ClaimsRefreshToken.for_user`) et
+reposés à chaque rafraîchissement depuis la base : c'est le seul moment où
+l'utilisateur est relu.
+
+Les jetons émis et révoqués sont suivis par le stockage de
+`apps.users.token_store` (Redis par défaut) plutôt que par les tables de
+`rest_framework_simplejwt.token_blacklist`.
+"""
+
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer, TokenRefreshSerializer, TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken, UntypedToken
+
+from .activity import record_login
+from .authentication import AUTH_VERSION_CLAIM, USER_CLAIMS
+from .token_store import get_token_store
+
+
+def set_user_claims(token, user):
+    for claim, field in USER_CLAIMS.items():
+        token[claim] = getattr(user, field)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Jeton de rafraîchissement dont le jeton d'accès hérite des claims de
+    l'utilisateur, suivi par le stockage de jetons configuré.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Logique : On saute BlacklistMixin.for_user, qui insère un OutstandingToken en base.
+        token = super(BlacklistMixin, cls).for_user(user)
+        set_user_claims(token, user)
+        token.outstand()
+        # Logique : Remplace UPDATE_LAST_LOGIN (écriture synchrone de users_user).
+        record_login(user.pk)
+        return token
+
+    def _store_args(self):
+        return (
+            self.payload[api_settings.JTI_CLAIM],
+            self.payload.get(api_settings.USER_ID_CLAIM),
+            self.payload['exp'],
+        )
+
+    def check_blacklist(self):
+        if get_token_store().is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        get_token_store().blacklist(*self._store_args())
+
+    def blacklist_once(self):
+        """Révoque le jeton ; False s'il l'était déjà."""
+        return get_token_store().blacklist_once(*self._store_args())
+
+    def outstand(self):
+        get_token_store().outstand(*self._store_args())
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rafraîchissement refusé si la version d'authentification du jeton n'est
+    plus celle de l'utilisateur ; les claims sont remis à jour sinon.
+    """
+
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = (
+            get_user_model().objects
+            .filter(**{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)})
+            .first()
+        )
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        # Logique : Les jetons antérieurs aux claims (sans version) sont acceptés une dernière fois.
+        if refresh.payload.get(AUTH_VERSION_CLAIM, user.auth_version) != user.auth_version:
+            raise AuthenticationFailed("Ce jeton a été révoqué.", 'token_revoked')
+
+        set_user_claims(refresh, user)
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Logique : Révocation et vérification en une opération atomique : deux rotations
+            # concurrentes du même jeton ne produisent qu'un seul nouveau jeton.
+            if api_settings.BLACKLIST_AFTER_ROTATION and not refresh.blacklist_once():
+                raise TokenError(_("Token is blacklisted"))
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+class ClaimsTokenVerifySerializer(TokenVerifySerializer):
+    """Vérification d'un jeton quelconque, la liste noire étant lue dans le stockage de jetons."""
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti and get_token_store().is_blacklisted(jti):
+            raise serializers.ValidationError(_("Token is blacklisted"))
+        return {}
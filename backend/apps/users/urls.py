@@ -24,10 +24,14 @@ urlpatterns = [
     # 3. Téléchargement et mise à jour de l'avatar
     path("me/avatar/", AvatarUploadView.as_view(), name="avatar-upload"),
     
+    # 3 bis. Création de comptes en masse (administrateurs)
+    path("provision/", views.UserProvisioningView.as_view(), name="user-provision"),
+
     # 4. Déconnexion
     path("logout/", LogoutView.as_view(), name="user-logout"),
     
     # 5. Authentification Google (NOUVELLE MÉTHODE ID TOKEN)
     # Le frontend enverra le token à cet endpoint
     path("google-auth/", views.google_auth, name="google-auth-id-token"),
+    path("google-auth/async/", views.AsyncGoogleAuthView.as_view(), name="google-auth-id-token-async"),
 ]
\ No newline at end of file
@@ -1,33 +1,62 @@
 # apps/users/views.py
 
+import io
+import itertools
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from django.contrib.auth import get_user_model
-from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.contrib.auth.hashers import make_password
+from rest_framework.parsers import BaseParser, MultiPartParser, FormParser, JSONParser
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
+from dj_rest_auth.jwt_auth import unset_jwt_cookies
+from dj_rest_auth.views import LogoutView as RestAuthLogoutView
+from rest_framework_simplejwt.exceptions import TokenError
 
-# Importations spécifiques à l'Auth Google (méthode ID Token)
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
+from apps.common.deadlines import DeadlineExceeded, latency_budget
+from apps.common.replicas import ReplicaRoutingMixin
+from apps.common.transactions import NO_TRANSACTION, TransactionPolicyMixin
 
+from .authentication import get_request_user
+from .avatars import schedule_renditions
+from .google import GoogleCertificatesUnavailable, averify_id_token, get_google_setting, verify_id_token
+from .provisioning import FORMATS, detect_format, get_provisioning_setting, provision_users, read_rows
+from .tokens import ClaimsRefreshToken
 from .serializers import (
     UserRegisterSerializer, 
     UserSerializer, 
     UserAvatarSerializer
 )
 
+logger = logging.getLogger(__name__)
+
 User = get_user_model()
 
 
+class ProvisioningFileParser(BaseParser):
+    """Corps brut CSV / NDJSON : `request.data['file']` est le flux binaire de la requête."""
+    media_type = '*/*'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return {'file': stream}
+
+
 # =========================================================================
 # 1. AUTHENTIFICATION DE BASE (Basée sur Simple JWT)
 # =========================================================================
 
-class UserRegisterView(generics.CreateAPIView):
+class UserRegisterView(TransactionPolicyMixin, ReplicaRoutingMixin, generics.CreateAPIView):
     """
     Endpoint POST /api/v1/users/register/
     Permet l'enregistrement d'un nouvel utilisateur (email/password).
@@ -35,6 +64,8 @@ class UserRegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserRegisterSerializer
     permission_classes = [permissions.AllowAny]
+    latency_budget = 5.0  # Hachage du mot de passe compris
+    throttle_scopes = {'post': 'user_registration'}
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -43,7 +74,7 @@ class UserRegisterView(generics.CreateAPIView):
         
         # Génère les tokens JWT immédiatement après l'inscription (Auto-login)
         user = serializer.instance
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         
         return Response(
             {
@@ -60,34 +91,38 @@ class UserRegisterView(generics.CreateAPIView):
 # 2. GESTION DU PROFIL (L'utilisateur connecté)
 # =========================================================================
 
-class UserDetailView(generics.RetrieveUpdateAPIView):
+class UserDetailView(TransactionPolicyMixin, ReplicaRoutingMixin, generics.RetrieveUpdateAPIView):
     """
     Endpoint GET/PUT /api/v1/users/me/
     Permet de visualiser et mettre à jour le profil de l'utilisateur connecté.
     """
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    latency_budget = 2.0
+    throttle_scopes = {'put': 'profile_update', 'patch': 'profile_update'}
 
     def get_object(self):
-        return self.request.user
+        # Logique : `request.user` ne porte que les claims du jeton (voir authentication.py).
+        return get_request_user(self.request)
 
 
 # =========================================================================
 # 3. LOGOUT (Blacklisting du Refresh Token)
 # =========================================================================
 
-class LogoutView(APIView):
+class LogoutView(TransactionPolicyMixin, APIView):
     """
     Endpoint POST /api/v1/users/logout/
     Invalide la session en blacklistant le Refresh Token.
     """
     permission_classes = [permissions.IsAuthenticated]
+    latency_budget = 2.0
 
     def post(self, request):
         try:
             refresh_token = request.data.get("refresh")
             if refresh_token:
-                token = RefreshToken(refresh_token)
+                token = ClaimsRefreshToken(refresh_token)
                 token.blacklist()
                 return Response({"message": _("Déconnexion réussie.")}, status=status.HTTP_205_RESET_CONTENT)
             else:
@@ -102,20 +137,46 @@ class LogoutView(APIView):
             )
 
 
+class TokenStoreLogoutView(RestAuthLogoutView):
+    """
+    Endpoint POST /api/v1/auth/logout/
+    Déconnexion dj-rest-auth dont la révocation passe par le stockage de jetons
+    (apps/users/token_store.py) au lieu des tables de simplejwt.
+    """
+
+    def logout(self, request):
+        response = Response({'detail': _('Successfully logged out.')}, status=status.HTTP_200_OK)
+        unset_jwt_cookies(response)
+
+        raw_token = request.data.get('refresh') or request.COOKIES.get(settings.REST_AUTH['JWT_AUTH_REFRESH_COOKIE'])
+        if not raw_token:
+            response.data = {'detail': _('Refresh token was not included in request data.')}
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            return response
+        try:
+            ClaimsRefreshToken(raw_token).blacklist()
+        except TokenError as error:
+            response.data = {'detail': str(error)}
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+        return response
+
+
 # =========================================================================
 # 4. GESTION DES FICHIERS (Avatar)
 # =========================================================================
 
-class AvatarUploadView(APIView):
+class AvatarUploadView(TransactionPolicyMixin, ReplicaRoutingMixin, APIView):
     """
     Endpoint PATCH /api/v1/users/me/avatar/
     Permet de télécharger l'avatar de l'utilisateur.
     """
     parser_classes = [MultiPartParser, FormParser]  
     permission_classes = [permissions.IsAuthenticated]
+    latency_budget = 10.0  # Upload et traitement de l'image
+    load_class = 'heavy'
 
     def patch(self, request, *args, **kwargs):
-        user = request.user
+        user = get_request_user(request)
         
         if 'avatar' not in request.FILES:
             return Response(
@@ -131,117 +192,178 @@ class AvatarUploadView(APIView):
             
         if serializer.is_valid():
             serializer.save()
-            return Response(UserSerializer(user).data) 
+            # Logique : Déclinaisons WebP / JPEG produites après le commit, hors de la requête.
+            schedule_renditions(user)
+            return Response(UserSerializer(user, context={'request': request}).data) 
             
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class UserProvisioningView(TransactionPolicyMixin, APIView):
+    """
+    Endpoint POST /api/v1/users/provision/ (administrateurs)
+    Crée des comptes en masse depuis un fichier CSV ou NDJSON (voir provisioning.py),
+    envoyé en multipart (champ `file`) ou comme corps brut (text/csv, application/x-ndjson).
+    Paramètres : `create_cv=1` (un CV vide par compte), `cv_title`.
+    """
+    parser_classes = [MultiPartParser, ProvisioningFileParser]
+    permission_classes = [permissions.IsAdminUser]
+    # Logique : Une transaction par lot (voir provisioning.py), pas une pour tout l'import.
+    transaction_policies = {'post': NO_TRANSACTION}
+    latency_budget = 300.0  # Hachage de milliers de mots de passe
+    load_class = 'heavy'  # Délesté en premier (voir apps/common/concurrency.py)
+
+    def post(self, request):
+        upload = request.FILES.get('file') if 'file' in request.FILES else request.data.get('file')
+        if upload is None:
+            return Response({"file": _("Veuillez fournir un fichier CSV ou NDJSON.")}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.query_params.get('format_type') or detect_format(
+            getattr(upload, 'name', '') or '', getattr(upload, 'content_type', '') or request.content_type
+        )
+        if fmt not in FORMATS:
+            return Response({"format_type": _("Format inconnu (csv ou ndjson).")}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            lines = io.StringIO(upload.read().decode('utf-8-sig'))
+        except UnicodeDecodeError:
+            return Response({"file": _("Le fichier doit être encodé en UTF-8.")}, status=status.HTTP_400_BAD_REQUEST)
+        rows = list(itertools.islice(read_rows(lines, fmt), get_provisioning_setting('MAX_ROWS') + 1))
+        if len(rows) > get_provisioning_setting('MAX_ROWS'):
+            return Response(
+                {"file": _("Trop de lignes : utilisez la commande provision_users pour les gros imports.")},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = provision_users(
+            rows,
+            create_cvs=request.query_params.get('create_cv') in ('1', 'true'),
+            cv_title=request.query_params.get('cv_title'),
+        )
+        return Response(report, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+
+
 # =========================================================================
 # 5. AUTHENTIFICATION GOOGLE (MÉTHODE ID TOKEN)
 # =========================================================================
 
+def login_with_google(id_info):
+    """
+    Connexion (ou inscription) de l'utilisateur décrit par un ID Token Google
+    vérifié ; retourne (corps de la réponse, statut HTTP).
+    """
+    # 1. Extraction des informations utilisateur
+    email = id_info.get('email')
+    if not email:
+        return {"error": "Email non trouvé dans le token Google", "status": False}, status.HTTP_400_BAD_REQUEST
+
+    # 2. Récupération ou création de l'utilisateur
+    # Logique : Un seul INSERT complet : un utilisateur sans username ne doit jamais
+    # être validé (la vue tourne en autocommit, hors TransactionPolicyMixin).
+    user, created = User.objects.get_or_create(email=email, defaults={
+        'username': email,  # Assurer l'unicité du champ username
+        'password': make_password(None),  # mot de passe inutilisable
+        'first_name': id_info.get('given_name', ''),
+        'last_name': id_info.get('family_name', ''),
+        'registration_method': 'google',
+        'is_active': True,
+    })
+
+    if created:
+        # CAS N°1 : NOUVEL UTILISATEUR (Inscription Google)
+        logger.info("Nouvel utilisateur Google créé (id=%s).", user.pk)
+    else:
+        # CAS N°2 : UTILISATEUR EXISTANT
+        if user.registration_method != 'google':
+            return {
+                "error": "Ce compte existe déjà avec un mot de passe. Veuillez vous connecter avec votre email.",
+                "status": False,
+            }, status.HTTP_403_FORBIDDEN
+
+        if not user.is_active:
+            user.is_active = True
+            user.save()
+
+    # 3. Génération des tokens JWT
+    refresh = ClaimsRefreshToken.for_user(user)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}, status.HTTP_200_OK
+
+
+def google_unavailable_response(response_class):
+    """503 quand les certificats Google ne peuvent pas être téléchargés (voir google.py)."""
+    response = response_class(
+        {"error": "Connexion Google momentanément indisponible. Réessayez dans quelques instants.", "status": False},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+    response['Retry-After'] = str(get_google_setting('FAILURE_BACKOFF'))
+    return response
+
+
+@latency_budget(10.0)
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
 def google_auth(request):
     """
     Endpoint POST /api/v1/users/google-auth/
     Traite le jeton d'identification (ID Token) envoyé par le frontend (Google SDK).
+    La signature est vérifiée localement sur les certificats en cache (voir google.py).
     """
-    # ✅ AJOUT : Log pour débugger
-    print("=" * 80)
-    print("📦 Données reçues dans request.data:", request.data)
-    print("=" * 80)
-    
-    # ✅ CORRECTION : Récupérer "id_token" (avec underscore)
     id_token_str = request.data.get("id_token")
-    
     if not id_token_str:
-        print("❌ Erreur: id_token manquant dans request.data")
-        return Response(
-            {"error": "ID Token non fourni", "status": False}, 
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return Response({"error": "ID Token non fourni", "status": False}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        print(f"🔵 Vérification de l'ID Token: {id_token_str[:50]}...")
-        
-        # 1. Vérification du jeton avec l'ID client
-        id_info = id_token.verify_oauth2_token(
-            id_token_str, 
-            google_requests.Request(), 
-            settings.GOOGLE_OAUTH_CLIENT_ID
-        )
-
-        print(f"✅ ID Token vérifié. Infos reçues: {id_info}")
-
-        # 2. Extraction des informations utilisateur
-        email = id_info.get('email')
-        first_name = id_info.get('given_name', '')
-        last_name = id_info.get('family_name', '')
-        
-        if not email:
-            print("❌ Erreur: Email non trouvé dans le token")
-            return Response(
-                {"error": "Email non trouvé dans le token Google", "status": False},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        print(f"📧 Email extrait: {email}")
-        
-        # 3. Récupération ou création de l'utilisateur
-        user, created = User.objects.get_or_create(email=email)
-        
-        if created:
-            print(f"✨ Nouvel utilisateur créé: {email}")
-            # CAS N°1 : NOUVEL UTILISATEUR (Inscription Google)
-            user.username = email  # Assurer l'unicité du champ username
-            user.set_unusable_password() 
-            user.first_name = first_name
-            user.last_name = last_name
-            user.registration_method = 'google'
-            user.is_active = True
-            user.save()
-        else:
-            print(f"👤 Utilisateur existant: {email}")
-            # CAS N°2 : UTILISATEUR EXISTANT
-            if user.registration_method != 'google':
-                print(f"⚠️ Conflit: Utilisateur enregistré avec mot de passe")
-                return Response({
-                    "error": "Ce compte existe déjà avec un mot de passe. Veuillez vous connecter avec votre email.",
-                    "status": False
-                }, status=status.HTTP_403_FORBIDDEN)
-            
-            if not user.is_active:
-                user.is_active = True
-                user.save()
-
-        # 4. Génération des tokens JWT
-        refresh = RefreshToken.for_user(user)
-        
-        print(f"🎟️ Tokens JWT générés pour {email}")
-        print("=" * 80)
-        
-        # ✅ CORRECTION : Retourner la structure attendue par le frontend
-        return Response(
-            {
-                "access": str(refresh.access_token),
-                "refresh": str(refresh),
-            },
-            status=status.HTTP_200_OK
-        )
-
+        id_info = verify_id_token(id_token_str)
+        body, status_code = login_with_google(id_info)
+        return Response(body, status=status_code)
+    except DeadlineExceeded:
+        # Logique : Échéance dépassée (ex: certificats Google trop lents) -> 503 via DRF.
+        raise
+    except GoogleCertificatesUnavailable:
+        return google_unavailable_response(Response)
     except ValueError as e:
         # Token invalide, expiré ou mauvais Client ID
-        print(f"❌ ValueError: {str(e)}")
         return Response(
-            {"error": f"Token Google invalide: {str(e)}", "status": False}, 
+            {"error": f"Token Google invalide: {str(e)}", "status": False},
             status=status.HTTP_400_BAD_REQUEST
         )
     except Exception as e:
-        print(f"❌ Exception: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Échec de l'authentification Google.")
         return Response(
-            {"error": f"Erreur serveur: {str(e)}", "status": False}, 
+            {"error": f"Erreur serveur: {str(e)}", "status": False},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncGoogleAuthView(View):
+    """
+    Endpoint POST /api/v1/users/google-auth/async/ (déploiement ASGI)
+    Même contrat que `google_auth` ; la vérification ne bloque aucun thread
+    tant que les certificats en cache sont valides.
+    """
+    http_method_names = ['post', 'options']
+    latency_budget = 10.0
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body) if request.content_type == 'application/json' else request.POST
+        except ValueError:
+            data = {}
+        id_token_str = data.get("id_token")
+        if not id_token_str:
+            return JsonResponse({"error": "ID Token non fourni", "status": False}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            id_info = await averify_id_token(id_token_str)
+        except DeadlineExceeded as exc:
+            return JsonResponse({'detail': exc.detail}, status=exc.status_code, encoder=JSONEncoder)
+        except GoogleCertificatesUnavailable:
+            return google_unavailable_response(JsonResponse)
+        except ValueError as e:
+            return JsonResponse(
+                {"error": f"Token Google invalide: {str(e)}", "status": False},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        body, status_code = await sync_to_async(login_with_google)(id_info)
+        return JsonResponse(body, status=status_code)
@@ -0,0 +1,11 @@
+# backend/conftest.py
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    """Chaque test part de seaux à jetons pleins (voir apps/common/throttling.py)."""
+    from apps.common.throttling import reset_rate_limits
+
+    reset_rate_limits()
@@ -0,0 +1,23 @@
+# backend/gunicorn.conf.py
+
+"""
+Configuration gunicorn (chargée automatiquement depuis backend/).
+
+    gunicorn CvDidacticiel_API.wsgi
+    gunicorn CvDidacticiel_API.asgi -k uvicorn.workers.UvicornWorker
+"""
+
+import os
+
+
+def post_worker_init(worker):
+    """
+    Ouvre les pools de connexions PostgreSQL de chaque worker dès son
+    démarrage (voir apps/common/dbpool.py) : après le fork, y compris avec
+    `--preload`, et avant la première requête.
+    """
+    if os.environ.get('DATABASE_POOL_OPEN_ON_START', 'true').lower() in ('0', 'false', 'no'):
+        return
+    from apps.common.dbpool import open_connection_pools
+
+    open_connection_pools()